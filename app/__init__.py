@@ -10,7 +10,6 @@ from dotenv import load_dotenv
 import json
 import logging
 import subprocess
-from flask_caching import Cache
 from flask import Blueprint
 from flask_mail import Mail
 from app.extensions import db, migrate, cors, jwt, swagger, init_extensions
@@ -23,11 +22,6 @@ from app.websockets import init_websocket
 env = get_env()
 print(f"----- 当前运行环境: {env} -----")
 
-# 创建缓存对象
-cache = Cache(config={
-    'CACHE_TYPE': 'simple'  # 使用简单的内存缓存
-})
-
 # 从extensions模块导入扩展
 from app.extensions import db, migrate, cors, jwt, init_extensions
 
@@ -52,6 +46,10 @@ def create_app(config_name=None):
     # 初始化所有扩展
     init_extensions(app)
     
+    # 请求级 SQL 查询计数
+    from app.utils.query_counter import init_query_counter
+    init_query_counter(app)
+    
     # 初始化 WebSocket
     init_websocket(app)
     
@@ -63,8 +61,21 @@ def create_app(config_name=None):
     app.config['JSONIFY_MIMETYPE'] = "application/json;charset=utf-8"
     app.json.ensure_ascii = False
     
-    # 初始化缓存
-    cache.init_app(app)
+    # 初始化响应缓存(Redis)
+    from app.utils.response_cache import init_response_cache
+    init_response_cache(app)
+
+    # 初始化聊天回复缓存
+    from app.services.chat.cache import init_chat_cache
+    init_chat_cache(app)
+
+    # 初始化聊天供应商网关
+    from app.services.chat.gateway import init_chat_gateway
+    init_chat_gateway(app)
+
+    # 初始化聊天供应商路由
+    from app.services.chat.router import init_chat_router
+    init_chat_router(app)
 
     # 用户身份加载器
     @jwt.user_identity_loader
@@ -210,6 +221,10 @@ def create_app(config_name=None):
         from app.routes.analysis import analysis_bp
         app.register_blueprint(analysis_bp)
         
+        # 注册响应缓存统计蓝图
+        from app.routes.cache import cache_bp
+        app.register_blueprint(cache_bp)
+        
         # 导入所有模型
         from app.models.user import User
         from app.models.debunk import DebunkArticle, RumorReport, ClarificationReport
@@ -244,6 +259,16 @@ def create_app(config_name=None):
                 "error": str(e)
             }), 500, {'Content-Type': 'application/json;charset=utf-8'}
 
+        # 分页游标无效时返回 400，而不是落入全局 500
+        from app.utils.pagination import CursorError
+
+        @app.errorhandler(CursorError)
+        def handle_cursor_error(e):
+            return jsonify({
+                "code": 400,
+                "message": str(e)
+            }), 400, {'Content-Type': 'application/json;charset=utf-8'}
+
         # 打印注册的路由
         print("已注册的路由：")
         for rule in app.url_map.iter_rules():
@@ -46,6 +46,17 @@ class Config:
         'pool_pre_ping': True  # 添加预检选项
     }
     
+    # SQL 查询计数: 在响应头 X-Query-Count 返回查询数 / 超出视图预算时抛异常
+    SQL_QUERY_COUNT_HEADER = os.environ.get('SQL_QUERY_COUNT_HEADER', 'false').lower() == 'true'
+    SQL_QUERY_BUDGET_STRICT = False
+    
+    # 公共只读接口的响应缓存(Redis)，见 app.utils.response_cache；需要可用的 Redis(REDIS_URL)，默认关闭
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'false').lower() == 'true'
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    RESPONSE_CACHE_DEFAULT_TTL = int(os.environ.get('RESPONSE_CACHE_DEFAULT_TTL', '60'))
+    RESPONSE_CACHE_LOCK_TIMEOUT = 5
+    RESPONSE_CACHE_KEY_PREFIX = os.environ.get('RESPONSE_CACHE_KEY_PREFIX', 'tg:')
+    
     SERVER_NAME = None
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=7)  # Token 有效期7天
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)  # 刷新Token 有效期30天
@@ -56,7 +67,45 @@ class Config:
     OSS_ENDPOINT = os.environ.get('OSS_ENDPOINT')
     OSS_BUCKET_NAME = os.environ.get('OSS_BUCKET_NAME')
     
-    # 默认聊天供应商
+    # 聊天供应商 HTTP 连接池，见 app.services.chat.transport
+    CHAT_HTTP_POOL_SIZE = int(os.environ.get('CHAT_HTTP_POOL_SIZE', '20'))
+    CHAT_HTTP_KEEPALIVE = int(os.environ.get('CHAT_HTTP_KEEPALIVE', '60'))  # 连接空闲超过该秒数后丢弃
+    CHAT_HTTP_CONNECT_TIMEOUT = float(os.environ.get('CHAT_HTTP_CONNECT_TIMEOUT', '5'))
+    CHAT_HTTP_READ_TIMEOUT = float(os.environ.get('CHAT_HTTP_READ_TIMEOUT', '120'))
+    
+    # 聊天回复缓存(Redis，与响应缓存共用 REDIS_URL)，见 app.services.chat.cache；需要可用的 Redis，默认关闭
+    CHAT_CACHE_ENABLED = os.environ.get('CHAT_CACHE_ENABLED', 'false').lower() == 'true'
+    CHAT_CACHE_TTL = int(os.environ.get('CHAT_CACHE_TTL', '86400'))
+    CHAT_CACHE_PROVIDER_TTL = {}  # {供应商: 缓存时间(秒)}，覆盖 CHAT_CACHE_TTL
+    CHAT_CACHE_EXCLUDED_PROVIDERS = [name.strip() for name in os.environ.get('CHAT_CACHE_EXCLUDED_PROVIDERS', '').split(',')
+                                     if name.strip()]
+    CHAT_CACHE_SEMANTIC = os.environ.get('CHAT_CACHE_SEMANTIC', 'false').lower() == 'true'
+    CHAT_CACHE_SEMANTIC_DISTANCE = int(os.environ.get('CHAT_CACHE_SEMANTIC_DISTANCE', '3'))
+    CHAT_CACHE_TOKEN_PRICE = {}  # {供应商: 每千 token 价格(元)}，用于估算缓存省下的费用
+    
+    # 聊天供应商网关: 按供应商限制并发、合并相同请求、队列满时返回 429，见 app.services.chat.gateway
+    CHAT_GATEWAY_ENABLED = os.environ.get('CHAT_GATEWAY_ENABLED', 'true').lower() == 'true'
+    CHAT_GATEWAY_MAX_CONCURRENCY = int(os.environ.get('CHAT_GATEWAY_MAX_CONCURRENCY', '8'))
+    CHAT_GATEWAY_PROVIDER_LIMITS = {}  # {供应商: 最大并发数}，覆盖 CHAT_GATEWAY_MAX_CONCURRENCY
+    CHAT_GATEWAY_MAX_QUEUE = int(os.environ.get('CHAT_GATEWAY_MAX_QUEUE', '32'))
+    CHAT_GATEWAY_QUEUE_TIMEOUT = float(os.environ.get('CHAT_GATEWAY_QUEUE_TIMEOUT', '10'))
+    CHAT_GATEWAY_COALESCE = os.environ.get('CHAT_GATEWAY_COALESCE', 'true').lower() == 'true'
+    
+    # 聊天供应商路由: provider=auto 时按耗时和错误率选择路线，失败时切换，可选对冲，见 app.services.chat.router
+    CHAT_ROUTER_ENABLED = os.environ.get('CHAT_ROUTER_ENABLED', 'true').lower() == 'true'
+    # 路线列表，格式为 供应商:模型，逗号分隔；为空时使用配置了 API 密钥的 OpenAI/DeepSeek/通义及其默认模型
+    CHAT_ROUTER_ROUTES = [route.strip() for route in os.environ.get('CHAT_ROUTER_ROUTES', '').split(',') if route.strip()]
+    CHAT_ROUTER_WINDOW = int(os.environ.get('CHAT_ROUTER_WINDOW', '100'))  # 每条路线保留的最近样本数
+    CHAT_ROUTER_WINDOW_SECONDS = int(os.environ.get('CHAT_ROUTER_WINDOW_SECONDS', '300'))
+    CHAT_ROUTER_MIN_SAMPLES = int(os.environ.get('CHAT_ROUTER_MIN_SAMPLES', '5'))
+    CHAT_ROUTER_EJECT_FAILURES = int(os.environ.get('CHAT_ROUTER_EJECT_FAILURES', '3'))  # 连续失败多少次后暂停路线
+    CHAT_ROUTER_COOLDOWN = int(os.environ.get('CHAT_ROUTER_COOLDOWN', '30'))
+    CHAT_ROUTER_HEDGE = os.environ.get('CHAT_ROUTER_HEDGE', 'false').lower() == 'true'
+    CHAT_ROUTER_HEDGE_DELAY = float(os.environ.get('CHAT_ROUTER_HEDGE_DELAY', '2'))  # 样本不足时的对冲延迟(秒)
+    CHAT_ROUTER_HEDGE_QUANTILE = float(os.environ.get('CHAT_ROUTER_HEDGE_QUANTILE', '0.95'))
+    CHAT_ROUTER_EXPLORE = float(os.environ.get('CHAT_ROUTER_EXPLORE', '0.05'))  # 随机先试其他路线的请求比例
+    
+    # 默认聊天供应商: /api/chat/completions 请求没有指定 provider 时使用，为 auto 时由供应商路由选择
     DEFAULT_CHAT_SOURCE = os.environ.get('DEFAULT_CHAT_SOURCE', 'openai')
     
     # OpenAI配置
@@ -85,11 +134,13 @@ class Config:
     COZE_APP_ID = os.environ.get('COZE_APP_ID')
     COZE_BOT_ID = os.environ.get('COZE_BOT_ID')
     COZE_USER_ID = os.environ.get('COZE_USER_ID', 'user123')
+    COZE_API_PROXY = os.environ.get('COZE_API_PROXY')
     
     # Dify配置
     DIFY_API_KEY = os.environ.get('DIFY_API_KEY')
     DIFY_API_BASE_URL = os.environ.get('DIFY_API_BASE_URL', 'http://localhost:8580/v1')
     DIFY_MODEL = os.environ.get('DIFY_MODEL', 'dify-workflow')
+    DIFY_API_PROXY = os.environ.get('DIFY_API_PROXY')
     
     # 聊天供应商配置
     CHAT_SOURCES = {
@@ -124,6 +175,7 @@ class DevelopmentConfig(Config):
     """开发环境配置"""
     DEBUG = True
     # 开发环境特定配置
+    SQL_QUERY_COUNT_HEADER = True
 
 class ProductionConfig(Config):
     """生产环境配置"""
@@ -140,6 +192,16 @@ class TestingConfig(Config):
         os.environ.get("TEST_DATABASE_URL")
         or "sqlite:///:memory:"
     )
+    # sqlite 内存库使用 StaticPool，不支持连接池大小等参数
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': True
+    }
+    SQL_QUERY_COUNT_HEADER = True
+    SQL_QUERY_BUDGET_STRICT = True
+    # 每个测试应用使用独立的 fakeredis(见 requirements-dev.txt)
+    RESPONSE_CACHE_ENABLED = True
+    CHAT_CACHE_ENABLED = True
+    RESPONSE_CACHE_REDIS_URL = 'fakeredis://'
     # 其他测试环境特定配置
 
 # 映射环境名称到配置类
@@ -0,0 +1,51 @@
+from app import db
+
+
+class ContentDailyStat(db.Model):
+    """爬虫内容按 天 × 来源 × 状态 的汇总表
+
+    由 app.services.stats_service 在 DebunkContent 写入/修改/删除时增量维护，
+    可视化接口直接读取汇总行，不再加载原始内容
+    """
+    __tablename__ = 'content_daily_stat'
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)  # DebunkContent.created_at 所在日期
+    source = db.Column(db.String(50), nullable=False)  # weibo/xinlang/...
+    status = db.Column(db.String(20), nullable=False, default='')  # pending/verified/false，空值记为 ''
+    content_count = db.Column(db.Integer, nullable=False, default=0)
+    reposts_sum = db.Column(db.Integer, nullable=False, default=0)
+    comments_sum = db.Column(db.Integer, nullable=False, default=0)
+    attitudes_sum = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'source', 'status', name='uq_content_daily_stat'),
+    )
+
+
+class ContentDailyRegion(db.Model):
+    """爬虫内容按 天 × 地区 的计数"""
+    __tablename__ = 'content_daily_region'
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    region = db.Column(db.String(100), nullable=False)
+    content_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'region', name='uq_content_daily_region'),
+    )
+
+
+class ContentDailyKeyword(db.Model):
+    """爬虫内容按 天 × 关键词 累加的 TF-IDF 权重(每条内容取前 N 个关键词)"""
+    __tablename__ = 'content_daily_keyword'
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    word = db.Column(db.String(64), nullable=False)
+    weight = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'word', name='uq_content_daily_keyword'),
+    )
@@ -0,0 +1,48 @@
+from app import db
+from datetime import datetime
+
+
+class CrawlTask(db.Model):
+    """爬虫任务
+
+    CrawlerManager 的任务队列持久化在这里，管理器重启后未完成的任务重新入队，
+    各爬虫的运行状态也从这里汇总
+    """
+    __tablename__ = 'crawl_task'
+
+    id = db.Column(db.Integer, primary_key=True)
+    spider = db.Column(db.String(32), nullable=False, comment='爬虫名称')
+    keyword = db.Column(db.String(100), comment='搜索关键词')
+    start_page = db.Column(db.Integer, nullable=False, default=1, comment='起始页')
+    end_page = db.Column(db.Integer, comment='结束页')
+    priority = db.Column(db.Integer, nullable=False, default=0, comment='优先级，越大越先执行')
+    status = db.Column(db.String(16), nullable=False, default='queued',
+                       comment='queued/running/success/failed/cancelled')
+    worker = db.Column(db.Integer, comment='执行的工作进程编号')
+    items = db.Column(db.Integer, nullable=False, default=0, comment='抓取条数')
+    error = db.Column(db.Text, comment='错误信息')
+    created_at = db.Column(db.DateTime, default=datetime.now, comment='入队时间')
+    started_at = db.Column(db.DateTime, comment='开始时间')
+    finished_at = db.Column(db.DateTime, comment='结束时间')
+
+    __table_args__ = (
+        db.Index('ix_crawl_task_status', 'status', 'priority'),
+        db.Index('ix_crawl_task_spider', 'spider', 'finished_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'spider': self.spider,
+            'keyword': self.keyword,
+            'start_page': self.start_page,
+            'end_page': self.end_page,
+            'priority': self.priority,
+            'status': self.status,
+            'worker': self.worker,
+            'items': self.items,
+            'error': self.error,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else None,
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None,
+        }
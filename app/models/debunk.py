@@ -15,9 +15,37 @@ article_clarification_association = db.Table('article_clarification_association'
     db.Column('clarification_report_id', db.Integer, db.ForeignKey('clarification_report.id'), primary_key=True)
 )
 
+# 辟谣文章和标签的关联表
+# 主键 (article_id, tag_id) 用于按文章查标签，(tag_id, article_id) 索引用于按标签筛选文章
+article_tag_association = db.Table('article_tag_association',
+    db.Column('article_id', db.Integer, db.ForeignKey('debunk_article.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True),
+    db.Index('ix_article_tag_tag_article', 'tag_id', 'article_id')
+)
+
+class Tag(db.Model):
+    """标签模型"""
+    __tablename__ = 'tag'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    article_count = db.Column(db.Integer, nullable=False, default=0)  # 关联文章数(物化计数)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'article_count': self.article_count
+        }
+
 class DebunkArticle(db.Model):
     """辟谣文章模型"""
     __tablename__ = 'debunk_article'
+    __table_args__ = (
+        # 信息流按 (created_at, id) 倒序分页
+        db.Index('ix_debunk_article_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -29,10 +57,13 @@ class DebunkArticle(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, onupdate=datetime.now)
     published_at = db.Column(db.DateTime)
-    tags = db.Column(db.String(255))  # 以逗号分隔的标签
+    tags = db.Column(db.String(255))  # 以逗号分隔的标签，写入时同步到 tag/article_tag_association
     
     # 关联
     author = db.relationship('User', backref='debunk_articles')
+    # 只读关系，关联表由 tag_service 根据 tags 字段维护
+    tag_items = db.relationship('Tag', secondary=article_tag_association, viewonly=True,
+                                backref=db.backref('articles', lazy='dynamic', viewonly=True))
     rumor_reports = db.relationship('RumorReport', secondary=article_rumor_association, 
                                   backref=db.backref('debunk_articles', lazy='dynamic'))
     clarification_reports = db.relationship('ClarificationReport', secondary=article_clarification_association, 
@@ -72,6 +103,10 @@ class ClarificationReport(db.Model):
 class WeiboDebunk(db.Model):
     """微博辟谣数据模型"""
     __tablename__ = 'weibo_debunk'
+    __table_args__ = (
+        # 信息流按 (created_at, id) 倒序分页
+        db.Index('ix_weibo_debunk_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     source = db.Column(db.String(50), default='weibo')
@@ -206,6 +241,10 @@ class XinlangDebunk(db.Model):
 class DebunkContent(db.Model):
     """辟谣内容聚合模型"""
     __tablename__ = 'debunk_content'
+    __table_args__ = (
+        # 信息流按 (created_at, id) 倒序分页
+        db.Index('ix_debunk_content_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     source = db.Column(db.String(50), nullable=False)  # xinlang/weibo
@@ -228,6 +267,8 @@ class DebunkContent(db.Model):
     search_query = db.Column(db.String(255))  # 搜索关键词
     status = db.Column(db.String(20), default='pending')  # pending, verified, false
     origin_content = db.Column(db.Text)  # 原始JSON内容
+    simhash = db.Column(db.BigInteger, index=True)  # 正文的 64 位 SimHash(有符号)
+    cluster_id = db.Column(db.Integer, index=True)  # 近似重复分组，无近似重复时为空
     
     def to_dict(self):
         """转换为字典格式"""
@@ -251,5 +292,6 @@ class DebunkContent(db.Model):
             'publish_time': self.publish_time,
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
             'search_query': self.search_query,
-            'status': self.status
+            'status': self.status,
+            'cluster_id': self.cluster_id
         } 
\ No newline at end of file
@@ -9,6 +9,12 @@ from datetime import datetime
 class Message(db.Model):
     """消息模型类"""
     __tablename__ = 'messages'
+    __table_args__ = (
+        # 消息列表/历史消息按 (send_time, id) 倒序分页
+        db.Index('ix_messages_receiver_send', 'receiver_id', 'send_time', 'id'),
+        db.Index('ix_messages_sender_send', 'sender_id', 'send_time', 'id'),
+        db.Index('ix_messages_receiver_priority_send', 'receiver_id', 'priority', 'send_time', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, nullable=False, comment='发送者ID')
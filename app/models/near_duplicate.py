@@ -0,0 +1,40 @@
+from app import db
+from datetime import datetime
+
+
+class SimHashBand(db.Model):
+    """SimHash 分段索引: 每条记录的指纹切成 4 段，每段一行
+
+    汉明距离不超过 3 的两个指纹至少有一段相同，查找近似重复时先按 (band, value)
+    精确查找候选，再用冗余保存的完整指纹计算汉明距离，无需回表
+    """
+    __tablename__ = 'simhash_band'
+
+    id = db.Column(db.Integer, primary_key=True)
+    doc_type = db.Column(db.String(32), nullable=False)  # debunk_content/rumor_data
+    doc_id = db.Column(db.Integer, nullable=False)
+    band = db.Column(db.SmallInteger, nullable=False)  # 段号 0-3
+    value = db.Column(db.Integer, nullable=False)  # 该段的 16 位值
+    simhash = db.Column(db.BigInteger, nullable=False)  # 完整指纹(有符号 64 位)
+
+    __table_args__ = (
+        db.Index('ix_simhash_band_lookup', 'band', 'value', 'doc_type', 'doc_id', 'simhash'),
+        db.Index('ix_simhash_band_doc', 'doc_type', 'doc_id'),
+    )
+
+
+class NearDuplicateCluster(db.Model):
+    """近似重复分组
+
+    辟谣内容/谣言数据的 cluster_id 指向这里，没有近似重复的记录 cluster_id 为空
+    """
+    __tablename__ = 'near_duplicate_cluster'
+
+    id = db.Column(db.Integer, primary_key=True)
+    size = db.Column(db.Integer, nullable=False, default=0)  # 成员数
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        db.Index('ix_near_duplicate_cluster_size', 'size', 'updated_at'),
+    )
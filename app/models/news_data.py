@@ -57,6 +57,8 @@ class RumorData(db.Model):
     source_type = db.Column(db.String(20), comment='数据来源类型')
     processed = db.Column(db.Boolean, default=False, comment='是否已处理')
     processed_time = db.Column(db.DateTime, comment='处理时间')
+    simhash = db.Column(db.BigInteger, index=True, comment='正文的 64 位 SimHash')
+    cluster_id = db.Column(db.Integer, index=True, comment='近似重复分组')
     
     def __repr__(self):
         return f'<RumorData {self.title}>'
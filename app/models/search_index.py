@@ -0,0 +1,39 @@
+from app import db
+from datetime import datetime
+
+
+class SearchDocument(db.Model):
+    """全文检索文档表
+
+    每条被索引的记录(辟谣文章/爬虫内容)对应一行，保存分词后的文档长度，
+    用于计算 BM25 中的文档数 N 和平均文档长度 avgdl
+    """
+    __tablename__ = 'search_document'
+
+    id = db.Column(db.Integer, primary_key=True)
+    doc_type = db.Column(db.String(32), nullable=False)  # debunk_article/debunk_content
+    doc_id = db.Column(db.Integer, nullable=False)  # 被索引记录的主键
+    length = db.Column(db.Integer, nullable=False, default=0)  # 加权后的词项总数
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        db.UniqueConstraint('doc_type', 'doc_id', name='uq_search_document_doc'),
+    )
+
+
+class SearchPosting(db.Model):
+    """倒排索引表: 词项 -> 文档的倒排记录"""
+    __tablename__ = 'search_posting'
+
+    id = db.Column(db.Integer, primary_key=True)
+    doc_type = db.Column(db.String(32), nullable=False)
+    term = db.Column(db.String(64), nullable=False)  # jieba 分词后的词项(小写)
+    doc_id = db.Column(db.Integer, nullable=False)
+    tf = db.Column(db.Float, nullable=False, default=0)  # 按字段加权后的词频
+    doc_len = db.Column(db.Integer, nullable=False, default=0)  # 冗余存储文档长度，避免检索时回表
+
+    __table_args__ = (
+        # 覆盖索引: 按词项检索时无需回表即可计算 BM25
+        db.Index('ix_search_posting_term', 'doc_type', 'term', 'doc_id', 'tf', 'doc_len'),
+        db.Index('ix_search_posting_doc', 'doc_type', 'doc_id'),
+    )
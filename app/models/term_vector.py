@@ -0,0 +1,50 @@
+from app import db
+
+
+class Term(db.Model):
+    """词表: 词项 -> 整数ID，词频向量中只保存ID"""
+    __tablename__ = 'term'
+
+    id = db.Column(db.Integer, primary_key=True)
+    term = db.Column(db.String(64), nullable=False, unique=True)
+
+
+class TermDocFreq(db.Model):
+    """各语料(doc_type)中包含某词项的文档数，用于计算 IDF，随文档写入增量维护"""
+    __tablename__ = 'term_doc_freq'
+
+    doc_type = db.Column(db.String(32), primary_key=True)
+    term_id = db.Column(db.Integer, primary_key=True)
+    df = db.Column(db.Integer, nullable=False, default=0)
+
+
+class TermCorpus(db.Model):
+    """各语料的文档总数 N"""
+    __tablename__ = 'term_corpus'
+
+    doc_type = db.Column(db.String(32), primary_key=True)
+    doc_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class TermVector(db.Model):
+    """单个文档的稀疏词频向量
+
+    term_ids / term_counts 为等长的 int32 数组(小端字节序)，读出后用
+    numpy.frombuffer 直接还原，不需要重新分词
+    """
+    __tablename__ = 'term_vector'
+
+    id = db.Column(db.Integer, primary_key=True)
+    doc_type = db.Column(db.String(32), nullable=False)  # debunk_content/news_data
+    doc_id = db.Column(db.Integer, nullable=False)
+    source = db.Column(db.String(100))  # 冗余保存来源，按来源筛选时无需回表
+    doc_time = db.Column(db.DateTime)  # 冗余保存文档时间，按时间窗口筛选
+    length = db.Column(db.Integer, nullable=False, default=0)  # 词项总数
+    term_ids = db.Column(db.LargeBinary, nullable=False)
+    term_counts = db.Column(db.LargeBinary, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('doc_type', 'doc_id', name='uq_term_vector_doc'),
+        db.Index('ix_term_vector_time', 'doc_type', 'doc_time'),
+        db.Index('ix_term_vector_source_time', 'doc_type', 'source', 'doc_time'),
+    )
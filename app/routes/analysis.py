@@ -3,138 +3,93 @@
 分析爬虫数据并生成可视化所需的数据格式
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from app.models.debunk import DebunkContent, WeiboDebunk, XinlangDebunk
 from app import db
 from sqlalchemy import func, and_
 from datetime import datetime, timedelta
-from collections import Counter
-import jieba
-import jieba.analyse
 from flask_jwt_extended import jwt_required
+from app.services import near_duplicate_service, stats_service, term_vector_service
+from app.utils.query_counter import query_budget
+from app.utils.response_cache import cached_response
 
 analysis_bp = Blueprint('analysis', __name__, url_prefix='/api/analysis')
 
 # 创建一个不带参数的jwt_required实例
 
 
-def extract_keywords(texts, top_n=100):
-    """提取文本关键词"""
-    combined_text = ' '.join(texts)
-    keywords = jieba.analyse.extract_tags(combined_text, topK=top_n, withWeight=True)
-    return [{'word': word, 'weight': int(weight * 100)} for word, weight in keywords]
+@analysis_bp.route('/visualization-data', methods=['GET'])
+@cached_response(['analysis'], params=())
+@query_budget(3)
+def get_visualization_data():
+    """生成可视化数据(读取按天预汇总的统计表，见 app.services.stats_service)"""
+    try:
+        data = stats_service.get_visualization_data(days=30)
+
+        return jsonify({
+            'code': 0,
+            'message': 'success',
+            'data': data
+        })
 
-def analyze_sentiment(status):
-    """简单的情感分析"""
-    if status == 'verified':
-        return 'positive'
-    elif status == 'false':
-        return 'negative'
-    return 'neutral'
+    except Exception as e:
+        return jsonify({
+            'code': 1,
+            'message': str(e)
+        }), 500
 
-@analysis_bp.route('/visualization-data', methods=['GET'])
+@analysis_bp.route('/keyword-cloud', methods=['GET'])
+@cached_response(['analysis'], params=('start', 'end', 'source', 'doc_type', 'top_n'))
+def get_keyword_cloud():
+    """任意时间窗口/来源的关键词云
 
-def get_visualization_data():
-    """生成可视化数据"""
+    Query参数:
+    - start: 开始日期 YYYY-MM-DD (默认30天前)
+    - end: 结束日期 YYYY-MM-DD (包含当天，默认今天)
+    - source: 来源过滤，多个用逗号分隔 (weibo/xinlang/...)
+    - doc_type: 语料类型，多个用逗号分隔 (debunk_content/news_data，默认 debunk_content)
+    - top_n: 返回的关键词数 (默认50，最多200)
+    """
     try:
-        # 获取过去30天的日期范围
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        dates = [(end_date - timedelta(days=x)).strftime('%Y-%m-%d') for x in range(30)]
+        today = datetime.now().date()
+        start = request.args.get('start')
+        end = request.args.get('end')
+        try:
+            start_day = datetime.strptime(start, '%Y-%m-%d').date() if start else today - timedelta(days=29)
+            end_day = datetime.strptime(end, '%Y-%m-%d').date() if end else today
+        except ValueError:
+            return jsonify({
+                'code': 1,
+                'message': '日期格式应为 YYYY-MM-DD'
+            }), 400
 
-        # 获取所有内容
-        contents = DebunkContent.query.filter(
-            DebunkContent.created_at >= start_date
-        ).all()
+        sources = [s.strip() for s in request.args.get('source', '').split(',') if s.strip()]
+        doc_types = [d.strip() for d in request.args.get('doc_type', 'debunk_content').split(',') if d.strip()]
+        unknown = [d for d in doc_types if d not in term_vector_service.list_doc_types()]
+        if unknown:
+            return jsonify({
+                'code': 1,
+                'message': f'不支持的语料类型: {",".join(unknown)}'
+            }), 400
+        top_n = min(max(request.args.get('top_n', 50, type=int), 1), 200)
 
-        # 文本分析
-        all_contents = [c.content for c in contents if c.content]
-        keyword_cloud = extract_keywords(all_contents)
-
-        # 话题分布（基于source统计）
-        source_counts = Counter(c.source for c in contents)
-        topic_distribution = [
-            {'topic': source, 'percentage': (count / len(contents)) * 100}
-            for source, count in source_counts.items()
-        ]
-
-        # 可信度分析
-        status_counts = Counter(c.status for c in contents)
-        credibility_scores = [
-            {'category': '可信度高', 'count': status_counts.get('verified', 0)},
-            {'category': '待核实', 'count': status_counts.get('pending', 0)},
-            {'category': '确定为谣言', 'count': status_counts.get('false', 0)}
-        ]
-
-        # 情感分析时间线数据
-        daily_sentiments = {date: {'positive': 0, 'neutral': 0, 'negative': 0} for date in dates}
-        for content in contents:
-            date = content.created_at.strftime('%Y-%m-%d')
-            if date in daily_sentiments:
-                sentiment = analyze_sentiment(content.status)
-                daily_sentiments[date][sentiment] += 1
-
-        # 平台情感分布
-        platform_sentiment = {
-            'weibo': {'positive': 0, 'neutral': 0, 'negative': 0},
-            'xinlang': {'positive': 0, 'neutral': 0, 'negative': 0}
-        }
-        for content in contents:
-            sentiment = analyze_sentiment(content.status)
-            if content.source in platform_sentiment:
-                platform_sentiment[content.source][sentiment] += 1
-
-        # 用户行为数据
-        daily_interactions = {date: {'shares': 0, 'comments': 0, 'reports': 0} for date in dates}
-        for content in contents:
-            date = content.created_at.strftime('%Y-%m-%d')
-            if date in daily_interactions:
-                daily_interactions[date]['shares'] += content.reposts_count or 0
-                daily_interactions[date]['comments'] += content.comments_count or 0
-                daily_interactions[date]['reports'] += content.attitudes_count or 0
-
-        # 地理分布
-        region_counts = Counter(c.region for c in contents if c.region)
-        top_regions = region_counts.most_common(10)
-        
-        # 构建返回数据
-        data = {
-            'text_analysis': {
-                'keyword_cloud': keyword_cloud[:50],  # 限制关键词数量
-                'topic_distribution': topic_distribution,
-                'credibility_scores': credibility_scores
-            },
-            'sentiment_analysis': {
-                'timeline': {
-                    'dates': dates,
-                    'positive': [daily_sentiments[date]['positive'] for date in dates],
-                    'neutral': [daily_sentiments[date]['neutral'] for date in dates],
-                    'negative': [daily_sentiments[date]['negative'] for date in dates]
-                },
-                'platform_sentiment': platform_sentiment
-            },
-            'user_behavior': {
-                'interaction_stats': {
-                    'dates': dates,
-                    'shares': [daily_interactions[date]['shares'] for date in dates],
-                    'comments': [daily_interactions[date]['comments'] for date in dates],
-                    'reports': [daily_interactions[date]['reports'] for date in dates]
-                }
-            },
-            'geo_distribution': {
-                'regions': [
-                    {
-                        'name': region,
-                        'value': count
-                    } for region, count in top_regions
-                ]
-            }
-        }
+        keywords, doc_count = term_vector_service.keyword_cloud(
+            doc_types,
+            start=datetime.combine(start_day, datetime.min.time()),
+            end=datetime.combine(end_day + timedelta(days=1), datetime.min.time()),
+            sources=sources,
+            top_n=top_n
+        )
 
         return jsonify({
             'code': 0,
             'message': 'success',
-            'data': data
+            'data': {
+                'keyword_cloud': keywords,
+                'doc_count': doc_count,
+                'start': start_day.strftime('%Y-%m-%d'),
+                'end': end_day.strftime('%Y-%m-%d')
+            }
         })
 
     except Exception as e:
@@ -144,7 +99,7 @@ def get_visualization_data():
         }), 500
 
 @analysis_bp.route('/stats/daily', methods=['GET'])
-
+@cached_response(['analysis'], params=())
 def get_daily_stats():
     """获取每日统计数据"""
     try:
@@ -185,7 +140,7 @@ def get_daily_stats():
         }), 500
 
 @analysis_bp.route('/stats/platform', methods=['GET'])
-
+@cached_response(['analysis'], params=())
 def get_platform_stats():
     """获取平台统计数据"""
     try:
@@ -217,4 +172,88 @@ def get_platform_stats():
         return jsonify({
             'code': 1,
             'message': str(e)
-        }), 500 
\ No newline at end of file
+        }), 500 
+
+
+@analysis_bp.route('/near-duplicates', methods=['GET'])
+def get_near_duplicate_groups():
+    """近似重复分组列表(按成员数降序)
+
+    同一条谣言在不同平台上措辞略有不同的多条记录归为一组，见 app.services.near_duplicate_service
+
+    Query参数:
+    - page: 页码 (默认1)
+    - per_page: 每页分组数 (默认20，最多100)
+    - min_size: 最少成员数 (默认2)
+    """
+    try:
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        min_size = max(request.args.get('min_size', 2, type=int), 2)
+
+        groups, total = near_duplicate_service.list_clusters(page=page, per_page=per_page, min_size=min_size)
+
+        return jsonify({
+            'code': 0,
+            'message': 'success',
+            'data': {
+                'items': groups,
+                'total': total,
+                'page': page,
+                'per_page': per_page
+            }
+        })
+
+    except Exception as e:
+        return jsonify({
+            'code': 1,
+            'message': str(e)
+        }), 500
+
+
+@analysis_bp.route('/near-duplicates/<doc_type>/<int:doc_id>', methods=['GET'])
+def get_near_duplicates(doc_type, doc_id):
+    """查找一条记录的近似重复
+
+    路径参数:
+    - doc_type: debunk_content/rumor_data
+    - doc_id: 记录ID
+
+    Query参数:
+    - max_distance: 最大汉明距离 (默认3，最多3)
+    """
+    try:
+        if doc_type not in near_duplicate_service.list_doc_types():
+            return jsonify({
+                'code': 1,
+                'message': f'不支持的类型: {doc_type}'
+            }), 400
+        max_distance = min(max(request.args.get('max_distance', near_duplicate_service.MAX_DISTANCE, type=int), 0),
+                           near_duplicate_service.MAX_DISTANCE)
+
+        duplicates = near_duplicate_service.find_near_duplicates(doc_type, doc_id, max_distance)
+        if duplicates is None:
+            return jsonify({
+                'code': 1,
+                'message': '记录不存在'
+            }), 404
+
+        model = near_duplicate_service.get_source(doc_type).model
+        cluster_id = db.session.query(model.cluster_id).filter(model.id == doc_id).scalar()
+
+        return jsonify({
+            'code': 0,
+            'message': 'success',
+            'data': {
+                'doc_type': doc_type,
+                'id': doc_id,
+                'cluster_id': cluster_id,
+                'duplicates': duplicates
+            }
+        })
+
+    except Exception as e:
+        return jsonify({
+            'code': 1,
+            'message': str(e)
+        }), 500
@@ -0,0 +1,103 @@
+"""响应缓存路由模块
+
+查看和重置公共只读接口响应缓存、聊天回复缓存的命中统计
+"""
+
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from app.services.chat.cache import get_chat_cache
+from app.utils.response_cache import get_response_cache
+
+cache_bp = Blueprint('cache', __name__, url_prefix='/api/cache')
+
+
+@cache_bp.route('/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """获取各端点的缓存命中/未命中次数和命中率"""
+    cache = get_response_cache()
+    if cache is None:
+        return jsonify({
+            'code': 1,
+            'message': '响应缓存未启用'
+        }), 404
+    try:
+        return jsonify({
+            'code': 0,
+            'message': 'success',
+            'data': cache.get_stats()
+        })
+    except Exception as e:
+        return jsonify({
+            'code': 1,
+            'message': str(e)
+        }), 500
+
+
+@cache_bp.route('/stats', methods=['DELETE'])
+@jwt_required()
+def reset_cache_stats():
+    """清零命中统计"""
+    cache = get_response_cache()
+    if cache is None:
+        return jsonify({
+            'code': 1,
+            'message': '响应缓存未启用'
+        }), 404
+    try:
+        cache.reset_stats()
+        return jsonify({
+            'code': 0,
+            'message': 'success'
+        })
+    except Exception as e:
+        return jsonify({
+            'code': 1,
+            'message': str(e)
+        }), 500
+
+
+@cache_bp.route('/chat/stats', methods=['GET'])
+@jwt_required()
+def get_chat_cache_stats():
+    """获取各聊天供应商的回复缓存命中率，以及省下的上游调用、耗时、token 数和估算费用"""
+    cache = get_chat_cache()
+    if cache is None:
+        return jsonify({
+            'code': 1,
+            'message': '聊天回复缓存未启用'
+        }), 404
+    try:
+        return jsonify({
+            'code': 0,
+            'message': 'success',
+            'data': cache.get_stats()
+        })
+    except Exception as e:
+        return jsonify({
+            'code': 1,
+            'message': str(e)
+        }), 500
+
+
+@cache_bp.route('/chat/stats', methods=['DELETE'])
+@jwt_required()
+def reset_chat_cache_stats():
+    """清零聊天回复缓存的命中统计"""
+    cache = get_chat_cache()
+    if cache is None:
+        return jsonify({
+            'code': 1,
+            'message': '聊天回复缓存未启用'
+        }), 404
+    try:
+        cache.reset_stats()
+        return jsonify({
+            'code': 0,
+            'message': 'success'
+        })
+    except Exception as e:
+        return jsonify({
+            'code': 1,
+            'message': str(e)
+        }), 500
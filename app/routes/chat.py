@@ -1,12 +1,17 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
 import requests
 import os
 import json
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.utils.decorators import admin_required
 import time
 import uuid
 import logging
 from app.services.chat.factory import ChatServiceFactory
+from app.services.chat.cache import get_chat_cache, request_digest
+from app.services.chat.gateway import GatewayRejected, get_chat_gateway
+from app.services.chat.router import get_chat_router
+from app.services.chat.streaming import ChatStreamError, DONE_EVENT, format_event, result_chunks
 
 chat_bp = Blueprint('chat', __name__, url_prefix='/api/chat')
 logger = logging.getLogger('app.chat')
@@ -76,37 +81,101 @@ def chat_completions():
                 }
             }), 400
             
-        # 获取提供商
-        provider = data.pop('provider', 'openai')
+        # 获取提供商，auto 表示由供应商路由选择
+        provider = data.pop('provider', current_app.config.get('DEFAULT_CHAT_SOURCE', 'openai'))
         
-        # 获取聊天服务
-        service = ChatServiceFactory.get_service(provider)
-        if not service:
-            return jsonify({
-                "error": {
-                    "message": f"不支持的服务提供商: {provider}",
-                    "type": "invalid_request_error",
-                    "code": "unsupported_provider"
-                }
-            }), 400
-            
         # 从data中提取messages和model
         messages = data.pop('messages')
         model = data.pop('model', None)
+        
+        router = get_chat_router()
+        if provider == 'auto':
+            routes = router.candidates(model) if router is not None else []
+            if not routes:
+                return jsonify({
+                    "error": {
+                        "message": "自动路由未启用或没有可用的供应商",
+                        "type": "invalid_request_error",
+                        "code": "no_available_route"
+                    }
+                }), 400
+        else:
+            # 获取聊天服务
+            if not ChatServiceFactory.get_service(provider):
+                return jsonify({
+                    "error": {
+                        "message": f"不支持的服务提供商: {provider}",
+                        "type": "invalid_request_error",
+                        "code": "unsupported_provider"
+                    }
+                }), 400
+            routes = [(provider, model)]
+        
+        stream = data.pop('stream', False)
+        
+        # 回复缓存: 相同(或措辞相近)的提问直接返回缓存的回复，请求带 cache=false 时跳过
+        cache = get_chat_cache() if data.pop('cache', True) is not False else None
+        lookup = cache.prepare(provider, model, messages, data) if cache is not None else None
+        cached = cache.get(lookup) if lookup is not None else None
+        
+        gateway = get_chat_gateway()
+        
+        # 流式模式: 以 text/event-stream 逐块转发供应商的输出
+        if stream:
+            def open_stream(name, route_model):
+                service = ChatServiceFactory.get_service(name)
+                
+                def open_provider():
+                    return service.chat_completion_stream(messages=messages, model=route_model, **data)
+                
+                # 流式请求不合并，但同样受供应商并发限制，名额在流结束或客户端断开时释放
+                return gateway.stream(name, open_provider) if gateway is not None else open_provider()
+            
+            if router is not None:
+                return stream_chat_completion(lambda: router.stream(routes, open_stream), model, cache, lookup, cached)
+            return stream_chat_completion(lambda: open_stream(provider, model), model, cache, lookup, cached)
+        
+        if cached is not None:
+            return jsonify(cached)
             
         # 调用聊天服务
-        result = service.chat_completion(
-            messages=messages,
-            model=model,
-            **data  # 其他参数
-        )
+        def call(name, route_model):
+            service = ChatServiceFactory.get_service(name)
+            
+            def call_provider():
+                return service.chat_completion(
+                    messages=messages,
+                    model=route_model,
+                    **data  # 其他参数
+                )
+            
+            # 经过网关: 按供应商限制并发，正在进行的相同请求只调用一次上游(有会话状态的请求不合并)
+            if gateway is None:
+                return call_provider()
+            key = None if data.get('conversation_id') else request_digest(name, route_model, messages, data)
+            return gateway.complete(name, key, call_provider)
+        
+        # 经过路由: 记录各供应商的耗时和错误率，自动路由时失败切换到其他供应商
+        result = router.complete(routes, call) if router is not None else call(provider, model)
         
         # 检查错误
         if 'error' in result:
             return jsonify(result['error']), result.get('status_code', 500)
+        
+        # 路由信息(本次实际使用和尝试过的路线)只属于这次请求，不写入缓存
+        routing = result.pop('routing', None)
+        
+        # 合并的请求共用第一个请求的结果，由第一个请求写入缓存
+        if lookup is not None and not result.get('coalesced'):
+            cache.put(lookup, result)
+        
+        if routing is not None:
+            result['routing'] = routing
             
         return jsonify(result)
         
+    except GatewayRejected as e:
+        return gateway_rejected(e)
     except Exception as e:
         logger.error(f"聊天API错误: {str(e)}")
         return jsonify({
@@ -117,6 +186,70 @@ def chat_completions():
             }
         }), 500
 
+def gateway_rejected(e):
+    """网关拒绝请求时返回 429 和 Retry-After"""
+    response = jsonify({
+        "error": {
+            "message": str(e),
+            "type": "rate_limit_error",
+            "code": e.reason
+        }
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def stream_chat_completion(open_stream, model, cache=None, lookup=None, cached=None):
+    """流式聊天完成
+
+    先取到第一个数据块再返回响应: 上游在此之前失败时仍能返回 JSON 错误和对应的状态码。
+    客户端断开时 WSGI 服务器关闭响应迭代器，进而关闭服务的生成器和上游连接，取消上游请求。
+    缓存命中时把缓存的回复作为数据块返回；未命中时完整输出后写入缓存
+
+    Args:
+        open_stream: 返回供应商数据块生成器的函数，缓存未命中时才调用
+    """
+    try:
+        if cached is not None:
+            chunks = result_chunks(cached, model)
+        else:
+            chunks = open_stream()
+            if lookup is not None:
+                chunks = cache.record_stream(lookup, chunks, model)
+        first = next(chunks, None)
+    except ChatStreamError as e:
+        logger.error(f"流式聊天请求失败: {str(e)}")
+        return jsonify(e.error), e.status_code
+    except GatewayRejected as e:
+        return gateway_rejected(e)
+
+    def generate():
+        completed = False
+        try:
+            if first is not None:
+                yield format_event(first)
+            for chunk in chunks:
+                yield format_event(chunk)
+            completed = True
+        except ChatStreamError as e:
+            logger.error(f"流式聊天中断: {str(e)}")
+            yield format_event({'error': e.error})
+            completed = True
+        except Exception as e:
+            logger.error(f"流式聊天中断: {str(e)}")
+            yield format_event({'error': {'message': str(e), 'type': 'server_error', 'code': 'stream_error'}})
+            completed = True
+        finally:
+            if not completed:
+                logger.info("客户端已断开，取消上游请求")
+            chunks.close()
+        yield DONE_EVENT
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # 关闭 Nginx 缓冲，数据块到达后立即转发
+    })
+
 @chat_bp.route('/providers', methods=['GET'])
 def list_providers():
     """获取支持的服务提供商列表"""
@@ -166,4 +299,58 @@ def list_models():
                 "type": "server_error",
                 "code": "internal_server_error"
             }
-        }), 500 
\ No newline at end of file
+        }), 500 
+
+@chat_bp.route('/gateway/stats', methods=['GET'])
+@jwt_required()
+def get_gateway_stats():
+    """获取聊天网关各供应商的并发、排队、合并和拒绝统计"""
+    gateway = get_chat_gateway()
+    if gateway is None:
+        return jsonify({
+            "error": {
+                "message": "聊天网关未启用",
+                "type": "invalid_request_error",
+                "code": "gateway_disabled"
+            }
+        }), 404
+    return jsonify({
+        "success": True,
+        "stats": gateway.get_stats()
+    })
+
+@chat_bp.route('/routing', methods=['GET'])
+@admin_required
+def get_routing_state():
+    """获取供应商路由状态: 各路线的排序、耗时 p50/p95、错误率、暂停剩余时间和切换/对冲计数"""
+    router = get_chat_router()
+    if router is None:
+        return jsonify({
+            "error": {
+                "message": "供应商路由未启用",
+                "type": "invalid_request_error",
+                "code": "router_disabled"
+            }
+        }), 404
+    return jsonify({
+        "success": True,
+        "routing": router.get_stats()
+    })
+
+@chat_bp.route('/routing', methods=['DELETE'])
+@admin_required
+def reset_routing_state():
+    """清空供应商路由统计并恢复所有暂停的路线"""
+    router = get_chat_router()
+    if router is None:
+        return jsonify({
+            "error": {
+                "message": "供应商路由未启用",
+                "type": "invalid_request_error",
+                "code": "router_disabled"
+            }
+        }), 404
+    router.reset()
+    return jsonify({
+        "success": True
+    })
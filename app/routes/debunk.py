@@ -7,6 +7,10 @@ from datetime import datetime
 import json
 from urllib.parse import unquote
 from app.models.user import User
+from app.services import article_query, search_service, tag_service
+from app.utils.pagination import parse_feed_args, paginate_feed
+from app.utils.query_counter import query_budget
+from app.utils.response_cache import cached_response
 
 # API 蓝图
 debunk_bp = Blueprint('debunk', __name__, url_prefix='/api/debunk')
@@ -112,19 +116,13 @@ def create_article():
         db.session.add(article)
         db.session.flush()  # 获取文章ID
         
-        # 关联谣言报道
+        # 关联谣言报道(一次 IN 查询批量获取)
         if 'rumor_reports' in data and isinstance(data['rumor_reports'], list):
-            for report_id in data['rumor_reports']:
-                report = RumorReport.query.get(report_id)
-                if report:
-                    article.rumor_reports.append(report)
+            article.rumor_reports.extend(article_query.load_by_ids(RumorReport, data['rumor_reports']))
         
         # 关联澄清报道
         if 'clarification_reports' in data and isinstance(data['clarification_reports'], list):
-            for report_id in data['clarification_reports']:
-                report = ClarificationReport.query.get(report_id)
-                if report:
-                    article.clarification_reports.append(report)
+            article.clarification_reports.extend(article_query.load_by_ids(ClarificationReport, data['clarification_reports']))
         
         db.session.commit()
         return jsonify({"message": "辟谣文章发布成功", "article_id": article.id}), 201, {'Content-Type': 'application/json; charset=utf-8'}
@@ -236,25 +234,13 @@ def update_article(article_id):
         if 'tags' in data and isinstance(data['tags'], list):
             article.tags = ','.join(data['tags'])
         
-        # 更新关联的谣言报道
+        # 更新关联的谣言报道(整体替换，一次 IN 查询批量获取)
         if 'rumor_reports' in data and isinstance(data['rumor_reports'], list):
-            # 清除现有关联
-            article.rumor_reports = []
-            # 添加新关联
-            for report_id in data['rumor_reports']:
-                report = RumorReport.query.get(report_id)
-                if report:
-                    article.rumor_reports.append(report)
+            article.rumor_reports = article_query.load_by_ids(RumorReport, data['rumor_reports'])
         
         # 更新关联的澄清报道
         if 'clarification_reports' in data and isinstance(data['clarification_reports'], list):
-            # 清除现有关联
-            article.clarification_reports = []
-            # 添加新关联
-            for report_id in data['clarification_reports']:
-                report = ClarificationReport.query.get(report_id)
-                if report:
-                    article.clarification_reports.append(report)
+            article.clarification_reports = article_query.load_by_ids(ClarificationReport, data['clarification_reports'])
         
         article.updated_at = datetime.now()
         db.session.commit()
@@ -476,6 +462,18 @@ def update_article_status(article_id):
             'in': 'query',
             'schema': {'type': 'string'},
             'description': '标签筛选，多个标签用逗号分隔，例如：tags=科技,健康'
+        },
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'schema': {'type': 'string'},
+            'description': '游标分页：首页传空值，之后传上一页返回的next_cursor(搜索时不支持)'
+        },
+        {
+            'name': 'include_total',
+            'in': 'query',
+            'schema': {'type': 'boolean', 'default': True},
+            'description': '为false时不统计总数，total/pages返回null'
         }
     ],
     'responses': {
@@ -484,9 +482,12 @@ def update_article_status(article_id):
         }
     }
 })
+@cached_response(['debunk_article'],
+                 params=('page', 'per_page', 'status', 'search', 'tags', 'cursor', 'include_total'))
+@query_budget(5)
 def get_articles():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    feed_args = parse_feed_args(request.args, default_per_page=10)
+    page, per_page = feed_args['page'], feed_args['per_page']
     status = request.args.get('status')
     search = request.args.get('search')
     tags = request.args.get('tags')
@@ -503,49 +504,11 @@ def get_articles():
     else:
         print(f"DEBUG - 不筛选状态，返回所有状态的文章")
     
-    # 标签筛选
+    # 标签筛选：通过标签关联表索引连接，多个标签为 AND 关系
     if tags and tags.strip():  # 确保tags参数存在且不为空字符串
-        print(f"DEBUG - 启用标签筛选: {tags}")
-        tag_list = tags.split(',')
-        for tag in tag_list:
-            # 对标签进行URL解码
-            clean_tag = unquote(tag.strip())
-            
-            # 跳过空标签
-            if not clean_tag:
-                continue
-                
-            print(f"DEBUG - 筛选标签: {clean_tag}")
-            
-            # 使用更精确的标签匹配方式:
-            # 1. 使用 ILIKE 而不是 LIKE 来忽略大小写
-            # 2. 确保完全匹配单词而不是部分匹配
-            tag_filter = (
-                # 精确匹配单个标签（整个标签字段就是这一个标签）
-                (DebunkArticle.tags.ilike(clean_tag)) | 
-                # 标签在开头，后面跟着逗号
-                (DebunkArticle.tags.ilike(f'{clean_tag},%')) |
-                # 标签在中间，前后都有逗号
-                (DebunkArticle.tags.ilike(f'%,{clean_tag},%')) |
-                # 标签在结尾，前面有逗号
-                (DebunkArticle.tags.ilike(f'%,{clean_tag}'))
-            )
-            
-            # 检查数据库中是否存在匹配的标签
-            tag_check = DebunkArticle.query.filter(tag_filter).first()
-            if tag_check:
-                print(f"DEBUG - 找到匹配标签 '{clean_tag}' 的文章，ID: {tag_check.id}, 标签: {tag_check.tags}")
-            else:
-                print(f"DEBUG - 未找到匹配标签 '{clean_tag}' 的文章")
-                # 打印所有标签供对比
-                all_tags = set()
-                for article in DebunkArticle.query.all():
-                    if article.tags:
-                        for t in article.tags.split(','):
-                            all_tags.add(t.strip())
-                print(f"DEBUG - 数据库中所有可用标签: {all_tags}")
-            
-            query = query.filter(tag_filter)
+        tag_list = [unquote(tag.strip()) for tag in tags.split(',')]
+        print(f"DEBUG - 启用标签筛选: {tag_list}")
+        query = tag_service.filter_by_tags(query, tag_list)
     else:
         print("DEBUG - 未启用标签筛选，返回所有符合条件的文章")
     
@@ -556,21 +519,14 @@ def get_articles():
     except Exception as e:
         print(f"DEBUG - 无法打印SQL: {str(e)}")
         
-    # 搜索功能
+    # 搜索功能：走全文索引，按相关度排序(只支持页码分页)；无搜索词时最新的文章优先
+    order_columns = [DebunkArticle.created_at, DebunkArticle.id]
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (DebunkArticle.title.ilike(search_term)) | 
-            (DebunkArticle.content.ilike(search_term)) |
-            (DebunkArticle.summary.ilike(search_term)) |
-            (DebunkArticle.tags.ilike(search_term))
-        )
+        query = search_service.apply_search('debunk_article', query, search)
+        order_columns = None
     
-    # 排序：最新的文章优先
-    query = query.order_by(DebunkArticle.created_at.desc())
-    
-    # 分页
-    pagination = query.paginate(page=page, per_page=per_page)
+    # 分页(作者信息随主查询一起加载)
+    pagination = paginate_feed(article_query.list_query(query), order_columns, **feed_args)
     
     # 调试日志：输出找到的文章及其标签
     print(f"DEBUG - 找到 {pagination.total} 篇文章")
@@ -581,27 +537,7 @@ def get_articles():
         article_tags = article.tags.split(',') if article.tags else []
         print(f"DEBUG - 文章ID: {article.id}, 标题: {article.title}, 标签: {article_tags}")
         
-        # 获取作者信息
-        author_info = None
-        if article.author:
-            author_info = {
-                'id': article.author.id,
-                'username': article.author.username if hasattr(article.author, 'username') else '辟谣小能手'
-            }
-            
-        articles.append({
-            'id': article.id,
-            'title': article.title,
-            'summary': article.summary,
-            'source': article.source,
-            'author_id': article.author_id,
-            'author': author_info,  # 添加作者信息
-            'status': article.status,
-            'created_at': article.created_at.strftime('%Y-%m-%d %H:%M:%S') if article.created_at else None,
-            'updated_at': article.updated_at.strftime('%Y-%m-%d %H:%M:%S') if article.updated_at else None,
-            'published_at': article.published_at.strftime('%Y-%m-%d %H:%M:%S') if article.published_at else None,
-            'tags': article_tags
-        })
+        articles.append(article_query.serialize_list_item(article, default_username='辟谣小能手'))
     
     return jsonify({
         'data': {
@@ -609,7 +545,9 @@ def get_articles():
             'total': pagination.total,
             'pages': pagination.pages,
             'page': page,
-            'per_page': per_page
+            'per_page': per_page,
+            'has_more': pagination.has_more,
+            'next_cursor': pagination.next_cursor
         }
     }), 200, {'Content-Type': 'application/json; charset=utf-8'}
 
@@ -631,58 +569,47 @@ def get_articles():
         }
     }
 })
+@cached_response(['debunk_article:{article_id}', 'debunk_article:*'])
+@query_budget(3)
 def get_article_detail(article_id):
-    article = DebunkArticle.query.get(article_id)
+    article = article_query.get_article_detail(article_id)
     
     if not article:
         return jsonify({"code": 404, "message": "文章不存在"}), 404, {'Content-Type': 'application/json; charset=utf-8'}
     
-    # 获取关联的谣言报道
-    rumor_reports = []
-    for report in article.rumor_reports:
-        rumor_reports.append({
-            'id': report.id,
-            'title': report.title,
-            'source': report.source,
-            'published_at': report.published_at.strftime('%Y-%m-%d %H:%M:%S') if report.published_at else None
-        })
-    
-    # 获取关联的澄清报道
-    clarification_reports = []
-    for report in article.clarification_reports:
-        clarification_reports.append({
-            'id': report.id,
-            'title': report.title,
-            'source': report.source,
-            'published_at': report.published_at.strftime('%Y-%m-%d %H:%M:%S') if report.published_at else None
-        })
+    # 作者和关联报道已随查询预加载
+    article_data = article_query.serialize_detail(article)
     
-    # 获取作者信息
-    author_info = None
-    if article.author:
-        author_info = {
-            'id': article.author.id,
-            'username': article.author.username if hasattr(article.author, 'username') else '辟谣小能手'
+    return jsonify(article_data), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+@debunk_bp.route('/tags', methods=['GET'])
+@swag_from({
+    'tags': ['辟谣管理'],
+    'summary': '获取所有可用标签及文章数',
+    'parameters': [
+        {
+            'name': 'limit',
+            'in': 'query',
+            'schema': {'type': 'integer'},
+            'description': '最多返回的标签数，不传返回全部'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': '获取标签列表成功'
         }
-        
-    article_data = {
-        'id': article.id,
-        'title': article.title,
-        'content': article.content,
-        'summary': article.summary,
-        'source': article.source,
-        'author_id': article.author_id,
-        'author': author_info,  # 添加作者信息
-        'status': article.status,
-        'created_at': article.created_at.strftime('%Y-%m-%d %H:%M:%S') if article.created_at else None,
-        'updated_at': article.updated_at.strftime('%Y-%m-%d %H:%M:%S') if article.updated_at else None,
-        'published_at': article.published_at.strftime('%Y-%m-%d %H:%M:%S') if article.published_at else None,
-        'tags': article.tags.split(',') if article.tags else [],
-        'rumor_reports': rumor_reports,
-        'clarification_reports': clarification_reports
     }
-    
-    return jsonify(article_data), 200, {'Content-Type': 'application/json; charset=utf-8'}
+})
+@query_budget(1)
+def get_tags():
+    limit = request.args.get('limit', type=int)
+    tags = tag_service.list_tags(limit=limit)
+    return jsonify({
+        'data': {
+            'items': [tag.to_dict() for tag in tags],
+            'total': len(tags)
+        }
+    }), 200, {'Content-Type': 'application/json; charset=utf-8'}
 
 # 前端路由 - 文章列表页面
 @debunk_view_bp.route('/articles', methods=['GET'])
@@ -709,8 +636,7 @@ def edit_article_view(article_id):
 @debunk_bp.route('/weibo/debunks', methods=['GET'])
 def get_weibo_debunks():
     """获取微博辟谣数据列表"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    feed_args = parse_feed_args(request.args, default_per_page=20)
     status = request.args.get('status')
     search_query = request.args.get('search_query')
     
@@ -721,15 +647,15 @@ def get_weibo_debunks():
     if search_query:
         query = query.filter(WeiboDebunk.search_query == search_query)
         
-    pagination = query.order_by(WeiboDebunk.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    pagination = paginate_feed(query, [WeiboDebunk.created_at, WeiboDebunk.id], **feed_args)
     
     return jsonify({
         'total': pagination.total,
         'pages': pagination.pages,
-        'current_page': page,
-        'per_page': per_page,
+        'current_page': pagination.page,
+        'per_page': pagination.per_page,
+        'has_more': pagination.has_more,
+        'next_cursor': pagination.next_cursor,
         'items': [item.to_dict() for item in pagination.items]
     })
 
@@ -903,6 +829,18 @@ def batch_create_weibo_debunks():
             'in': 'query',
             'schema': {'type': 'string'},
             'description': '标签筛选，多个标签用逗号分隔，例如：tags=科技,健康'
+        },
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'schema': {'type': 'string'},
+            'description': '游标分页：首页传空值，之后传上一页返回的next_cursor(搜索时不支持)'
+        },
+        {
+            'name': 'include_total',
+            'in': 'query',
+            'schema': {'type': 'boolean', 'default': True},
+            'description': '为false时不统计总数，total/pages返回null'
         }
     ],
     'responses': {
@@ -925,7 +863,9 @@ def batch_create_weibo_debunks():
                                     'total': {'type': 'integer'},
                                     'pages': {'type': 'integer'},
                                     'page': {'type': 'integer'},
-                                    'per_page': {'type': 'integer'}
+                                    'per_page': {'type': 'integer'},
+                                    'has_more': {'type': 'boolean'},
+                                    'next_cursor': {'type': 'string'}
                                 }
                             }
                         }
@@ -938,6 +878,7 @@ def batch_create_weibo_debunks():
         }
     }
 })
+@query_budget(6)
 def get_my_articles():
     """获取当前登录用户发布的文章列表"""
     print("##########################################")
@@ -1018,8 +959,8 @@ def get_my_articles():
     print(f"成功识别用户: ID={user_id}, 用户名={user.user_name}")
     
     # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    feed_args = parse_feed_args(request.args, default_per_page=10)
+    page, per_page = feed_args['page'], feed_args['per_page']
     status = request.args.get('status')
     search = request.args.get('search')
     tags = request.args.get('tags')
@@ -1037,58 +978,22 @@ def get_my_articles():
     else:
         print(f"DEBUG - 不筛选状态，返回所有状态的文章")
     
-    # 标签筛选
+    # 标签筛选：通过标签关联表索引连接，多个标签为 AND 关系
     if tags and tags.strip():  # 确保tags参数存在且不为空字符串
-        print(f"DEBUG - 启用标签筛选: {tags}")
-        tag_list = tags.split(',')
-        for tag in tag_list:
-            # 对标签进行URL解码
-            clean_tag = unquote(tag.strip())
-            
-            # 跳过空标签
-            if not clean_tag:
-                continue
-                
-            print(f"DEBUG - 筛选标签: {clean_tag}")
-            
-            # 使用更精确的标签匹配方式
-            tag_filter = (
-                # 精确匹配单个标签（整个标签字段就是这一个标签）
-                (DebunkArticle.tags.ilike(clean_tag)) | 
-                # 标签在开头，后面跟着逗号
-                (DebunkArticle.tags.ilike(f'{clean_tag},%')) |
-                # 标签在中间，前后都有逗号
-                (DebunkArticle.tags.ilike(f'%,{clean_tag},%')) |
-                # 标签在结尾，前面有逗号
-                (DebunkArticle.tags.ilike(f'%,{clean_tag}'))
-            )
-            
-            # 检查数据库中是否存在匹配的标签
-            tag_check = DebunkArticle.query.filter(DebunkArticle.author_id == user_id).filter(tag_filter).first()
-            if tag_check:
-                print(f"DEBUG - 找到用户 {user_id} 匹配标签 '{clean_tag}' 的文章，ID: {tag_check.id}, 标签: {tag_check.tags}")
-            else:
-                print(f"DEBUG - 未找到用户 {user_id} 匹配标签 '{clean_tag}' 的文章")
-            
-            query = query.filter(tag_filter)
+        tag_list = [unquote(tag.strip()) for tag in tags.split(',')]
+        print(f"DEBUG - 启用标签筛选: {tag_list}")
+        query = tag_service.filter_by_tags(query, tag_list)
     else:
         print(f"DEBUG - 未启用标签筛选，返回用户 {user_id} 的所有符合条件的文章")
     
-    # 搜索功能
+    # 搜索功能：走全文索引，按相关度排序(只支持页码分页)；无搜索词时最新的文章优先
+    order_columns = [DebunkArticle.created_at, DebunkArticle.id]
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (DebunkArticle.title.ilike(search_term)) | 
-            (DebunkArticle.content.ilike(search_term)) |
-            (DebunkArticle.summary.ilike(search_term)) |
-            (DebunkArticle.tags.ilike(search_term))
-        )
+        query = search_service.apply_search('debunk_article', query, search)
+        order_columns = None
     
-    # 排序：最新的文章优先
-    query = query.order_by(DebunkArticle.created_at.desc())
-    
-    # 分页
-    pagination = query.paginate(page=page, per_page=per_page)
+    # 分页(作者信息随主查询一起加载)
+    pagination = paginate_feed(article_query.list_query(query), order_columns, **feed_args)
     
     # 调试日志：输出找到的文章及其标签
     print(f"DEBUG - 找到用户 {user_id} 的 {pagination.total} 篇文章")
@@ -1100,27 +1005,7 @@ def get_my_articles():
         article_tags = article.tags.split(',') if article.tags else []
         print(f"DEBUG - 文章ID: {article.id}, 标题: {article.title}, 标签: {article_tags}")
         
-        # 获取作者信息
-        author_info = None
-        if article.author:
-            author_info = {
-                'id': article.author.id,
-                'username': article.author.username if hasattr(article.author, 'username') else '匿名'
-            }
-            
-        articles.append({
-            'id': article.id,
-            'title': article.title,
-            'summary': article.summary,
-            'source': article.source,
-            'author_id': article.author_id,
-            'author': author_info,
-            'status': article.status,
-            'created_at': article.created_at.strftime('%Y-%m-%d %H:%M:%S') if article.created_at else None,
-            'updated_at': article.updated_at.strftime('%Y-%m-%d %H:%M:%S') if article.updated_at else None,
-            'published_at': article.published_at.strftime('%Y-%m-%d %H:%M:%S') if article.published_at else None,
-            'tags': article_tags
-        })
+        articles.append(article_query.serialize_list_item(article, default_username='匿名'))
     
     return jsonify({
         'data': {
@@ -1128,7 +1013,9 @@ def get_my_articles():
             'total': pagination.total,
             'pages': pagination.pages,
             'page': page,
-            'per_page': per_page
+            'per_page': per_page,
+            'has_more': pagination.has_more,
+            'next_cursor': pagination.next_cursor
         }
     }), 200, {'Content-Type': 'application/json; charset=utf-8'}
 
@@ -7,6 +7,7 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 from app.models.message import Message
 from app.extensions import db
+from app.utils.pagination import CursorError, parse_feed_args, paginate_feed
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.websockets.message_handler import push_message
 import logging
@@ -183,6 +184,8 @@ def get_messages():
     - unread_only: 是否只获取未读消息 (1/0)
     - page: 页码 (默认1)
     - per_page: 每页数量 (默认20)
+    - cursor: 游标分页 (可选, 首页传空值, 之后传上一页返回的 next_cursor)
+    - include_total: 是否统计总数 (默认true, 为false时 total/total_pages 返回 null)
     - priority: 优先级过滤 (可选, 0/1/2)
     - msg_type: 消息类型过滤 (可选, text/image/file)
     
@@ -206,7 +209,9 @@ def get_messages():
             "total": 总消息数,
             "page": 当前页码,
             "per_page": 每页数量,
-            "total_pages": 总页数
+            "total_pages": 总页数,
+            "has_more": 是否还有下一页,
+            "next_cursor": "下一页游标"
         }
     }
     """
@@ -240,8 +245,7 @@ def get_messages():
         # 获取查询参数
         direction = request.args.get('direction', 'received')  # 默认获取收到的消息
         unread_only = request.args.get('unread_only', '0') == '1'
-        page = int(request.args.get('page', 1))
-        per_page = min(int(request.args.get('per_page', 20)), 100)  # 限制最大每页数量
+        feed_args = parse_feed_args(request.args, default_per_page=20, max_per_page=100)  # 限制最大每页数量
         priority = request.args.get('priority', type=int)
         msg_type = request.args.get('msg_type')
         
@@ -273,11 +277,8 @@ def get_messages():
         # 添加调试日志
         logger.info(f"查询参数: direction={direction}, unread_only={unread_only}, user_id={user_id}")
         
-        # 按优先级和时间排序
-        query = query.order_by(Message.priority.desc(), Message.send_time.desc())
-        
-        # 分页
-        pagination = query.paginate(page=page, per_page=per_page)
+        # 按优先级和时间排序并分页
+        pagination = paginate_feed(query, [Message.priority, Message.send_time, Message.id], **feed_args)
         
         return jsonify({
             'success': True,
@@ -285,12 +286,19 @@ def get_messages():
             'data': {
                 'messages': [msg.to_dict() for msg in pagination.items],
                 'total': pagination.total,
-                'page': page,
-                'per_page': per_page,
-                'total_pages': pagination.pages
+                'page': pagination.page,
+                'per_page': pagination.per_page,
+                'total_pages': pagination.pages,
+                'has_more': pagination.has_more,
+                'next_cursor': pagination.next_cursor
             }
         })
         
+    except CursorError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"获取消息列表失败: {str(e)}")
         return jsonify({
@@ -398,6 +406,8 @@ def get_history_messages():
     - direction: 消息方向 (received/sent/all)
     - page: 页码 (默认1)
     - per_page: 每页数量 (默认20)
+    - cursor: 游标分页 (可选, 首页传空值, 之后传上一页返回的 next_cursor)
+    - include_total: 是否统计总数 (默认true, 为false时 total/total_pages 返回 null)
     - msg_type: 消息类型过滤 (可选)
     - priority: 优先级过滤 (可选)
     
@@ -410,7 +420,9 @@ def get_history_messages():
             "total": 总数,
             "page": 当前页,
             "per_page": 每页数量,
-            "total_pages": 总页数
+            "total_pages": 总页数,
+            "has_more": 是否还有下一页,
+            "next_cursor": "下一页游标"
         }
     }
     """
@@ -443,8 +455,7 @@ def get_history_messages():
         start_time = request.args.get('start_time')
         end_time = request.args.get('end_time')
         direction = request.args.get('direction', 'all')
-        page = int(request.args.get('page', 1))
-        per_page = min(int(request.args.get('per_page', 20)), 100)
+        feed_args = parse_feed_args(request.args, default_per_page=20, max_per_page=100)
         msg_type = request.args.get('msg_type')
         priority = request.args.get('priority', type=int)
         
@@ -486,11 +497,8 @@ def get_history_messages():
         if priority is not None:
             query = query.filter_by(priority=priority)
             
-        # 排序
-        query = query.order_by(Message.send_time.desc())
-        
-        # 分页
-        pagination = query.paginate(page=page, per_page=per_page)
+        # 按时间排序并分页
+        pagination = paginate_feed(query, [Message.send_time, Message.id], **feed_args)
         
         return jsonify({
             'success': True,
@@ -498,12 +506,19 @@ def get_history_messages():
             'data': {
                 'messages': [msg.to_dict() for msg in pagination.items],
                 'total': pagination.total,
-                'page': page,
-                'per_page': per_page,
-                'total_pages': pagination.pages
+                'page': pagination.page,
+                'per_page': pagination.per_page,
+                'total_pages': pagination.pages,
+                'has_more': pagination.has_more,
+                'next_cursor': pagination.next_cursor
             }
         })
         
+    except CursorError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"获取历史消息失败: {str(e)}")
         return jsonify({
@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
 from app.models.debunk import WeiboDebunk, XinlangDebunk, DebunkContent
 from app import db
+from app.services import search_service, spider_ingest
+from app.utils.pagination import parse_feed_args, paginate_feed
+from app.utils.response_cache import cached_response
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_
 from datetime import datetime
 
 spider_bp = Blueprint('spider', __name__, url_prefix='/api/spider')
@@ -21,12 +23,13 @@ def get_spider_data():
     - keyword: 搜索关键词
     - page: 页码
     - per_page: 每页数量
+    - cursor: 游标分页，首页传空值，之后传上一页返回的 next_cursor (搜索时不支持)
+    - include_total: 为 false 时不统计总数
     """
     source = request.args.get('source', 'all')
     status = request.args.get('status')
     keyword = request.args.get('keyword')
-    page = int(request.args.get('page', 1))
-    per_page = min(int(request.args.get('per_page', 20)), 100)
+    feed_args = parse_feed_args(request.args, default_per_page=20, max_per_page=100)
     
     # 构建基础查询
     query = DebunkContent.query
@@ -36,17 +39,14 @@ def get_spider_data():
         query = query.filter(DebunkContent.source == source)
     if status:
         query = query.filter(DebunkContent.status == status)
+    order_columns = [DebunkContent.created_at, DebunkContent.id]
     if keyword:
-        query = query.filter(or_(
-            DebunkContent.title.ilike(f'%{keyword}%'),
-            DebunkContent.content.ilike(f'%{keyword}%'),
-            DebunkContent.author_name.ilike(f'%{keyword}%')
-        ))
+        # 全文索引检索，按相关度排序
+        query = search_service.apply_search('debunk_content', query, keyword)
+        order_columns = None
     
     # 获取分页数据
-    pagination = query.order_by(DebunkContent.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    pagination = paginate_feed(query, order_columns, **feed_args)
     
     return jsonify({
         'code': 0,
@@ -56,7 +56,9 @@ def get_spider_data():
             'total': pagination.total,
             'page': pagination.page,
             'per_page': pagination.per_page,
-            'pages': pagination.pages
+            'pages': pagination.pages,
+            'has_more': pagination.has_more,
+            'next_cursor': pagination.next_cursor
         }
     })
 
@@ -149,6 +151,7 @@ def delete_spider_data(data_id):
 
 @spider_bp.route('/stats', methods=['GET'])
 @jwt_required_without_optional
+@cached_response(['spider_stats'], params=())
 def get_spider_stats():
     """获取爬虫数据统计信息"""
     try:
@@ -436,4 +439,45 @@ def create_spider_data():
         return jsonify({
             'code': 1,
             'message': str(e)
-        }), 500 
\ No newline at end of file
+        }), 500 
+
+@spider_bp.route('/data/batch', methods=['POST'])
+@jwt_required_without_optional
+def batch_create_spider_data():
+    """批量新增/更新爬虫数据
+
+    请求体参数:
+    - items: 数据列表，每项格式同 POST /api/spider/data ({"source": ..., "data": {...}})，
+      单次最多 1000 条
+
+    已存在的微博/新闻按唯一ID更新(保留审核状态)，其他来源按 (来源, 标题) 更新正文。
+    返回每一项的结果: {"index", "status": created/updated/error, "id", "message"}
+    """
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({
+            'code': 1,
+            'message': '缺少必要的参数'
+        }), 400
+    if len(items) > spider_ingest.MAX_BATCH_SIZE:
+        return jsonify({
+            'code': 1,
+            'message': f'单次最多提交 {spider_ingest.MAX_BATCH_SIZE} 条数据'
+        }), 400
+
+    try:
+        results = spider_ingest.ingest_items(items)
+        return jsonify({
+            'code': 0,
+            'message': 'success',
+            'data': {
+                **spider_ingest.summarize(results),
+                'results': results
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'code': 1,
+            'message': str(e)
+        }), 500
@@ -25,11 +25,13 @@ from app.models.news_data import NewsData, RumorData, SocialMediaData, DataProce
 # 创建应用实例
 app = create_app()
 
-def start_crawler(spider_name=None):
-    """启动爬虫
+def start_crawler(spider_name=None, keyword=None, pages=None):
+    """启动爬虫，等待任务队列执行完成
     
     Args:
         spider_name: 爬虫名称，为None时启动所有爬虫
+        keyword: 搜索关键词(搜索爬虫)，为None时使用配置的关键词
+        pages: 搜索爬虫抓取的页数
     """
     with app.app_context():
         # 初始化爬虫管理器
@@ -44,22 +46,53 @@ def start_crawler(spider_name=None):
                 return
             
             print(f"正在启动爬虫: {spider_name}")
-            crawler_manager.start_crawler(spider_name)
+            if not crawler_manager.start_crawler(spider_name, keyword, end_page=pages):
+                return
         else:
             # 启动所有爬虫
             print("正在启动所有爬虫...")
             crawler_manager.crawl_all()
+            crawler_manager.start()
+        
+        try:
+            crawler_manager.wait()
+        finally:
+            metrics = crawler_manager.get_metrics()
+            crawler_manager.stop()
+        
+        wait = metrics['queue_wait']
+        print(f"任务完成: 成功 {metrics['completed']}, 失败 {metrics['failed']}, "
+              f"工作进程利用率 {metrics['utilization']:.1%}")
+        print(f"排队等待: 平均 {wait['avg']}s, p50 {wait['p50']}s, p95 {wait['p95']}s, 最长 {wait['max']}s")
 
-def process_data():
-    """处理爬虫数据"""
+def process_data(workers=0, chunk_size=200, limit=None):
+    """处理爬虫数据
+    
+    Args:
+        workers: 工作进程数，0 为原有的串行处理
+        chunk_size: 批处理模式下每块的数据量
+        limit: 批处理模式下每种类型最多处理的数量
+    """
     with app.app_context():
         # 初始化数据处理器
         data_processor = init_data_processor(app)
         
-        print("开始处理爬虫数据...")
-        result = data_processor.process_all_data(batch_size=50)
+        if not workers:
+            print("开始处理爬虫数据...")
+            result = data_processor.process_all_data(batch_size=50)
+            
+            print(f"处理完成! 新闻: {result['news']}条, 谣言: {result['rumor']}条, 社交媒体: {result['social']}条")
+            return
+        
+        print(f"开始批处理爬虫数据 (进程数: {workers}, 块大小: {chunk_size})...")
+        result = data_processor.process_all_data_parallel(workers=workers, chunk_size=chunk_size, limit=limit)
         
-        print(f"处理完成! 新闻: {result['news']}条, 谣言: {result['rumor']}条, 社交媒体: {result['social']}条")
+        names = {'news': '新闻', 'rumor': '谣言', 'social': '社交媒体'}
+        for data_type, stats in result.items():
+            print(f"{names[data_type]}: 成功 {stats['processed']}条, 失败 {stats['failed']}条, "
+                  f"耗时 {stats['seconds']}s, {stats['rows_per_second']} 条/秒")
+            for stage, metric in stats['stages'].items():
+                print(f"  {stage:<8} {metric['rows']:>8}条 {metric['seconds']:>9.3f}s {metric['rows_per_second']} 条/秒")
 
 def query_data(data_type, limit=10, days=None, keywords=None):
     """查询爬虫数据
@@ -160,10 +193,16 @@ def main():
     
     # 启动爬虫
     run_parser = subparsers.add_parser('run', help='启动爬虫')
-    run_parser.add_argument('spider', nargs='?', help='爬虫名称 (news/government/weibo)，不指定则启动所有爬虫')
+    run_parser.add_argument('spider', nargs='?', help='爬虫名称 (news/gov/weibo/xinlang)，不指定则启动所有爬虫')
+    run_parser.add_argument('-k', '--keyword', help='搜索关键词 (weibo/xinlang)，不指定则使用配置的关键词')
+    run_parser.add_argument('-p', '--pages', type=int, help='搜索爬虫抓取的页数')
     
     # 处理数据
     process_parser = subparsers.add_parser('process', help='处理爬虫数据')
+    process_parser.add_argument('-w', '--workers', type=int, default=0,
+                                help='多进程批处理的工作进程数 (默认: 0，串行处理)')
+    process_parser.add_argument('--chunk-size', type=int, default=200, help='批处理每块数据量 (默认: 200)')
+    process_parser.add_argument('-l', '--limit', type=int, help='批处理时每种类型最多处理的数量')
     
     # 查询数据
     query_parser = subparsers.add_parser('query', help='查询爬虫数据')
@@ -178,9 +217,9 @@ def main():
     args = parser.parse_args()
     
     if args.command == 'run':
-        start_crawler(args.spider)
+        start_crawler(args.spider, args.keyword, args.pages)
     elif args.command == 'process':
-        process_data()
+        process_data(args.workers, args.chunk_size, args.limit)
     elif args.command == 'query':
         query_data(args.type, args.limit, args.days, args.keywords)
     elif args.command == 'stats':
@@ -0,0 +1,269 @@
+"""广告段落过滤
+
+爬虫清洗管道(DataCleanPipeline)和数据处理器(DataProcessor)共用的广告过滤引擎。
+
+关键词编译为一个 Aho-Corasick 自动机，正则模式合并为一个预编译的正则，
+对整篇文本各扫描一遍即可判定所有段落，不再对每个段落逐个关键词、逐个模式查找。
+未安装 pyahocorasick 时关键词并入合并正则，结果相同。
+
+关键词和模式默认读取爬虫配置 TRUTH_GUARDIAN_SETTINGS['AD_FILTER']，
+配置了 CONFIG_FILE 时按文件修改时间热加载，文件格式:
+    {"keywords": ["广告", ...], "patterns": ["正则", ...]}
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from bisect import bisect_right
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from app.scraper import settings
+
+# 配置日志
+logger = logging.getLogger('ad_filter')
+logger.setLevel(logging.INFO)
+
+# 段落分隔，与原有 filter_ads 一致
+_PARAGRAPH_SPLIT = re.compile(r'\n+')
+
+
+def _first_chars(items):
+    """求解析后的正则可能的首字符集合，无法确定时返回 None"""
+    chars = set()
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            chars.add(chr(av))
+            return chars
+        if op is sre_parse.IN:
+            for item_op, item_av in av:
+                if item_op is sre_parse.LITERAL:
+                    chars.add(chr(item_av))
+                elif item_op is sre_parse.RANGE and item_av[1] - item_av[0] < 256:
+                    chars.update(chr(c) for c in range(item_av[0], item_av[1] + 1))
+                else:
+                    return None
+            return chars
+        if op is sre_parse.SUBPATTERN:
+            if av[1] or av[2]:  # 组内修改了匹配标志
+                return None
+            sub = _first_chars(av[3])
+            if sub is None:
+                return None
+            chars |= sub
+            return chars
+        if op is sre_parse.BRANCH:
+            for branch in av[1]:
+                sub = _first_chars(branch)
+                if sub is None:
+                    return None
+                chars |= sub
+            return chars
+        if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            sub = _first_chars(av[2])
+            if sub is None:
+                return None
+            chars |= sub
+            if av[0] > 0:
+                return chars
+            # 可重复0次，首字符还可能来自下一项
+            continue
+        return None
+    # 整个模式可以匹配空串
+    return None
+
+
+def _combine(alternatives):
+    """合并多个正则为一个，并在前面加上首字符集合的先行断言
+
+    多分支正则无法利用首字符快速跳过，先行断言让正则引擎按字符集扫描，
+    只在可能匹配的位置尝试各分支。
+    段落以换行拼接后整体扫描，按 re.MULTILINE 编译，^/$ 与逐段落匹配时一样在每个段落的首尾生效
+    (拆分后的段落不含换行，两者等价)
+    """
+    combined = '|'.join('(?:%s)' % alternative for alternative in alternatives)
+    parsed = sre_parse.parse(combined)
+    chars = None if parsed.state.flags & re.IGNORECASE else _first_chars(list(parsed))
+    if chars:
+        combined = '(?=[%s])(?:%s)' % (''.join(re.escape(c) for c in sorted(chars)), combined)
+    return re.compile(combined, re.MULTILINE)
+
+
+class _Engine:
+    """一组关键词和模式编译后的结果，热加载时整体替换"""
+
+    def __init__(self, keywords, patterns):
+        self.keywords = list(keywords)
+        self.patterns = list(patterns)
+        alternatives = ['(?:%s)' % pattern for pattern in self.patterns]
+
+        self.automaton = None
+        if self.keywords and ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self.automaton.add_word(keyword, keyword)
+            self.automaton.make_automaton()
+        elif self.keywords:
+            # 未安装 pyahocorasick 时关键词并入合并正则
+            alternatives = [re.escape(kw) for kw in sorted(self.keywords, key=len, reverse=True)] + alternatives
+
+        self.regex = _combine(alternatives) if alternatives else None
+
+
+class AdFilter:
+    """广告过滤器
+
+    Args:
+        keywords: 广告关键词列表，为None时读取爬虫配置
+        patterns: 广告正则模式列表，为None时读取爬虫配置
+        config_file: 热加载的配置文件路径，为None时读取爬虫配置
+        check_interval: 检查配置文件是否修改的间隔(秒)
+    """
+
+    def __init__(self, keywords=None, patterns=None, config_file=None, check_interval=5):
+        config = settings.TRUTH_GUARDIAN_SETTINGS.get('AD_FILTER', {})
+        if keywords is None:
+            keywords = config.get('KEYWORDS', [])
+        if patterns is None:
+            patterns = config.get('PATTERNS', [])
+        self.config_file = config_file if config_file is not None else config.get('CONFIG_FILE')
+        self.check_interval = check_interval
+
+        self._engine = _Engine(keywords, patterns)
+        self._lock = threading.Lock()
+        self._config_mtime = None
+        self._last_check = 0
+        self.reload()
+
+    @property
+    def keywords(self):
+        return self._engine.keywords
+
+    @property
+    def patterns(self):
+        return self._engine.patterns
+
+    def update(self, keywords=None, patterns=None):
+        """替换关键词和/或模式，正则编译失败时抛出 re.error 且保留原配置"""
+        engine = self._engine
+        self._engine = _Engine(engine.keywords if keywords is None else keywords,
+                               engine.patterns if patterns is None else patterns)
+
+    def reload(self, force=False):
+        """配置文件有修改时重新加载，返回是否加载了新配置
+
+        文件不存在或内容有误时记录日志并继续使用原配置
+        """
+        if not self.config_file:
+            return False
+        with self._lock:
+            self._last_check = time.monotonic()
+            try:
+                mtime = os.stat(self.config_file).st_mtime
+            except OSError:
+                return False
+            if not force and mtime == self._config_mtime:
+                return False
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.update(data.get('keywords'), data.get('patterns'))
+            except (OSError, ValueError, re.error) as e:
+                logger.error(f"加载广告过滤配置失败: {str(e)}")
+                return False
+            finally:
+                # 出错的文件也记录修改时间，避免每次检查都重复报错
+                self._config_mtime = mtime
+        logger.info(f"已加载广告过滤配置: {len(self.keywords)} 个关键词, {len(self.patterns)} 个模式")
+        return True
+
+    def _check_reload(self):
+        if self.config_file and time.monotonic() - self._last_check >= self.check_interval:
+            self.reload()
+
+    def is_ad(self, paragraph):
+        """判断单个段落是否为广告"""
+        return self.classify([paragraph])[0]
+
+    def classify(self, paragraphs):
+        """判定每个段落是否为广告
+
+        段落之间以换行拼接后整体扫描，命中位置按段落起始偏移二分定位到段落
+
+        Returns:
+            list: 与 paragraphs 等长的布尔列表
+        """
+        self._check_reload()
+        engine = self._engine
+        flags = [False] * len(paragraphs)
+        if not paragraphs:
+            return flags
+
+        text = '\n'.join(paragraphs)
+        starts = []
+        offset = 0
+        for para in paragraphs:
+            starts.append(offset)
+            offset += len(para) + 1
+
+        if engine.automaton is not None:
+            for end, _ in engine.automaton.iter(text):
+                flags[bisect_right(starts, end) - 1] = True
+
+        if engine.regex is not None:
+            pos = 0
+            while True:
+                # 跳过已判定为广告的段落
+                index = bisect_right(starts, pos) - 1
+                while index < len(paragraphs) and flags[index]:
+                    index += 1
+                if index >= len(paragraphs):
+                    break
+                pos = max(pos, starts[index])
+                match = engine.regex.search(text, pos)
+                if not match:
+                    break
+                index = bisect_right(starts, match.start()) - 1
+                if '\n' in match.group():
+                    # 配置的模式跨越了段落(如含 \s)，退回到单独检查该段落
+                    flags[index] = engine.regex.search(paragraphs[index]) is not None
+                else:
+                    flags[index] = True
+                if index + 1 >= len(paragraphs):
+                    break
+                pos = starts[index + 1]
+
+        return flags
+
+    def filter(self, text):
+        """过滤广告段落，返回保留的段落(以换行连接)"""
+        if not text:
+            return text
+        paragraphs = _PARAGRAPH_SPLIT.split(text)
+        flags = self.classify(paragraphs)
+        return '\n'.join(para for para, is_ad in zip(paragraphs, flags) if not is_ad)
+
+
+_default_filter = None
+_default_lock = threading.Lock()
+
+
+def get_ad_filter():
+    """获取共享的广告过滤器实例"""
+    global _default_filter
+    if _default_filter is None:
+        with _default_lock:
+            if _default_filter is None:
+                _default_filter = AdFilter()
+    return _default_filter
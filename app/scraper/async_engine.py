@@ -0,0 +1,234 @@
+"""搜索爬虫异步抓取引擎
+
+WeiboSearchSpider / XinlangSearchSpider 的同步 run() 逐个关键词、逐页用 requests.get 抓取，
+每页之间等待固定时间。本引擎在一个事件循环里并发抓取 关键词 × 页码:
+
+- 所有请求共用一个 aiohttp 连接池(keep-alive)，总并发由 CONCURRENCY 限制
+- 每个主机单独限制并发(PER_HOST / HOST_LIMITS)，避免集中请求同一站点
+- 网络错误、超时和 RETRY_HTTP_CODES 中的状态码按指数退避 + 随机抖动(full jitter)重试，
+  429/503 带 Retry-After 时至少等待该时长
+- 解析沿用爬虫自身的 build_request() / parse_response()
+- 解析结果放入有界队列，由写入协程攒批异步提交到 /api/spider/data/batch；
+  写入跟不上时队列写满，抓取协程自动等待(背压)
+
+用法:
+    spider = WeiboSearchSpider()
+    spider.run_many(['辟谣', '谣言'], max_pages=10)
+"""
+
+import time
+import json
+import random
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from app.scraper import settings
+
+logger = logging.getLogger('async_engine')
+
+
+class AsyncSearchEngine:
+    """并发抓取搜索爬虫的多个关键词和页码
+
+    Args:
+        spider: 搜索爬虫，需要提供 source、api_base_url、token、build_request()、parse_response()
+        config: 覆盖 TRUTH_GUARDIAN_SETTINGS['SEARCH_ENGINE'] 中的配置项
+        record_path: 把抓取到的响应追加写入该 JSONL 文件，供本地回放服务器(replay_server)使用
+    """
+
+    def __init__(self, spider, config=None, record_path=None):
+        options = dict(settings.TRUTH_GUARDIAN_SETTINGS.get('SEARCH_ENGINE', {}))
+        options.update(config or {})
+        self.spider = spider
+        self.concurrency = options.get('CONCURRENCY', 32)
+        self.per_host = options.get('PER_HOST', 4)
+        self.host_limits = dict(options.get('HOST_LIMITS') or {})
+        self.timeout = options.get('TIMEOUT', 30)
+        self.retries = options.get('RETRIES', 3)
+        self.backoff_base = options.get('BACKOFF_BASE', 0.5)
+        self.backoff_max = options.get('BACKOFF_MAX', 30)
+        self.retry_codes = set(options.get('RETRY_HTTP_CODES', [500, 502, 503, 504, 408, 429]))
+        self.batch_size = options.get('BATCH_SIZE', 100)
+        self.queue_size = options.get('QUEUE_SIZE', 1000)
+        self.writers = options.get('WRITERS', 2)
+        self.record_path = record_path
+        self._host_semaphores = {}
+        self._record_file = None
+        self.stats = {
+            'pages': 0,
+            'pages_failed': 0,
+            'requests': 0,
+            'retries': 0,
+            'items': 0,
+            'batches': 0,
+            'created': 0,
+            'updated': 0,
+            'failed': 0,
+            'elapsed': 0.0,
+        }
+
+    def _semaphore(self, url):
+        host = urlsplit(url).hostname or ''
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.host_limits.get(host, self.per_host))
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    def _backoff(self, attempt, retry_after=None):
+        """第 attempt 次重试前的等待时间"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, min(self.backoff_max, float(retry_after)))
+            except ValueError:
+                pass
+        return delay
+
+    async def request(self, session, method, url, **kwargs):
+        """发送请求(带主机并发限制和重试)，返回解析后的JSON，最终失败返回 None"""
+        semaphore = self._semaphore(url)
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                async with semaphore:
+                    self.stats['requests'] += 1
+                    async with session.request(method, url, **kwargs) as response:
+                        if response.status in self.retry_codes:
+                            retry_after = response.headers.get('Retry-After')
+                            error = f'状态码 {response.status}'
+                        else:
+                            response.raise_for_status()
+                            # 部分接口返回的 Content-Type 不是 application/json
+                            return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError) as e:
+                if isinstance(e, aiohttp.ClientResponseError) and e.status not in self.retry_codes:
+                    logger.error(f"请求失败 {url}: 状态码 {e.status}")
+                    return None
+                error = str(e) or type(e).__name__
+            if attempt < self.retries:
+                self.stats['retries'] += 1
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(f"请求失败 {url}: {error}，{delay:.2f} 秒后第 {attempt + 1} 次重试")
+                await asyncio.sleep(delay)
+            else:
+                logger.error(f"请求失败 {url}: {error}，已重试 {self.retries} 次")
+        return None
+
+    async def login(self, session):
+        """登录入库接口获取token"""
+        data = await self.request(session, 'POST', f"{self.spider.api_base_url}/api/auth/login", json={
+            'username': self.spider.api_config['username'],
+            'password': self.spider.api_config['password']
+        })
+        if data and 'access_token' in data:
+            self.spider.token = data['access_token']
+            logger.info("登录成功")
+            return True
+        logger.error("登录失败")
+        return False
+
+    async def _fetch_worker(self, session, tasks, items):
+        while True:
+            try:
+                keyword, page = tasks.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            request = self.spider.build_request(keyword, page)
+            data = await self.request(
+                session, 'GET', request['url'],
+                params=request.get('params'),
+                headers=request.get('headers'),
+                ssl=None if request.get('verify', True) else False
+            )
+            if data is None:
+                self.stats['pages_failed'] += 1
+                continue
+            self.stats['pages'] += 1
+            if self._record_file is not None:
+                self._record_file.write(json.dumps({
+                    'url': request['url'], 'params': request.get('params'), 'body': data
+                }, ensure_ascii=False) + '\n')
+            for item in self.spider.parse_response(data, keyword):
+                await items.put(item)
+
+    async def _write_batch(self, session, batch):
+        url = f"{self.spider.api_base_url}/api/spider/data/batch"
+        result = await self.request(session, 'POST', url, headers={
+            'Authorization': f'Bearer {self.spider.token}'
+        }, json={
+            'items': [{'source': self.spider.source, 'data': data} for data in batch]
+        })
+        self.stats['batches'] += 1
+        if not result or result.get('code') != 0:
+            self.stats['failed'] += len(batch)
+            logger.error(f"批量保存 {len(batch)} 条数据失败: {result.get('message') if result else '请求失败'}")
+            return
+        data = result['data']
+        self.stats['created'] += data['created']
+        self.stats['updated'] += data['updated']
+        self.stats['failed'] += data['failed']
+        for item in data['results']:
+            if item['status'] == 'error':
+                logger.error(f"数据保存失败: 第 {item['index']} 条, {item['message']}")
+
+    async def _write_worker(self, session, items):
+        batch = []
+        while True:
+            item = await items.get()
+            if item is None:
+                break
+            batch.append(item)
+            self.stats['items'] += 1
+            if len(batch) >= self.batch_size:
+                await self._write_batch(session, batch)
+                batch = []
+        if batch:
+            await self._write_batch(session, batch)
+
+    async def crawl(self, keywords, max_pages=5, start_page=1):
+        """并发抓取所有 关键词 × 页码(start_page 到 max_pages)，返回统计信息"""
+        begin = time.perf_counter()
+        connector = aiohttp.TCPConnector(limit=self.concurrency + self.writers, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        if self.record_path:
+            self._record_file = open(self.record_path, 'a', encoding='utf-8')
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                if not self.spider.token and not await self.login(session):
+                    return self.stats
+
+                tasks = asyncio.Queue()
+                for keyword in keywords:
+                    for page in range(start_page, max_pages + 1):
+                        tasks.put_nowait((keyword, page))
+                items = asyncio.Queue(maxsize=self.queue_size)
+
+                writers = [asyncio.create_task(self._write_worker(session, items)) for _ in range(self.writers)]
+                fetchers = [asyncio.create_task(self._fetch_worker(session, tasks, items))
+                            for _ in range(min(self.concurrency, tasks.qsize()))]
+                try:
+                    await asyncio.gather(*fetchers)
+                finally:
+                    for _ in writers:
+                        await items.put(None)
+                    await asyncio.gather(*writers)
+        finally:
+            if self._record_file is not None:
+                self._record_file.close()
+                self._record_file = None
+        self.stats['elapsed'] = time.perf_counter() - begin
+        logger.info(
+            f"抓取完成: 页面 {self.stats['pages']} (失败 {self.stats['pages_failed']}), "
+            f"请求 {self.stats['requests']} (重试 {self.stats['retries']}), 数据 {self.stats['items']}, "
+            f"新增 {self.stats['created']}, 更新 {self.stats['updated']}, 失败 {self.stats['failed']}, "
+            f"耗时 {self.stats['elapsed']:.2f}s"
+        )
+        return self.stats
+
+    def run(self, keywords, max_pages=5, start_page=1):
+        """在新的事件循环中运行 crawl()"""
+        return asyncio.run(self.crawl(keywords, max_pages, start_page))
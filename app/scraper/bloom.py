@@ -0,0 +1,259 @@
+"""可扩展布隆过滤器
+
+重复数据过滤管道使用，跨次运行保存已抓取项目的指纹(get_fingerprint 生成的 SHA-256)。
+
+- 由多层固定大小的布隆过滤器组成，当前层写满后新建一层，容量按 growth 倍增长，
+  误判率按 tightening 倍收紧，总误判率不超过 error_rate
+- 指纹本身就是均匀的哈希值，直接取前 16 字节做双重哈希得到各个比特位，不再重复计算哈希
+- 两种持久化方式:
+  - 文件: save() 写入临时文件后原子替换，load() 用 mmap(写时复制)映射，只有访问到的页才会读入内存
+  - Redis: 每层一个字符串键(GETBIT/SETBIT)，多个爬虫进程共享，写入即生效
+"""
+
+import os
+import math
+import mmap
+import json
+import struct
+import logging
+
+logger = logging.getLogger('bloom_filter')
+
+_MAGIC = b'TGBF'
+_VERSION = 1
+# 文件头: 魔数、版本、总误判率、层数
+_HEADER = struct.Struct('<4sHdI')
+# 层头: 容量、已写入条数、比特数、哈希函数个数、误判率
+_SLICE_HEADER = struct.Struct('<QQQId')
+
+
+def _digest(fingerprint):
+    """指纹(十六进制字符串或字节) -> 字节"""
+    if isinstance(fingerprint, str):
+        return bytes.fromhex(fingerprint)
+    return fingerprint
+
+
+class BloomSlice:
+    """单层布隆过滤器
+
+    Args:
+        capacity: 容量
+        error_rate: 写满时的误判率
+        bits: 比特数组(bytearray/mmap 切片)，None 表示新建
+        count: 已写入条数
+    """
+
+    def __init__(self, capacity, error_rate, bits=None, count=0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    @property
+    def nbytes(self):
+        return (self.num_bits + 7) // 8
+
+    def positions(self, digest):
+        # 双重哈希: h1 + i * h2
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def contains(self, digest):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self.positions(digest))
+
+    def add(self, digest):
+        bits = self.bits
+        for position in self.positions(digest):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+
+class RedisBloomSlice(BloomSlice):
+    """比特数组保存在 Redis 字符串中的单层布隆过滤器"""
+
+    def __init__(self, client, key, capacity, error_rate, count=0):
+        super().__init__(capacity, error_rate, bits=b'', count=count)
+        self.client = client
+        self.key = key
+
+    def contains(self, digest):
+        pipe = self.client.pipeline(transaction=False)
+        for position in self.positions(digest):
+            pipe.getbit(self.key, position)
+        return all(pipe.execute())
+
+    def add(self, digest):
+        pipe = self.client.pipeline(transaction=False)
+        for position in self.positions(digest):
+            pipe.setbit(self.key, position, 1)
+        pipe.execute()
+        self.count += 1
+
+
+class ScalableBloomFilter:
+    """可扩展布隆过滤器
+
+    Args:
+        initial_capacity: 第一层的容量
+        error_rate: 总误判率上限
+        growth: 每新建一层容量的增长倍数
+        tightening: 每新建一层误判率的收紧比例
+    """
+
+    def __init__(self, initial_capacity=100000, error_rate=0.001, growth=2, tightening=0.5):
+        if not 0 < error_rate < 1:
+            raise ValueError('error_rate 必须在 0 和 1 之间')
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.slices = []
+        self._mmap = None
+
+    def _next_slice_params(self):
+        index = len(self.slices)
+        capacity = self.initial_capacity * self.growth ** index
+        # 各层误判率为等比数列，总和不超过 error_rate
+        error_rate = self.error_rate * (1 - self.tightening) * self.tightening ** index
+        return capacity, error_rate
+
+    def _new_slice(self):
+        return BloomSlice(*self._next_slice_params())
+
+    def __contains__(self, fingerprint):
+        digest = _digest(fingerprint)
+        return any(layer.contains(digest) for layer in reversed(self.slices))
+
+    def __len__(self):
+        return sum(layer.count for layer in self.slices)
+
+    def add(self, fingerprint):
+        """写入指纹，返回写入前是否(可能)已存在"""
+        digest = _digest(fingerprint)
+        if any(layer.contains(digest) for layer in reversed(self.slices)):
+            return True
+        if not self.slices or self.slices[-1].full:
+            self.slices.append(self._new_slice())
+        self.slices[-1].add(digest)
+        return False
+
+    @property
+    def memory_bytes(self):
+        """比特数组占用的字节数"""
+        return sum(layer.nbytes for layer in self.slices)
+
+    def save(self, path):
+        """写入文件(先写临时文件再原子替换)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.error_rate, len(self.slices)))
+            for layer in self.slices:
+                f.write(_SLICE_HEADER.pack(layer.capacity, layer.count, layer.num_bits, layer.num_hashes,
+                                           layer.error_rate))
+                f.write(layer.bits[:layer.nbytes])
+        self.close()
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, initial_capacity=100000, error_rate=0.001, growth=2, tightening=0.5):
+        """从文件加载(mmap 写时复制映射)，文件不存在或损坏时返回空过滤器"""
+        bloom = cls(initial_capacity, error_rate, growth, tightening)
+        if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+            return bloom
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        views = []
+        try:
+            magic, version, saved_rate, count = _HEADER.unpack_from(mapped, 0)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError('文件格式不正确')
+            offset = _HEADER.size
+            for _ in range(count):
+                capacity, items, num_bits, num_hashes, layer_rate = _SLICE_HEADER.unpack_from(mapped, offset)
+                offset += _SLICE_HEADER.size
+                size = (num_bits + 7) // 8
+                if offset + size > len(mapped):
+                    raise ValueError('文件不完整')
+                views.append(memoryview(mapped)[offset:offset + size])
+                layer = BloomSlice(capacity, layer_rate, bits=views[-1], count=items)
+                if (layer.num_bits, layer.num_hashes) != (num_bits, num_hashes):
+                    raise ValueError('层参数不一致')
+                bloom.slices.append(layer)
+                offset += size
+        except (ValueError, struct.error) as e:
+            logger.warning(f"布隆过滤器文件 {path} 无法加载，重新创建: {str(e)}")
+            bloom.slices = []
+            for view in views:
+                view.release()
+            mapped.close()
+            return bloom
+        # 沿用文件中的误判率，之后新建的层按原参数继续收紧
+        bloom.error_rate = saved_rate
+        bloom._mmap = mapped
+        return bloom
+
+    def close(self):
+        """释放 mmap 映射(映射中的层复制到内存)"""
+        if self._mmap is None:
+            return
+        for layer in self.slices:
+            if isinstance(layer.bits, memoryview):
+                bits = bytearray(layer.bits)
+                layer.bits.release()
+                layer.bits = bits
+        self._mmap.close()
+        self._mmap = None
+
+
+class RedisScalableBloomFilter(ScalableBloomFilter):
+    """保存在 Redis 中的可扩展布隆过滤器
+
+    各层参数保存在 '<key>:meta'，第 i 层的比特数组和已写入条数分别保存在 '<key>:<i>'、'<key>:count:<i>'
+    """
+
+    def __init__(self, client, key, initial_capacity=100000, error_rate=0.001, growth=2, tightening=0.5):
+        super().__init__(initial_capacity, error_rate, growth, tightening)
+        self.client = client
+        self.key = key
+        raw = client.get(f'{key}:meta')
+        if raw:
+            for capacity, layer_rate in json.loads(raw):
+                self.slices.append(RedisBloomSlice(client, f'{key}:{len(self.slices)}', capacity, layer_rate))
+            counts = client.mget([f'{key}:count:{i}' for i in range(len(self.slices))])
+            for layer, count in zip(self.slices, counts):
+                layer.count = int(count or 0)
+
+    def _new_slice(self):
+        capacity, error_rate = self._next_slice_params()
+        layer = RedisBloomSlice(self.client, f'{self.key}:{len(self.slices)}', capacity, error_rate)
+        meta = [[item.capacity, item.error_rate] for item in self.slices] + [[capacity, error_rate]]
+        self.client.set(f'{self.key}:meta', json.dumps(meta))
+        return layer
+
+    def add(self, fingerprint):
+        existed = super().add(fingerprint)
+        if not existed:
+            self.client.incr(f'{self.key}:count:{len(self.slices) - 1}')
+        return existed
+
+    @property
+    def memory_bytes(self):
+        return sum(self.client.strlen(layer.key) for layer in self.slices)
+
+    def save(self, path=None):
+        """写入即生效，无需保存"""
+
+    def close(self):
+        pass
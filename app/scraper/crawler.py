@@ -1,276 +1,696 @@
 """爬虫管理器
 
-负责启动和管理网页爬虫进程
+负责调度爬虫任务和管理工作进程
+
+- 任务(爬虫, 关键词, 页码范围)按爬虫分别放入优先级堆，优先级高的先执行，同优先级按入队顺序
+- 固定数量的工作进程，每个进程有自己的任务队列，管理器只把任务派发给空闲的工作进程；
+  每个爬虫同时执行的任务数有上限，达到上限的爬虫暂时跳过，先派发其他爬虫的任务
+- 相同的任务(爬虫、关键词、页码范围都相同)已在队列中时不重复入队，只提高其优先级
+- 任务状态写入 crawl_task 表，管理器重启后未完成的任务重新入队，get_status() 从表中汇总
+- 统计工作进程的繁忙比例(利用率)和任务在队列中的等待时间，见 get_metrics()
+- Scrapy 爬虫使用的 twisted reactor 无法在同一进程中重启，执行完 Scrapy 任务的工作进程退出后重新创建
 """
 
-import os
 import time
-import json
 import queue
+import heapq
 import logging
-import schedule
+import itertools
 import threading
 import multiprocessing
+from collections import Counter, defaultdict, deque
 from datetime import datetime
 from typing import Dict, List, Optional
 
+import schedule
+import scrapy
 from flask import current_app
+from sqlalchemy import func, case
+
+from app.extensions import db
+from app.models.crawl_task import CrawlTask
+from app.scraper import settings
 from app.scraper.spiders.news_spider import NewsSpider
 from app.scraper.spiders.gov_spider import GovSpider
-from app.scraper.spiders.weibo_spider import WeiboSpider
+from app.scraper.spiders.weibo_search import WeiboSearchSpider
+from app.scraper.spiders.xinlang_search import XinlangSearchSpider
 
 # 配置日志
 logger = logging.getLogger('crawler_manager')
 logger.setLevel(logging.INFO)
 
+# 最高优先级，手动启动的爬虫使用
+PRIORITY_MAX = 9
+
+
+def _is_search_spider(spider_class) -> bool:
+    """搜索爬虫(按关键词和页码抓取)"""
+    return hasattr(spider_class, 'run_many')
+
+
+def _run_task(spider_class, task: dict, app) -> tuple:
+    """在工作进程中执行一个任务
+
+    Returns:
+        tuple: (抓取条数, 执行后是否需要重建工作进程)
+    """
+    if _is_search_spider(spider_class):
+        stats = spider_class().run_many([task['keyword']], max_pages=task['end_page'], start_page=task['start_page'])
+        return stats['items'], False
+
+    if isinstance(spider_class, type) and issubclass(spider_class, scrapy.Spider):
+        from scrapy.crawler import CrawlerProcess
+        from scrapy.settings import Settings
+
+        crawler_settings = Settings()
+        crawler_settings.setmodule(settings, priority='project')
+        process = CrawlerProcess(crawler_settings, install_root_handler=False)
+        crawler = process.create_crawler(spider_class)
+        process.crawl(crawler, **({'keyword': task['keyword']} if task['keyword'] else {}))
+        process.start()
+        return crawler.stats.get_value('item_scraped_count', 0), True
+
+    # BaseSpider 子类: 同步抓取并直接写数据库
+    spider = spider_class()
+    if app is not None:
+        with app.app_context():
+            spider.start_crawl()
+    else:
+        spider.start_crawl()
+    return spider.stats.get('items_scraped', 0), False
+
+
+def _worker_main(worker_id: int, spiders: dict, app, task_queue, result_queue) -> None:
+    """工作进程: 循环执行派发给自己的任务，结果通过 result_queue 回传给管理器"""
+    if app is not None:
+        # 不复用父进程的数据库连接
+        with app.app_context():
+            db.engine.dispose(close=False)
+    while True:
+        task = task_queue.get()
+        if task is None:
+            return
+        recycle = False
+        try:
+            items, recycle = _run_task(spiders[task['spider']], task, app)
+            result = ('success', items, None)
+        except Exception as e:
+            logger.error(f"任务 {task['id']} ({task['spider']}) 执行出错: {str(e)}")
+            logger.exception(e)
+            result = ('failed', 0, str(e))
+        # 需要重建的工作进程回传结果后退出，管理器不再向其派发任务
+        result_queue.put((task['id'], worker_id, time.time()) + result + (recycle,))
+        if recycle:
+            return
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """已排序列表的百分位数(最近秩)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(q / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
 class CrawlerManager:
     """爬虫管理器类"""
-    
-    def __init__(self, app=None):
+
+    def __init__(self, app=None, spiders=None, config=None):
         """初始化爬虫管理器
-        
+
         Args:
-            app: Flask应用实例
+            app: Flask应用实例，为None时任务状态只保存在内存中
+            spiders: 爬虫名称到爬虫类的映射，默认使用内置爬虫
+            config: 覆盖 TRUTH_GUARDIAN_SETTINGS['CRAWLER_MANAGER'] 中的配置项
         """
+        options = dict(settings.TRUTH_GUARDIAN_SETTINGS.get('CRAWLER_MANAGER', {}))
+        options.update(config or {})
         self.app = app
-        self.processes: Dict[str, multiprocessing.Process] = {}
-        self.status: Dict[str, dict] = {}
-        self.task_queue = queue.Queue()
-        self.scheduler_thread = None
-        self.monitor_thread = None
-        self.running = False
-        
+        self.num_workers = options.get('WORKERS', 4)
+        self.spider_limits = dict(options.get('SPIDER_CONCURRENCY') or {})
+        self.default_limit = options.get('DEFAULT_CONCURRENCY', 1)
+        self.search_keywords = list(options.get('SEARCH_KEYWORDS') or [])
+        self.max_pages = options.get('MAX_PAGES', 5)
+        self.poll_interval = options.get('POLL_INTERVAL', 1.0)
+
         # 爬虫类映射
-        self.spiders = {
+        self.spiders = spiders or {
             'news': NewsSpider,
             'gov': GovSpider,
-            'weibo': WeiboSpider
+            'weibo': WeiboSearchSpider,
+            'xinlang': XinlangSearchSpider
         }
-        
-        # 初始化状态
-        for spider_name in self.spiders.keys():
-            self.status[spider_name] = {
-                'status': 'stopped',
-                'last_start': None,
-                'last_end': None,
-                'error_count': 0,
-                'items_scraped': 0
-            }
-            
+
+        self.lock = threading.RLock()
+        # 每个爬虫一个优先级堆，元素为 (-优先级, 入队序号, 任务ID)
+        self.queues: Dict[str, list] = defaultdict(list)
+        # 未结束的任务
+        self.tasks: Dict[int, dict] = {}
+        # 排队中任务的去重键 -> 任务ID
+        self.queued_keys: Dict[tuple, int] = {}
+        # 执行中的任务ID -> 工作进程编号
+        self.assigned: Dict[int, int] = {}
+        self.running_by_spider = Counter()
+        self._seq = itertools.count()
+        self._memory_ids = itertools.count(1)
+        self._restored = False
+
+        self.workers: Dict[int, multiprocessing.Process] = {}
+        self.worker_queues: Dict[int, multiprocessing.Queue] = {}
+        self.idle_workers = set()
+        self.result_queue = None
+        self.scheduler_thread = None
+        self.monitor_thread = None
+        self.running = False
+        self.scheduling = False
+
+        # 指标
+        self.started_at = None
+        self.busy_seconds = 0.0
+        self.wait_samples = deque(maxlen=10000)
+        self.completed = 0
+        self.failed = 0
+        # 不持久化时的各爬虫状态
+        self.status: Dict[str, dict] = {name: self._empty_status() for name in self.spiders}
+
         logger.info("爬虫管理器初始化完成")
-    
-    def start_crawler(self, spider_name: str) -> bool:
-        """启动指定爬虫
-        
+
+    @staticmethod
+    def _empty_status() -> dict:
+        return {
+            'status': 'stopped',
+            'last_start': None,
+            'last_end': None,
+            'error_count': 0,
+            'items_scraped': 0,
+            'queued': 0,
+            'running': 0
+        }
+
+    @staticmethod
+    def _task_key(task: dict) -> tuple:
+        return task['spider'], task['keyword'] or '', task['start_page'], task['end_page']
+
+    def _limit(self, spider_name: str) -> int:
+        return self.spider_limits.get(spider_name, self.default_limit)
+
+    # ---- 持久化 ----
+
+    def _insert(self, task: dict) -> int:
+        if self.app is None:
+            return next(self._memory_ids)
+        with self.app.app_context():
+            row = CrawlTask(
+                spider=task['spider'],
+                keyword=task['keyword'],
+                start_page=task['start_page'],
+                end_page=task['end_page'],
+                priority=task['priority'],
+                status='queued',
+                created_at=datetime.fromtimestamp(task['enqueued_at'])
+            )
+            db.session.add(row)
+            db.session.commit()
+            return row.id
+
+    def _update(self, task_ids, **fields) -> None:
+        if self.app is None:
+            return
+        if isinstance(task_ids, int):
+            task_ids = [task_ids]
+        with self.app.app_context():
+            CrawlTask.query.filter(CrawlTask.id.in_(task_ids)).update(fields, synchronize_session=False)
+            db.session.commit()
+
+    def _restore(self) -> None:
+        """从 crawl_task 表恢复未完成的任务(上次运行中断的任务重新排队)"""
+        if self._restored or self.app is None:
+            return
+        self._restored = True
+        with self.app.app_context():
+            rows = CrawlTask.query.filter(CrawlTask.status.in_(('queued', 'running'))).order_by(CrawlTask.id).all()
+            interrupted = [row.id for row in rows if row.status == 'running']
+            tasks = [{
+                'id': row.id,
+                'spider': row.spider,
+                'keyword': row.keyword,
+                'start_page': row.start_page,
+                'end_page': row.end_page,
+                'priority': row.priority
+            } for row in rows if row.spider in self.spiders]
+        if interrupted:
+            self._update(interrupted, status='queued', worker=None, started_at=None)
+            logger.warning(f"{len(interrupted)} 个上次运行中断的任务重新排队")
+        now = time.time()
+        for task in tasks:
+            task['enqueued_at'] = now
+            self._enqueue(task)
+        if tasks:
+            logger.info(f"恢复 {len(tasks)} 个未完成的任务")
+
+    # ---- 任务队列 ----
+
+    def _enqueue(self, task: dict) -> None:
+        task['status'] = 'queued'
+        self.tasks[task['id']] = task
+        self.queued_keys[self._task_key(task)] = task['id']
+        heapq.heappush(self.queues[task['spider']], (-task['priority'], next(self._seq), task['id']))
+
+    def _valid(self, entry: tuple) -> bool:
+        """堆中的条目是否仍有效(任务仍在排队且优先级未被提高)"""
+        task = self.tasks.get(entry[2])
+        return task is not None and task['status'] == 'queued' and task['priority'] == -entry[0]
+
+    def _pop_ready(self) -> Optional[dict]:
+        """取出未达到并发上限的爬虫中优先级最高的任务"""
+        best = None
+        for spider_name, heap in self.queues.items():
+            if self.running_by_spider[spider_name] >= self._limit(spider_name):
+                continue
+            while heap and not self._valid(heap[0]):
+                heapq.heappop(heap)
+            if heap and (best is None or heap[0] < self.queues[best][0]):
+                best = spider_name
+        if best is None:
+            return None
+        return self.tasks[heapq.heappop(self.queues[best])[2]]
+
+    def _dispatch(self) -> None:
+        """把任务派发给空闲的工作进程"""
+        if not self.running:
+            return
+        while self.idle_workers:
+            task = self._pop_ready()
+            if task is None:
+                break
+            worker_id = min(self.idle_workers)
+            self.idle_workers.discard(worker_id)
+            now = time.time()
+            task['status'] = 'running'
+            task['started_at'] = now
+            del self.queued_keys[self._task_key(task)]
+            self.assigned[task['id']] = worker_id
+            self.running_by_spider[task['spider']] += 1
+            self.wait_samples.append(max(0.0, now - task['enqueued_at']))
+            self.status[task['spider']]['last_start'] = datetime.fromtimestamp(now)
+            self.worker_queues[worker_id].put(
+                {key: task[key] for key in ('id', 'spider', 'keyword', 'start_page', 'end_page')}
+            )
+            self._update(task['id'], status='running', worker=worker_id, started_at=datetime.fromtimestamp(now))
+
+    def _finish(self, task_id: int, finished_at: float, status: str, items: int = 0, error: str = None) -> None:
+        task = self.tasks.pop(task_id, None)
+        self.assigned.pop(task_id, None)
+        if task is None:
+            return
+        self.running_by_spider[task['spider']] -= 1
+        if task.get('started_at'):
+            self.busy_seconds += finished_at - task['started_at']
+        if status == 'failed':
+            self.failed += 1
+        elif status == 'success':
+            self.completed += 1
+        spider_status = self.status[task['spider']]
+        spider_status['last_end'] = datetime.fromtimestamp(finished_at)
+        spider_status['items_scraped'] += items
+        spider_status['error_count'] += status == 'failed'
+        self._update(task_id, status=status, items=items, error=error,
+                     finished_at=datetime.fromtimestamp(finished_at))
+
+    def _handle(self, event: tuple) -> None:
+        """处理工作进程回传的任务结果"""
+        task_id, worker_id, finished_at, status, items, error, recycle = event
+        if self.assigned.get(task_id) == worker_id:
+            self._finish(task_id, finished_at, status, items, error)
+        if not recycle and worker_id in self.workers:
+            self.idle_workers.add(worker_id)
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                event = self.result_queue.get_nowait()
+            except queue.Empty:
+                return
+            self._handle(event)
+
+    # ---- 工作进程 ----
+
+    def _spawn(self, worker_id: int) -> None:
+        task_queue = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(worker_id, self.spiders, self.app, task_queue, self.result_queue),
+            daemon=True
+        )
+        process.start()
+        self.workers[worker_id] = process
+        self.worker_queues[worker_id] = task_queue
+        self.idle_workers.add(worker_id)
+
+    def _check_workers(self) -> None:
+        """重建退出的工作进程，异常退出时其正在执行的任务记为失败"""
+        dead = [worker_id for worker_id, process in self.workers.items() if not process.is_alive()]
+        if not dead:
+            return
+        # 工作进程退出前回传的结果先处理掉
+        self._drain()
+        now = time.time()
+        for worker_id in dead:
+            process = self.workers[worker_id]
+            self.idle_workers.discard(worker_id)
+            for task_id, assigned_worker in list(self.assigned.items()):
+                if assigned_worker == worker_id:
+                    logger.warning(f"工作进程 {worker_id} 异常退出(退出码 {process.exitcode})，任务 {task_id} 失败")
+                    self._finish(task_id, now, 'failed', error=f'工作进程异常退出(退出码 {process.exitcode})')
+            process.join(timeout=0)
+            self.worker_queues.pop(worker_id).close()
+            if self.running:
+                self._spawn(worker_id)
+            else:
+                del self.workers[worker_id]
+
+    def start(self) -> bool:
+        """启动工作进程和派发线程"""
+        with self.lock:
+            if self.running:
+                logger.warning("爬虫管理器已在运行")
+                return False
+            self._restore()
+            self.result_queue = multiprocessing.Queue()
+            self.running = True
+            self.started_at = time.time()
+            self.busy_seconds = 0.0
+            for worker_id in range(self.num_workers):
+                self._spawn(worker_id)
+
+            # 启动监控线程
+            self.monitor_thread = threading.Thread(target=self._monitor_crawlers)
+            self.monitor_thread.daemon = True
+            self.monitor_thread.start()
+            self._dispatch()
+        logger.info(f"爬虫管理器启动成功，工作进程数: {self.num_workers}")
+        return True
+
+    def stop(self, timeout: float = 5) -> bool:
+        """停止派发并关闭工作进程，未执行完的任务重新排队(下次启动时继续执行)
+
+        Args:
+            timeout: 等待每个工作进程结束当前任务的秒数，超时后强制结束
+        """
+        with self.lock:
+            if not self.running:
+                return False
+            self.running = False
+        if self.monitor_thread:
+            self.monitor_thread.join(timeout=self.poll_interval + 5)
+        for task_queue in self.worker_queues.values():
+            task_queue.put(None)
+        for process in self.workers.values():
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+        with self.lock:
+            self._drain()
+            interrupted = list(self.assigned)
+            for task_id in interrupted:
+                task = self.tasks[task_id]
+                self.running_by_spider[task['spider']] -= 1
+                task['started_at'] = None
+                self._enqueue(task)
+            self.assigned.clear()
+            if interrupted:
+                self._update(interrupted, status='queued', worker=None, started_at=None)
+            for task_queue in self.worker_queues.values():
+                task_queue.close()
+            self.workers.clear()
+            self.worker_queues.clear()
+            self.idle_workers.clear()
+            self.result_queue.close()
+        logger.info("爬虫管理器已停止")
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待所有任务执行完成
+
+        Returns:
+            bool: 超时前是否全部完成
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self.lock:
+                if not self.tasks:
+                    return True
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def start_crawler(self, spider_name: str, keyword: Optional[str] = None, start_page: int = 1,
+                      end_page: Optional[int] = None) -> bool:
+        """以最高优先级启动指定爬虫
+
         Args:
             spider_name: 爬虫名称
-            
+            keyword: 搜索关键词，搜索爬虫不指定时使用配置的全部关键词
+            start_page: 起始页
+            end_page: 结束页，默认使用配置的 MAX_PAGES
+
         Returns:
             bool: 是否成功启动
         """
-        if spider_name not in self.spiders:
-            logger.error(f"未知的爬虫类型: {spider_name}")
-            return False
-        
-        if spider_name in self.processes and self.processes[spider_name].is_alive():
-            logger.warning(f"爬虫 {spider_name} 已在运行")
+        if keyword or not _is_search_spider(self.spiders.get(spider_name)):
+            task_ids = [self.add_task(spider_name, PRIORITY_MAX, keyword, start_page, end_page)]
+        else:
+            task_ids = self._add_default_tasks(spider_name, PRIORITY_MAX)
+        if not task_ids or None in task_ids:
             return False
-            
-        try:
-            # 创建爬虫进程
-            process = multiprocessing.Process(
-                target=self._run_spider,
-                args=(spider_name, self.spiders[spider_name])
-            )
-            process.start()
-        
-            # 更新状态
-        self.processes[spider_name] = process
-            self.status[spider_name].update({
-                'status': 'running',
-                'last_start': datetime.now(),
-                'error_count': 0
-            })
-            
-            logger.info(f"爬虫 {spider_name} 启动成功")
+        if not self.running:
+            self.start()
+        logger.info(f"爬虫 {spider_name} 启动成功")
         return True
-    
-        except Exception as e:
-            logger.error(f"启动爬虫 {spider_name} 失败: {str(e)}")
-            self.status[spider_name]['error_count'] += 1
-            return False
-            
+
     def stop_crawler(self, spider_name: str) -> bool:
-        """停止指定爬虫
-        
+        """停止指定爬虫: 取消排队中的任务，结束正在执行其任务的工作进程
+
         Args:
             spider_name: 爬虫名称
-            
+
         Returns:
             bool: 是否成功停止
         """
-        if spider_name not in self.processes:
-            logger.warning(f"爬虫 {spider_name} 未运行")
-            return False
-            
-        try:
-            process = self.processes[spider_name]
-            if process.is_alive():
-                process.terminate()
-                process.join(timeout=5)
-                
-            # 更新状态
-            self.status[spider_name].update({
-                'status': 'stopped',
-                'last_end': datetime.now()
-            })
-            
-            del self.processes[spider_name]
-            logger.info(f"爬虫 {spider_name} 已停止")
-            return True
-            
-        except Exception as e:
-            logger.error(f"停止爬虫 {spider_name} 失败: {str(e)}")
-            return False
-            
+        with self.lock:
+            cancelled = [task_id for task_id, task in self.tasks.items()
+                         if task['spider'] == spider_name and task['status'] == 'queued']
+            running = [task_id for task_id, task in self.tasks.items()
+                       if task['spider'] == spider_name and task['status'] != 'queued']
+            if not cancelled and not running:
+                logger.warning(f"爬虫 {spider_name} 未运行")
+                return False
+            for task_id in cancelled:
+                task = self.tasks.pop(task_id)
+                del self.queued_keys[self._task_key(task)]
+            if cancelled:
+                self._update(cancelled, status='cancelled', finished_at=datetime.now())
+            now = time.time()
+            for task_id in running:
+                worker_id = self.assigned[task_id]
+                self.workers[worker_id].terminate()
+                self.workers[worker_id].join(timeout=5)
+                self._finish(task_id, now, 'cancelled')
+            # 重建被结束的工作进程
+            self._check_workers()
+            self._dispatch()
+        logger.info(f"爬虫 {spider_name} 已停止")
+        return True
+
     def start_scheduler(self) -> bool:
-        """启动调度器"""
+        """启动调度器(工作进程和定时任务)"""
         if self.scheduler_thread and self.scheduler_thread.is_alive():
             logger.warning("调度器已在运行")
             return False
-            
+
         try:
-            self.running = True
-            
+            self.start()
+            self.scheduling = True
+
             # 启动调度器线程
             self.scheduler_thread = threading.Thread(target=self._run_scheduler)
             self.scheduler_thread.daemon = True
             self.scheduler_thread.start()
-            
-            # 启动监控线程
-            self.monitor_thread = threading.Thread(target=self._monitor_crawlers)
-            self.monitor_thread.daemon = True
-            self.monitor_thread.start()
-            
+
             logger.info("调度器启动成功")
             return True
-            
+
         except Exception as e:
             logger.error(f"启动调度器失败: {str(e)}")
             return False
-            
+
     def stop_scheduler(self) -> bool:
         """停止调度器"""
         if not self.scheduler_thread or not self.scheduler_thread.is_alive():
             logger.warning("调度器未运行")
-        return False
-    
+            return False
+
         try:
-            self.running = False
-            
-            # 停止所有爬虫
-        for spider_name in list(self.processes.keys()):
-            self.stop_crawler(spider_name)
-                
-            # 等待线程结束
-            if self.scheduler_thread:
-                self.scheduler_thread.join(timeout=5)
-            if self.monitor_thread:
-                self.monitor_thread.join(timeout=5)
-                
+            self.scheduling = False
+            self.scheduler_thread.join(timeout=5)
+            self.stop()
             logger.info("调度器已停止")
             return True
-            
+
         except Exception as e:
             logger.error(f"停止调度器失败: {str(e)}")
             return False
-            
-    def add_task(self, spider_name: str, priority: int = 0) -> bool:
+
+    def add_task(self, spider_name: str, priority: int = 0, keyword: Optional[str] = None,
+                 start_page: int = 1, end_page: Optional[int] = None) -> Optional[int]:
         """添加爬虫任务到队列
-        
+
         Args:
             spider_name: 爬虫名称
             priority: 优先级(0-9)，数字越大优先级越高
-            
+            keyword: 搜索关键词(搜索爬虫必填)
+            start_page: 起始页
+            end_page: 结束页，搜索爬虫默认使用配置的 MAX_PAGES
+
         Returns:
-            bool: 是否成功添加
+            Optional[int]: 任务ID，相同任务已在队列中时返回已有任务的ID，失败返回None
         """
         if spider_name not in self.spiders:
             logger.error(f"未知的爬虫类型: {spider_name}")
-            return False
-            
+            return None
+        if _is_search_spider(self.spiders[spider_name]):
+            if not keyword:
+                logger.error(f"搜索爬虫 {spider_name} 需要指定关键词")
+                return None
+            end_page = end_page or self.max_pages
+
         try:
-            self.task_queue.put((priority, spider_name))
-            logger.info(f"已添加任务: {spider_name} (优先级: {priority})")
-            return True
+            with self.lock:
+                self._restore()
+                task = {
+                    'spider': spider_name,
+                    'keyword': keyword,
+                    'start_page': start_page,
+                    'end_page': end_page,
+                    'priority': priority,
+                    'enqueued_at': time.time()
+                }
+                task_id = self.queued_keys.get(self._task_key(task))
+                if task_id is not None:
+                    queued = self.tasks[task_id]
+                    if priority > queued['priority']:
+                        # 旧的堆条目出堆时因优先级不一致被跳过
+                        queued['priority'] = priority
+                        heapq.heappush(self.queues[spider_name], (-priority, next(self._seq), task_id))
+                        self._update(task_id, priority=priority)
+                    logger.info(f"任务已在队列中: {spider_name} {keyword or ''} (任务ID: {task_id}，优先级: {queued['priority']})")
+                    return task_id
+                task['id'] = self._insert(task)
+                self._enqueue(task)
+                self._dispatch()
+            logger.info(f"已添加任务: {spider_name} {keyword or ''} (任务ID: {task['id']}，优先级: {priority})")
+            return task['id']
         except Exception as e:
             logger.error(f"添加任务失败: {str(e)}")
-            return False
-            
+            return None
+
+    def _add_default_tasks(self, spider_name: str, priority: int = 0) -> List[Optional[int]]:
+        """按配置添加爬虫的任务，搜索爬虫每个关键词一个任务"""
+        if _is_search_spider(self.spiders.get(spider_name)):
+            return [self.add_task(spider_name, priority, keyword) for keyword in self.search_keywords]
+        return [self.add_task(spider_name, priority)]
+
     def get_status(self) -> Dict[str, dict]:
-        """获取所有爬虫状态"""
-        return self.status
-        
-    def _run_spider(self, spider_name: str, spider_class) -> None:
-        """在进程中运行爬虫
-        
-        Args:
-            spider_name: 爬虫名称
-            spider_class: 爬虫类
-        """
-        try:
+        """获取所有爬虫状态(持久化时从 crawl_task 表汇总，管理器重启后仍然有效)"""
+        if self.app is None:
+            with self.lock:
+                result = {name: dict(status, queued=0, running=0) for name, status in self.status.items()}
+                for task in self.tasks.values():
+                    result[task['spider']][task['status']] += 1
+        else:
+            result = {name: self._empty_status() for name in self.spiders}
             with self.app.app_context():
-                # 获取配置
-                settings = current_app.config.get('TRUTH_GUARDIAN_SETTINGS', {})
-                
-                # 创建爬虫实例
-                spider = spider_class()
-                spider.custom_settings = {
-                    'TRUTH_GUARDIAN_SETTINGS': settings,
-                    'FLASK_APP': current_app
+                rows = db.session.query(
+                    CrawlTask.spider,
+                    func.max(CrawlTask.started_at),
+                    func.max(CrawlTask.finished_at),
+                    func.sum(case((CrawlTask.status == 'failed', 1), else_=0)),
+                    func.sum(CrawlTask.items),
+                    func.sum(case((CrawlTask.status == 'queued', 1), else_=0)),
+                    func.sum(case((CrawlTask.status == 'running', 1), else_=0))
+                ).group_by(CrawlTask.spider).all()
+            for spider_name, last_start, last_end, errors, items, queued, running in rows:
+                if spider_name in result:
+                    result[spider_name].update({
+                        'last_start': last_start,
+                        'last_end': last_end,
+                        'error_count': int(errors or 0),
+                        'items_scraped': int(items or 0),
+                        'queued': int(queued or 0),
+                        'running': int(running or 0)
+                    })
+        for status in result.values():
+            status['status'] = 'running' if status['running'] else 'queued' if status['queued'] else 'stopped'
+        return result
+
+    def get_metrics(self) -> dict:
+        """工作进程利用率和任务排队等待时间(本次启动以来)"""
+        with self.lock:
+            now = time.time()
+            uptime = now - self.started_at if self.started_at else 0.0
+            busy = self.busy_seconds + sum(now - task['started_at'] for task in self.tasks.values()
+                                           if task.get('started_at'))
+            waits = sorted(self.wait_samples)
+            return {
+                'workers': self.num_workers,
+                'uptime': round(uptime, 3),
+                'utilization': round(busy / (uptime * self.num_workers), 4) if uptime else 0.0,
+                'queued': sum(task['status'] == 'queued' for task in self.tasks.values()),
+                'running': len(self.assigned),
+                'idle_workers': len(self.idle_workers),
+                'completed': self.completed,
+                'failed': self.failed,
+                'queue_wait': {
+                    'count': len(waits),
+                    'avg': round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    'p50': round(_percentile(waits, 50), 3),
+                    'p95': round(_percentile(waits, 95), 3),
+                    'max': round(waits[-1], 3) if waits else 0.0
                 }
-                
-                # 运行爬虫
-                spider.start_crawl()
-                
-        except Exception as e:
-            logger.error(f"爬虫 {spider_name} 运行出错: {str(e)}")
-            logger.exception(e)
-            self.status[spider_name]['error_count'] += 1
-            
+            }
+
     def _run_scheduler(self) -> None:
         """运行调度器"""
         # 设置定时任务
-        schedule.every().day.at("00:00").do(self.crawl_all)
-        schedule.every().hour.do(self._check_tasks)
-        
-        while self.running:
-            schedule.run_pending()
+        scheduler = schedule.Scheduler()
+        scheduler.every().day.at("00:00").do(self.crawl_all)
+        scheduler.every().hour.do(self._check_tasks)
+
+        while self.scheduling:
+            scheduler.run_pending()
             time.sleep(1)
-            
+
     def _monitor_crawlers(self) -> None:
-        """监控爬虫状态"""
+        """处理工作进程回传的事件，重建退出的工作进程，派发任务"""
         while self.running:
             try:
-                # 检查进程状态
-                for spider_name, process in list(self.processes.items()):
-                    if not process.is_alive():
-                        logger.warning(f"爬虫 {spider_name} 异常退出，尝试重启")
-                        self.stop_crawler(spider_name)
-                        self.start_crawler(spider_name)
-                        
-                # 处理任务队列
-                while not self.task_queue.empty():
-                    priority, spider_name = self.task_queue.get()
-                    if spider_name not in self.processes or not self.processes[spider_name].is_alive():
-                        self.start_crawler(spider_name)
-                        
+                try:
+                    event = self.result_queue.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    event = None
+                with self.lock:
+                    if event is not None:
+                        self._handle(event)
+                    self._drain()
+                    self._check_workers()
+                    self._dispatch()
+
             except Exception as e:
                 logger.error(f"监控线程出错: {str(e)}")
                 logger.exception(e)
-                
-            time.sleep(60)  # 每分钟检查一次
-            
+                time.sleep(self.poll_interval)
+
     def _check_tasks(self) -> None:
         """检查并执行定时任务"""
         try:
@@ -278,31 +698,31 @@ class CrawlerManager:
             with self.app.app_context():
                 settings = current_app.config.get('TRUTH_GUARDIAN_SETTINGS', {})
                 schedules = settings.get('SCHEDULES', {})
-                
+
             # 检查每个爬虫的调度时间
             current_hour = datetime.now().hour
             for spider_name, schedule_hours in schedules.items():
                 if current_hour in schedule_hours:
-                    self.add_task(spider_name)
-                    
+                    self._add_default_tasks(spider_name)
+
         except Exception as e:
             logger.error(f"检查任务出错: {str(e)}")
             logger.exception(e)
-            
+
     def crawl_all(self) -> None:
-        """启动所有爬虫"""
+        """为所有爬虫添加任务"""
         for spider_name in self.spiders.keys():
-            self.add_task(spider_name)
+            self._add_default_tasks(spider_name)
 
 # 创建一个全局的爬虫管理器实例
 crawler_manager = None
 
 def init_crawler(app=None):
     """初始化爬虫管理器
-    
+
     Args:
         app: Flask应用实例
-    
+
     Returns:
         CrawlerManager: 爬虫管理器实例
     """
@@ -313,11 +733,11 @@ def init_crawler(app=None):
 
 def get_crawler_manager():
     """获取爬虫管理器实例
-    
+
     Returns:
         CrawlerManager: 爬虫管理器实例
     """
     global crawler_manager
     if crawler_manager is None:
         crawler_manager = CrawlerManager()
-    return crawler_manager 
\ No newline at end of file
+    return crawler_manager
@@ -3,34 +3,29 @@
 负责对爬取的数据进行清洗，去除HTML标签、广告内容等
 """
 
-import re
 import logging
 from scrapy.exceptions import DropItem
 
+from app.scraper.ad_filter import get_ad_filter
+from app.utils.text_normalize import TextNormalizer
+
 # 配置日志
 logger = logging.getLogger('data_clean_pipeline')
 logger.setLevel(logging.INFO)
 
+# 文本清洗结果缓存条数
+TEXT_CACHE_SIZE = 4096
+
 class DataCleanPipeline:
     """数据清洗管道，处理爬取的原始数据"""
     
     def __init__(self):
         """初始化清洗管道"""
-        # 广告关键词列表
-        self.ad_keywords = [
-            '广告', '推广', '赞助', '点击购买', '限时优惠',
-            '联系电话', '推荐使用', '购买链接', '折扣', '促销',
-            '联系我们', '微信号', 'QQ群', '加入我们', '转发有奖'
-        ]
+        # 广告过滤器(与数据处理器共用)
+        self.ad_filter = get_ad_filter()
         
-        # 广告模式正则表达式
-        self.ad_patterns = [
-            r'([购领][买取][链方地][接式址][：:].+)',
-            r'([加关]入?[我官]们?的?[微群].{1,10}[：:].{5,30})',
-            r'([联微][系信][方电][式话][：:].{5,15})',
-            r'((?:http|https|www).+?(?:\.com|\.cn|\.net))',
-            r'([送优][礼惠][：:].+)',
-        ]
+        # 文本清洗器，同一内容反复抓取时直接命中缓存
+        self.normalizer = TextNormalizer('clean', cache_size=TEXT_CACHE_SIZE)
         
         logger.info("数据清洗管道初始化完成")
     
@@ -82,22 +77,7 @@ class DataCleanPipeline:
         Returns:
             str: 清洗后的文本
         """
-        if not text:
-            return ""
-            
-        # 替换HTML标签
-        text = re.sub(r'<[^>]+>', ' ', text)
-        
-        # 替换多余空白字符
-        text = re.sub(r'\s+', ' ', text)
-        
-        # 替换特殊字符
-        text = re.sub(r'[^\w\s\u4e00-\u9fff。，、；：""（）《》？！]', '', text)
-        
-        # 移除空行
-        text = re.sub(r'\n\s*\n', '\n', text)
-        
-        return text.strip()
+        return self.normalizer.normalize(text)
     
     def filter_ads(self, text):
         """过滤广告内容
@@ -108,30 +88,4 @@ class DataCleanPipeline:
         Returns:
             str: 过滤后的内容
         """
-        # 根据广告关键词拆分文本，然后过滤包含关键词的段落
-        paragraphs = re.split(r'\n+', text)
-        filtered_paragraphs = []
-        
-        for para in paragraphs:
-            is_ad = False
-            
-            # 检查是否包含广告关键词
-            for keyword in self.ad_keywords:
-                if keyword in para:
-                    is_ad = True
-                    break
-            
-            # 检查是否匹配广告模式
-            if not is_ad:
-                for pattern in self.ad_patterns:
-                    if re.search(pattern, para):
-                        is_ad = True
-                        break
-            
-            # 如果不是广告，保留这个段落
-            if not is_ad:
-                filtered_paragraphs.append(para)
-        
-        # 重新连接过滤后的段落
-        filtered_text = '\n'.join(filtered_paragraphs)
-        return filtered_text 
\ No newline at end of file
+        return self.ad_filter.filter(text)
@@ -1,263 +1,381 @@
 """数据库存储管道
 
 将爬取的数据存储到数据库中
+
+项目先缓存在内存中，每攒够 BATCH_SIZE 条或距上次写入超过 FLUSH_INTERVAL 秒时批量写入:
+每张表一次 IN 查询找出已存在的记录，新记录多行 upsert(MySQL 为 ON DUPLICATE KEY UPDATE，
+SQLite/PostgreSQL 为 ON CONFLICT DO UPDATE)，已存在的记录按项目中出现的字段批量 UPDATE，
+一批只提交一次。同一批内唯一键重复的项目合并，后出现的字段覆盖先出现的。
+
+写入失败时回滚并保留缓存，下次再试，连续失败 MAX_RETRIES 次后丢弃这一批。
+缓存超过 MAX_BUFFER 条时先同步写入，仍写不进去则延迟处理后续项目(背压)，避免数据库
+不可用时内存无限增长。爬虫关闭时写入剩余数据，并在爬虫统计中记录写入次数、批大小和耗时。
+
+配置见 TRUTH_GUARDIAN_SETTINGS['DB_STORAGE']。
 """
 
 import json
+import time
 import logging
 from datetime import datetime
+
 from scrapy.exceptions import DropItem
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import bindparam, select
+
+from app.scraper import settings
+from app.utils.upsert import upsert_rows
 
 # 配置日志
 logger = logging.getLogger('db_storage_pipeline')
 logger.setLevel(logging.INFO)
 
+# 项目类型: (唯一键, 统计名称, 模型名, 需要序列化为 JSON 字符串的字段)
+ITEM_TYPES = (
+    ('news_id', 'news', 'NewsData', ('media', 'tags')),
+    ('rumor_id', 'rumor', 'RumorData', ('media', 'tags')),
+    ('post_id', 'social', 'SocialMediaData', ('media', 'tags', 'topics')),
+)
+
+# IN 查询每批的参数个数
+IN_BATCH_SIZE = 500
+
+
 class DatabaseStoragePipeline:
-    """数据库存储管道，将爬取的数据保存到数据库"""
-    
-    def __init__(self):
+    """数据库存储管道，将爬取的数据批量保存到数据库
+
+    Args:
+        batch_size: 每批写入的条数
+        flush_interval: 最长写入间隔(秒)，0 表示只按条数写入
+        max_buffer: 缓存条数上限，超过后对后续项目施加背压
+        retry_delay: 背压时延迟处理项目的时间(秒)
+        max_retries: 一批数据连续写入失败的最大次数
+        stats: Scrapy 统计收集器
+    """
+
+    def __init__(self, batch_size=200, flush_interval=5, max_buffer=2000, retry_delay=1.0, max_retries=3,
+                 stats=None):
         """初始化存储管道"""
         self.app = None
         self.db = None
-        self.NewsData = None
-        self.RumorData = None
-        self.SocialMediaData = None
+        self.models = {}
+        self.term_vector_service = None
+        self.near_duplicate_service = None
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_buffer = max(self.batch_size, max_buffer)
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.stats = stats
+        # 统计名称 -> {唯一键: 字段}
+        self.buffers = {name: {} for _, name, _, _ in ITEM_TYPES}
+        self.failures = 0
+        self._skipped = 0
+        self.last_flush = time.monotonic()
+        self._flush_loop = None
         self.items_count = {
             'news': 0,
             'rumor': 0,
             'social': 0
         }
+        self.flush_stats = {
+            'flushes': 0,
+            'items': 0,
+            'updated': 0,
+            'max_batch_size': 0,
+            'total_latency': 0.0,
+            'max_latency': 0.0,
+            'errors': 0,
+            'dropped': 0,
+            'backpressure': 0
+        }
         logger.info("数据库存储管道初始化完成")
-    
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        config = settings.TRUTH_GUARDIAN_SETTINGS.get('DB_STORAGE', {})
+        return cls(
+            batch_size=config.get('BATCH_SIZE', 200),
+            flush_interval=config.get('FLUSH_INTERVAL', 5),
+            max_buffer=config.get('MAX_BUFFER', 2000),
+            retry_delay=config.get('RETRY_DELAY', 1.0),
+            max_retries=config.get('MAX_RETRIES', 3),
+            stats=crawler.stats
+        )
+
+    @property
+    def buffered(self):
+        return sum(len(buffer) for buffer in self.buffers.values())
+
     def open_spider(self, spider):
         """爬虫启动时调用
-        
+
         Args:
             spider: 爬虫实例
         """
         # 获取Flask应用实例和数据库模型
         self.app = spider.settings.get('FLASK_APP')
-        
+
         if not self.app:
             logger.warning("未找到Flask应用实例，将无法存储数据到数据库")
             return
-            
+
         # 导入数据库和模型
         from app import db
-        from app.models.news_data import NewsData, RumorData, SocialMediaData
-        
+        from app.models import news_data
+        from app.services import near_duplicate_service, term_vector_service
+
         self.db = db
-        self.NewsData = NewsData
-        self.RumorData = RumorData
-        self.SocialMediaData = SocialMediaData
-        
+        self.models = {name: getattr(news_data, model) for _, name, model, _ in ITEM_TYPES}
+        self.term_vector_service = term_vector_service
+        self.near_duplicate_service = near_duplicate_service
+        self.last_flush = time.monotonic()
+
+        # 爬虫空闲时也按时间间隔写入
+        from twisted.internet import reactor, task
+        if self.flush_interval and reactor.running:
+            self._flush_loop = task.LoopingCall(self._flush_if_due)
+            self._flush_loop.start(self.flush_interval, now=False)
+
         logger.info(f"数据库存储管道已启动: {spider.name}")
-    
+
     def process_item(self, item, spider):
         """处理爬取的项目
-        
+
         Args:
             item: 爬取的项目
             spider: 爬虫实例
-            
+
         Returns:
-            item: 处理后的项目
+            item: 处理后的项目；缓存已满且无法写入时返回延迟处理的 Deferred
         """
         if not self.app or not self.db:
             logger.warning("未初始化数据库连接，跳过数据存储")
             return item
-            
-        try:
-            # 创建应用上下文
-            with self.app.app_context():
-                # 根据项目类型选择保存方式
-                if 'news_id' in item:
-                    self._save_news_item(item)
-                elif 'rumor_id' in item:
-                    self._save_rumor_item(item)
-                elif 'post_id' in item:
-                    self._save_social_item(item)
-                else:
-                    logger.warning(f"未知项目类型: {item}")
-                    return item
-        except Exception as e:
-            logger.error(f"保存数据时出错: {str(e)}")
-            raise DropItem(f"保存数据失败: {str(e)}")
-            
+
+        item_type = next((item_type for item_type in ITEM_TYPES if item_type[0] in item), None)
+        if item_type is None:
+            logger.warning(f"未知项目类型: {item}")
+            return item
+
+        if self.buffered >= self.max_buffer:
+            # 背压: 先尝试同步写入，仍然写不进去则延迟处理
+            self.flush()
+            if self.buffered >= self.max_buffer:
+                self.flush_stats['backpressure'] += 1
+                from twisted.internet import reactor, task
+                return task.deferLater(reactor, self.retry_delay, self.process_item, item, spider)
+
+        key, name, _, json_fields = item_type
+        values = {}
+        for field, value in dict(item).items():
+            if field in json_fields:
+                value = json.dumps(value) if value else None
+            values[field] = value
+        if not values.get(key):
+            raise DropItem(f"缺少 {key}")
+        self.buffers[name].setdefault(values[key], {}).update(values)
+
+        if self.buffered >= self.batch_size:
+            self.flush()
+        else:
+            self._flush_if_due()
         return item
-    
-    def _save_news_item(self, item):
-        """保存新闻项目
-        
-        Args:
-            item: 新闻项目
-        """
-        try:
-            # 检查是否已存在
-            existing = self.NewsData.query.filter_by(news_id=item['news_id']).first()
-            
-            if existing:
-                # 更新已有记录
-                for key, value in item.items():
-                    if key != 'news_id' and hasattr(existing, key):
-                        if key in ['media', 'tags']:
-                            value = json.dumps(value) if value else None
-                        setattr(existing, key, value)
-                
-                existing.crawl_time = datetime.now()
-                self.db.session.commit()
-                logger.info(f"更新新闻: {item['title']}")
-                
-            else:
-                # 创建新记录
-                news_data = self.NewsData(
-                    news_id=item['news_id'],
-                    title=item['title'],
-                    content=item['content'],
-                    summary=item.get('summary'),
-                    source=item.get('source'),
-                    url=item.get('url'),
-                    pub_date=item.get('pub_date'),
-                    crawl_time=datetime.now(),
-                    author=item.get('author'),
-                    category=item.get('category'),
-                    tags=json.dumps(item['tags']) if 'tags' in item and item['tags'] else None,
-                    media=json.dumps(item['media']) if 'media' in item and item['media'] else None,
-                    source_type=item.get('source_type'),
-                    recommendation_level=item.get('recommendation_level', 0),
-                    keyword_match=item.get('keyword_match', 0.0),
-                    processed=False
-                )
-                
-                self.db.session.add(news_data)
-                self.db.session.commit()
-                self.items_count['news'] += 1
-                logger.info(f"保存新闻: {item['title']}")
-                
-        except SQLAlchemyError as e:
-            self.db.session.rollback()
-            logger.error(f"保存新闻出错: {str(e)}")
-            raise
-    
-    def _save_rumor_item(self, item):
-        """保存谣言项目
-        
-        Args:
-            item: 谣言项目
+
+    def _flush_if_due(self):
+        if self.flush_interval and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """把缓存中的项目写入数据库
+
+        Returns:
+            bool: 是否写入成功(缓存为空时也返回 True)
         """
+        self.last_flush = time.monotonic()
+        batch_size = self.buffered
+        if not batch_size or not self.app:
+            return True
+
+        begin = time.perf_counter()
+        self._skipped = 0
         try:
-            # 检查是否已存在
-            existing = self.RumorData.query.filter_by(rumor_id=item['rumor_id']).first()
-            
-            if existing:
-                # 更新已有记录
-                for key, value in item.items():
-                    if key != 'rumor_id' and hasattr(existing, key):
-                        if key in ['media', 'tags']:
-                            value = json.dumps(value) if value else None
-                        setattr(existing, key, value)
-                
-                existing.crawl_time = datetime.now()
-                self.db.session.commit()
-                logger.info(f"更新谣言: {item['title']}")
-                
+            with self.app.app_context():
+                counts = self._write_buffers()
+        except Exception as e:
+            self.failures += 1
+            self.flush_stats['errors'] += 1
+            if self.failures >= self.max_retries:
+                logger.error(f"批量保存连续失败 {self.failures} 次，丢弃 {batch_size} 条数据: {str(e)}")
+                self.flush_stats['dropped'] += batch_size
+                self._clear_buffers()
             else:
-                # 创建新记录
-                rumor_data = self.RumorData(
-                    rumor_id=item['rumor_id'],
-                    title=item['title'],
-                    content=item['content'],
-                    source=item.get('source'),
-                    refutation=item.get('refutation'),
-                    refutation_source=item.get('refutation_source'),
-                    url=item.get('url'),
-                    pub_date=item.get('pub_date'),
-                    crawl_time=datetime.now(),
-                    category=item.get('category'),
-                    spread_level=item.get('spread_level', 1),
-                    harm_level=item.get('harm_level', 1),
-                    tags=json.dumps(item['tags']) if 'tags' in item and item['tags'] else None,
-                    media=json.dumps(item['media']) if 'media' in item and item['media'] else None,
-                    source_type=item.get('source_type'),
-                    processed=False
-                )
-                
-                self.db.session.add(rumor_data)
-                self.db.session.commit()
-                self.items_count['rumor'] += 1
-                logger.info(f"保存谣言: {item['title']}")
-                
-        except SQLAlchemyError as e:
-            self.db.session.rollback()
-            logger.error(f"保存谣言出错: {str(e)}")
-            raise
-    
-    def _save_social_item(self, item):
-        """保存社交媒体项目
-        
-        Args:
-            item: 社交媒体项目
-        """
+                logger.error(f"批量保存 {batch_size} 条数据出错，稍后重试: {str(e)}")
+            return False
+
+        elapsed = time.perf_counter() - begin
+        self.failures = 0
+        self._clear_buffers()
+        for name, (inserted, updated) in counts.items():
+            self.items_count[name] += inserted
+            self.flush_stats['updated'] += updated
+        self.flush_stats['dropped'] += self._skipped
+        self.flush_stats['flushes'] += 1
+        self.flush_stats['items'] += batch_size
+        self.flush_stats['max_batch_size'] = max(self.flush_stats['max_batch_size'], batch_size)
+        self.flush_stats['total_latency'] += elapsed
+        self.flush_stats['max_latency'] = max(self.flush_stats['max_latency'], elapsed)
+        logger.info(f"批量保存 {batch_size} 条数据，耗时 {elapsed * 1000:.1f}ms")
+        return True
+
+    def _clear_buffers(self):
+        for buffer in self.buffers.values():
+            buffer.clear()
+
+    def _write_buffers(self):
+        """在一个事务中写入所有缓存，返回 {统计名称: (新增条数, 更新条数)}"""
+        session = self.db.session
+        counts = {}
+        touched = []
         try:
-            # 检查是否已存在
-            existing = self.SocialMediaData.query.filter_by(post_id=item['post_id']).first()
-            
-            if existing:
-                # 更新已有记录
-                for key, value in item.items():
-                    if key != 'post_id' and hasattr(existing, key):
-                        if key in ['media', 'tags', 'topics']:
-                            value = json.dumps(value) if value else None
-                        setattr(existing, key, value)
-                
-                existing.crawl_time = datetime.now()
-                self.db.session.commit()
-                logger.info(f"更新社交媒体帖子: {item['platform']}:{item['post_id']}")
-                
-            else:
-                # 创建新记录
-                social_data = self.SocialMediaData(
-                    post_id=item['post_id'],
-                    platform=item['platform'],
-                    content=item['content'],
-                    user_id=item.get('user_id'),
-                    username=item.get('username'),
-                    verified_type=item.get('verified_type'),
-                    pub_date=item.get('pub_date'),
-                    crawl_time=datetime.now(),
-                    url=item.get('url'),
-                    shares=item.get('shares', 0),
-                    comments=item.get('comments', 0),
-                    likes=item.get('likes', 0),
-                    media=json.dumps(item['media']) if 'media' in item and item['media'] else None,
-                    tags=json.dumps(item['tags']) if 'tags' in item and item['tags'] else None,
-                    topics=json.dumps(item['topics']) if 'topics' in item and item['topics'] else None,
-                    location=item.get('location'),
-                    content_type=item.get('content_type', 'original'),
-                    recommendation_level=item.get('recommendation_level', 0),
-                    keyword_match=item.get('keyword_match', 0.0),
-                    processed=False
-                )
-                
-                self.db.session.add(social_data)
-                self.db.session.commit()
-                self.items_count['social'] += 1
-                logger.info(f"保存社交媒体帖子: {item['platform']}:{item['post_id']}")
-                
-        except SQLAlchemyError as e:
-            self.db.session.rollback()
-            logger.error(f"保存社交媒体帖子出错: {str(e)}")
+            connection = session.connection()
+            for key, name, _, _ in ITEM_TYPES:
+                buffer = self.buffers[name]
+                if not buffer:
+                    continue
+                model = self.models[name]
+                ids, inserted, updated = self._write_table(connection, model, key, buffer)
+                if name == 'news':
+                    self._write_news_vectors(connection, model, ids)
+                elif name == 'rumor':
+                    self._write_rumor_fingerprints(connection, model, ids)
+                counts[name] = (inserted, updated)
+                touched.append(model)
+            session.commit()
+        except Exception:
+            session.rollback()
             raise
-    
+
+        from app.utils.response_cache import invalidate_models
+        invalidate_models(*touched)
+        return counts
+
+    def _write_table(self, connection, model, key, buffer):
+        """写入一张表，返回 (写入记录的主键, 新增条数, 更新条数)"""
+        table = model.__table__
+        key_column = table.c[key]
+        keys = list(buffer)
+        existing = set()
+        for start in range(0, len(keys), IN_BATCH_SIZE):
+            existing.update(connection.execute(
+                select(key_column).where(key_column.in_(keys[start:start + IN_BATCH_SIZE]))).scalars())
+        now = datetime.now()
+
+        # 新记录: 缺省字段取列默认值，缺少必填字段的跳过
+        inserts = []
+        for value, item in buffer.items():
+            if value in existing:
+                continue
+            row = {}
+            for column in table.columns:
+                if column.primary_key:
+                    continue
+                field = item.get(column.key)
+                if field is None and column.default is not None and column.default.is_scalar:
+                    field = column.default.arg
+                row[column.key] = field
+            missing = [column.key for column in table.columns
+                       if not column.nullable and not column.primary_key and row.get(column.key) is None]
+            if missing:
+                logger.warning(f"缺少必填字段 {', '.join(missing)}，跳过: {value}")
+                self._skipped += 1
+                continue
+            row['crawl_time'] = now
+            row['processed'] = False
+            inserts.append(row)
+        if inserts:
+            update_columns = [name for name in inserts[0] if name not in (key, 'processed', 'simhash', 'cluster_id')]
+            upsert_rows(connection, table, inserts, key, update_columns)
+
+        # 已存在的记录只更新项目中出现的字段，按字段组合分组批量 UPDATE
+        groups = {}
+        for value in existing:
+            item = buffer[value]
+            columns = tuple(sorted(field for field in item
+                                   if field in table.c and field not in (key, 'id', 'crawl_time')))
+            groups.setdefault(columns, []).append(
+                {'_key': value, '_crawl_time': now, **{f'_{field}': item[field] for field in columns}})
+        for columns, params in groups.items():
+            statement = table.update().where(key_column == bindparam('_key')).values(
+                crawl_time=bindparam('_crawl_time'), **{field: bindparam(f'_{field}') for field in columns})
+            connection.execute(statement, params)
+
+        ids = []
+        for start in range(0, len(keys), IN_BATCH_SIZE):
+            ids.extend(connection.execute(
+                select(table.c.id).where(key_column.in_(keys[start:start + IN_BATCH_SIZE]))).scalars())
+        return ids, len(inserts), len(existing)
+
+    def _write_news_vectors(self, connection, model, ids):
+        """Core 批量写入不触发 mapper 事件，新闻的词频向量在同一事务内同步"""
+        corpus = self.term_vector_service.get_corpus('news_data')
+        table = model.__table__
+        columns = [table.c.id] + [table.c[field] for field in corpus.tracked_fields]
+        docs = {}
+        for start in range(0, len(ids), IN_BATCH_SIZE):
+            for row in connection.execute(
+                    select(*columns).where(table.c.id.in_(ids[start:start + IN_BATCH_SIZE]))):
+                docs[row.id] = corpus.document(row)
+        self.term_vector_service.write_documents(connection, 'news_data', docs)
+
+    def _write_rumor_fingerprints(self, connection, model, ids):
+        """谣言的近似重复指纹同样需要在同一事务内同步"""
+        table = model.__table__
+        docs = {}
+        for start in range(0, len(ids), IN_BATCH_SIZE):
+            for row in connection.execute(select(table.c.id, table.c.title, table.c.content)
+                                          .where(table.c.id.in_(ids[start:start + IN_BATCH_SIZE]))):
+                docs[row.id] = row
+        self.near_duplicate_service.write_documents(connection, 'rumor_data', docs)
+
+    def get_stats(self):
+        """写入统计: 写入次数、平均/最大批大小、平均/最大耗时(毫秒)"""
+        flushes = self.flush_stats['flushes']
+        return {
+            'flushes': flushes,
+            'items': self.flush_stats['items'],
+            'inserted': sum(self.items_count.values()),
+            'updated': self.flush_stats['updated'],
+            'avg_batch_size': round(self.flush_stats['items'] / flushes, 1) if flushes else 0,
+            'max_batch_size': self.flush_stats['max_batch_size'],
+            'avg_flush_ms': round(self.flush_stats['total_latency'] * 1000 / flushes, 2) if flushes else 0,
+            'max_flush_ms': round(self.flush_stats['max_latency'] * 1000, 2),
+            'errors': self.flush_stats['errors'],
+            'dropped': self.flush_stats['dropped'],
+            'backpressure': self.flush_stats['backpressure']
+        }
+
     def close_spider(self, spider):
         """爬虫关闭时调用
-        
+
         Args:
             spider: 爬虫实例
         """
+        if self._flush_loop is not None and self._flush_loop.running:
+            self._flush_loop.stop()
+        if self.buffered and not self.flush():
+            logger.error(f"爬虫关闭时仍有 {self.buffered} 条数据未能保存")
+            self.flush_stats['dropped'] += self.buffered
+            self._clear_buffers()
+
+        stats = self.get_stats()
+        if self.stats is not None:
+            for name, value in stats.items():
+                self.stats.set_value(f'db_storage/{name}', value, spider=spider)
+
         logger.info(f"数据库存储管道已关闭: {spider.name}")
         logger.info(f"已保存 {sum(self.items_count.values())} 条数据:")
         logger.info(f"- 新闻: {self.items_count['news']} 条")
         logger.info(f"- 谣言: {self.items_count['rumor']} 条")
-        logger.info(f"- 社交媒体: {self.items_count['social']} 条") 
\ No newline at end of file
+        logger.info(f"- 社交媒体: {self.items_count['social']} 条")
+        logger.info(f"批量写入 {stats['flushes']} 次，平均每批 {stats['avg_batch_size']} 条，"
+                    f"平均耗时 {stats['avg_flush_ms']}ms，最大耗时 {stats['max_flush_ms']}ms")
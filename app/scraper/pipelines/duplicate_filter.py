@@ -1,6 +1,12 @@
 """重复数据过滤管道
 
 检测并过滤重复的爬取数据，防止数据库中出现重复条目
+
+本次运行内的指纹保存在内存集合中；历次运行的指纹保存在持久化的可扩展布隆过滤器中
+(文件或 Redis，见 TRUTH_GUARDIAN_SETTINGS['DUPLICATE_FILTER'])，爬虫启动时加载、关闭时保存。
+布隆过滤器判定为新数据的项目一定没有抓取过，不再查询数据库；只有命中时才调用
+spider.check_duplicate 精确检查，排除误判。过滤器首次创建的那次运行仍逐条查询数据库，
+把已有数据写入过滤器。
 """
 
 import logging
@@ -8,6 +14,9 @@ import hashlib
 from scrapy.exceptions import DropItem
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.scraper import settings
+from app.scraper.bloom import ScalableBloomFilter, RedisScalableBloomFilter
+
 # 配置日志
 logger = logging.getLogger('duplicate_filter_pipeline')
 logger.setLevel(logging.INFO)
@@ -15,11 +24,33 @@ logger.setLevel(logging.INFO)
 class DuplicateFilterPipeline:
     """重复数据过滤管道，确保不会插入重复数据"""
     
-    def __init__(self):
-        """初始化去重管道"""
-        # 存储已处理项目的指纹
+    def __init__(self, config=None, stats=None):
+        """初始化去重管道
+
+        Args:
+            config: 布隆过滤器配置，默认取 TRUTH_GUARDIAN_SETTINGS['DUPLICATE_FILTER']
+            stats: Scrapy 统计收集器
+        """
+        # 存储本次运行已处理项目的指纹
         self.fingerprints = set()
+        self.config = config if config is not None else settings.TRUTH_GUARDIAN_SETTINGS.get('DUPLICATE_FILTER', {})
+        self.stats = stats
+        self.bloom = None
+        self.bloom_path = None
+        # 过滤器是新建的(没有历史指纹)时，仍对每个项目做精确检查
+        self.warming_up = True
+        self.counts = {
+            'duplicates': 0,
+            'bloom_hits': 0,
+            'false_positives': 0,
+            'db_lookups': 0,
+            'db_lookups_avoided': 0
+        }
         logger.info("重复数据过滤管道初始化完成")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(stats=crawler.stats)
     
     def process_item(self, item, spider):
         """处理爬取的项目
@@ -56,20 +87,41 @@ class DuplicateFilterPipeline:
         
         # 检查内存中是否已存在
         if fingerprint in self.fingerprints:
+            self.counts['duplicates'] += 1
             raise DropItem(f"重复项目: {item_id}")
         
+        # 检查历史指纹，只有命中时才查询数据库确认
+        exact_check = spider.settings.get('FLASK_APP') and hasattr(spider, 'check_duplicate')
+        seen = self.bloom is not None and fingerprint in self.bloom
+        if seen:
+            self.counts['bloom_hits'] += 1
+            if not exact_check:
+                self.counts['duplicates'] += 1
+                raise DropItem(f"历史数据中已存在: {item_id}")
+        elif exact_check and self.bloom is not None and not self.warming_up:
+            self.counts['db_lookups_avoided'] += 1
+            exact_check = False
+        
         # 检查数据库中是否已存在
         try:
-            if spider.settings.get('FLASK_APP') and hasattr(spider, 'check_duplicate'):
+            if exact_check:
+                self.counts['db_lookups'] += 1
                 if spider.check_duplicate(item_type, item):
+                    self.counts['duplicates'] += 1
+                    if self.bloom is not None:
+                        self.bloom.add(fingerprint)
                     raise DropItem(f"数据库中已存在: {item_id}")
+                if seen:
+                    self.counts['false_positives'] += 1
         except (SQLAlchemyError, AttributeError) as e:
             logger.error(f"检查数据库重复时出错: {str(e)}")
             # 出错时不丢弃，让数据库约束处理重复情况
             pass
         
-        # 添加到内存集合
+        # 添加到内存集合和历史指纹
         self.fingerprints.add(fingerprint)
+        if self.bloom is not None:
+            self.bloom.add(fingerprint)
         
         return item
     
@@ -111,7 +163,39 @@ class DuplicateFilterPipeline:
         Args:
             spider: 爬虫实例
         """
+        self.bloom = self._load_bloom(spider)
+        self.warming_up = self.bloom is None or len(self.bloom) == 0
+        if self.bloom is not None:
+            logger.info(f"已加载历史指纹 {len(self.bloom)} 条，占用 {self.bloom.memory_bytes / 1024:.1f} KB")
         logger.info(f"重复数据过滤管道已启动: {spider.name}")
+
+    def _load_bloom(self, spider):
+        """按配置加载布隆过滤器，未配置或加载失败时返回 None(只在本次运行内去重)"""
+        backend = self.config.get('BACKEND')
+        options = {
+            'initial_capacity': self.config.get('INITIAL_CAPACITY', 100000),
+            'error_rate': self.config.get('ERROR_RATE', 0.001)
+        }
+        try:
+            if backend == 'file':
+                self.bloom_path = self.config.get('PATH', 'crawls/bloom/{spider}.bloom').format(spider=spider.name)
+                return ScalableBloomFilter.load(self.bloom_path, **options)
+            if backend == 'redis':
+                import redis
+                client = redis.Redis.from_url(self.config['REDIS_URL'])
+                key = self.config.get('REDIS_KEY', 'tg:bloom:{spider}').format(spider=spider.name)
+                return RedisScalableBloomFilter(client, key, **options)
+        except Exception as e:
+            logger.error(f"加载布隆过滤器失败，只在本次运行内去重: {str(e)}")
+        return None
+
+    def get_stats(self):
+        """去重统计: 过滤的重复项目、布隆过滤器命中/误判、查询和省去的数据库查询"""
+        stats = dict(self.counts, items=len(self.fingerprints))
+        if self.bloom is not None:
+            stats['bloom_items'] = len(self.bloom)
+            stats['bloom_memory_bytes'] = self.bloom.memory_bytes
+        return stats
     
     def close_spider(self, spider):
         """爬虫关闭时调用
@@ -119,6 +203,25 @@ class DuplicateFilterPipeline:
         Args:
             spider: 爬虫实例
         """
+        stats = self.get_stats()
+        if self.bloom is not None:
+            try:
+                if self.bloom_path:
+                    self.bloom.save(self.bloom_path)
+            except OSError as e:
+                logger.error(f"保存布隆过滤器失败: {str(e)}")
+            finally:
+                self.bloom.close()
+        if self.stats is not None:
+            for name, value in stats.items():
+                self.stats.set_value(f'duplicate_filter/{name}', value, spider=spider)
+
         logger.info(f"重复数据过滤管道已关闭: {spider.name}, 共处理 {len(self.fingerprints)} 条数据")
+        logger.info(f"过滤重复 {stats['duplicates']} 条，数据库查询 {stats['db_lookups']} 次，"
+                    f"省去 {stats['db_lookups_avoided']} 次，布隆过滤器命中 {stats['bloom_hits']} 次"
+                    f"(误判 {stats['false_positives']} 次)")
+        if self.bloom is not None:
+            logger.info(f"历史指纹 {stats['bloom_items']} 条，占用 {stats['bloom_memory_bytes'] / 1024:.1f} KB")
         # 清空指纹集合
-        self.fingerprints.clear() 
\ No newline at end of file
+        self.fingerprints.clear()
+        self.bloom = None 
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""本地回放服务器
+
+离线测试和基准测试搜索爬虫时代替真实站点和入库接口:
+
+- 回放录制的响应: AsyncSearchEngine(record_path=...) 录制的 JSONL，每行 {'url', 'params', 'body'}，
+  按 路径 + 查询参数 精确匹配；同一路径下没有录到的查询参数(其他关键词/页码)按参数哈希轮流返回已录制的响应
+- 模拟上游: 每个请求固定延迟 latency 秒，按 error_rate 的概率返回 503，统计同时处理的最大请求数
+- 模拟入库接口: /api/auth/login 返回固定 token，/api/spider/data/batch 只计数并按全部新增返回
+
+用法:
+    python -m app.scraper.replay_server --responses crawls/recorded.jsonl --port 8765 --latency 0.05
+"""
+
+import zlib
+import json
+import random
+import asyncio
+import argparse
+import logging
+from urllib.parse import urlsplit, parse_qsl
+
+from aiohttp import web
+
+logger = logging.getLogger('replay_server')
+
+
+def _request_key(path, query):
+    return path, tuple(sorted((str(name), str(value)) for name, value in query))
+
+
+def response_key(url, params=None):
+    """录制的请求 -> 匹配键(路径, 排序后的查询参数)"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True) + list((params or {}).items())
+    return _request_key(parts.path, query)
+
+
+def load_responses(path):
+    """读取录制的 JSONL 响应"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayServer:
+    """回放录制响应的本地 HTTP 服务器
+
+    Args:
+        responses: 录制的响应列表，每项 {'url', 'params', 'body'}
+        latency: 每个请求的模拟延迟(秒)
+        error_rate: 返回 503 的概率
+        seed: 错误注入的随机种子
+    """
+
+    def __init__(self, responses, latency=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.exact = {}
+        self.by_path = {}
+        for record in responses:
+            key = response_key(record['url'], record.get('params'))
+            self.exact[key] = record['body']
+            self.by_path.setdefault(key[0], []).append(record['body'])
+        self.stats = {'requests': 0, 'errors': 0, 'misses': 0, 'batches': 0, 'items': 0, 'max_concurrent': 0}
+        self._concurrent = 0
+        self.base_url = None
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_post('/api/auth/login', self.login)
+        self.app.router.add_post('/api/spider/data/batch', self.ingest)
+        self.app.router.add_get('/{path:.*}', self.replay)
+
+    async def _simulate(self):
+        """模拟上游延迟和偶发错误，返回错误响应或 None"""
+        self.stats['requests'] += 1
+        self._concurrent += 1
+        self.stats['max_concurrent'] = max(self.stats['max_concurrent'], self._concurrent)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self._concurrent -= 1
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.stats['errors'] += 1
+            return web.json_response({'message': '服务暂时不可用'}, status=503)
+        return None
+
+    async def replay(self, request):
+        error = await self._simulate()
+        if error is not None:
+            return error
+        key = _request_key(request.path, request.query.items())
+        body = self.exact.get(key)
+        if body is None:
+            candidates = self.by_path.get(request.path)
+            if not candidates:
+                self.stats['misses'] += 1
+                return web.json_response({'message': '没有录制的响应'}, status=404)
+            body = candidates[zlib.crc32(repr(key).encode('utf-8')) % len(candidates)]
+        return web.json_response(body)
+
+    async def login(self, request):
+        return web.json_response({'access_token': 'replay-token'})
+
+    async def ingest(self, request):
+        error = await self._simulate()
+        if error is not None:
+            return error
+        items = (await request.json()).get('items') or []
+        self.stats['batches'] += 1
+        self.stats['items'] += len(items)
+        return web.json_response({'code': 0, 'message': 'success', 'data': {
+            'created': len(items),
+            'updated': 0,
+            'failed': 0,
+            'results': [{'index': index, 'status': 'created'} for index in range(len(items))]
+        }})
+
+    async def start(self, host='127.0.0.1', port=0):
+        """启动服务器，port 为 0 时随机分配端口，返回服务器地址"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f'http://{host}:{port}'
+        return self.base_url
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回放录制响应的本地 HTTP 服务器')
+    parser.add_argument('--responses', required=True, help='录制的响应(JSONL)')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的模拟延迟(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 503 的概率')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = ReplayServer(load_responses(args.responses), latency=args.latency, error_rate=args.error_rate)
+    logger.info(f"已加载 {len(server.exact)} 个录制的响应，监听 {args.host}:{args.port}")
+    web.run_app(server.app, host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
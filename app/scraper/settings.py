@@ -3,6 +3,8 @@
 此文件包含Scrapy爬虫的所有设置
 """
 
+import os
+
 # 爬虫名称
 BOT_NAME = 'truth_guardian'
 
@@ -140,5 +142,97 @@ TRUTH_GUARDIAN_SETTINGS = {
         '谣言', '辟谣', '真相', '事实', '真实',
         '安全', '健康', '预防', '感染', '传播',
         '官方', '权威', '发布', '通报', '声明'
-    ]
-} 
\ No newline at end of file
+    ],
+    
+    # 广告过滤(app.scraper.ad_filter)
+    'AD_FILTER': {
+        # 广告关键词
+        'KEYWORDS': [
+            '广告', '推广', '赞助', '点击购买', '限时优惠',
+            '联系电话', '推荐使用', '购买链接', '折扣', '促销',
+            '联系我们', '微信号', 'QQ群', '加入我们', '转发有奖'
+        ],
+        # 广告模式正则表达式
+        'PATTERNS': [
+            r'([购领][买取][链方地][接式址][：:].+)',
+            r'([加关]入?[我官]们?的?[微群].{1,10}[：:].{5,30})',
+            r'([联微][系信][方电][式话][：:].{5,15})',
+            r'((?:http|https|www).+?(?:\.com|\.cn|\.net))',
+            r'([送优][礼惠][：:].+)',
+        ],
+        # 热加载配置文件(JSON，包含 keywords/patterns)，修改后无需重启即可生效
+        'CONFIG_FILE': os.environ.get('AD_FILTER_CONFIG'),
+    },
+
+    # 数据库存储管道批量写入配置
+    'DB_STORAGE': {
+        # 每批写入条数
+        'BATCH_SIZE': 200,
+        # 最长写入间隔(秒)
+        'FLUSH_INTERVAL': 5,
+        # 缓存条数上限，超过后延迟处理后续项目
+        'MAX_BUFFER': 2000,
+        # 背压时延迟处理项目的时间(秒)
+        'RETRY_DELAY': 1.0,
+        # 一批数据连续写入失败的最大次数，超过后丢弃
+        'MAX_RETRIES': 3,
+    },
+
+    # 跨次运行去重的布隆过滤器配置
+    'DUPLICATE_FILTER': {
+        # 持久化方式: file / redis，留空只在本次运行内去重
+        'BACKEND': os.environ.get('DUPLICATE_FILTER_BACKEND', 'file'),
+        # 文件路径，{spider} 替换为爬虫名称
+        'PATH': 'crawls/bloom/{spider}.bloom',
+        'REDIS_URL': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+        'REDIS_KEY': 'tg:bloom:{spider}',
+        # 第一层容量，写满后自动扩容
+        'INITIAL_CAPACITY': 100000,
+        # 误判率上限
+        'ERROR_RATE': 0.001,
+    },
+
+    # 搜索爬虫异步抓取引擎(app.scraper.async_engine)
+    'SEARCH_ENGINE': {
+        # 同时抓取的页面数(连接池大小)
+        'CONCURRENCY': 32,
+        # 每个主机的并发上限
+        'PER_HOST': 4,
+        # 按主机单独设置的并发上限
+        'HOST_LIMITS': {
+            'm.weibo.cn': 2,
+        },
+        # 单个请求超时(秒)
+        'TIMEOUT': 30,
+        # 失败重试次数
+        'RETRIES': 3,
+        # 退避基数和上限(秒)，实际等待时间在 [0, min(上限, 基数 * 2^重试次数)] 之间随机
+        'BACKOFF_BASE': 0.5,
+        'BACKOFF_MAX': 30,
+        # 需要重试的HTTP状态码
+        'RETRY_HTTP_CODES': [500, 502, 503, 504, 408, 429],
+        # 每批提交到入库接口的条数
+        'BATCH_SIZE': 100,
+        # 待提交队列长度上限，写入跟不上时抓取协程等待
+        'QUEUE_SIZE': 1000,
+        # 同时提交的批次数
+        'WRITERS': 2,
+    },
+
+    # 爬虫管理器任务调度(app.scraper.crawler)
+    'CRAWLER_MANAGER': {
+        # 工作进程数
+        'WORKERS': 4,
+        # 每个爬虫同时执行的任务数上限
+        'SPIDER_CONCURRENCY': {
+            'weibo': 1,
+            'xinlang': 2,
+        },
+        'DEFAULT_CONCURRENCY': 1,
+        # 定时抓取时搜索爬虫使用的关键词和页数
+        'SEARCH_KEYWORDS': ['辟谣', '谣言'],
+        'MAX_PAGES': 5,
+        # 结果队列的等待间隔(秒)，同时也是检查工作进程存活的间隔
+        'POLL_INTERVAL': 1.0,
+    }
+}
\ No newline at end of file
@@ -32,16 +32,14 @@ def main():
         # 确保所有表都已创建
         db.create_all()
         
-        # 运行微博爬虫
+        # 运行微博爬虫(异步引擎并发抓取所有关键词)
         weibo_spider = WeiboSearchSpider()
         keywords = ['辟谣', '谣言']
-        for keyword in keywords:
-            weibo_spider.run(keyword, max_pages=5)
+        weibo_spider.run_many(keywords, max_pages=5)
             
         # 运行新浪爬虫
         xinlang_spider = XinlangSearchSpider()
-        for keyword in keywords:
-            xinlang_spider.run(keyword, max_pages=5)
+        xinlang_spider.run_many(keywords, max_pages=5)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,4 +1,3 @@
-import json
 import time
 from datetime import datetime
 import requests
@@ -6,8 +5,13 @@ import sys
 import os
 import logging
 from urllib.parse import quote
-import re
-import html
+
+# 添加项目根目录到系统路径(支持直接运行本脚本)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from app.utils.text_normalize import normalize_text
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -24,54 +28,20 @@ def clean_html_text(text):
     Returns:
         str: 清理后的纯文本
     """
-    if not text:
-        return ""
-    
-    # 解码HTML实体（如 &lt; &gt; &amp; &quot; &#x等）
-    text = html.unescape(text)
-    
-    # 移除HTML标签，但保留标签内的文本内容
-    # 匹配 <标签名 属性> 和 </标签名> 格式
-    text = re.sub(r'<[^>]+>', '', text)
-    
-    # 处理常见的微博特殊标记
-    # 移除 @用户名 的链接格式，但保留用户名
-    text = re.sub(r'<a[^>]*>@([^<]+)</a>', r'@\1', text)
-    
-    # 移除话题链接格式，但保留话题内容  
-    text = re.sub(r'<a[^>]*>#([^<]+)#</a>', r'#\1#', text)
-    
-    # 移除链接，但保留链接文本
-    text = re.sub(r'<a[^>]*>([^<]+)</a>', r'\1', text)
-    
-    # 移除图片标签
-    text = re.sub(r'<img[^>]*/?>', '', text)
-    
-    # 移除视频标签
-    text = re.sub(r'<video[^>]*>.*?</video>', '', text, flags=re.DOTALL)
-    
-    # 移除换行符周围的多余空格
-    text = re.sub(r'\s*\n\s*', '\n', text)
-    
-    # 将多个连续空格替换为单个空格
-    text = re.sub(r' +', ' ', text)
-    
-    # 移除行首行尾空格
-    text = text.strip()
-    
-    # 移除多余的换行符（超过2个连续换行符替换为2个）
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    
-    return text
+    return normalize_text(text, 'weibo_html')
 # https://m.weibo.cn/search?containerid=100103type%3D1%26q%3D%E8%BE%9F%E8%B0%A3
 # https://m.weibo.cn/api/container/getIndex?containerid=100103type%3D1%26q%3D%E8%BE%9F%E8%B0%A3&page_type=searchall
 # API配置
 API_CONFIG = {
     'base_url': 'http://localhost:5005',
     'username': 'user1',
-    'password': 'user1123456'
+    'password': 'user1123456',
+    'batch_size': 100  # 攒够多少条后批量提交
 }
 
+# 搜索接口
+SEARCH_URL = 'https://m.weibo.cn/api/container/getIndex'
+
 # 微博配置
 WEIBO_CONFIG = {
     'headers': {
@@ -110,10 +80,15 @@ WEIBO_CONFIG = {
 class WeiboSearchSpider:
     def __init__(self):
         """初始化爬虫"""
+        self.api_config = API_CONFIG
         self.api_base_url = API_CONFIG['base_url']
         self.token = None
+        self.source = 'weibo'
+        self.search_url = SEARCH_URL
         self.headers = WEIBO_CONFIG['headers']
         self.cookies = WEIBO_CONFIG['cookies']
+        # 复用连接的会话
+        self.session = requests.Session()
         self.logger = logging.getLogger(__name__)
         self.stats = {
             'total': 0,
@@ -121,6 +96,8 @@ class WeiboSearchSpider:
             'existing': 0,
             'error': 0
         }
+        # 待批量提交的数据
+        self.buffer = []
         
     def login(self):
         """登录获取token"""
@@ -134,7 +111,7 @@ class WeiboSearchSpider:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, headers=headers, json=data)
             if response.status_code == 200:
                 result = response.json()
                 if 'access_token' in result:
@@ -151,60 +128,41 @@ class WeiboSearchSpider:
             self.logger.error(f"登录请求出错: {str(e)}")
             return False
         
-    def search(self, keyword, page=1):
-        """搜索微博内容"""
+    def build_request(self, keyword, page=1):
+        """构造搜索请求(同步 search() 和异步引擎共用)"""
         # URL编码关键词
         encoded_keyword = quote(keyword)
         
         # 直接构造完整URL，不使用params参数
-        url = f'https://m.weibo.cn/api/container/getIndex?containerid=100103type%3D1%26q%3D{encoded_keyword}&page_type=searchall'
+        url = f'{self.search_url}?containerid=100103type%3D1%26q%3D{encoded_keyword}&page_type=searchall'
+        if page > 1:
+            url += f'&page={page}'
         
-        # 严格按照curl请求的headers
-        headers = {
-            'accept': 'application/json, text/plain, */*',
-            'accept-language': 'zh-CN,zh;q=0.9',
-            'cache-control': 'no-cache',
-            'mweibo-pwa': '1',
-            'pragma': 'no-cache',
-            'priority': 'u=1, i',
-            'referer': f'https://m.weibo.cn/search?containerid=100103type%3D1%26q%3D{encoded_keyword}',
-            'sec-ch-ua': '"Google Chrome";v="135", "Not-A.Brand";v="8", "Chromium";v="135"',
-            'sec-ch-ua-mobile': '?1',
-            'sec-ch-ua-platform': '"Android"',
-            'sec-fetch-dest': 'empty',
-            'sec-fetch-mode': 'cors',
-            'sec-fetch-site': 'same-origin',
-            'user-agent': 'Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Mobile Safari/537.36',
-            'x-requested-with': 'XMLHttpRequest',
-            'x-xsrf-token': 'cf62e9'
+        # 严格按照curl请求的headers，referer对应当前关键词，cookies放在Cookie头中
+        headers = dict(self.headers)
+        headers['referer'] = f'https://m.weibo.cn/search?containerid=100103type%3D1%26q%3D{encoded_keyword}'
+        headers['cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        return {
+            'url': url,
+            'headers': headers,
+            'verify': False  # 避免SSL验证问题
         }
         
-        # 严格按照curl请求的cookies
-        cookies = {
-            'WEIBOCN_FROM': '1110006030',
-            '_T_WM': '56436634362',
-            'SCF': 'AsJDcLcsDdZbMVo5q1U6Z_kiEavOU7GO_8SnwKhXI6Gqsfi5I6uIlzot2pBzX56SgVKg_ON5xbNI6_7HuVhLqrE.',
-            'SUB': '_2A25FCtGEDeRhGeVP41IY9CnEyDmIHXVmZmtMrDV6PUJbktAYLXHYkW1NTRTbknjH7o3Tj4vod6rky8uudNR76Rmi',
-            'SUBP': '0033WrSXqPxfM725Ws9jqgMF55529P9D9W5cQQlcQ.iBYv6NSS0JZnjU5NHD95Q0eKn71KBN1hefWs4Dqcjji--fiKnEi-iFi--Xi-zRiKy2i--fiK.fi-2ci--fiKysi-i2Us8VIfY0ehet',
-            'SSOLoginState': '1745789396',
-            'ALF': '1748381396',
-            'MLOGIN': '1',
-            'XSRF-TOKEN': 'cf62e9',
-            'mweibo_short_token': '48563daa66',
-            'M_WEIBOCN_PARAMS': 'luicode%3D10000011%26lfid%3D231583%26fid%3D231583%26uicode%3D10000011'
-        }
+    def search(self, keyword, page=1):
+        """搜索微博内容"""
+        request = self.build_request(keyword, page)
+        url = request['url']
         
         try:
             # 打印完整请求信息用于调试
             self.logger.info(f'请求URL: {url}')
-            self.logger.info(f'请求Headers: {headers}')
+            self.logger.info(f'请求Headers: {request["headers"]}')
             
-            # 直接发送GET请求，不使用params参数
-            response = requests.get(
+            # 复用会话连接，不使用params参数
+            response = self.session.get(
                 url,
-                headers=headers,
-                cookies=cookies,
-                verify=False  # 添加此参数避免SSL验证问题
+                headers=request['headers'],
+                verify=request['verify']
             )
             
             # 打印响应信息用于调试
@@ -215,7 +173,7 @@ class WeiboSearchSpider:
             return response.json()
         except Exception as e:
             self.logger.error(f'搜索请求失败: {str(e)}')
-            if hasattr(e, 'response'):
+            if getattr(e, 'response', None) is not None:
                 self.logger.error(f'错误响应内容: {e.response.text}')
             return None
 
@@ -285,44 +243,51 @@ class WeiboSearchSpider:
         return results
 
     def save_to_api(self, data):
-        """保存数据到API"""
-        url = f"{API_CONFIG['base_url']}/api/spider/data"
+        """加入待提交缓冲区，攒够一批后批量保存到API"""
+        self.buffer.append(data)
+        if len(self.buffer) >= API_CONFIG['batch_size']:
+            return self.flush_to_api()
+        return True
+
+    def flush_to_api(self):
+        """批量保存缓冲区中的数据到API"""
+        if not self.buffer:
+            return True
+        items, self.buffer = self.buffer, []
+        url = f"{self.api_base_url}/api/spider/data/batch"
         headers = {
             'Authorization': f'Bearer {self.token}',
             'Content-Type': 'application/json'
         }
-        
         payload = {
-            'source': 'weibo',
-            'data': data
+            'items': [{'source': 'weibo', 'data': data} for data in items]
         }
         
-        self.logger.info(f"准备保存数据到API: {url}")
-        self.logger.info(f"请求Headers: {headers}")
-        self.logger.info(f"请求数据: {json.dumps(payload)}")
+        self.logger.info(f"准备批量保存 {len(items)} 条数据到API: {url}")
         
         try:
-            response = requests.post(url, json=payload, headers=headers)
+            response = self.session.post(url, json=payload, headers=headers)
             self.logger.info(f"API响应状态码: {response.status_code}")
-            self.logger.info(f"API响应内容: {response.text}")
             
-            self.stats['total'] += 1
+            self.stats['total'] += len(items)
             
             if response.status_code == 200:
-                self.stats['new'] += 1
-                self.logger.info("数据保存成功")
-                return True
-            elif response.status_code == 400 and "该微博已存在" in response.text:
-                self.stats['existing'] += 1
-                self.logger.info("该微博已存在，跳过")
+                result = response.json()['data']
+                self.stats['new'] += result['created']
+                self.stats['existing'] += result['updated']
+                self.stats['error'] += result['failed']
+                for item in result['results']:
+                    if item['status'] == 'error':
+                        self.logger.error(f"数据保存失败: {items[item['index']].get('weibo_mid_id')}, {item['message']}")
+                self.logger.info(f"批量保存完成: 新增 {result['created']}, 更新 {result['updated']}, 失败 {result['failed']}")
                 return True
             else:
-                self.stats['error'] += 1
+                self.stats['error'] += len(items)
                 self.logger.error(f"API请求失败，状态码: {response.status_code}, 响应内容: {response.text}")
                 return False
                 
         except Exception as e:
-            self.stats['error'] += 1
+            self.stats['error'] += len(items)
             self.logger.error(f"保存数据时发生错误: {str(e)}")
             return False
 
@@ -346,19 +311,29 @@ class WeiboSearchSpider:
                 data_list = self.parse_response(response, keyword)
                 for data in data_list:
                     self.save_to_api(data)
-                    time.sleep(1)  # 添加延时，避免请求过快
                 
                 time.sleep(2)  # 页面间延时
             
+            # 提交不足一批的剩余数据
+            self.flush_to_api()
             self.logger.info("爬虫运行完成")
             self.logger.info(f"统计信息:")
             self.logger.info(f"- 总处理数据: {self.stats['total']}")
             self.logger.info(f"- 新增数据: {self.stats['new']}")
-            self.logger.info(f"- 已存在数据: {self.stats['existing']}")
+            self.logger.info(f"- 已存在(更新)数据: {self.stats['existing']}")
             self.logger.info(f"- 错误数据: {self.stats['error']}")
             
         except Exception as e:
             self.logger.error(f"爬虫运行过程中发生错误: {str(e)}")
+            # 已爬取的数据仍然提交
+            self.flush_to_api()
+
+    def run_many(self, keywords, max_pages=5, config=None, start_page=1):
+        """用异步引擎并发抓取多个关键词(第 start_page 到 max_pages 页)，config 覆盖 SEARCH_ENGINE 配置，返回统计信息"""
+        from app.scraper.async_engine import AsyncSearchEngine
+        
+        self.logger.info(f"开始并发运行微博爬虫，关键词: {keywords}, 最大页数: {max_pages}")
+        return AsyncSearchEngine(self, config).run(keywords, max_pages, start_page)
 
 if __name__ == '__main__':
     # 创建Flask应用
@@ -15,14 +15,21 @@ logger = logging.getLogger(__name__)
 API_CONFIG = {
     'base_url': 'http://localhost:5005',
     'username': 'user1',
-    'password': 'user1123456'
+    'password': 'user1123456',
+    'batch_size': 100  # 攒够多少条后批量提交
 }
 
+# 搜索接口
+SEARCH_URL = 'https://search.sina.com.cn/api/search'
+
 class XinlangSearchSpider:
     def __init__(self):
         """初始化爬虫"""
+        self.api_config = API_CONFIG
         self.api_base_url = API_CONFIG['base_url']
         self.token = None
+        self.source = 'xinlang'
+        self.search_url = SEARCH_URL
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'application/json, text/plain, */*',
@@ -30,6 +37,10 @@ class XinlangSearchSpider:
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive'
         }
+        # 复用连接的会话
+        self.session = requests.Session()
+        # 待批量提交的数据
+        self.buffer = []
         
     def login(self):
         """登录获取token"""
@@ -43,7 +54,7 @@ class XinlangSearchSpider:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, headers=headers, json=data)
             if response.status_code == 200:
                 result = response.json()
                 if 'access_token' in result:
@@ -60,19 +71,26 @@ class XinlangSearchSpider:
             logger.error(f"登录请求出错: {str(e)}")
             return False
             
+    def build_request(self, keyword, page=1):
+        """构造搜索请求(同步 search() 和异步引擎共用)"""
+        return {
+            'url': self.search_url,
+            'params': {
+                'q': keyword,
+                'page': page,
+                'type': 'news',
+                'size': 20,
+                'sort': 'time'
+            },
+            'headers': self.headers
+        }
+            
     def search(self, keyword, page=1):
         """搜索新浪新闻"""
-        url = 'https://search.sina.com.cn/api/search'
-        params = {
-            'q': keyword,
-            'page': page,
-            'type': 'news',
-            'size': 20,
-            'sort': 'time'
-        }
+        request = self.build_request(keyword, page)
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(request['url'], headers=request['headers'], params=request['params'])
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -132,42 +150,55 @@ class XinlangSearchSpider:
         return results
 
     def save_to_api(self, news_data):
-        """通过API保存新闻数据"""
+        """加入待提交缓冲区，攒够一批后批量保存，返回批量保存成功的条数"""
+        self.buffer.append(news_data)
+        if len(self.buffer) >= API_CONFIG['batch_size']:
+            return self.flush_to_api()
+        return 0
+
+    def flush_to_api(self):
+        """通过批量API保存缓冲区中的新闻数据，返回保存成功(新增或更新)的条数"""
+        if not self.buffer:
+            return 0
         if not self.token:
             logger.error("未提供API认证token")
-            return False
+            return 0
+        items, self.buffer = self.buffer, []
             
-        url = f"{self.api_base_url}/api/spider/data"
+        url = f"{self.api_base_url}/api/spider/data/batch"
         headers = {
             'Authorization': f'Bearer {self.token}',
             'Content-Type': 'application/json'
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 url,
                 headers=headers,
                 json={
-                    'source': 'xinlang',
-                    'data': news_data
+                    'items': [{'source': 'xinlang', 'data': news_data} for news_data in items]
                 }
             )
             
             if response.status_code == 200:
                 result = response.json()
                 if result.get('code') == 0:
-                    logger.info(f"成功保存新闻，id: {news_data['news_id']}")
-                    return True
+                    data = result['data']
+                    for item in data['results']:
+                        if item['status'] == 'error':
+                            logger.warning(f"保存新闻失败，id: {items[item['index']]['news_id']}, 错误: {item['message']}")
+                    logger.info(f"批量保存新闻: 新增 {data['created']}, 更新 {data['updated']}, 失败 {data['failed']}")
+                    return data['created'] + data['updated']
                 else:
-                    logger.warning(f"保存新闻失败，id: {news_data['news_id']}, 错误: {result.get('message')}")
-                    return False
+                    logger.warning(f"批量保存新闻失败，错误: {result.get('message')}")
+                    return 0
             else:
                 logger.error(f"API请求失败，状态码: {response.status_code}")
-                return False
+                return 0
                 
         except Exception as e:
             logger.error(f"保存新闻时发生错误: {str(e)}")
-            return False
+            return 0
 
     def run(self, keyword, max_pages=5):
         """运行爬虫"""
@@ -190,14 +221,22 @@ class XinlangSearchSpider:
             results = self.parse_response(response_data, keyword)
             
             for news_data in results:
-                if self.save_to_api(news_data):
-                    total_saved += 1
+                total_saved += self.save_to_api(news_data)
                     
             logger.info(f'第 {page} 页处理完成')
             time.sleep(2)  # 避免请求过于频繁
             
+        # 提交不足一批的剩余数据
+        total_saved += self.flush_to_api()
         logger.info(f'爬取完成，共保存 {total_saved} 条新闻')
 
+    def run_many(self, keywords, max_pages=5, config=None, start_page=1):
+        """用异步引擎并发抓取多个关键词(第 start_page 到 max_pages 页)，config 覆盖 SEARCH_ENGINE 配置，返回统计信息"""
+        from app.scraper.async_engine import AsyncSearchEngine
+        
+        logger.info(f'开始并发搜索关键词: {keywords}, 最大页数: {max_pages}')
+        return AsyncSearchEngine(self, config).run(keywords, max_pages, start_page)
+
 if __name__ == '__main__':
     spider = XinlangSearchSpider()
     spider.run('谣言', max_pages=5)
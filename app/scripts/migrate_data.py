@@ -10,7 +10,6 @@ import requests
 import time
 import re
 from datetime import datetime
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 
 # 添加项目根目录到系统路径
@@ -19,6 +18,7 @@ sys.path.append(project_root)
 
 from app import create_app, db
 from app.models.debunk import DebunkContent
+from app.utils.text_normalize import normalize_text
 
 def has_chinese(text):
     """检查文本是否包含中文字符"""
@@ -37,22 +37,7 @@ def normalize_title(title):
 
 def clean_text(text):
     """清洗文本内容，去除HTML标签和URL"""
-    if not text:
-        return ""
-        
-    # 去除HTML标签
-    soup = BeautifulSoup(text, 'html.parser')
-    text = soup.get_text(separator=' ', strip=True)
-    
-    # 去除URL
-    url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-    text = re.sub(url_pattern, '', text)
-    
-    # 去除多余空白字符
-    text = re.sub(r'\s+', ' ', text)
-    text = text.strip()
-    
-    return text
+    return normalize_text(text, 'html_text')
 
 def is_valid_content(title, content):
     """检查内容是否有效"""
@@ -0,0 +1,100 @@
+"""辟谣文章查询层
+
+集中定义 DebunkArticle 列表/详情查询的预加载策略和序列化，避免在循环里
+逐条触发 article.author / article.rumor_reports 等懒加载(N+1 查询):
+- 列表: 作者是多对一关系，用 joinedload 随主查询一起取回，不会放大行数
+- 详情: 报道是多对多集合，用 selectinload 各追加一条 IN 查询
+"""
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models.debunk import DebunkArticle
+
+LIST_LOAD_OPTIONS = (
+    joinedload(DebunkArticle.author),
+)
+
+DETAIL_LOAD_OPTIONS = (
+    joinedload(DebunkArticle.author),
+    selectinload(DebunkArticle.rumor_reports),
+    selectinload(DebunkArticle.clarification_reports),
+)
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def list_query(query=None):
+    """文章列表查询，附带列表序列化需要的预加载"""
+    if query is None:
+        query = DebunkArticle.query
+    return query.options(*LIST_LOAD_OPTIONS)
+
+
+def get_article_detail(article_id):
+    """按ID获取文章，并一次性加载作者和关联报道"""
+    return DebunkArticle.query.options(*DETAIL_LOAD_OPTIONS).filter(DebunkArticle.id == article_id).first()
+
+
+def load_by_ids(model, ids):
+    """用一条 IN 查询批量获取记录，按传入ID的顺序返回，忽略不存在和非法的ID"""
+    clean_ids = []
+    for item in ids or []:
+        try:
+            item = int(item)
+        except (TypeError, ValueError):
+            continue
+        if item not in clean_ids:
+            clean_ids.append(item)
+    if not clean_ids:
+        return []
+
+    records = {record.id: record for record in model.query.filter(model.id.in_(clean_ids)).all()}
+    return [records[item] for item in clean_ids if item in records]
+
+
+def _format_time(value):
+    return value.strftime(DATETIME_FORMAT) if value else None
+
+
+def serialize_author(article, default_username='辟谣小能手'):
+    if not article.author:
+        return None
+    return {
+        'id': article.author.id,
+        'username': article.author.username if hasattr(article.author, 'username') else default_username
+    }
+
+
+def serialize_list_item(article, default_username='辟谣小能手'):
+    """列表项序列化(不含正文)"""
+    return {
+        'id': article.id,
+        'title': article.title,
+        'summary': article.summary,
+        'source': article.source,
+        'author_id': article.author_id,
+        'author': serialize_author(article, default_username),
+        'status': article.status,
+        'created_at': _format_time(article.created_at),
+        'updated_at': _format_time(article.updated_at),
+        'published_at': _format_time(article.published_at),
+        'tags': article.tags.split(',') if article.tags else []
+    }
+
+
+def serialize_report(report):
+    return {
+        'id': report.id,
+        'title': report.title,
+        'source': report.source,
+        'published_at': _format_time(report.published_at)
+    }
+
+
+def serialize_detail(article):
+    """详情序列化(含正文和关联报道)"""
+    data = serialize_list_item(article)
+    data['content'] = article.content
+    data['rumor_reports'] = [serialize_report(report) for report in article.rumor_reports]
+    data['clarification_reports'] = [serialize_report(report) for report in article.clarification_reports]
+    return data
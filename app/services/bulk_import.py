@@ -0,0 +1,231 @@
+"""辟谣数据批量导入服务
+
+scripts/import_piyao_data.py / import_piyao_ld_data.py 使用: 原来每条记录都按标题查询一次是否已存在，
+全部处理完才提交，数据量大时很慢，中途失败则全部回滚。现在:
+
+- 开始时一次查询预加载已有记录的 (来源, 标题哈希) 集合，去重在内存中完成(文件内重复的标题同样跳过)
+- 新记录按块用 bulk_insert_mappings 插入，每块单独提交
+- bulk_insert_mappings 不触发 ORM 事件，标签关联、全文索引、词频向量、近似重复指纹和统计汇总
+  在同一事务内按块同步
+- 每块提交后记录已处理到输入文件的第几条，中断后再次运行从断点继续
+- dry_run 只做解析和去重，不写数据库，用于评估去重率
+"""
+
+import time
+import hashlib
+import logging
+from datetime import datetime
+
+from sqlalchemy import func, select, tuple_
+
+from app import db
+from app.models.debunk import DebunkArticle, DebunkContent
+from app.services import search_service, spider_ingest, tag_service
+from app.utils.response_cache import invalidate_models
+
+logger = logging.getLogger(__name__)
+
+# 每块插入并提交的记录数
+CHUNK_SIZE = 1000
+# 每条 IN 查询包含的键数
+KEY_CHUNK_SIZE = 500
+
+
+def title_hash(title):
+    """标题的摘要，去重集合中只保存摘要以减少内存"""
+    return hashlib.md5(title.encode('utf-8')).digest()
+
+
+def piyao_content_record(item):
+    """piyao_results 中的一条记录 -> DebunkContent 字段，数据不完整时抛出 ValueError"""
+    truth_content = item.get('truth_content') or {}
+    if not truth_content:
+        raise ValueError('缺少truth_content')
+    title = (truth_content.get('title') or '').strip()
+    if not title:
+        raise ValueError('标题为空')
+    return {
+        'title': title,
+        'content': (truth_content.get('content') or '').strip() or '暂无内容',
+        'source': 'piyao.org.cn',
+        'author_name': truth_content.get('source', '辟谣平台'),
+        'link': item.get('truth_link', ''),
+        'region': '全国',
+        'search_query': '辟谣',
+        'status': 'published',
+    }
+
+
+def piyao_article_record(item):
+    """piyao_ld_results 中的一条记录 -> DebunkArticle 字段，数据不完整时抛出 ValueError"""
+    title = (item.get('title') or '').strip()
+    content = (item.get('content') or '').strip()
+    if not title:
+        raise ValueError('标题为空')
+    if not content:
+        raise ValueError('内容为空')
+    return {
+        'title': title,
+        'content': content,
+        'summary': content[:200] + '...' if len(content) > 200 else content,
+        'source': 'piyao.org.cn',
+        'author_id': 1,  # 使用默认作者ID
+        'status': 'published',
+        'tags': '辟谣,官方',
+    }
+
+
+def _chunks(items, size=KEY_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BulkImporter:
+    """按 (来源, 标题) 去重、分块写入的导入器
+
+    Args:
+        model: DebunkContent 或 DebunkArticle
+        transform: 把输入记录转换为模型字段的函数，数据不完整时抛出 ValueError
+        chunk_size: 每块插入并提交的记录数
+        dry_run: 只统计，不写数据库
+        checkpoint: 断点(spider.crawl_state.CrawlCheckpoint 或其他提供 load/save/clear 的对象)
+    """
+
+    def __init__(self, model, transform, chunk_size=CHUNK_SIZE, dry_run=False, checkpoint=None):
+        if model not in (DebunkContent, DebunkArticle):
+            raise ValueError(f'不支持的模型: {model.__name__}')
+        self.model = model
+        self.transform = transform
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.checkpoint = checkpoint
+        self.keys = set()
+        self.stats = {
+            'read': 0,          # 读取的记录数(含断点之前跳过的)
+            'resumed': 0,       # 从断点跳过的记录数
+            'created': 0,
+            'duplicates': 0,    # 数据库或文件中已有相同 (来源, 标题)
+            'invalid': 0,       # 数据不完整
+            'chunks': 0,
+            'elapsed': 0.0,
+        }
+
+    def load_keys(self):
+        """一次查询预加载已有记录的 (来源, 标题哈希)"""
+        table = self.model.__table__
+        result = db.session.connection().execution_options(stream_results=True).execute(
+            select(table.c.source, table.c.title))
+        for source, title in result:
+            if title:
+                self.keys.add((source, title_hash(title)))
+        logger.info(f"预加载 {len(self.keys)} 个已有标题")
+
+    def run(self, records, name=None):
+        """导入记录(可迭代对象，逐条读取)，返回统计信息
+
+        Args:
+            name: 输入的名称(如文件路径)，断点只对同名输入生效
+        """
+        begin = time.perf_counter()
+        self.load_keys()
+
+        skip = 0
+        if self.checkpoint is not None and not self.dry_run:
+            saved = self.checkpoint.load()
+            if saved and saved.get('name') == name:
+                skip = saved['position']
+                logger.info(f"从断点继续，跳过前 {skip} 条记录")
+
+        chunk = []
+        for item in records:
+            self.stats['read'] += 1
+            if self.stats['read'] <= skip:
+                self.stats['resumed'] += 1
+                continue
+            try:
+                mapping = self.transform(item)
+            except (ValueError, AttributeError) as e:
+                logger.debug(f"记录 {self.stats['read']}: {e}，跳过")
+                self.stats['invalid'] += 1
+                continue
+            key = (mapping['source'], title_hash(mapping['title']))
+            if key in self.keys:
+                self.stats['duplicates'] += 1
+                continue
+            self.keys.add(key)
+            chunk.append(mapping)
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk, name)
+                chunk = []
+        if chunk:
+            self._write_chunk(chunk, name)
+
+        if self.checkpoint is not None and not self.dry_run:
+            self.checkpoint.clear()
+        if self.stats['created'] and not self.dry_run:
+            invalidate_models(self.model)
+        self.stats['elapsed'] = time.perf_counter() - begin
+        return self.stats
+
+    def _write_chunk(self, mappings, name):
+        self.stats['chunks'] += 1
+        if self.dry_run:
+            self.stats['created'] += len(mappings)
+            return
+        now = datetime.now()
+        for mapping in mappings:
+            mapping.setdefault('created_at', now)
+            if self.model is DebunkArticle:
+                mapping.setdefault('published_at', now)
+        try:
+            # 只同步本块插入的行(MySQL 标题比较不区分大小写，按键查询可能查到已有的行)
+            last_id = db.session.query(func.max(self.model.id)).scalar() or 0
+            db.session.bulk_insert_mappings(self.model, mappings)
+            self._sync_derived(mappings, last_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.stats['created'] += len(mappings)
+        if self.checkpoint is not None:
+            self.checkpoint.save(name=name, position=self.stats['read'])
+        logger.info(f"已导入 {self.stats['created']} 条，已读取 {self.stats['read']} 条")
+
+    def _inserted_rows(self, connection, columns, mappings, last_id):
+        table = self.model.__table__
+        key_column = tuple_(table.c.source, table.c.title)
+        rows = []
+        for keys in _chunks({(mapping['source'], mapping['title']) for mapping in mappings}):
+            rows.extend(connection.execute(select(*columns).where(key_column.in_(keys), table.c.id > last_id)))
+        return rows
+
+    def _sync_derived(self, mappings, last_id):
+        """同步本块新插入记录的派生数据(bulk_insert_mappings 不触发 ORM 事件)"""
+        connection = db.session.connection()
+        table = self.model.__table__
+        if self.model is DebunkContent:
+            columns = [table.c.id] + [table.c[field] for field in spider_ingest.CONTENT_FIELDS]
+            rows = {row.id: row for row in self._inserted_rows(connection, columns, mappings, last_id)}
+            spider_ingest.sync_content_derived(connection, {}, rows)
+        else:
+            index = search_service.get_index('debunk_article')
+            fields = set(index.fields) | {'tags'}
+            columns = [table.c.id] + [table.c[field] for field in sorted(fields)]
+            rows = self._inserted_rows(connection, columns, mappings, last_id)
+            tag_service.add_article_tags(connection, {row.id: row.tags for row in rows})
+            search_service.write_documents(connection, 'debunk_article', {
+                row.id: {field: getattr(row, field) for field in index.fields} for row in rows
+            })
+
+    def report(self):
+        """可读的统计信息"""
+        stats = self.stats
+        processed = stats['read'] - stats['resumed']
+        rate = processed / stats['elapsed'] if stats['elapsed'] else 0.0
+        checked = stats['created'] + stats['duplicates']
+        dedup_rate = stats['duplicates'] / checked if checked else 0.0
+        action = '可导入' if self.dry_run else '导入'
+        return (f"读取 {stats['read']} 条(断点跳过 {stats['resumed']} 条)，{action} {stats['created']} 条，"
+                f"重复 {stats['duplicates']} 条(去重率 {dedup_rate:.1%})，数据不完整 {stats['invalid']} 条，"
+                f"耗时 {stats['elapsed']:.2f}s，{rate:.0f} 条/秒")
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from .streaming import ChatStreamError, result_chunks
 
 class ChatService(ABC):
     """聊天服务基类"""
@@ -53,6 +54,28 @@ class ChatService(ABC):
         """
         pass
         
+    def chat_completion_stream(
+        self,
+        messages: List[Dict],
+        model: Optional[str] = None,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        流式聊天完成接口
+        
+        逐个返回 OpenAI chat.completion.chunk 格式的数据块。请求失败时抛出 ChatStreamError。
+        生成器被关闭(客户端断开)时，实现应关闭上游连接以取消请求。
+        
+        默认实现等待完整响应后作为一个数据块返回，支持流式接口的服务应覆盖此方法
+        """
+        result = self.chat_completion(messages=messages, model=model, **kwargs)
+        if 'error' in result:
+            error = result['error']
+            message = error.get('message', str(error)) if isinstance(error, dict) else str(error)
+            raise ChatStreamError(message, status_code=result.get('status_code', 500),
+                                  error=error if isinstance(error, dict) else None)
+        yield from result_chunks(result, model)
+        
     @abstractmethod
     def list_models(self) -> List[Dict]:
         """
@@ -0,0 +1,318 @@
+"""聊天回复缓存
+
+用户反复询问同一批热门谣言("5G基站辐射致癌")，每次都调用供应商(Coze 谣言粉碎机工作流等)既慢又花钱。
+/api/chat/completions 在调用 chat_completion 之前先查 Redis 缓存:
+
+- 精确缓存: 键由供应商、模型、规范化后的消息(Unicode NFKC、合并空白)和其余参数生成
+- 语义缓存(可选，默认关闭): 只有一条用户消息(可带 system 消息)的提问，在供应商、模型、参数、system 消息
+  和否定词都相同的范围内，按规范化提问的字符二元组(保留单字和"不""没"等虚词)计算 64 位 SimHash，
+  查找汉明距离不超过 CHAT_CACHE_SEMANTIC_DISTANCE 的已缓存提问，标点、空白等细微差别的同一个问题也能命中。
+  否定词不同的提问(如"会致癌吗"和"不会致癌吗")答案相反，永远不会互相命中。
+  指纹切成 k+1 段写入 Redis 集合，查找时只比较至少一段相同的候选(原理见 app.utils.simhash)
+- 缓存时间 CHAT_CACHE_TTL，可按供应商覆盖(CHAT_CACHE_PROVIDER_TTL)，
+  CHAT_CACHE_EXCLUDED_PROVIDERS 中的供应商不缓存；请求带 conversation_id(有会话状态)或 cache=false 时不使用缓存
+- 统计: 各供应商的精确/语义命中、未命中次数，以及命中时省下的上游调用耗时、token 数和估算费用
+
+Redis 不可用时直接调用供应商，并在一段时间内不再尝试连接。
+"""
+
+import re
+import json
+import time
+import hashlib
+import logging
+import unicodedata
+from collections import Counter
+
+from flask import current_app, has_app_context
+
+from app.utils.response_cache import create_redis_client
+from app.utils.simhash import band_values, hamming, simhash
+
+logger = logging.getLogger('app.services.chat.cache')
+
+# 不影响回复内容、不参与缓存键的参数
+IGNORED_PARAMS = {'user', 'stream', 'cache'}
+# Redis 出错后暂停使用缓存的时间(秒)
+_RETRY_AFTER = 30
+_OUTCOMES = ('hit_exact', 'hit_semantic', 'miss', 'error')
+# 参与语义指纹的字符(去掉标点和空白)
+_FEATURE_CHAR_PATTERN = re.compile(r'[\w\u4e00-\u9fff]')
+# 否定词，提问中出现的否定词必须完全相同才能语义命中
+_NEGATION_PATTERN = re.compile(r'不|没|沒|无|無|非|未|别|別|勿|莫|否|\b(?:not|no|never)\b', re.I)
+
+
+def normalize_content(content):
+    """消息内容规范化: 全角转半角、合并空白；非文本内容(多模态列表等)按 JSON 序列化"""
+    if not isinstance(content, str):
+        return json.dumps(content, ensure_ascii=False, sort_keys=True, default=str)
+    return ' '.join(unicodedata.normalize('NFKC', content).split())
+
+
+def _digest(value):
+    raw = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def normalize_request(messages, params):
+    """规范化后的 (消息列表, 参数)，去掉不影响回复内容的参数"""
+    params = {name: value for name, value in params.items() if name not in IGNORED_PARAMS}
+    normalized = [[message.get('role'), normalize_content(message.get('content'))] for message in messages]
+    return normalized, params
+
+
+def request_digest(provider, model, messages, params):
+    """请求的摘要，相同摘要的请求会得到相同的回复(缓存键、合并相同请求时使用)"""
+    normalized, params = normalize_request(messages, params)
+    return _digest([provider, model, normalized, params])
+
+
+class ChatCache:
+    """Redis 聊天回复缓存
+
+    Args:
+        client: Redis 客户端
+        ttl: 默认缓存时间(秒)
+        provider_ttl: {供应商: 缓存时间}，为 0 时不缓存
+        excluded: 不缓存的供应商
+        semantic: 是否启用语义缓存
+        max_distance: 语义缓存的最大汉明距离
+        min_terms: 提问至少包含多少个不同的字符二元组才使用语义缓存(太短的提问指纹不可靠)
+        token_price: {供应商: 每千 token 价格}，用于估算省下的费用
+        key_prefix: Redis 键前缀
+    """
+
+    def __init__(self, client, ttl=86400, provider_ttl=None, excluded=(), semantic=False, max_distance=3,
+                 min_terms=4, token_price=None, key_prefix='tg:'):
+        self.client = client
+        self.ttl = ttl
+        self.provider_ttl = provider_ttl or {}
+        self.excluded = set(excluded)
+        self.semantic = semantic
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.min_terms = min_terms
+        self.token_price = token_price or {}
+        self.key_prefix = f'{key_prefix}llm:'
+        self._down_until = 0
+
+    @property
+    def available(self):
+        return time.monotonic() >= self._down_until
+
+    def _failed(self, e):
+        logger.warning(f"聊天缓存 Redis 不可用，{_RETRY_AFTER} 秒内跳过缓存: {str(e)}")
+        self._down_until = time.monotonic() + _RETRY_AFTER
+
+    def ttl_for(self, provider):
+        if provider in self.excluded:
+            return 0
+        return self.provider_ttl.get(provider, self.ttl)
+
+    def fingerprint(self, question):
+        """规范化提问的字符二元组 SimHash 指纹，二元组太少时返回 None
+
+        不用分词: 分词会去掉单字和停用词，"会致癌吗"和"不会致癌吗"的指纹完全相同
+        """
+        chars = ''.join(_FEATURE_CHAR_PATTERN.findall(question.lower()))
+        grams = Counter(chars[i:i + 2] for i in range(len(chars) - 1))
+        if len(grams) < self.min_terms:
+            return None
+        return simhash(grams)
+
+    def prepare(self, provider, model, messages, params):
+        """计算本次请求的缓存键，不使用缓存时返回 None"""
+        ttl = self.ttl_for(provider)
+        if not ttl or not self.available or params.get('conversation_id'):
+            return None
+        normalized, params = normalize_request(messages, params)
+        lookup = {
+            'provider': provider,
+            'ttl': ttl,
+            'digest': _digest([provider, model, normalized, params]),
+            'scope': None,
+            'fingerprint': None,
+        }
+        if self.semantic:
+            questions = [content for role, content in normalized if role == 'user']
+            others = [[role, content] for role, content in normalized if role != 'user']
+            if len(questions) == 1 and all(role == 'system' for role, _ in others):
+                value = self.fingerprint(questions[0])
+                if value is not None:
+                    negations = sorted(_NEGATION_PATTERN.findall(questions[0].lower()))
+                    lookup['scope'] = _digest([provider, model, others, params, negations])
+                    lookup['fingerprint'] = value
+        return lookup
+
+    def _entry_key(self, digest):
+        return f'{self.key_prefix}resp:{digest}'
+
+    def _band_key(self, scope, band, value):
+        return f'{self.key_prefix}sem:{scope}:{band}:{value}'
+
+    def _semantic_candidates(self, lookup):
+        """返回 [(距离, 缓存键摘要)]，按距离升序"""
+        pipe = self.client.pipeline(transaction=False)
+        for band, value in enumerate(band_values(lookup['fingerprint'], self.bands)):
+            pipe.smembers(self._band_key(lookup['scope'], band, value))
+        candidates = set()
+        for members in pipe.execute():
+            for member in members:
+                value, _, digest = member.decode('utf-8').partition(':')
+                distance = hamming(lookup['fingerprint'], int(value))
+                if distance <= self.max_distance and digest != lookup['digest']:
+                    candidates.add((distance, digest))
+        return sorted(candidates)
+
+    def get(self, lookup):
+        """查找缓存，命中时返回结果(带 cache 字段)，否则返回 None"""
+        begin = time.perf_counter()
+        try:
+            raw = self.client.get(self._entry_key(lookup['digest']))
+            outcome, distance = 'hit_exact', 0
+            if raw is None and lookup['fingerprint'] is not None:
+                outcome = 'hit_semantic'
+                for distance, digest in self._semantic_candidates(lookup):
+                    raw = self.client.get(self._entry_key(digest))
+                    if raw is not None:
+                        break
+        except Exception as e:
+            self._failed(e)
+            self._count(lookup['provider'], 'error')
+            return None
+
+        if raw is None:
+            self._count(lookup['provider'], 'miss')
+            return None
+
+        entry = json.loads(raw)
+        result = entry['result']
+        self._count(lookup['provider'], outcome, saved_ms=entry['latency_ms'], saved_tokens=entry['tokens'])
+        result['cache'] = {
+            'type': outcome[len('hit_'):],
+            'distance': distance,
+            'age': int(time.time() - entry['created']),
+            'upstream_latency_ms': entry['latency_ms']
+        }
+        result['server_latency_ms'] = int((time.perf_counter() - begin) * 1000)
+        return result
+
+    def put(self, lookup, result):
+        """缓存成功的结果"""
+        if 'error' in result or not result.get('choices'):
+            return
+        usage = result.get('usage') or {}
+        entry = {
+            'result': result,
+            'created': time.time(),
+            'latency_ms': int(result.get('server_latency_ms') or 0),
+            'tokens': int(usage.get('total_tokens') or 0),
+        }
+        ttl_ms = int(lookup['ttl'] * 1000)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.set(self._entry_key(lookup['digest']), json.dumps(entry, ensure_ascii=False).encode('utf-8'),
+                     px=ttl_ms)
+            if lookup['fingerprint'] is not None:
+                member = f"{lookup['fingerprint']}:{lookup['digest']}"
+                for band, value in enumerate(band_values(lookup['fingerprint'], self.bands)):
+                    band_key = self._band_key(lookup['scope'], band, value)
+                    pipe.sadd(band_key, member)
+                    pipe.pexpire(band_key, ttl_ms)
+            pipe.execute()
+        except Exception as e:
+            self._failed(e)
+
+    def record_stream(self, lookup, chunks, model=None):
+        """转发流式数据块，完整结束后把拼接的回复写入缓存"""
+        begin = time.perf_counter()
+        parts = []
+        last = None
+        try:
+            for chunk in chunks:
+                last = chunk
+                for choice in chunk.get('choices', []):
+                    parts.append(choice.get('delta', {}).get('content') or '')
+                yield chunk
+        finally:
+            chunks.close()
+        if last is not None and ''.join(parts):
+            self.put(lookup, {
+                'id': last.get('id'),
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': last.get('model', model),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': ''.join(parts)},
+                             'finish_reason': 'stop'}],
+                'server_latency_ms': int((time.perf_counter() - begin) * 1000),
+                'provider': last.get('provider'),
+            })
+
+    def _count(self, provider, outcome, saved_ms=0, saved_tokens=0):
+        try:
+            key = f'{self.key_prefix}stats'
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hincrby(key, f'{provider}:{outcome}', 1)
+            if outcome.startswith('hit_'):
+                pipe.hincrby(key, f'{provider}:saved_ms', saved_ms)
+                pipe.hincrby(key, f'{provider}:saved_tokens', saved_tokens)
+            pipe.execute()
+        except Exception as e:
+            self._failed(e)
+
+    def get_stats(self):
+        """各供应商及总体的命中率和省下的上游开销"""
+        fields = _OUTCOMES + ('saved_ms', 'saved_tokens')
+        providers = {}
+        for field, value in self.client.hgetall(f'{self.key_prefix}stats').items():
+            provider, _, name = field.decode('utf-8').rpartition(':')
+            providers.setdefault(provider, dict.fromkeys(fields, 0))[name] = int(value)
+
+        def summarize(counts, price=None):
+            hits = counts['hit_exact'] + counts['hit_semantic']
+            total = hits + counts['miss'] + counts['error']
+            counts['hit_ratio'] = round(hits / total, 4) if total else 0.0
+            counts['saved_calls'] = hits
+            if price is not None:
+                counts['saved_cost'] = round(counts['saved_tokens'] / 1000 * price, 4)
+            return counts
+
+        total = dict.fromkeys(fields, 0)
+        saved_cost = 0.0
+        result = {}
+        for provider, counts in sorted(providers.items()):
+            for field in fields:
+                total[field] += counts[field]
+            result[provider] = summarize(counts, self.token_price.get(provider))
+            saved_cost += result[provider].get('saved_cost', 0.0)
+        total = summarize(total)
+        total['saved_cost'] = round(saved_cost, 4)
+        return {'providers': result, 'total': total}
+
+    def reset_stats(self):
+        self.client.delete(f'{self.key_prefix}stats')
+
+
+def get_chat_cache():
+    """当前应用的聊天回复缓存，未启用时返回 None"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('chat_cache')
+
+
+def init_chat_cache(app):
+    """按配置创建聊天回复缓存"""
+    if not app.config.get('CHAT_CACHE_ENABLED'):
+        return None
+    cache = ChatCache(
+        create_redis_client(app.config['RESPONSE_CACHE_REDIS_URL']),
+        ttl=app.config.get('CHAT_CACHE_TTL', 86400),
+        provider_ttl=app.config.get('CHAT_CACHE_PROVIDER_TTL'),
+        excluded=app.config.get('CHAT_CACHE_EXCLUDED_PROVIDERS', ()),
+        semantic=app.config.get('CHAT_CACHE_SEMANTIC', False),
+        max_distance=app.config.get('CHAT_CACHE_SEMANTIC_DISTANCE', 3),
+        token_price=app.config.get('CHAT_CACHE_TOKEN_PRICE'),
+        key_prefix=app.config.get('RESPONSE_CACHE_KEY_PREFIX', 'tg:')
+    )
+    app.extensions['chat_cache'] = cache
+    return cache
@@ -7,6 +7,8 @@ import requests
 import logging
 from typing import Dict, Any, Optional, List
 from .base import ChatService
+from .transport import get_transport
+from .streaming import ChatStreamError, iter_sse, make_chunk, new_chunk_id, upstream_error
 
 # 创建模块级别的日志记录器并设置编码
 logger = logging.getLogger('app.services.chat.dify')
@@ -39,6 +41,7 @@ class DifyService(ChatService):
         if self.api_base.endswith('/api'):
             self.api_base = self.api_base[:-4]
             
+        self.transport = get_transport(self.api_base, self.api_proxy)
         logger.info(f"初始化完成，使用API基础URL: {self.api_base}")
         self.print_config()
         
@@ -122,11 +125,11 @@ class DifyService(ChatService):
             # 发送请求
             start_time = time.time()
             try:
-                response = requests.post(
+                response = self.transport.post(
                     api_url,
                     headers=headers,
                     json=data,
-                    timeout=600,
+                    read_timeout=600,
                     stream=stream
                 )
                 logger.info(f"HTTP请求完成，状态码: {response.status_code}")
@@ -260,6 +263,79 @@ class DifyService(ChatService):
                 'status_code': 500
             }
     
+    def chat_completion_stream(self, messages: List[Dict], model: str = None, **kwargs):
+        """
+        流式执行工作流(response_mode=streaming)
+        转发 text_chunk 事件的文本；工作流没有输出文本片段时，在 workflow_finished 时返回最终结果
+        """
+        model = model or self.default_model
+        user = kwargs.pop('user', None)
+        
+        user_message = None
+        for msg in reversed(messages):
+            if msg.get('role') == 'user':
+                user_message = msg.get('content')
+                break
+        if not user_message:
+            raise ChatStreamError("缺少用户消息", status_code=400, error={
+                'message': "缺少用户消息",
+                'type': 'invalid_request_error',
+                'code': 'missing_user_message'
+            })
+        
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json; charset=utf-8"
+        }
+        data = {
+            'query': user_message,
+            'conversation_id': str(uuid.uuid4()),
+            'user': user or 'default_user',
+            'response_mode': 'streaming',
+            'inputs': {
+                "query": user_message,
+            }
+        }
+        for key, value in kwargs.items():
+            if key not in ['stream', 'user', 'model']:
+                data['inputs'][key] = value
+        
+        api_url = f"{self.api_base.rstrip('/')}/workflows/run"
+        logger.info(f"发送Dify流式请求: {api_url}")
+        return self._stream_workflow(api_url, headers, data, model)
+    
+    def _stream_workflow(self, api_url, headers, data, model):
+        response = self.transport.post(api_url, headers=headers, json=data, read_timeout=600, stream=True)
+        try:
+            if response.status_code != 200:
+                raise upstream_error(response, 'dify')
+            chunk_id = new_chunk_id('dify-wf')
+            yield make_chunk(chunk_id, model, 'dify', role='assistant')
+            streamed = False
+            for _, payload in iter_sse(response):
+                event = json.loads(payload)
+                event_type = event.get('event')
+                if event_type == 'text_chunk':
+                    streamed = True
+                    yield make_chunk(chunk_id, model, 'dify', content=event.get('data', {}).get('text'))
+                elif event_type == 'workflow_finished':
+                    result = event.get('data', {})
+                    if result.get('status') not in (None, 'succeeded'):
+                        raise ChatStreamError(f"Dify工作流执行失败: {result.get('error')}",
+                                              code='dify_execution_error')
+                    if not streamed:
+                        content = (result.get('outputs') or {}).get('data', '')
+                        if not isinstance(content, str):
+                            content = json.dumps(content, ensure_ascii=False)
+                        yield make_chunk(chunk_id, model, 'dify', content=content)
+                    break
+                elif event_type == 'error':
+                    raise ChatStreamError(f"Dify工作流执行失败: {event.get('message')}",
+                                          code='dify_execution_error')
+            yield make_chunk(chunk_id, model, 'dify', finish_reason='stop')
+        finally:
+            response.close()
+    
     def list_models(self) -> List[Dict]:
         """获取Dify可用模型列表"""
         models = []
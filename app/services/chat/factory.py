@@ -7,11 +7,37 @@ import requests
 import logging
 from typing import Dict, Any, Optional, List, Type
 from .base import ChatService
-from .coze_service import CozeService
 from .dify import DifyService
+from .transport import get_transport
+from .streaming import ChatStreamError, iter_sse, make_chunk, new_chunk_id, upstream_error
 
 logger = logging.getLogger('app.chat.factory')
 
+
+def _stream_openai_compatible(transport, api_url, api_key, data, provider):
+    """OpenAI 兼容接口的流式请求，逐个返回 chat.completion.chunk 数据块"""
+    headers = {
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json',
+        'Accept': 'text/event-stream'
+    }
+    response = transport.post(api_url, headers=headers, json=dict(data, stream=True), stream=True)
+    try:
+        if response.status_code != 200:
+            raise upstream_error(response, provider)
+        for _, payload in iter_sse(response):
+            if payload == '[DONE]':
+                break
+            chunk = json.loads(payload)
+            if 'error' in chunk:
+                raise ChatStreamError(str(chunk['error']), code=f'{provider}_stream_error', error=chunk['error'])
+            chunk['provider'] = provider
+            yield chunk
+    finally:
+        # 正常结束、出错或客户端断开(生成器被关闭)时都关闭上游响应，未读完的连接不会放回连接池
+        response.close()
+
+
 class OpenAIService(ChatService):
     """OpenAI聊天服务"""
     
@@ -19,6 +45,7 @@ class OpenAIService(ChatService):
         self.api_key = current_app.config.get('OPENAI_API_KEY')
         self.api_base = current_app.config.get('OPENAI_API_BASE', 'https://api.openai.com/v1')
         self.api_proxy = current_app.config.get('OPENAI_API_PROXY')
+        self.transport = get_transport(self.api_base, self.api_proxy)
         self.default_model = current_app.config.get('OPENAI_MODEL', 'gpt-3.5-turbo')
         self.available_models = current_app.config.get('CHAT_SOURCES', {}).get('openai', {}).get('models', [])
         
@@ -36,25 +63,15 @@ class OpenAIService(ChatService):
             'Content-Type': 'application/json'
         }
         
-        # 准备代理
-        proxies = None
-        if self.api_proxy:
-            proxies = {
-                'http': self.api_proxy,
-                'https': self.api_proxy
-            }
-        
         # 构建API URL
         api_url = f"{self.api_base}/chat/completions"
         
         # 发送请求
         start_time = time.time()
-        response = requests.post(
+        response = self.transport.post(
             api_url,
             headers=headers,
-            json=data,
-            proxies=proxies,
-            timeout=120
+            json=data
         )
         end_time = time.time()
         
@@ -88,6 +105,15 @@ class OpenAIService(ChatService):
             
         return result
     
+    def chat_completion_stream(self, messages: List[Dict], model: str = None, **kwargs):
+        """OpenAI流式聊天完成"""
+        data = kwargs.copy()
+        data['messages'] = messages
+        data['model'] = model or self.default_model
+        return _stream_openai_compatible(
+            self.transport, f"{self.api_base}/chat/completions", self.api_key, data, 'openai'
+        )
+    
     def list_models(self) -> List[Dict]:
         """获取OpenAI可用模型列表"""
         models = []
@@ -152,10 +178,6 @@ class ChatServiceFactory:
         """
         return cls._services.copy()
 
-# 注册服务
-ChatServiceFactory.register('openai', OpenAIService)
-ChatServiceFactory.register('coze', CozeService)
-ChatServiceFactory.register('dify', DifyService)
 
 class DeepSeekService(ChatService):
     """DeepSeek聊天服务"""
@@ -164,6 +186,7 @@ class DeepSeekService(ChatService):
         self.api_key = current_app.config.get('DEEPSEEK_API_KEY')
         self.api_base = current_app.config.get('DEEPSEEK_API_BASE', 'https://api.deepseek.com/v1')
         self.api_proxy = current_app.config.get('DEEPSEEK_API_PROXY')
+        self.transport = get_transport(self.api_base, self.api_proxy)
         self.default_model = current_app.config.get('DEEPSEEK_MODEL', 'deepseek-chat')
         self.available_models = current_app.config.get('CHAT_SOURCES', {}).get('deepseek', {}).get('models', [])
         
@@ -181,25 +204,15 @@ class DeepSeekService(ChatService):
             'Content-Type': 'application/json'
         }
         
-        # 准备代理
-        proxies = None
-        if self.api_proxy:
-            proxies = {
-                'http': self.api_proxy,
-                'https': self.api_proxy
-            }
-        
         # 构建API URL
         api_url = f"{self.api_base}/chat/completions"
         
         # 发送请求
         start_time = time.time()
-        response = requests.post(
+        response = self.transport.post(
             api_url,
             headers=headers,
-            json=data,
-            proxies=proxies,
-            timeout=120
+            json=data
         )
         end_time = time.time()
         
@@ -233,6 +246,15 @@ class DeepSeekService(ChatService):
             
         return result
     
+    def chat_completion_stream(self, messages: List[Dict], model: str = None, **kwargs):
+        """DeepSeek流式聊天完成"""
+        data = kwargs.copy()
+        data['messages'] = messages
+        data['model'] = model or self.default_model
+        return _stream_openai_compatible(
+            self.transport, f"{self.api_base}/chat/completions", self.api_key, data, 'deepseek'
+        )
+    
     def list_models(self) -> List[Dict]:
         """获取DeepSeek可用模型列表"""
         models = []
@@ -253,6 +275,7 @@ class TongyiService(ChatService):
         self.api_key = current_app.config.get('TONGYI_API_KEY')
         self.api_base = current_app.config.get('TONGYI_API_BASE', 'https://api.tongyi.aliyun.com/v1')
         self.api_proxy = current_app.config.get('TONGYI_API_PROXY')
+        self.transport = get_transport(self.api_base, self.api_proxy)
         self.default_model = current_app.config.get('TONGYI_MODEL', 'qwen-max')
         self.available_models = current_app.config.get('CHAT_SOURCES', {}).get('tongyi', {}).get('models', [])
         
@@ -280,25 +303,15 @@ class TongyiService(ChatService):
             'Content-Type': 'application/json'
         }
         
-        # 准备代理
-        proxies = None
-        if self.api_proxy:
-            proxies = {
-                'http': self.api_proxy,
-                'https': self.api_proxy
-            }
-        
         # 构建API URL
         api_url = f"{self.api_base}/generations"
         
         # 发送请求
         start_time = time.time()
-        response = requests.post(
+        response = self.transport.post(
             api_url,
             headers=headers,
-            json=request_data,
-            proxies=proxies,
-            timeout=120
+            json=request_data
         )
         end_time = time.time()
         
@@ -365,6 +378,48 @@ class TongyiService(ChatService):
         
         return result
     
+    def chat_completion_stream(self, messages: List[Dict], model: str = None, **kwargs):
+        """通义千问流式聊天完成(incremental_output 模式，每个事件只包含新增的文本)"""
+        model = model or self.default_model
+        request_data = {
+            "model": model,
+            "input": {
+                "messages": messages
+            },
+            "parameters": {
+                "temperature": kwargs.get('temperature', 0.7),
+                "top_p": kwargs.get('top_p', 0.9),
+                "max_tokens": kwargs.get('max_tokens', 2000),
+                "incremental_output": True
+            }
+        }
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+            'X-DashScope-SSE': 'enable'
+        }
+        
+        response = self.transport.post(f"{self.api_base}/generations", headers=headers, json=request_data, stream=True)
+        try:
+            if response.status_code != 200:
+                raise upstream_error(response, 'tongyi')
+            chunk_id = None
+            for event, payload in iter_sse(response):
+                data = json.loads(payload)
+                if event == 'error' or 'code' in data and 'output' not in data:
+                    raise ChatStreamError(f"通义千问流式响应错误: {data.get('message', payload)}",
+                                          code='tongyi_stream_error')
+                if chunk_id is None:
+                    chunk_id = data.get('request_id') or new_chunk_id()
+                    yield make_chunk(chunk_id, model, 'tongyi', role='assistant')
+                output = data.get('output', {})
+                finish_reason = output.get('finish_reason')
+                yield make_chunk(chunk_id, model, 'tongyi', content=output.get('text'),
+                                 finish_reason=finish_reason if finish_reason not in (None, 'null') else None)
+        finally:
+            response.close()
+    
     def list_models(self) -> List[Dict]:
         """获取通义千问可用模型列表"""
         models = []
@@ -381,6 +436,8 @@ class TongyiService(ChatService):
 class CozeService(ChatService):
     """Coze聊天服务"""
     
+    BOT_API_URL = "https://api.coze.cn/v3/chat"
+    
     def __init__(self):
         self.api_key = current_app.config.get('COZE_API_KEY')
         self.api_base = current_app.config.get('COZE_API_BASE_URL', 'https://api.coze.cn/v1')
@@ -389,6 +446,10 @@ class CozeService(ChatService):
         self.app_id = current_app.config.get('COZE_APP_ID')
         self.bot_id = current_app.config.get('COZE_BOT_ID')
         self.user_id = current_app.config.get('COZE_USER_ID', 'user123')
+        self.api_proxy = current_app.config.get('COZE_API_PROXY')
+        # 工作流接口原来禁用了 SSL 验证和环境变量中的代理，这里保持不变
+        self.workflow_transport = get_transport(self.api_base, self.api_proxy, trust_env=False, verify=False)
+        self.bot_transport = get_transport(self.BOT_API_URL, self.api_proxy)
         
     def chat_completion(self, messages: List[Dict], model: str = None, **kwargs) -> Dict:
         """处理Coze聊天完成请求"""
@@ -457,16 +518,11 @@ class CozeService(ChatService):
             
             # 发送请求
             start_time = time.time()
-            response = requests.post(
+            response = self.workflow_transport.post(
                 api_url,
                 headers=headers,
                 json=payload,
-                timeout=600,
-                verify=False,  # 临时禁用 SSL 验证
-                proxies={
-                    'http': None,
-                    'https': None
-                }
+                read_timeout=600
             )
             end_time = time.time()
             
@@ -623,16 +679,11 @@ class CozeService(ChatService):
             
             # 发送请求
             start_time = time.time()
-            response = requests.post(
+            response = self.workflow_transport.post(
                 api_url,
                 headers=headers,
                 json=payload,
-                timeout=600,
-                verify=False,  # 临时禁用 SSL 验证
-                proxies={
-                    'http': None,
-                    'https': None
-                }
+                read_timeout=600
             )
             end_time = time.time()
             
@@ -783,7 +834,7 @@ class CozeService(ChatService):
             }
             
             # 如果有会话ID，则使用
-            api_url = "https://api.coze.cn/v3/chat"
+            api_url = self.BOT_API_URL
             conversation_id = kwargs.get('conversation_id')
             if conversation_id:
                 api_url = f"{api_url}?conversation_id={conversation_id}"
@@ -796,11 +847,11 @@ class CozeService(ChatService):
             
             # 发送请求
             start_time = time.time()
-            response = requests.post(
+            response = self.bot_transport.post(
                 api_url,
                 headers=headers,
                 json=payload,
-                timeout=60
+                read_timeout=60
             )
             end_time = time.time()
             
@@ -896,6 +947,121 @@ class CozeService(ChatService):
                 'status_code': 500
             }
     
+    def chat_completion_stream(self, messages: List[Dict], model: str = None, **kwargs):
+        """Coze流式聊天完成，模式选择与 chat_completion 相同"""
+        mode = kwargs.get('mode', 'default')
+        if mode == 'rumor_crusher' or model == 'coze-rumor-crusher':
+            payload = self._workflow_payload(messages, self.rumor_workflow_id or self.workflow_id,
+                                             self.app_id or kwargs.get('app_id'), **kwargs)
+            return self._stream_workflow(payload, 'coze-rumor-crusher')
+        elif kwargs.get('use_bot', False) or not self.workflow_id:
+            return self._stream_bot(messages, **kwargs)
+        else:
+            payload = self._workflow_payload(messages, self.workflow_id, kwargs.get('app_id'), **kwargs)
+            return self._stream_workflow(payload, model or 'coze-workflow')
+    
+    def _workflow_payload(self, messages: List[Dict], workflow_id, app_id, **kwargs) -> Dict:
+        """构建工作流请求数据"""
+        user_message = None
+        for msg in reversed(messages):
+            if msg.get('role') == 'user':
+                user_message = msg.get('content')
+                break
+        if not user_message:
+            raise ChatStreamError("缺少用户消息", status_code=400, error={
+                'message': "缺少用户消息",
+                'type': 'invalid_request_error',
+                'code': 'missing_user_message'
+            })
+        
+        payload = {
+            "workflow_id": workflow_id,
+            "user_id": self.user_id,
+            "parameters": {
+                "query": user_message
+            }
+        }
+        if app_id:
+            payload["app_id"] = app_id
+        if kwargs.get('workflow_params'):
+            payload["parameters"].update(kwargs.get('workflow_params'))
+        return payload
+    
+    def _stream_workflow(self, payload: Dict, model: str):
+        """调用Coze工作流流式接口(workflow/stream_run)，转发 Message 事件的内容"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        api_url = f"{self.api_base.rstrip('/')}/workflow/stream_run"
+        logging.info(f"发送Coze工作流流式请求: {api_url}")
+        
+        response = self.workflow_transport.post(api_url, headers=headers, json=payload, read_timeout=600, stream=True)
+        try:
+            if response.status_code != 200:
+                raise upstream_error(response, 'coze')
+            chunk_id = new_chunk_id('coze-wf')
+            yield make_chunk(chunk_id, model, 'coze', role='assistant')
+            for event, data in iter_sse(response):
+                if event == 'Message':
+                    yield make_chunk(chunk_id, model, 'coze', content=json.loads(data).get('content'))
+                elif event == 'Error':
+                    error = json.loads(data)
+                    raise ChatStreamError(
+                        f"Coze工作流执行失败: code={error.get('error_code')}, msg={error.get('error_message')}",
+                        code='coze_workflow_error'
+                    )
+                elif event == 'Done':
+                    break
+            yield make_chunk(chunk_id, model, 'coze', finish_reason='stop')
+        finally:
+            response.close()
+    
+    def _stream_bot(self, messages: List[Dict], **kwargs):
+        """调用Coze Bot流式接口，转发 conversation.message.delta 事件中的回答内容"""
+        if not self.bot_id:
+            raise ChatStreamError("缺少Coze配置: COZE_BOT_ID", code='missing_bot_id')
+        
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "bot_id": self.bot_id,
+            "user_id": self.user_id,
+            "stream": True,
+            "auto_save_history": True,
+            "additional_messages": [
+                {"role": msg.get('role'), "content": msg.get('content'), "content_type": "text"}
+                for msg in messages
+            ]
+        }
+        if kwargs.get('custom_variables'):
+            payload["custom_variables"] = kwargs.get('custom_variables')
+        api_url = self.BOT_API_URL
+        if kwargs.get('conversation_id'):
+            api_url = f"{api_url}?conversation_id={kwargs.get('conversation_id')}"
+        logging.info(f"发送Coze Bot流式聊天请求: {api_url}")
+        
+        response = self.bot_transport.post(api_url, headers=headers, json=payload, read_timeout=60, stream=True)
+        try:
+            if response.status_code != 200:
+                raise upstream_error(response, 'coze')
+            chunk_id = new_chunk_id('coze-chat')
+            yield make_chunk(chunk_id, 'coze-bot', 'coze', role='assistant')
+            for event, data in iter_sse(response):
+                if event == 'conversation.message.delta':
+                    message = json.loads(data)
+                    if message.get('type', 'answer') == 'answer':
+                        yield make_chunk(chunk_id, 'coze-bot', 'coze', content=message.get('content'))
+                elif event in ('conversation.chat.failed', 'error'):
+                    raise ChatStreamError(f"Coze Bot聊天失败: {data}", code='coze_chat_error')
+                elif event == 'done':
+                    break
+            yield make_chunk(chunk_id, 'coze-bot', 'coze', finish_reason='stop')
+        finally:
+            response.close()
+    
     def list_models(self) -> List[Dict]:
         """获取Coze可用模型列表"""
         models = []
@@ -908,4 +1074,12 @@ class CozeService(ChatService):
                 "created": int(time.time()),
                 "owned_by": "coze"
             })
-        return models 
\ No newline at end of file
+        return models
+
+
+# 注册服务(放在所有服务类定义之后，coze 使用本模块中基于配置的 CozeService)
+ChatServiceFactory.register('openai', OpenAIService)
+ChatServiceFactory.register('deepseek', DeepSeekService)
+ChatServiceFactory.register('tongyi', TongyiService)
+ChatServiceFactory.register('coze', CozeService)
+ChatServiceFactory.register('dify', DifyService)
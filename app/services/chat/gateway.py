@@ -0,0 +1,239 @@
+"""聊天供应商网关
+
+run.py 在 eventlet 下运行，每个聊天请求在调用供应商期间占用一个绿色线程，
+同一个热门问题集中出现时会变成同样多的上游调用，供应商限流后所有请求一起变慢。
+/api/chat/completions 调用供应商前经过网关:
+
+- 按供应商限制并发(CHAT_GATEWAY_MAX_CONCURRENCY，可按供应商覆盖)，超出的请求进入有界等待队列
+  (CHAT_GATEWAY_MAX_QUEUE)，最多等待 CHAT_GATEWAY_QUEUE_TIMEOUT 秒
+- 合并相同请求(single-flight): 与正在进行的请求完全相同(摘要见 cache.request_digest)的请求不再调用上游，
+  等待并共用第一个请求的结果
+- 队列已满或等待超时时抛出 GatewayRejected，接口返回 429 和 Retry-After，而不是让请求堆积到超时
+
+使用 threading 的锁和条件变量，eventlet 打过猴子补丁后即为协程安全的绿色版本。
+网关状态保存在进程内，多进程部署时各进程分别限流。
+"""
+
+import copy
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger('app.services.chat.gateway')
+
+_COUNTERS = ('admitted', 'queued', 'coalesced', 'rejected', 'timeouts')
+
+
+class GatewayRejected(Exception):
+    """请求被网关拒绝(队列已满或排队超时)"""
+
+    def __init__(self, provider, reason, retry_after=1):
+        messages = {
+            'queue_full': f"{provider} 请求过多，等待队列已满，请稍后重试",
+            'queue_timeout': f"{provider} 请求过多，排队超时，请稍后重试",
+        }
+        super().__init__(messages.get(reason, reason))
+        self.provider = provider
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _ProviderLimiter:
+    """单个供应商的并发限制和等待队列"""
+
+    def __init__(self, limit, max_queue):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self.peak_active = 0
+        self.peak_waiting = 0
+        self.counters = dict.fromkeys(_COUNTERS, 0)
+        self.wait_times = []
+        self._condition = threading.Condition()
+
+    def acquire(self, provider, timeout):
+        with self._condition:
+            if self.active < self.limit and not self.waiting:
+                self._admit()
+                return
+            if self.waiting >= self.max_queue:
+                self.counters['rejected'] += 1
+                logger.warning(f"{provider} 等待队列已满({self.max_queue})，拒绝请求")
+                raise GatewayRejected(provider, 'queue_full')
+
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            self.counters['queued'] += 1
+            begin = time.monotonic()
+            deadline = begin + timeout
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counters['timeouts'] += 1
+                        logger.warning(f"{provider} 排队超过 {timeout} 秒，拒绝请求")
+                        raise GatewayRejected(provider, 'queue_timeout')
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.wait_times.append(time.monotonic() - begin)
+            del self.wait_times[:-1000]
+            self._admit()
+
+    def _admit(self):
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        self.counters['admitted'] += 1
+
+    def count(self, counter):
+        with self._condition:
+            self.counters[counter] += 1
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def stats(self):
+        waits = sorted(self.wait_times)
+        return dict(self.counters, limit=self.limit, max_queue=self.max_queue, active=self.active,
+                    waiting=self.waiting, peak_active=self.peak_active, peak_waiting=self.peak_waiting,
+                    queue_wait_p95_ms=round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0.0)
+
+
+class _Flight:
+    """一次正在进行的上游调用，相同的请求等待它的结果"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ChatGateway:
+    """按供应商限流并合并相同请求的网关
+
+    Args:
+        max_concurrency: 每个供应商的默认最大并发调用数
+        provider_limits: {供应商: 最大并发数}，覆盖默认值
+        max_queue: 每个供应商的等待队列长度
+        queue_timeout: 排队最长等待时间(秒)
+        coalesce: 是否合并相同的请求
+    """
+
+    def __init__(self, max_concurrency=8, provider_limits=None, max_queue=32, queue_timeout=10, coalesce=True):
+        self.max_concurrency = max_concurrency
+        self.provider_limits = provider_limits or {}
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.coalesce = coalesce
+        self._limiters = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, provider):
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.setdefault(provider, _ProviderLimiter(
+                    self.provider_limits.get(provider, self.max_concurrency), self.max_queue))
+        return limiter
+
+    @contextmanager
+    def slot(self, provider):
+        """占用供应商的一个并发名额，没有空闲名额时排队"""
+        limiter = self._limiter(provider)
+        limiter.acquire(provider, self.queue_timeout)
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    def complete(self, provider, key, call):
+        """在并发限制下执行 call()，key 相同的并发请求只执行一次
+
+        Args:
+            key: 请求摘要，为 None 时不合并
+            call: 调用供应商的函数，返回结果字典
+        """
+        if key is None or not self.coalesce:
+            with self.slot(provider):
+                return call()
+
+        flight_key = (provider, key)
+        with self._lock:
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[flight_key] = _Flight()
+
+        if not leader:
+            self._limiter(provider).count('coalesced')
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            result = copy.deepcopy(flight.result)
+            if isinstance(result, dict):
+                result['coalesced'] = True
+            return result
+
+        try:
+            with self.slot(provider):
+                flight.result = call()
+            return copy.deepcopy(flight.result)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(flight_key, None)
+            flight.done.set()
+
+    def stream(self, provider, open_stream):
+        """在并发限制下转发流式数据块，名额在流结束或客户端断开时释放
+
+        Args:
+            open_stream: 返回数据块生成器的函数，拿到名额后才调用
+        """
+        with self.slot(provider):
+            chunks = open_stream()
+            try:
+                yield from chunks
+            finally:
+                chunks.close()
+
+    def get_stats(self):
+        """各供应商的并发、排队、合并和拒绝统计"""
+        with self._lock:
+            limiters = dict(self._limiters)
+            in_flight = len(self._flights)
+        return {
+            'providers': {provider: limiter.stats() for provider, limiter in sorted(limiters.items())},
+            'in_flight': in_flight
+        }
+
+
+def get_chat_gateway():
+    """当前应用的聊天网关，未启用时返回 None"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('chat_gateway')
+
+
+def init_chat_gateway(app):
+    """按配置创建聊天网关"""
+    if not app.config.get('CHAT_GATEWAY_ENABLED'):
+        return None
+    gateway = ChatGateway(
+        max_concurrency=app.config.get('CHAT_GATEWAY_MAX_CONCURRENCY', 8),
+        provider_limits=app.config.get('CHAT_GATEWAY_PROVIDER_LIMITS'),
+        max_queue=app.config.get('CHAT_GATEWAY_MAX_QUEUE', 32),
+        queue_timeout=app.config.get('CHAT_GATEWAY_QUEUE_TIMEOUT', 10),
+        coalesce=app.config.get('CHAT_GATEWAY_COALESCE', True)
+    )
+    app.extensions['chat_gateway'] = gateway
+    return gateway
@@ -0,0 +1,385 @@
+"""聊天供应商路由
+
+请求 provider=auto(或 DEFAULT_CHAT_SOURCE=auto)时，由路由器在 CHAT_ROUTER_ROUTES 配置的
+(供应商, 模型) 路线中选择:
+
+- 按路线记录最近 CHAT_ROUTER_WINDOW 次调用(且不超过 CHAT_ROUTER_WINDOW_SECONDS 秒)的耗时和成败，
+  样本足够且错误率达到一半的路线排在后面，其余按成功调用的 p50 耗时 x (1 + 10 x 错误率) 排序，
+  成功样本不足 CHAT_ROUTER_MIN_SAMPLES 的路线优先试探。另有 CHAT_ROUTER_EXPLORE 比例的请求随机先试一条
+  未暂停的其他路线，排在后面的路线恢复后能重新得到流量
+- 超时、连接失败、5xx 和 429 视为失败，依次切换到下一条路线；4xx 直接返回给客户端
+- 连续失败 CHAT_ROUTER_EJECT_FAILURES 次的路线暂停 CHAT_ROUTER_COOLDOWN 秒，期间排在最后，只在其他路线都失败时使用
+- 开启 CHAT_ROUTER_HEDGE 时，首选路线在其 p95 耗时内没有返回，就同时请求第二条路线，采用先返回的结果
+- 流式请求只在拿到第一个数据块之前切换路线，不对冲
+
+指定了具体供应商的请求只有一条路线，不切换，但同样计入统计。
+统计保存在进程内，多进程部署时各进程分别统计。
+"""
+
+import time
+import queue
+import random
+import logging
+import threading
+from collections import deque
+
+from flask import current_app, has_app_context
+
+from .gateway import GatewayRejected
+from .streaming import ChatStreamError
+
+logger = logging.getLogger('app.services.chat.router')
+
+ERROR_PENALTY = 10
+UNHEALTHY_ERROR_RATE = 0.5
+_COUNTERS = ('requests', 'failures', 'failovers', 'hedges', 'hedge_wins')
+
+
+def _retryable(status_code):
+    return status_code >= 500 or status_code == 429
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else None
+
+
+class _Outcome:
+    """一次路线调用的结果: result 为供应商返回的字典，error 为抛出的异常，retry 表示可以换下一条路线"""
+
+    def __init__(self, route, result=None, error=None, retry=False):
+        self.route = route
+        self.result = result
+        self.error = error
+        self.retry = retry
+
+
+class _RouteStats:
+    """单条路线最近的调用耗时、成败和暂停状态"""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)  # (时间, 耗时秒或 None, 是否成功)
+        self.counters = dict.fromkeys(_COUNTERS, 0)
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def prune(self, now, max_age):
+        while self.samples and now - self.samples[0][0] > max_age:
+            self.samples.popleft()
+
+    def latencies(self, ok_only=False):
+        return [latency for _, latency, ok in self.samples if latency is not None and (ok or not ok_only)]
+
+    def error_rate(self):
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, _, ok in self.samples if not ok) / len(self.samples)
+
+
+class ProviderRouter:
+    """按耗时和错误率选择聊天供应商，失败时切换，可选对冲请求
+
+    Args:
+        routes: 默认路线 [(供应商, 模型)]，按优先级排列
+        window: 每条路线保留的最近样本数
+        window_seconds: 样本最长保留时间(秒)，过期后路线重新按样本不足处理
+        min_samples: 样本数不少于该值时才按耗时排序和计算对冲延迟
+        eject_failures: 连续失败多少次后暂停路线
+        cooldown: 暂停时长(秒)
+        hedge: 是否对冲
+        hedge_delay: 首选路线样本不足时的对冲延迟(秒)
+        hedge_quantile: 按首选路线耗时的该分位数决定对冲延迟
+        explore: 随机先试其他路线的请求比例
+    """
+
+    def __init__(self, routes, window=100, window_seconds=300, min_samples=5, eject_failures=3, cooldown=30,
+                 hedge=False, hedge_delay=2.0, hedge_quantile=0.95, explore=0.05):
+        self.routes = [tuple(route) for route in routes]
+        self.window = window
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.eject_failures = eject_failures
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_quantile = hedge_quantile
+        self.explore = explore
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, model=None):
+        """自动路由的候选路线，请求指定了模型且有路线使用该模型时只用这些路线"""
+        if model:
+            matched = [route for route in self.routes if route[1] == model]
+            if matched:
+                return matched
+        return list(self.routes)
+
+    def _route_stats(self, route):
+        stats = self._stats.get(route)
+        if stats is None:
+            stats = self._stats[route] = _RouteStats(self.window)
+        return stats
+
+    def _sort_key(self, route, index, now):
+        stats = self._route_stats(route)
+        stats.prune(now, self.window_seconds)
+        ejected = stats.ejected_until > now
+        error_rate = stats.error_rate()
+        # 失败的调用可能很快返回，只按成功调用的耗时排序
+        latencies = stats.latencies(ok_only=True)
+        if len(latencies) < self.min_samples:
+            score = 0.0
+        else:
+            score = _percentile(latencies, 0.5) * (1 + ERROR_PENALTY * error_rate)
+        unhealthy = len(stats.samples) >= self.min_samples and error_rate >= UNHEALTHY_ERROR_RATE
+        return ejected, unhealthy, score, index
+
+    def rank(self, routes, explore=False):
+        """按当前健康状况排序: 未暂停的在前，错误率低于一半的在前，分数(耗时加错误率惩罚)低的在前，相同时保持配置顺序
+
+        explore 为 True 时按 self.explore 的概率把一条未暂停的其他路线提到最前
+        """
+        now = time.monotonic()
+        with self._lock:
+            keys = {route: self._sort_key(route, index, now) for index, route in enumerate(routes)}
+        ranked = sorted(routes, key=keys.get)
+        if explore and len(ranked) > 1 and random.random() < self.explore:
+            others = [route for route in ranked[1:] if not keys[route][0]]
+            if others:
+                route = random.choice(others)
+                ranked.remove(route)
+                ranked.insert(0, route)
+        return ranked
+
+    def _record(self, route, latency, ok):
+        now = time.monotonic()
+        with self._lock:
+            stats = self._route_stats(route)
+            stats.samples.append((now, latency, ok))
+            stats.counters['requests'] += 1
+            if ok:
+                stats.consecutive_failures = 0
+                return
+            stats.counters['failures'] += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.eject_failures and stats.ejected_until <= now:
+                stats.ejected_until = now + self.cooldown
+                logger.warning(f"{route[0]}/{route[1]} 连续失败 {stats.consecutive_failures} 次，暂停 {self.cooldown} 秒")
+
+    def _count(self, route, counter):
+        with self._lock:
+            self._route_stats(route).counters[counter] += 1
+
+    def _attempt(self, route, call):
+        begin = time.monotonic()
+        try:
+            result = call(*route)
+        except GatewayRejected as e:
+            # 本进程的网关限流，不代表供应商不健康，不计入统计
+            return _Outcome(route, error=e, retry=True)
+        except Exception as e:
+            self._record(route, time.monotonic() - begin, False)
+            logger.warning(f"{route[0]}/{route[1]} 调用失败: {str(e)}")
+            return _Outcome(route, error=e, retry=True)
+
+        status_code = result.get('status_code', 500) if 'error' in result else 200
+        retry = _retryable(status_code)
+        self._record(route, time.monotonic() - begin, not retry)
+        if retry:
+            logger.warning(f"{route[0]}/{route[1]} 返回错误: 状态码={status_code}")
+        return _Outcome(route, result=result, retry=retry)
+
+    def _hedge_after(self, route):
+        with self._lock:
+            stats = self._route_stats(route)
+            latencies = stats.latencies(ok_only=True)
+            if len(latencies) < self.min_samples:
+                return self.hedge_delay
+            return _percentile(latencies, self.hedge_quantile)
+
+    def _hedged(self, pending, call, attempts):
+        """首选路线超过对冲延迟仍未返回时同时请求下一条路线，返回先成功的结果
+
+        落后的请求在后台继续执行，结果只计入统计
+        """
+        app = current_app._get_current_object() if has_app_context() else None
+        outcomes = queue.Queue()
+
+        def run(route):
+            if app is None:
+                outcomes.put(self._attempt(route, call))
+                return
+            with app.app_context():
+                outcomes.put(self._attempt(route, call))
+
+        primary = pending.popleft()
+        attempts.append(primary)
+        threading.Thread(target=run, args=(primary,), daemon=True).start()
+        running, backup = 1, None
+        try:
+            outcome = outcomes.get(timeout=self._hedge_after(primary))
+        except queue.Empty:
+            backup = pending.popleft()
+            attempts.append(backup)
+            self._count(backup, 'hedges')
+            logger.info(f"{primary[0]}/{primary[1]} 超过对冲延迟未返回，同时请求 {backup[0]}/{backup[1]}")
+            threading.Thread(target=run, args=(backup,), daemon=True).start()
+            running += 1
+            outcome = outcomes.get()
+        running -= 1
+        while outcome.retry and running:
+            outcome = outcomes.get()
+            running -= 1
+        if backup is not None and outcome.route == backup and not outcome.retry:
+            self._count(backup, 'hedge_wins')
+        return outcome
+
+    def complete(self, routes, call):
+        """按排序依次调用路线，直到成功或返回不可重试的错误
+
+        Args:
+            routes: 候选路线 [(供应商, 模型)]
+            call: call(供应商, 模型) 调用供应商并返回结果字典
+
+        Returns:
+            Dict: 供应商的结果；有多条路线时附带 routing(实际使用的路线和尝试过的路线)。
+                  所有路线都失败时返回最后一个错误结果或抛出最后一个异常
+        """
+        pending = deque(self.rank(routes, explore=True))
+        attempts = []
+        outcome = None
+        if self.hedge and len(pending) > 1:
+            outcome = self._hedged(pending, call, attempts)
+        while (outcome is None or outcome.retry) and pending:
+            if outcome is not None:
+                self._count(outcome.route, 'failovers')
+            route = pending.popleft()
+            attempts.append(route)
+            outcome = self._attempt(route, call)
+
+        if outcome.error is not None:
+            raise outcome.error
+        result = outcome.result
+        if len(routes) > 1:
+            result['routing'] = {
+                'provider': outcome.route[0],
+                'model': outcome.route[1],
+                'attempts': [f"{provider}/{model}" for provider, model in attempts]
+            }
+        return result
+
+    def stream(self, routes, open_stream):
+        """流式请求: 依次打开路线直到拿到第一个数据块，之后不再切换
+
+        Args:
+            open_stream: open_stream(供应商, 模型) 返回数据块生成器
+        """
+        error = None
+        for route in self.rank(routes, explore=True):
+            if error is not None:
+                self._count(route, 'failovers')
+            begin = time.monotonic()
+            chunks = None
+            try:
+                chunks = open_stream(*route)
+                first = next(chunks, None)
+            except GatewayRejected as e:
+                chunks.close()
+                error = e
+                continue
+            except Exception as e:
+                if chunks is not None:
+                    chunks.close()
+                if isinstance(e, ChatStreamError) and not _retryable(e.status_code):
+                    raise
+                # 首个数据块的耗时与完整回复不可比，流式请求只计成败
+                self._record(route, None, False)
+                logger.warning(f"{route[0]}/{route[1]} 流式调用失败: {str(e)}")
+                error = e
+                continue
+            self._record(route, None, True)
+            logger.debug(f"流式请求使用 {route[0]}/{route[1]}，首个数据块耗时 {time.monotonic() - begin:.3f}s")
+            try:
+                if first is not None:
+                    yield first
+                yield from chunks
+            finally:
+                chunks.close()
+            return
+        raise error
+
+    def get_stats(self):
+        """各路线当前的排序、耗时、错误率、暂停状态和切换/对冲计数"""
+        now = time.monotonic()
+        routes = self.rank(list(dict.fromkeys(self.routes + list(self._stats))))
+        result = []
+        with self._lock:
+            for route in routes:
+                stats = self._route_stats(route)
+                latencies = stats.latencies()
+                p50 = _percentile(latencies, 0.5)
+                p95 = _percentile(latencies, 0.95)
+                result.append(dict(
+                    stats.counters,
+                    provider=route[0],
+                    model=route[1],
+                    samples=len(stats.samples),
+                    error_rate=round(stats.error_rate(), 4),
+                    p50_ms=round(p50 * 1000, 1) if p50 is not None else None,
+                    p95_ms=round(p95 * 1000, 1) if p95 is not None else None,
+                    consecutive_failures=stats.consecutive_failures,
+                    ejected_for=round(max(0.0, stats.ejected_until - now), 1)
+                ))
+        return {
+            'routes': result,
+            'hedge': self.hedge,
+            'window': self.window,
+            'cooldown': self.cooldown
+        }
+
+    def reset(self):
+        """清空统计并恢复所有暂停的路线"""
+        with self._lock:
+            self._stats.clear()
+
+
+def _configured_routes(config):
+    """读取 CHAT_ROUTER_ROUTES，未配置时使用配置了 API 密钥的 OpenAI 兼容供应商及其默认模型"""
+    routes = []
+    for item in config.get('CHAT_ROUTER_ROUTES') or []:
+        provider, _, model = item.partition(':')
+        routes.append((provider.strip(), model.strip() or None))
+    if routes:
+        return routes
+    for provider in ('openai', 'deepseek', 'tongyi'):
+        if config.get(f'{provider.upper()}_API_KEY'):
+            routes.append((provider, config.get(f'{provider.upper()}_MODEL')))
+    return routes
+
+
+def get_chat_router():
+    """当前应用的供应商路由器，未启用时返回 None"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('chat_router')
+
+
+def init_chat_router(app):
+    """按配置创建供应商路由器"""
+    if not app.config.get('CHAT_ROUTER_ENABLED'):
+        return None
+    router = ProviderRouter(
+        _configured_routes(app.config),
+        window=app.config.get('CHAT_ROUTER_WINDOW', 100),
+        window_seconds=app.config.get('CHAT_ROUTER_WINDOW_SECONDS', 300),
+        min_samples=app.config.get('CHAT_ROUTER_MIN_SAMPLES', 5),
+        eject_failures=app.config.get('CHAT_ROUTER_EJECT_FAILURES', 3),
+        cooldown=app.config.get('CHAT_ROUTER_COOLDOWN', 30),
+        hedge=app.config.get('CHAT_ROUTER_HEDGE', False),
+        hedge_delay=app.config.get('CHAT_ROUTER_HEDGE_DELAY', 2.0),
+        hedge_quantile=app.config.get('CHAT_ROUTER_HEDGE_QUANTILE', 0.95),
+        explore=app.config.get('CHAT_ROUTER_EXPLORE', 0.05)
+    )
+    app.extensions['chat_router'] = router
+    return router
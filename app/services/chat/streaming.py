@@ -0,0 +1,109 @@
+"""聊天流式输出(Server-Sent Events)
+
+各供应商的流式接口格式不同(OpenAI/DeepSeek 的 chat.completion.chunk、通义的增量 output.text、
+Dify 的 text_chunk 事件、Coze 的 Message / conversation.message.delta 事件)，
+服务的 chat_completion_stream 统一转换为 OpenAI 的 chat.completion.chunk 格式，
+由 /api/chat/completions 以 text/event-stream 转发给客户端。
+"""
+
+import json
+import time
+import uuid
+
+
+class ChatStreamError(Exception):
+    """流式请求失败
+
+    在返回第一个数据块之前抛出时，接口直接返回 JSON 错误和状态码；
+    之后抛出时，以 error 事件的形式发给客户端
+    """
+
+    def __init__(self, message, code='stream_error', status_code=500, error=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error = error or {
+            'message': message,
+            'type': 'server_error',
+            'code': code
+        }
+
+
+def upstream_error(response, provider):
+    """供应商返回非 200 时构造错误(优先使用供应商返回的 JSON 错误)"""
+    try:
+        error = response.json()
+        error = error.get('error', error) if isinstance(error, dict) else None
+    except ValueError:
+        error = None
+    return ChatStreamError(
+        f"{provider} API调用失败: 状态码={response.status_code}, 响应={response.text[:500]}",
+        code=f'{provider}_api_error',
+        status_code=response.status_code,
+        error=error if isinstance(error, dict) else None
+    )
+
+
+def iter_sse(response):
+    """逐个读取上游的 SSE 事件，返回 (事件名, 数据)
+
+    iter_lines 使用 chunk_size=None，收到多少转发多少，不等待凑满缓冲区
+    """
+    event, data = None, []
+    for line in response.iter_lines(chunk_size=None):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line:
+            if data:
+                yield event or 'message', '\n'.join(data)
+            event, data = None, []
+            continue
+        if line.startswith(':'):
+            continue
+        field, _, value = line.partition(':')
+        if value.startswith(' '):
+            value = value[1:]
+        if field == 'event':
+            event = value
+        elif field == 'data':
+            data.append(value)
+    if data:
+        yield event or 'message', '\n'.join(data)
+
+
+def new_chunk_id(prefix='chatcmpl'):
+    return f"{prefix}-{uuid.uuid4()}"
+
+
+def make_chunk(chunk_id, model, provider, content=None, role=None, finish_reason=None):
+    """构造 OpenAI chat.completion.chunk 格式的数据块"""
+    delta = {}
+    if role:
+        delta['role'] = role
+    if content:
+        delta['content'] = content
+    return {
+        'id': chunk_id,
+        'object': 'chat.completion.chunk',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+        'provider': provider
+    }
+
+
+def result_chunks(result, model=None):
+    """把完整的 chat.completion 结果转换为数据块(不支持流式的服务和缓存命中时使用)"""
+    chunk_id = result.get('id') or new_chunk_id()
+    provider = result.get('provider')
+    model = result.get('model', model)
+    for choice in result.get('choices', []):
+        content = choice.get('message', {}).get('content')
+        yield make_chunk(chunk_id, model, provider, content=content, role='assistant')
+    yield make_chunk(chunk_id, model, provider, finish_reason='stop')
+
+
+def format_event(payload):
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+DONE_EVENT = 'data: [DONE]\n\n'
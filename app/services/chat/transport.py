@@ -0,0 +1,141 @@
+"""聊天供应商 HTTP 传输层
+
+各聊天服务原来每次请求都调用模块级的 requests.post，每轮对话都要重新建立 TCP/TLS 连接。
+这里按供应商基础 URL(协议+主机+端口)和代理共享一个带连接池的 requests.Session:
+
+- 连接池大小 CHAT_HTTP_POOL_SIZE，对应同一供应商的最大并发连接数
+- 空闲超过 CHAT_HTTP_KEEPALIVE 秒后换用新的连接池再发请求，避免复用已被服务端关闭的连接
+- 连接超时 CHAT_HTTP_CONNECT_TIMEOUT 和读取超时 CHAT_HTTP_READ_TIMEOUT 分开设置，
+  连不上时快速失败，模型生成较慢时仍能等待
+- 代理沿用各供应商的 *_API_PROXY 配置
+"""
+
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app, has_app_context
+
+logger = logging.getLogger('app.services.chat.transport')
+
+# 没有应用上下文时(如基准测试脚本)使用的默认值
+DEFAULT_POOL_SIZE = 20
+DEFAULT_KEEPALIVE = 60
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 120
+
+
+def _config(name, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+class ProviderTransport:
+    """一个供应商的连接池
+
+    Args:
+        base_url: 供应商基础 URL
+        proxy: 代理地址，为空时不使用代理
+        trust_env: 未配置代理时是否读取 HTTP(S)_PROXY 环境变量
+        verify: 是否校验 TLS 证书
+        pool_size: 连接池大小
+        keepalive: 连接空闲多少秒后丢弃
+        connect_timeout / read_timeout: 默认的连接和读取超时(秒)
+    """
+
+    def __init__(self, base_url, proxy=None, trust_env=True, verify=True, pool_size=DEFAULT_POOL_SIZE,
+                 keepalive=DEFAULT_KEEPALIVE, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT):
+        self.base_url = base_url
+        self.proxy = proxy
+        self.trust_env = trust_env
+        self.verify = verify
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.session = self._new_session()
+        self.last_used = time.monotonic()
+        self.stats = {'requests': 0, 'recycled': 0}
+        self._lock = threading.Lock()
+
+    def _new_session(self):
+        session = requests.Session()
+        session.trust_env = self.trust_env
+        session.verify = self.verify
+        if self.proxy:
+            session.proxies = {'http': self.proxy, 'https': self.proxy}
+        # 不在传输层重试：聊天请求不是幂等的，失败由调用方处理
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def request(self, method, url, connect_timeout=None, read_timeout=None, **kwargs):
+        """发送请求，未指定 timeout 时使用 (连接超时, 读取超时)"""
+        with self._lock:
+            now = time.monotonic()
+            if self.keepalive and now - self.last_used > self.keepalive:
+                # 换用新的连接池，后续请求重新建立连接。旧连接池可能仍有其他协程在读的响应(如流式输出)，
+                # 不主动关闭，等这些请求结束、不再被引用后随对象回收
+                self.session = self._new_session()
+                self.stats['recycled'] += 1
+            self.last_used = now
+            self.stats['requests'] += 1
+            session = self.session
+        kwargs.setdefault('timeout', (connect_timeout or self.connect_timeout, read_timeout or self.read_timeout))
+        return session.request(method, url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def get_transport(base_url, proxy=None, trust_env=True, verify=True):
+    """获取供应商共享的连接池，同一基础 URL 和代理只创建一次"""
+    key = (_origin(base_url), proxy or None, trust_env, verify)
+    transport = _transports.get(key)
+    if transport is not None:
+        return transport
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            transport = ProviderTransport(
+                base_url,
+                proxy=proxy,
+                trust_env=trust_env,
+                verify=verify,
+                pool_size=int(_config('CHAT_HTTP_POOL_SIZE', DEFAULT_POOL_SIZE)),
+                keepalive=float(_config('CHAT_HTTP_KEEPALIVE', DEFAULT_KEEPALIVE)),
+                connect_timeout=float(_config('CHAT_HTTP_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)),
+                read_timeout=float(_config('CHAT_HTTP_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)),
+            )
+            _transports[key] = transport
+            logger.info(f"创建聊天供应商连接池: {key[0]} 代理={proxy or '无'}")
+        return transport
+
+
+def close_transports():
+    """关闭所有连接池(测试和进程退出时使用)"""
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
@@ -0,0 +1,239 @@
+"""数据处理多进程批处理模式
+
+分词、摘要、标签提取都是 CPU 密集的纯文本计算，串行处理时单核跑满、数据库空等。
+批处理模式拆成三个阶段:
+
+- 读取: 主进程按主键游标分块读出未处理数据的原始字段(只读需要的列)
+- 计算: ProcessPoolExecutor 中的工作进程各自预加载一次 jieba 词典，
+  对整块数据调用 DataProcessor.compute_*_fields，只返回计算后的字段
+- 写入: 主进程用 executemany 批量 UPDATE 结果并批量写入处理日志，每块提交一次
+
+主进程同时最多挂起 workers * 2 个计算任务，读取和写入与计算重叠进行。
+"""
+
+import os
+import time
+import logging
+from types import SimpleNamespace
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, ALL_COMPLETED, wait
+
+from sqlalchemy import select, bindparam
+
+from app import db
+from app.models.news_data import NewsData, RumorData, SocialMediaData, DataProcessLog
+from app.scraper import settings
+from app.services.data_processor.processor import DataProcessor, NEWS_FIELDS, RUMOR_FIELDS, SOCIAL_FIELDS
+from app.utils.response_cache import invalidate_models
+
+logger = logging.getLogger('data_processor')
+
+# 数据类型 -> (模型, 读取字段, 计算方法名, 写回字段, 词频向量语料)
+DATA_TYPES = {
+    'news': (NewsData, NEWS_FIELDS, 'compute_news_fields', ('content', 'summary', 'tags', 'keyword_match'), 'news_data'),
+    'rumor': (RumorData, RUMOR_FIELDS, 'compute_rumor_fields', ('content', 'refutation', 'tags'), None),
+    'social': (SocialMediaData, SOCIAL_FIELDS, 'compute_social_fields', ('content', 'tags', 'keyword_match', 'recommendation_level'), None),
+}
+
+DEFAULT_CHUNK_SIZE = 200
+
+# 工作进程内的处理器实例，由 _init_worker 创建
+_worker_processor = None
+_worker_keywords = None
+
+
+def _init_worker(keywords):
+    """工作进程初始化: 加载一次 jieba 词典和用户词典，后续任务复用"""
+    global _worker_processor, _worker_keywords
+    import jieba
+
+    jieba.setLogLevel(logging.WARNING)
+    jieba.initialize()
+    _worker_processor = DataProcessor()
+    _worker_keywords = keywords
+
+
+def _process_chunk(data_type, items):
+    """在工作进程中计算一块数据
+
+    需要维护词频向量的类型同时在工作进程中分词，写入阶段不再重复分词
+
+    Args:
+        data_type: news/rumor/social
+        items: [(id, {字段: 值})]
+
+    Returns:
+        tuple: ([(id, 计算结果字段 或 None, 词频向量文档 或 None, 错误信息 或 None)], 计算耗时秒)
+    """
+    from app.services import term_vector_service
+
+    _, _, method, _, doc_type = DATA_TYPES[data_type]
+    compute = getattr(_worker_processor, method)
+    corpus = term_vector_service.get_corpus(doc_type) if doc_type else None
+    begin = time.process_time()
+    results = []
+    for item_id, values in items:
+        try:
+            fields = compute(values, keywords=_worker_keywords)
+            document = corpus.document(SimpleNamespace(**{**values, **fields})) if corpus else None
+            results.append((item_id, fields, document, None))
+        except Exception as e:
+            results.append((item_id, None, None, str(e)))
+    return results, time.process_time() - begin
+
+
+class StageMetrics:
+    """单个阶段的吞吐统计"""
+
+    def __init__(self):
+        self.rows = 0
+        self.seconds = 0.0
+
+    def add(self, rows, seconds):
+        self.rows += rows
+        self.seconds += seconds
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows / self.seconds, 1) if self.seconds else None
+        }
+
+
+def _read_chunks(data_type, chunk_size, limit):
+    """按主键游标分块读取未处理数据，避免 OFFSET 扫描和一次性加载"""
+    model, fields, _, _, doc_type = DATA_TYPES[data_type]
+    if doc_type:
+        # 额外读取词频向量需要的标题、来源、时间等字段
+        from app.services import term_vector_service
+        fields = tuple(dict.fromkeys(fields + term_vector_service.get_corpus(doc_type).tracked_fields))
+    columns = [model.id] + [getattr(model, field) for field in fields]
+    last_id = 0
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        begin = time.perf_counter()
+        rows = db.session.execute(
+            select(*columns)
+            .where(model.processed.is_(False), model.id > last_id)
+            .order_by(model.id)
+            .limit(size)
+        ).all()
+        # 读完立即结束只读事务，避免长时间持有快照
+        db.session.commit()
+        elapsed = time.perf_counter() - begin
+        if not rows:
+            return
+        last_id = rows[-1].id
+        if remaining is not None:
+            remaining -= len(rows)
+        yield [(row.id, {field: getattr(row, field) for field in fields}) for row in rows], elapsed
+
+
+def _write_results(data_type, results):
+    """批量写回一块计算结果，返回成功条数"""
+    from app.services import term_vector_service
+
+    model, _, _, write_fields, doc_type = DATA_TYPES[data_type]
+    table = model.__table__
+    now = datetime.now()
+
+    updates = []
+    documents = {}
+    logs = []
+    for item_id, fields, document, error in results:
+        if error is None:
+            params = {f'_{field}': fields[field] for field in write_fields}
+            params['_id'] = item_id
+            updates.append(params)
+            documents[item_id] = document
+            status, message = 'success', '数据处理成功'
+        else:
+            logger.error(f"处理{data_type} ID {item_id} 时出错: {error}")
+            status, message = 'error', f'处理出错: {error}'
+        logs.append({
+            'data_type': data_type,
+            'data_id': item_id,
+            'process_type': 'clean_and_extract',
+            'status': status,
+            'message': message,
+            'created_at': now
+        })
+
+    if updates:
+        values = {field: bindparam(f'_{field}') for field in write_fields}
+        values.update(processed=True, processed_time=now)
+        statement = table.update().where(table.c.id == bindparam('_id')).values(**values)
+        db.session.execute(statement, updates)
+        # Core 批量更新不触发 ORM 事件，需要手动写入词频向量
+        if doc_type:
+            term_vector_service.write_documents(db.session.connection(), doc_type, documents)
+    if logs:
+        db.session.execute(DataProcessLog.__table__.insert(), logs)
+    db.session.commit()
+    if updates:
+        invalidate_models(model)
+    return len(updates)
+
+
+def process_parallel(data_type, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, limit=None, keywords=None):
+    """多进程处理一类未处理数据
+
+    需在应用上下文中调用。
+
+    Args:
+        data_type: news/rumor/social
+        workers: 工作进程数，默认 CPU 核数
+        chunk_size: 每块数据量，也是每次提交的数据量
+        limit: 最多处理的数量，为None时处理全部
+        keywords: 关注关键词，为None时读取爬虫配置
+
+    Returns:
+        dict: 处理数量、出错数量、总耗时及各阶段吞吐
+    """
+    if data_type not in DATA_TYPES:
+        raise ValueError(f"未知的数据类型: {data_type}")
+    workers = workers or os.cpu_count() or 1
+    if keywords is None:
+        keywords = list(settings.TRUTH_GUARDIAN_SETTINGS.get('KEYWORDS', []))
+
+    metrics = {'read': StageMetrics(), 'compute': StageMetrics(), 'write': StageMetrics()}
+    processed = 0
+    failed = 0
+    started = time.perf_counter()
+
+    def drain(futures, return_when):
+        nonlocal processed, failed
+        done, pending = wait(futures, return_when=return_when)
+        for future in done:
+            results, cpu_seconds = future.result()
+            metrics['compute'].add(len(results), cpu_seconds)
+            begin = time.perf_counter()
+            success = _write_results(data_type, results)
+            metrics['write'].add(len(results), time.perf_counter() - begin)
+            processed += success
+            failed += len(results) - success
+        return pending
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(keywords,)) as executor:
+        futures = set()
+        for items, read_seconds in _read_chunks(data_type, chunk_size, limit):
+            metrics['read'].add(len(items), read_seconds)
+            futures.add(executor.submit(_process_chunk, data_type, items))
+            if len(futures) >= workers * 2:
+                futures = drain(futures, FIRST_COMPLETED)
+        if futures:
+            drain(futures, ALL_COMPLETED)
+
+    elapsed = time.perf_counter() - started
+    result = {
+        'processed': processed,
+        'failed': failed,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round((processed + failed) / elapsed, 1) if elapsed else None,
+        # compute 阶段为各进程 CPU 时间之和，rows_per_second 即单进程吞吐
+        'stages': {name: stage.to_dict() for name, stage in metrics.items()}
+    }
+    logger.info(f"[{data_type}] 批处理完成: {result}")
+    return result
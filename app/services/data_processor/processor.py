@@ -14,6 +14,9 @@ from collections import Counter
 
 from app import db
 from app.models.news_data import NewsData, RumorData, SocialMediaData, DataProcessLog
+from app.scraper import settings
+from app.scraper.ad_filter import get_ad_filter
+from app.utils.text_normalize import normalize_text
 
 # 配置日志
 logger = logging.getLogger('data_processor')
@@ -28,6 +31,11 @@ try:
 except Exception as e:
     logger.warning(f"加载停用词失败: {str(e)}")
 
+# 各类数据处理时需要读取的字段
+NEWS_FIELDS = ('content', 'summary', 'tags', 'keyword_match')
+RUMOR_FIELDS = ('content', 'refutation', 'tags')
+SOCIAL_FIELDS = ('content', 'tags', 'keyword_match', 'verified_type', 'shares', 'comments', 'likes')
+
 class DataProcessor:
     """数据处理器"""
     
@@ -57,22 +65,7 @@ class DataProcessor:
         Returns:
             str: 清洗后的文本
         """
-        if not text:
-            return ""
-            
-        # 替换HTML标签
-        text = re.sub(r'<[^>]+>', ' ', text)
-        
-        # 替换多余空白字符
-        text = re.sub(r'\s+', ' ', text)
-        
-        # 替换特殊字符
-        text = re.sub(r'[^\w\s\u4e00-\u9fff。，、；：""（）《》？！]', '', text)
-        
-        # 移除空行
-        text = re.sub(r'\n\s*\n', '\n', text)
-        
-        return text.strip()
+        return normalize_text(text)
     
     def extract_keywords(self, text, topk=10):
         """提取关键词
@@ -240,49 +233,115 @@ class DataProcessor:
         Returns:
             str: 过滤后的内容
         """
-        # 广告关键词列表
-        ad_keywords = [
-            '广告', '推广', '赞助', '点击购买', '限时优惠',
-            '联系电话', '推荐使用', '购买链接', '折扣', '促销',
-            '联系我们', '微信号', 'QQ群', '加入我们', '转发有奖'
-        ]
-        
-        # 广告模式正则表达式
-        ad_patterns = [
-            r'([购领][买取][链方地][接式址][：:].+)',
-            r'([加关]入?[我官]们?的?[微群].{1,10}[：:].{5,30})',
-            r'([联微][系信][方电][式话][：:].{5,15})',
-            r'((?:http|https|www).+?(?:\.com|\.cn|\.net))',
-            r'([送优][礼惠][：:].+)',
-        ]
-        
-        # 根据广告关键词拆分文本，然后过滤包含关键词的段落
-        paragraphs = re.split(r'\n+', text)
-        filtered_paragraphs = []
-        
-        for para in paragraphs:
-            is_ad = False
-            
-            # 检查是否包含广告关键词
-            for keyword in ad_keywords:
-                if keyword in para:
-                    is_ad = True
-                    break
-            
-            # 检查是否匹配广告模式
-            if not is_ad:
-                for pattern in ad_patterns:
-                    if re.search(pattern, para):
-                        is_ad = True
-                        break
-            
-            # 如果不是广告，保留这个段落
-            if not is_ad:
-                filtered_paragraphs.append(para)
-        
-        # 重新连接过滤后的段落
-        filtered_text = '\n'.join(filtered_paragraphs)
-        return filtered_text
+        return get_ad_filter().filter(text)
+    
+    def keyword_match(self, content, keywords=None):
+        """计算内容与关注关键词的匹配度，没有配置关键词时返回 None"""
+        if keywords is None:
+            keywords = settings.TRUTH_GUARDIAN_SETTINGS.get('KEYWORDS', [])
+        if not content or not keywords:
+            return None
+        matches = sum(1 for kw in keywords if kw in content)
+        return matches / len(keywords)
+    
+    def compute_news_fields(self, item, keywords=None):
+        """计算一条新闻处理后的字段
+        
+        只做文本计算、不访问数据库，串行处理和多进程批处理共用
+        
+        Args:
+            item: 包含 NEWS_FIELDS 各字段的字典
+            keywords: 关注关键词列表，为None时读取爬虫配置
+            
+        Returns:
+            dict: 处理后的字段
+        """
+        content = item.get('content')
+        summary = item.get('summary')
+        tags = item.get('tags')
+        keyword_match = item.get('keyword_match')
+        
+        # 清洗内容
+        if content:
+            content = self.clean_text(content)
+            content = self.filter_ads(content)
+        
+        # 生成摘要
+        if not summary and content:
+            summary = self.generate_summary(content)
+        
+        # 提取标签
+        if content and not tags:
+            tags = json.dumps(self.extract_tags(content))
+        
+        # 计算关键词匹配度
+        match = self.keyword_match(content, keywords)
+        if match is not None:
+            keyword_match = match
+        
+        return {'content': content, 'summary': summary, 'tags': tags, 'keyword_match': keyword_match}
+    
+    def compute_rumor_fields(self, item, keywords=None):
+        """计算一条谣言处理后的字段(参数同 compute_news_fields)"""
+        content = item.get('content')
+        refutation = item.get('refutation')
+        tags = item.get('tags')
+        
+        # 清洗内容
+        if content:
+            content = self.clean_text(content)
+            content = self.filter_ads(content)
+        
+        if refutation:
+            refutation = self.clean_text(refutation)
+            refutation = self.filter_ads(refutation)
+        
+        # 提取标签
+        if (content or refutation) and not tags:
+            text = (content or '') + ' ' + (refutation or '')
+            tags = json.dumps(self.extract_tags(text))
+        
+        return {'content': content, 'refutation': refutation, 'tags': tags}
+    
+    def compute_social_fields(self, item, keywords=None):
+        """计算一条社交媒体数据处理后的字段(参数同 compute_news_fields)"""
+        content = item.get('content')
+        tags = item.get('tags')
+        keyword_match = item.get('keyword_match')
+        
+        # 清洗内容
+        if content:
+            content = self.clean_text(content)
+            content = self.filter_ads(content)
+        
+        # 提取标签
+        if content and not tags:
+            tags = json.dumps(self.extract_tags(content))
+        
+        # 计算关键词匹配度
+        match = self.keyword_match(content, keywords)
+        if match is not None:
+            keyword_match = match
+        
+        # 计算推荐级别
+        recommendation_level = 0
+        # 认证用户的内容更可信
+        if item.get('verified_type') in ['official', 'media']:
+            recommendation_level += 2
+        # 热度高的内容更值得关注
+        engagement = (item.get('shares') or 0) + (item.get('comments') or 0) + (item.get('likes') or 0)
+        if engagement > 1000:
+            recommendation_level += 1
+        # 关键词匹配度高的内容更相关
+        if keyword_match and keyword_match > 0.2:
+            recommendation_level += 1
+        
+        return {
+            'content': content,
+            'tags': tags,
+            'keyword_match': keyword_match,
+            'recommendation_level': min(5, recommendation_level)
+        }
     
     def process_news_data(self, news_id=None, limit=100):
         """处理新闻数据
@@ -311,26 +370,10 @@ class DataProcessor:
             
             for news in news_list:
                 try:
-                    # 清洗内容
-                    if news.content:
-                        news.content = self.clean_text(news.content)
-                        news.content = self.filter_ads(news.content)
-                    
-                    # 生成摘要
-                    if not news.summary and news.content:
-                        news.summary = self.generate_summary(news.content)
-                    
-                    # 提取标签
-                    if news.content and not news.tags:
-                        tags = self.extract_tags(news.content)
-                        news.tags = json.dumps(tags)
-                    
-                    # 计算关键词匹配度
-                    if news.content:
-                        keywords = [kw for kw in settings.TRUTH_GUARDIAN_SETTINGS.get('KEYWORDS', [])]
-                        if keywords:
-                            matches = sum(1 for kw in keywords if kw in news.content)
-                            news.keyword_match = matches / len(keywords)
+                    # 清洗内容、生成摘要、提取标签、计算关键词匹配度
+                    fields = self.compute_news_fields({field: getattr(news, field) for field in NEWS_FIELDS})
+                    for field, value in fields.items():
+                        setattr(news, field, value)
                     
                     # 标记为已处理
                     news.processed = True
@@ -402,20 +445,10 @@ class DataProcessor:
             
             for rumor in rumor_list:
                 try:
-                    # 清洗内容
-                    if rumor.content:
-                        rumor.content = self.clean_text(rumor.content)
-                        rumor.content = self.filter_ads(rumor.content)
-                    
-                    if rumor.refutation:
-                        rumor.refutation = self.clean_text(rumor.refutation)
-                        rumor.refutation = self.filter_ads(rumor.refutation)
-                    
-                    # 提取标签
-                    if (rumor.content or rumor.refutation) and not rumor.tags:
-                        text = (rumor.content or '') + ' ' + (rumor.refutation or '')
-                        tags = self.extract_tags(text)
-                        rumor.tags = json.dumps(tags)
+                    # 清洗内容和辟谣内容、提取标签
+                    fields = self.compute_rumor_fields({field: getattr(rumor, field) for field in RUMOR_FIELDS})
+                    for field, value in fields.items():
+                        setattr(rumor, field, value)
                     
                     # 标记为已处理
                     rumor.processed = True
@@ -487,37 +520,10 @@ class DataProcessor:
             
             for post in post_list:
                 try:
-                    # 清洗内容
-                    if post.content:
-                        post.content = self.clean_text(post.content)
-                        post.content = self.filter_ads(post.content)
-                    
-                    # 提取标签
-                    if post.content and not post.tags:
-                        tags = self.extract_tags(post.content)
-                        post.tags = json.dumps(tags)
-                    
-                    # 计算关键词匹配度
-                    if post.content:
-                        keywords = [kw for kw in settings.TRUTH_GUARDIAN_SETTINGS.get('KEYWORDS', [])]
-                        if keywords:
-                            matches = sum(1 for kw in keywords if kw in post.content)
-                            post.keyword_match = matches / len(keywords)
-                    
-                    # 计算推荐级别
-                    recommendation_level = 0
-                    # 认证用户的内容更可信
-                    if post.verified_type in ['official', 'media']:
-                        recommendation_level += 2
-                    # 热度高的内容更值得关注
-                    engagement = (post.shares or 0) + (post.comments or 0) + (post.likes or 0)
-                    if engagement > 1000:
-                        recommendation_level += 1
-                    # 关键词匹配度高的内容更相关
-                    if post.keyword_match and post.keyword_match > 0.2:
-                        recommendation_level += 1
-                        
-                    post.recommendation_level = min(5, recommendation_level)
+                    # 清洗内容、提取标签、计算关键词匹配度和推荐级别
+                    fields = self.compute_social_fields({field: getattr(post, field) for field in SOCIAL_FIELDS})
+                    for field, value in fields.items():
+                        setattr(post, field, value)
                     
                     # 标记为已处理
                     post.processed = True
@@ -590,6 +596,32 @@ class DataProcessor:
         result['social'] = social_count
         
         return result
+    
+    def process_all_data_parallel(self, workers=None, chunk_size=200, limit=None):
+        """多进程批处理所有未处理的数据
+        
+        Args:
+            workers: 工作进程数，默认 CPU 核数
+            chunk_size: 每块数据量
+            limit: 每种类型最多处理的数量，为None时处理全部
+            
+        Returns:
+            dict: 各类型的处理数量和各阶段吞吐
+        """
+        from app.services.data_processor.parallel import process_parallel
+        
+        result = {}
+        if self.app:
+            ctx = self.app.app_context()
+            ctx.push()
+        try:
+            for data_type in ('news', 'rumor', 'social'):
+                result[data_type] = process_parallel(data_type, workers=workers, chunk_size=chunk_size, limit=limit)
+        finally:
+            if self.app:
+                ctx.pop()
+        
+        return result
 
 # 创建一个全局的数据处理器实例
 data_processor = None
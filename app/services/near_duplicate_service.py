@@ -0,0 +1,395 @@
+"""近似重复检测服务
+
+同一条谣言会以略有不同的措辞出现在微博、新浪和辟谣平台上，按唯一ID或标题精确去重
+无法识别。每条辟谣内容(DebunkContent)和谣言数据(RumorData)写入时根据正文计算
+64 位 SimHash(各平台的标题差别较大，微博的标题又是正文的前 100 字，只在没有正文时使用标题)，保存在 simhash 列，并把指纹切成 4 段写入 simhash_band 分段索引:
+查找汉明距离不超过 3 的近似重复时，按 (段号, 段值) 在索引上做 4 次精确查找得到候选，
+再用完整指纹过滤，不需要扫描全表。
+
+互为近似重复的记录(单链传递)归入同一个分组(near_duplicate_cluster)，记录的 cluster_id
+指向分组，没有近似重复的记录 cluster_id 为空。新记录同时命中多个分组时合并为ID最小的分组。
+记录修改或删除后只会缩小所在分组，不会把分组拆开，需要时执行 `flask rebuild-simhash` 重新聚类。
+
+与全文索引一样由 mapper 事件在同一事务内维护；绕过 ORM 的批量写入后调用 write_documents 同步。
+"""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from sqlalchemy import and_, bindparam, event, func, or_, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import db
+from app.models.debunk import DebunkContent
+from app.models.near_duplicate import NearDuplicateCluster, SimHashBand
+from app.models.news_data import RumorData
+from app.services.term_vector_service import tokenize
+from app.utils.simhash import SimHashIndex, band_values, hamming, simhash, to_signed, to_unsigned
+
+logger = logging.getLogger(__name__)
+
+# 近似重复的最大汉明距离，指纹切成 MAX_DISTANCE + 1 段
+MAX_DISTANCE = 3
+BANDS = MAX_DISTANCE + 1
+# IN 查询每批的参数个数
+IN_BATCH_SIZE = 500
+
+
+class SimHashSource:
+    """参与近似重复检测的模型配置"""
+
+    def __init__(self, doc_type, model, fields):
+        self.doc_type = doc_type
+        self.model = model
+        # 依次取第一个非空的字段计算指纹
+        self.fields = fields
+
+    def fingerprint(self, values):
+        """根据记录(对象或行)计算无符号指纹，没有可用文本时返回 None"""
+        text = next((str(getattr(values, field)) for field in self.fields if getattr(values, field, None)), '')
+        return simhash(Counter(tokenize(text)))
+
+
+_sources = {}
+
+
+def register_source(doc_type, model, fields):
+    """注册需要计算 SimHash 的模型，并挂载增删改事件"""
+    source = SimHashSource(doc_type, model, fields)
+    _sources[doc_type] = source
+
+    def before_insert(mapper, connection, target):
+        target.simhash = to_signed(source.fingerprint(target))
+
+    def before_update(mapper, connection, target):
+        state = sa_inspect(target)
+        if any(state.attrs[field].history.has_changes() for field in source.fields):
+            target.simhash = to_signed(source.fingerprint(target))
+
+    def after_insert(mapper, connection, target):
+        cluster_id = _assign(connection, source, target.id, to_unsigned(target.simhash))
+        set_committed_value(target, 'cluster_id', cluster_id)
+
+    def after_update(mapper, connection, target):
+        history = sa_inspect(target).attrs.simhash.history
+        if not history.has_changes():
+            return
+        _remove(connection, source, target.id, target.cluster_id)
+        cluster_id = _assign(connection, source, target.id, to_unsigned(target.simhash))
+        set_committed_value(target, 'cluster_id', cluster_id)
+
+    def after_delete(mapper, connection, target):
+        _remove(connection, source, target.id, target.cluster_id, deleted=True)
+
+    event.listen(model, 'before_insert', before_insert)
+    event.listen(model, 'before_update', before_update)
+    event.listen(model, 'after_insert', after_insert)
+    event.listen(model, 'after_update', after_update)
+    event.listen(model, 'after_delete', after_delete)
+    return source
+
+
+def get_source(doc_type):
+    if doc_type not in _sources:
+        raise ValueError(f"未注册的近似重复检测类型: {doc_type}")
+    return _sources[doc_type]
+
+
+def list_doc_types():
+    return list(_sources.keys())
+
+
+def _chunks(items, size=IN_BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _band_rows(doc_type, doc_id, value):
+    signed = to_signed(value)
+    return [{'doc_type': doc_type, 'doc_id': doc_id, 'band': band, 'value': band_value, 'simhash': signed}
+            for band, band_value in enumerate(band_values(value, BANDS))]
+
+
+def _candidates(connection, value, max_distance=MAX_DISTANCE):
+    """在分段索引中查找近似重复，返回 {(doc_type, doc_id): 距离}"""
+    table = SimHashBand.__table__
+    conditions = [and_(table.c.band == band, table.c.value == band_value)
+                  for band, band_value in enumerate(band_values(value, BANDS))]
+    matches = {}
+    for row in connection.execute(select(table.c.doc_type, table.c.doc_id, table.c.simhash).where(or_(*conditions))):
+        distance = hamming(value, to_unsigned(row.simhash))
+        if distance <= max_distance:
+            matches[(row.doc_type, row.doc_id)] = distance
+    return matches
+
+
+def _refresh_cluster(connection, cluster_id):
+    """重新统计分组成员数，不足 2 个时解散分组"""
+    size = sum(connection.execute(select(func.count()).select_from(source.model.__table__)
+                                  .where(source.model.__table__.c.cluster_id == cluster_id)).scalar()
+               for source in _sources.values())
+    cluster_table = NearDuplicateCluster.__table__
+    if size >= 2:
+        connection.execute(cluster_table.update().where(cluster_table.c.id == cluster_id)
+                           .values(size=size, updated_at=datetime.now()))
+        return
+    for source in _sources.values():
+        table = source.model.__table__
+        connection.execute(table.update().where(table.c.cluster_id == cluster_id).values(cluster_id=None))
+    connection.execute(cluster_table.delete().where(cluster_table.c.id == cluster_id))
+
+
+def _remove(connection, source, doc_id, cluster_id, deleted=False):
+    """从分段索引和所在分组中移除一条记录"""
+    table = SimHashBand.__table__
+    connection.execute(table.delete().where(and_(table.c.doc_type == source.doc_type, table.c.doc_id == doc_id)))
+    if cluster_id is None:
+        return
+    if not deleted:
+        model_table = source.model.__table__
+        connection.execute(model_table.update().where(model_table.c.id == doc_id).values(cluster_id=None))
+    _refresh_cluster(connection, cluster_id)
+
+
+def _assign(connection, source, doc_id, value):
+    """写入分段索引，并把记录和它的近似重复归入同一分组，返回分组ID(没有近似重复时为 None)"""
+    if value is None:
+        return None
+    matches = [key for key in _candidates(connection, value) if key != (source.doc_type, doc_id)]
+    connection.execute(SimHashBand.__table__.insert(), _band_rows(source.doc_type, doc_id, value))
+    if not matches:
+        return None
+
+    # 命中记录当前所在的分组
+    members = defaultdict(set)
+    for doc_type, match_id in matches:
+        members[doc_type].add(match_id)
+    current = {}
+    for doc_type, ids in members.items():
+        table = _sources[doc_type].model.__table__
+        for chunk in _chunks(ids):
+            for row in connection.execute(select(table.c.id, table.c.cluster_id).where(table.c.id.in_(chunk))):
+                current[(doc_type, row.id)] = row.cluster_id
+
+    cluster_table = NearDuplicateCluster.__table__
+    clusters = sorted({cluster_id for cluster_id in current.values() if cluster_id is not None})
+    if clusters:
+        cluster_id, merged = clusters[0], clusters[1:]
+        if merged:
+            for other in _sources.values():
+                table = other.model.__table__
+                connection.execute(table.update().where(table.c.cluster_id.in_(merged)).values(cluster_id=cluster_id))
+            connection.execute(cluster_table.delete().where(cluster_table.c.id.in_(merged)))
+    else:
+        now = datetime.now()
+        cluster_id = connection.execute(cluster_table.insert().values(
+            size=0, created_at=now, updated_at=now)).inserted_primary_key[0]
+
+    unassigned = defaultdict(list)
+    unassigned[source.doc_type].append(doc_id)
+    for (doc_type, match_id), current_id in current.items():
+        if current_id is None:
+            unassigned[doc_type].append(match_id)
+    for doc_type, ids in unassigned.items():
+        table = _sources[doc_type].model.__table__
+        for chunk in _chunks(ids):
+            connection.execute(table.update().where(table.c.id.in_(chunk)).values(cluster_id=cluster_id))
+    _refresh_cluster(connection, cluster_id)
+    return cluster_id
+
+
+def write_documents(connection, doc_type, docs):
+    """重新计算一批记录的指纹和分组(绕过 ORM 事件的批量写入后调用)
+
+    指纹未变化的记录跳过
+
+    Args:
+        docs: {doc_id: 记录(对象或行，至少包含 fields 中的字段)}
+
+    Returns:
+        dict: {doc_id: cluster_id}，只包含指纹发生变化的记录
+    """
+    if not docs:
+        return {}
+    source = get_source(doc_type)
+    table = source.model.__table__
+    stored = {}
+    for chunk in _chunks(docs):
+        for row in connection.execute(select(table.c.id, table.c.simhash, table.c.cluster_id)
+                                      .where(table.c.id.in_(chunk))):
+            stored[row.id] = row
+
+    result = {}
+    for doc_id, values in docs.items():
+        value = source.fingerprint(values)
+        row = stored.get(doc_id)
+        if row is None or row.simhash == to_signed(value):
+            continue
+        connection.execute(table.update().where(table.c.id == doc_id).values(simhash=to_signed(value)))
+        _remove(connection, source, doc_id, row.cluster_id)
+        result[doc_id] = _assign(connection, source, doc_id, value)
+    return result
+
+
+def find_near_duplicates(doc_type, doc_id, max_distance=MAX_DISTANCE):
+    """查找一条记录的近似重复
+
+    Returns:
+        list: [{'doc_type', 'id', 'distance'}]，按距离升序；记录不存在时返回 None
+    """
+    source = get_source(doc_type)
+    row = db.session.query(source.model.simhash).filter(source.model.id == doc_id).first()
+    if row is None:
+        return None
+    if row.simhash is None:
+        return []
+    matches = _candidates(db.session.connection(), to_unsigned(row.simhash), min(max_distance, MAX_DISTANCE))
+    matches.pop((doc_type, doc_id), None)
+    return [{'doc_type': key[0], 'id': key[1], 'distance': distance}
+            for key, distance in sorted(matches.items(), key=lambda item: (item[1], item[0]))]
+
+
+def find_similar_text(text, max_distance=MAX_DISTANCE):
+    """查找与一段文本近似重复的已入库记录(入库前检查用)"""
+    value = simhash(Counter(tokenize(text)))
+    if value is None:
+        return []
+    matches = _candidates(db.session.connection(), value, min(max_distance, MAX_DISTANCE))
+    return [{'doc_type': key[0], 'id': key[1], 'distance': distance}
+            for key, distance in sorted(matches.items(), key=lambda item: (item[1], item[0]))]
+
+
+def _member_info(doc_type, row):
+    return {
+        'doc_type': doc_type,
+        'id': row.id,
+        'title': row.title,
+        'source': row.source,
+        'created_at': row.created_at.strftime('%Y-%m-%d %H:%M:%S') if row.created_at else None
+    }
+
+
+def list_clusters(page=1, per_page=20, min_size=2, members_limit=20):
+    """分页列出近似重复分组(按成员数降序)，返回 (分组列表, 总数)"""
+    query = NearDuplicateCluster.query.filter(NearDuplicateCluster.size >= min_size)
+    total = query.count()
+    clusters = query.order_by(NearDuplicateCluster.size.desc(), NearDuplicateCluster.updated_at.desc(),
+                              NearDuplicateCluster.id.desc()) \
+        .offset((page - 1) * per_page).limit(per_page).all()
+    members = get_cluster_members([cluster.id for cluster in clusters], members_limit)
+    return [{
+        'cluster_id': cluster.id,
+        'size': cluster.size,
+        'updated_at': cluster.updated_at.strftime('%Y-%m-%d %H:%M:%S') if cluster.updated_at else None,
+        'members': members.get(cluster.id, [])
+    } for cluster in clusters], total
+
+
+def get_cluster_members(cluster_ids, limit=None):
+    """{cluster_id: [成员]}，成员按时间排序，每个分组最多 limit 条"""
+    members = defaultdict(list)
+    if not cluster_ids:
+        return members
+    columns = {
+        'debunk_content': (DebunkContent.created_at, DebunkContent.source),
+        'rumor_data': (RumorData.crawl_time, RumorData.source),
+    }
+    for doc_type, source in _sources.items():
+        model = source.model
+        time_column, source_column = columns[doc_type]
+        rows = db.session.query(model.id, model.cluster_id, model.title, source_column.label('source'),
+                                time_column.label('created_at')) \
+            .filter(model.cluster_id.in_(cluster_ids)).all()
+        for row in rows:
+            members[row.cluster_id].append(_member_info(doc_type, row))
+    for cluster_id, items in members.items():
+        items.sort(key=lambda item: (item['created_at'] or '', item['doc_type'], item['id']))
+        if limit:
+            del items[limit:]
+    return members
+
+
+def rebuild(batch_size=1000):
+    """全量重新计算指纹、分段索引和近似重复分组，返回 (记录数, 分组数)"""
+    connection = db.session.connection()
+    connection.execute(SimHashBand.__table__.delete())
+    connection.execute(NearDuplicateCluster.__table__.delete())
+    for source in _sources.values():
+        table = source.model.__table__
+        connection.execute(table.update().where(table.c.cluster_id.isnot(None)).values(cluster_id=None))
+    db.session.commit()
+
+    keys = []
+    hashes = []
+    for source in _sources.values():
+        model = source.model
+        table = model.__table__
+        columns = [getattr(model, field) for field in source.fields]
+        last_id = 0
+        while True:
+            rows = db.session.query(model.id, *columns).filter(model.id > last_id) \
+                .order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            updates = []
+            bands = []
+            for row in rows:
+                value = source.fingerprint(row)
+                updates.append({'_id': row.id, '_simhash': to_signed(value)})
+                if value is not None:
+                    keys.append((source.doc_type, row.id))
+                    hashes.append(value)
+                    bands.extend(_band_rows(source.doc_type, row.id, value))
+            connection = db.session.connection()
+            connection.execute(table.update().where(table.c.id == bindparam('_id'))
+                               .values(simhash=bindparam('_simhash')), updates)
+            if bands:
+                connection.execute(SimHashBand.__table__.insert(), bands)
+            db.session.commit()
+            last_id = rows[-1].id
+        logger.info(f"[{source.doc_type}] 指纹计算完成")
+
+    # 内存中用分段索引查找近似重复，并查集合并成分组
+    index = SimHashIndex(range(len(keys)), hashes, MAX_DISTANCE)
+    parent = list(range(len(keys)))
+
+    def find(position):
+        while parent[position] != position:
+            parent[position] = parent[parent[position]]
+            position = parent[position]
+        return position
+
+    for position, value in enumerate(hashes):
+        for other, _ in index.query(value):
+            root, other_root = find(position), find(other)
+            if root != other_root:
+                parent[max(root, other_root)] = min(root, other_root)
+
+    groups = defaultdict(list)
+    for position in range(len(keys)):
+        groups[find(position)].append(keys[position])
+    groups = [members for members in groups.values() if len(members) >= 2]
+
+    connection = db.session.connection()
+    cluster_table = NearDuplicateCluster.__table__
+    now = datetime.now()
+    for members in groups:
+        cluster_id = connection.execute(cluster_table.insert().values(
+            size=len(members), created_at=now, updated_at=now)).inserted_primary_key[0]
+        by_type = defaultdict(list)
+        for doc_type, doc_id in members:
+            by_type[doc_type].append(doc_id)
+        for doc_type, ids in by_type.items():
+            table = _sources[doc_type].model.__table__
+            for chunk in _chunks(ids):
+                connection.execute(table.update().where(table.c.id.in_(chunk)).values(cluster_id=cluster_id))
+    db.session.commit()
+    logger.info(f"近似重复分组重建完成: {len(keys)} 条记录，{len(groups)} 个分组")
+    return len(keys), len(groups)
+
+
+register_source('debunk_content', DebunkContent, fields=('content', 'title'))
+register_source('rumor_data', RumorData, fields=('content', 'title'))
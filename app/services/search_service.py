@@ -0,0 +1,315 @@
+"""全文检索服务
+
+基于 jieba 分词的倒排索引 + BM25 相关度排序，替代对 title/content/summary/tags
+多列 ILIKE '%q%' 的全表扫描。
+
+索引数据保存在 search_document / search_posting 两张表中:
+- 建表迁移(5b7e2c91d4a0)为已有数据建立索引
+- 记录插入、更新、删除时由 SQLAlchemy mapper 事件在同一事务内同步维护
+- 批量 SQL 写入(绕过 ORM 事件)后调用 write_documents 同步，或通过 `flask rebuild-search-index` 从数据库全量重建
+"""
+
+import logging
+import math
+import re
+from collections import Counter
+
+import jieba
+from sqlalchemy import and_, event, false, func, or_
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.models.debunk import DebunkArticle, DebunkContent
+from app.models.search_index import SearchDocument, SearchPosting
+
+logger = logging.getLogger(__name__)
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 词项最大长度，与 SearchPosting.term 列宽一致
+MAX_TERM_LENGTH = 64
+# 单次查询最多使用的词项数，防止超长输入拖慢查询
+MAX_QUERY_TERMS = 8
+# 文档频率超过该比例的词项视为停用词
+STOPWORD_DF_RATIO = 0.5
+
+_WORD_PATTERN = re.compile(r'\w', re.UNICODE)
+
+
+def tokenize(text, for_search=True):
+    """分词，返回小写后的词项列表(去掉空白和纯标点)
+
+    建索引时使用搜索引擎模式(长词额外切出子词，召回更高)；
+    查询时使用精确模式，精确模式切出的词必然也出现在索引模式的结果中
+    """
+    if not text:
+        return []
+    text = str(text).lower()
+    tokens = []
+    for token in (jieba.lcut_for_search(text) if for_search else jieba.lcut(text)):
+        token = token.strip()
+        if not token or not _WORD_PATTERN.search(token):
+            continue
+        tokens.append(token[:MAX_TERM_LENGTH])
+    return tokens
+
+
+class SearchIndex:
+    """单个模型的索引配置"""
+
+    def __init__(self, doc_type, model, fields, fallback_fields, order_column):
+        self.doc_type = doc_type
+        self.model = model
+        # 字段 -> 权重，标题命中比正文命中更重要
+        self.fields = fields
+        # 索引尚未建立时退化使用的 ILIKE 字段
+        self.fallback_fields = fallback_fields
+        # 非检索场景下的默认排序列
+        self.order_column = order_column
+
+    def document_terms(self, values):
+        """根据字段值计算加权词频"""
+        terms = Counter()
+        for field, weight in self.fields.items():
+            for token in tokenize(values.get(field)):
+                terms[token] += weight
+        return terms
+
+
+_indexes = {}
+
+
+def register_index(doc_type, model, fields, fallback_fields, order_column):
+    """注册需要建立倒排索引的模型，并挂载增删改事件"""
+    index = SearchIndex(doc_type, model, fields, fallback_fields, order_column)
+    _indexes[doc_type] = index
+
+    def after_insert(mapper, connection, target):
+        _write_document(connection, index, target.id, _target_terms(index, target))
+
+    def after_update(mapper, connection, target):
+        # 只有被索引的字段发生变化时才重新分词
+        state = sa_inspect(target)
+        if not any(state.attrs[field].history.has_changes() for field in index.fields):
+            return
+        _write_document(connection, index, target.id, _target_terms(index, target))
+
+    def after_delete(mapper, connection, target):
+        _delete_document(connection, index, target.id)
+
+    event.listen(model, 'after_insert', after_insert)
+    event.listen(model, 'after_update', after_update)
+    event.listen(model, 'after_delete', after_delete)
+    return index
+
+
+def get_index(doc_type):
+    if doc_type not in _indexes:
+        raise ValueError(f"未注册的索引类型: {doc_type}")
+    return _indexes[doc_type]
+
+
+def list_doc_types():
+    return list(_indexes.keys())
+
+
+def _target_terms(index, target):
+    return index.document_terms({field: getattr(target, field, None) for field in index.fields})
+
+
+def _delete_document(connection, index, doc_id):
+    connection.execute(SearchPosting.__table__.delete().where(and_(
+        SearchPosting.doc_type == index.doc_type,
+        SearchPosting.doc_id == doc_id
+    )))
+    connection.execute(SearchDocument.__table__.delete().where(and_(
+        SearchDocument.doc_type == index.doc_type,
+        SearchDocument.doc_id == doc_id
+    )))
+
+
+def _document_rows(index, doc_id, terms):
+    """生成文档行和倒排记录行"""
+    length = int(round(sum(terms.values())))
+    document = {'doc_type': index.doc_type, 'doc_id': doc_id, 'length': length}
+    postings = [
+        {'doc_type': index.doc_type, 'term': term, 'doc_id': doc_id, 'tf': tf, 'doc_len': length}
+        for term, tf in terms.items()
+    ]
+    return document, postings
+
+
+def _write_document(connection, index, doc_id, terms):
+    _delete_document(connection, index, doc_id)
+    document, postings = _document_rows(index, doc_id, terms)
+    connection.execute(SearchDocument.__table__.insert(), [document])
+    if postings:
+        connection.execute(SearchPosting.__table__.insert(), postings)
+
+
+def write_documents(connection, doc_type, docs):
+    """批量重写一批文档的索引(绕过 ORM 事件的批量写入后调用)
+
+    Args:
+        docs: {doc_id: {字段: 值}}
+    """
+    if not docs:
+        return
+    index = get_index(doc_type)
+    doc_ids = list(docs)
+    for start in range(0, len(doc_ids), 500):
+        chunk = doc_ids[start:start + 500]
+        connection.execute(SearchPosting.__table__.delete().where(and_(
+            SearchPosting.doc_type == doc_type,
+            SearchPosting.doc_id.in_(chunk)
+        )))
+        connection.execute(SearchDocument.__table__.delete().where(and_(
+            SearchDocument.doc_type == doc_type,
+            SearchDocument.doc_id.in_(chunk)
+        )))
+
+    documents = []
+    postings = []
+    for doc_id, values in docs.items():
+        document, doc_postings = _document_rows(index, doc_id, index.document_terms(values))
+        documents.append(document)
+        postings.extend(doc_postings)
+    connection.execute(SearchDocument.__table__.insert(), documents)
+    if postings:
+        connection.execute(SearchPosting.__table__.insert(), postings)
+
+
+def rebuild_index(doc_type, batch_size=1000):
+    """从数据库全量重建指定类型的索引
+
+    按主键分批读取，每批提交一次，返回索引的文档数
+    """
+    index = get_index(doc_type)
+    model = index.model
+    columns = [getattr(model, field) for field in index.fields]
+
+    db.session.execute(SearchPosting.__table__.delete().where(SearchPosting.doc_type == doc_type))
+    db.session.execute(SearchDocument.__table__.delete().where(SearchDocument.doc_type == doc_type))
+    db.session.commit()
+
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(model.id, *columns) \
+            .filter(model.id > last_id) \
+            .order_by(model.id) \
+            .limit(batch_size) \
+            .all()
+        if not rows:
+            break
+
+        documents = []
+        postings = []
+        for row in rows:
+            values = {field: getattr(row, field) for field in index.fields}
+            document, doc_postings = _document_rows(index, row.id, index.document_terms(values))
+            documents.append(document)
+            postings.extend(doc_postings)
+
+        db.session.execute(SearchDocument.__table__.insert(), documents)
+        if postings:
+            db.session.execute(SearchPosting.__table__.insert(), postings)
+        db.session.commit()
+
+        total += len(rows)
+        last_id = rows[-1].id
+        logger.info(f"[{doc_type}] 已索引 {total} 条记录")
+
+    return total
+
+
+def _ilike_search(index, query, keyword):
+    """未建立索引时的兼容路径: 多列 ILIKE"""
+    pattern = f"%{keyword}%"
+    return query.filter(or_(*[column.ilike(pattern) for column in index.fallback_fields])) \
+        .order_by(index.order_column.desc())
+
+
+def apply_search(doc_type, query, keyword):
+    """在查询上追加全文检索条件，并按 BM25 相关度降序排序
+
+    检索词分词后按 AND 语义匹配(文档需包含全部词项)，相关度为各词项 BM25 得分之和。
+    过滤条件由调用方预先加在 query 上，分页和总数统计仍由数据库完成
+
+    Args:
+        doc_type: 索引类型
+        query: 已经应用了其他过滤条件的查询
+        keyword: 用户输入的检索词
+
+    Returns:
+        追加了检索条件和排序的查询，调用方直接 paginate 即可
+    """
+    index = get_index(doc_type)
+    model = index.model
+
+    terms = list(dict.fromkeys(tokenize(keyword, for_search=False)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return _ilike_search(index, query, keyword)
+
+    doc_count, avg_length = db.session.query(
+        func.count(SearchDocument.id),
+        func.avg(SearchDocument.length)
+    ).filter(SearchDocument.doc_type == doc_type).one()
+    if not doc_count:
+        # 索引还未建立(例如刚完成迁移)，保持原有行为
+        logger.warning(f"[{doc_type}] 全文索引为空，退化为 ILIKE 查询，请执行 flask rebuild-search-index")
+        return _ilike_search(index, query, keyword)
+
+    doc_freqs = dict(db.session.query(SearchPosting.term, func.count(SearchPosting.id))
+                     .filter(SearchPosting.doc_type == doc_type, SearchPosting.term.in_(terms))
+                     .group_by(SearchPosting.term)
+                     .all())
+    # 与原 ILIKE 子串匹配的精确度保持一致: 所有词项都必须命中
+    if any(not doc_freqs.get(term) for term in terms):
+        return query.filter(false())
+
+    # 出现在大多数文档中的词(如"表示""的")区分度接近 0，作为停用词忽略，至少保留最稀有的一个词
+    terms = sorted(terms, key=lambda term: doc_freqs[term])
+    terms = terms[:1] + [term for term in terms[1:] if doc_freqs[term] <= doc_count * STOPWORD_DF_RATIO]
+
+    idf = {
+        term: math.log(1 + (doc_count - doc_freqs[term] + 0.5) / (doc_freqs[term] + 0.5))
+        for term in terms
+    }
+    avg_length = float(avg_length) or 1.0
+
+    # 每个词项单独连接一次倒排表(从最稀有的词开始)，连接本身即实现 AND 语义，
+    # 每次连接都是 (doc_type, term, doc_id) 覆盖索引上的查找，无需分组聚合
+    score = None
+    for term in terms:
+        posting = aliased(SearchPosting)
+        query = query.join(posting, and_(
+            posting.doc_type == doc_type,
+            posting.term == term,
+            posting.doc_id == model.id
+        ))
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * posting.doc_len / avg_length)
+        term_score = idf[term] * posting.tf * (BM25_K1 + 1) / (posting.tf + length_norm)
+        score = term_score if score is None else score + term_score
+
+    return query.order_by(score.desc(), model.id.desc())
+
+
+register_index(
+    'debunk_article',
+    DebunkArticle,
+    fields={'title': 3.0, 'summary': 2.0, 'tags': 2.0, 'content': 1.0},
+    fallback_fields=[DebunkArticle.title, DebunkArticle.content, DebunkArticle.summary, DebunkArticle.tags],
+    order_column=DebunkArticle.created_at
+)
+
+register_index(
+    'debunk_content',
+    DebunkContent,
+    fields={'title': 3.0, 'author_name': 2.0, 'content': 1.0},
+    fallback_fields=[DebunkContent.title, DebunkContent.content, DebunkContent.author_name],
+    order_column=DebunkContent.created_at
+)
@@ -0,0 +1,259 @@
+"""爬虫数据批量入库服务
+
+POST /api/spider/data/batch 使用: 一次请求提交几百条爬虫数据，按集合处理而不是逐条
+查询、插入、提交:
+
+- 每张表用一次 IN 查询找出已存在的记录(用于区分新增/更新和统计增量)
+- 微博/新浪原始表和 debunk_content 用多行 INSERT ... ON DUPLICATE KEY UPDATE
+  (SQLite/PostgreSQL 为 ON CONFLICT DO UPDATE) 写入，并发入库同一条数据也不会冲突
+- 其他来源(如辟谣网站)按 (来源, 标题) 去重，已存在的批量 UPDATE，其余多行 INSERT
+- Core 批量写入不触发 ORM 事件，统计汇总、全文索引、词频向量、近似重复指纹在同一事务内同步，
+  最后一次提交并使相关响应缓存失效
+
+重复抓取时不覆盖人工审核过的 status，也不修改 created_at。
+"""
+
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import bindparam, select, tuple_
+
+from app import db
+from app.models.debunk import WeiboDebunk, XinlangDebunk, DebunkContent
+from app.services import near_duplicate_service, search_service, stats_service, term_vector_service
+from app.utils.response_cache import invalidate_models
+from app.utils.upsert import upsert_rows
+
+logger = logging.getLogger(__name__)
+
+# 单次请求最多提交的条数
+MAX_BATCH_SIZE = 1000
+# 每条 INSERT / IN 查询包含的行数
+CHUNK_SIZE = 500
+# 重复抓取时不覆盖的列(指纹和近似重复分组由 near_duplicate_service 维护)
+PRESERVED_COLUMNS = ('id', 'status', 'created_at', 'simhash', 'cluster_id')
+
+# 来源 -> (原始数据模型, 唯一键字段)
+SOURCE_MODELS = {
+    'weibo': (WeiboDebunk, 'weibo_mid_id'),
+    'xinlang': (XinlangDebunk, 'news_id'),
+}
+
+# 入库后需要同步的 debunk_content 字段
+CONTENT_FIELDS = ('content_id', 'source', 'title', 'content', 'author_name', 'created_at', 'status', 'region',
+                   'reposts_count', 'comments_count', 'attitudes_count')
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _column_values(model, obj):
+    """取对象各列的值(不含主键)，未赋值的列按列默认值补齐，保证多行 INSERT 的列一致"""
+    values = {}
+    for column in model.__table__.columns:
+        if column.primary_key:
+            continue
+        value = getattr(obj, column.key)
+        if value is None and column.default is not None:
+            value = column.default.arg if column.default.is_scalar else column.default.arg(None)
+            setattr(obj, column.key, value)
+        values[column.key] = value
+    return values
+
+
+def _earliest_by_title(rows):
+    """{(来源, 标题): 记录}，同名多条时与单条接口一样取最早的一条"""
+    earliest = {}
+    for row in rows:
+        key = (row.source, row.title)
+        if key not in earliest or row.id < earliest[key].id:
+            earliest[key] = row
+    return earliest
+
+
+def _upsert(connection, table, rows, key, existing):
+    """按唯一键批量写入，已存在的行更新 PRESERVED_COLUMNS 以外的列"""
+    if rows:
+        update_columns = [name for name in rows[0] if name != key and name not in PRESERVED_COLUMNS]
+        upsert_rows(connection, table, rows, key, update_columns, existing)
+
+
+def _select_by_keys(connection, columns, key_column, keys):
+    rows = []
+    for chunk in _chunks(keys):
+        rows.extend(connection.execute(select(*columns).where(key_column.in_(chunk))))
+    return rows
+
+
+def _parse_item(item):
+    """校验单条数据，返回 (来源, 数据) 或抛出 ValueError"""
+    if not isinstance(item, dict) or not item.get('source') or not isinstance(item.get('data'), dict):
+        raise ValueError('缺少必要的参数')
+    source = item['source']
+    data = dict(item['data'])
+
+    if source in SOURCE_MODELS:
+        model, key = SOURCE_MODELS[source]
+        if not data.get(key):
+            raise ValueError(f'缺少 {key}')
+        if source == 'weibo' and 'created_at' in data:
+            try:
+                data['created_at'] = datetime.strptime(data['created_at'], '%Y-%m-%d %H:%M:%S')
+            except (TypeError, ValueError):
+                data['created_at'] = datetime.now()
+        # 忽略模型中不存在的字段
+        columns = {column.key for column in model.__table__.columns if not column.primary_key}
+        return source, {name: value for name, value in data.items() if name in columns}
+
+    if not data.get('title'):
+        raise ValueError('标题不能为空')
+    if not data.get('content'):
+        raise ValueError('内容不能为空')
+    return source, {'title': data['title'], 'content': data['content']}
+
+
+def ingest_items(items):
+    """批量入库爬虫数据
+
+    Args:
+        items: [{'source': 'weibo'/'xinlang'/其他来源, 'data': {...}}]，格式同 POST /api/spider/data
+
+    Returns:
+        list: 与 items 等长的结果 {'index', 'status': created/updated/error, 'id', 'message'}，
+            id 为 debunk_content 的ID。批内同一条数据出现多次时以最后一次为准
+    """
+    results = [{'index': i, 'status': 'error', 'id': None, 'message': None} for i in range(len(items))]
+    # 来源 -> {唯一键: (下标列表, 数据)}
+    source_items = {source: {} for source in SOURCE_MODELS}
+    # (来源, 标题) -> (下标列表, 正文)
+    other_items = {}
+    for index, item in enumerate(items):
+        try:
+            source, data = _parse_item(item)
+        except ValueError as e:
+            results[index]['message'] = str(e)
+            continue
+        if source in SOURCE_MODELS:
+            key = data[SOURCE_MODELS[source][1]]
+            indexes = source_items[source].get(key, ([], None))[0]
+            source_items[source][key] = (indexes + [index], data)
+        else:
+            key = (source, data['title'])
+            indexes = other_items.get(key, ([], None))[0]
+            other_items[key] = (indexes + [index], data['content'])
+
+    connection = db.session.connection()
+    content_table = DebunkContent.__table__
+    content_columns = [content_table.c.id] + [content_table.c[field] for field in CONTENT_FIELDS]
+    touched_models = set()
+
+    try:
+        # 1. 原始数据表，再由原始记录转换出 debunk_content 行
+        content_rows = {}
+        for source, grouped in source_items.items():
+            if not grouped:
+                continue
+            model, key = SOURCE_MODELS[source]
+            table = model.__table__
+            objects = {value: model(**data) for value, (_, data) in grouped.items()}
+            existing = {row[0] for row in _select_by_keys(connection, [table.c[key]], table.c[key], list(grouped))}
+            _upsert(connection, table, [_column_values(model, obj) for obj in objects.values()], key, existing)
+            ids = dict(_select_by_keys(connection, [table.c[key], table.c.id], table.c[key], list(grouped)))
+            for value, obj in objects.items():
+                obj.id = ids[value]
+                content_rows[value] = _column_values(DebunkContent, obj.to_debunk_content())
+                for index in grouped[value][0]:
+                    results[index]['status'] = 'updated' if value in existing else 'created'
+            touched_models.add(model)
+
+        # 2. debunk_content (微博/新浪按 content_id 写入)
+        old_rows = {row.id: row for row in _select_by_keys(
+            connection, content_columns, content_table.c.content_id, list(content_rows))}
+        _upsert(connection, content_table, list(content_rows.values()), 'content_id',
+                {row.content_id for row in old_rows.values()})
+        new_rows = {row.id: row for row in _select_by_keys(
+            connection, content_columns, content_table.c.content_id, list(content_rows))}
+        content_ids = {row.content_id: row.id for row in new_rows.values()}
+        for source, grouped in source_items.items():
+            for value, (indexes, _) in grouped.items():
+                for index in indexes:
+                    results[index]['id'] = content_ids.get(value)
+
+        # 3. 其他来源按 (来源, 标题) 去重
+        if other_items:
+            title_key = tuple_(content_table.c.source, content_table.c.title)
+            existing = _earliest_by_title(_select_by_keys(connection, content_columns, title_key, list(other_items)))
+            updates = [{'_id': existing[key].id, '_content': content}
+                       for key, (_, content) in other_items.items() if key in existing]
+            if updates:
+                connection.execute(
+                    content_table.update().where(content_table.c.id == bindparam('_id'))
+                    .values(content=bindparam('_content'), status='published'),
+                    updates)
+            now = datetime.now()
+            inserts = [_column_values(DebunkContent, DebunkContent(
+                source=source, title=title, content=content, created_at=now, status='published'))
+                for (source, title), (_, content) in other_items.items() if (source, title) not in existing]
+            for chunk in _chunks(inserts):
+                connection.execute(content_table.insert().values(chunk))
+
+            written = _earliest_by_title(_select_by_keys(connection, content_columns, title_key, list(other_items)))
+            for key, (indexes, _) in other_items.items():
+                if key in existing:
+                    old_rows[existing[key].id] = existing[key]
+                new_rows[written[key].id] = written[key]
+                for index in indexes:
+                    results[index]['status'] = 'updated' if key in existing else 'created'
+                    results[index]['id'] = written[key].id
+
+        # 4. 同步统计汇总、全文索引和词频向量
+        if new_rows:
+            sync_content_derived(connection, old_rows, new_rows)
+            touched_models.add(DebunkContent)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    invalidate_models(*touched_models)
+    return results
+
+
+def sync_content_derived(connection, old_rows, new_rows):
+    """按写入前后的值同步 debunk_content 的派生数据，没有变化的字段不重新计算"""
+    index = search_service.get_index('debunk_content')
+    corpus = term_vector_service.get_corpus('debunk_content')
+
+    fingerprint_fields = near_duplicate_service.get_source('debunk_content').fields
+
+    changes = []
+    search_docs = {}
+    vector_docs = {}
+    fingerprint_docs = {}
+    for doc_id, row in new_rows.items():
+        old = old_rows.get(doc_id)
+        changes.append((old, row))
+        if old is None or any(getattr(old, field) != getattr(row, field) for field in index.fields):
+            search_docs[doc_id] = {field: getattr(row, field) for field in index.fields}
+        if old is None or any(getattr(old, field) != getattr(row, field) for field in corpus.tracked_fields):
+            vector_docs[doc_id] = corpus.document(SimpleNamespace(**row._mapping))
+        if old is None or any(getattr(old, field) != getattr(row, field) for field in fingerprint_fields):
+            fingerprint_docs[doc_id] = row
+
+    stats_service.apply_changes(connection, changes)
+    search_service.write_documents(connection, 'debunk_content', search_docs)
+    term_vector_service.write_documents(connection, 'debunk_content', vector_docs)
+    near_duplicate_service.write_documents(connection, 'debunk_content', fingerprint_docs)
+
+
+def summarize(results):
+    """统计各状态的条数"""
+    summary = {'created': 0, 'updated': 0, 'failed': 0}
+    for result in results:
+        summary['failed' if result['status'] == 'error' else result['status']] += 1
+    return summary
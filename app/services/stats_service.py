@@ -0,0 +1,384 @@
+"""爬虫内容统计汇总服务
+
+可视化接口需要的统计都按天预先汇总到三张表(见 app.models.content_stats):
+- content_daily_stat: 天 × 来源 × 状态 的条数和转发/评论/点赞合计
+- content_daily_region: 天 × 地区 的条数
+- content_daily_keyword: 天 × 关键词 的 TF-IDF 权重合计(每条内容取前 N 个关键词)
+
+DebunkContent 写入、状态修改、删除时由 mapper 事件记录增量，在同一次 flush 结束时
+(session after_flush)合并后批量写入汇总表，批量入库时每次 flush 只产生少量语句。
+绕过 ORM 的批量写入可调用 apply_changes 同步增量，或之后通过 `flask rebuild-content-stats` 重建，
+`flask check-content-stats` 与原始数据重新计算的结果逐项比对。
+"""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+import jieba.analyse
+from sqlalchemy import and_, event, func, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models.content_stats import ContentDailyStat, ContentDailyRegion, ContentDailyKeyword
+from app.models.debunk import DebunkContent
+from app.utils.upsert import increment_rows
+
+logger = logging.getLogger(__name__)
+
+# 每条内容计入汇总的关键词数
+KEYWORDS_PER_CONTENT = 20
+# 关键词最大长度，与 ContentDailyKeyword.word 列宽一致
+MAX_WORD_LENGTH = 64
+# 关键词权重允许的浮点误差(MySQL FLOAT 为单精度)
+WEIGHT_TOLERANCE = 1e-4
+
+# 影响汇总结果的字段
+TRACKED_FIELDS = ('created_at', 'source', 'status', 'region', 'content',
+                  'reposts_count', 'comments_count', 'attitudes_count')
+
+_SESSION_KEY = 'content_stats_delta'
+
+
+def extract_content_keywords(text):
+    """提取单条内容的关键词及权重"""
+    if not text:
+        return []
+    return [(word[:MAX_WORD_LENGTH], weight)
+            for word, weight in jieba.analyse.extract_tags(text, topK=KEYWORDS_PER_CONTENT, withWeight=True)]
+
+
+class StatsDelta:
+    """汇总表的增量，key 为各表的唯一键"""
+
+    def __init__(self):
+        # (day, source, status) -> [条数, 转发, 评论, 点赞]
+        self.stats = defaultdict(lambda: [0, 0, 0, 0])
+        self.regions = Counter()  # (day, region) -> 条数
+        self.keywords = Counter()  # (day, word) -> 权重
+
+    def __bool__(self):
+        return bool(self.stats or self.regions or self.keywords)
+
+    def add(self, snapshot, sign=1, keywords=True):
+        """把一条内容计入增量，sign=-1 表示扣除"""
+        day = snapshot['day']
+        if day is None:
+            return
+        values = self.stats[(day, snapshot['source'], snapshot['status'])]
+        values[0] += sign
+        values[1] += sign * snapshot['reposts_count']
+        values[2] += sign * snapshot['comments_count']
+        values[3] += sign * snapshot['attitudes_count']
+        if snapshot['region']:
+            self.regions[(day, snapshot['region'])] += sign
+        if keywords:
+            for word, weight in extract_content_keywords(snapshot['content']):
+                self.keywords[(day, word)] += sign * weight
+
+
+def _snapshot(values):
+    """从记录(对象或行)中取出汇总需要的字段"""
+    created_at = values.created_at
+    return {
+        'day': created_at.date() if created_at else None,
+        'source': values.source or '',
+        'status': values.status or '',
+        'region': (values.region or '')[:100],
+        'content': values.content,
+        'reposts_count': values.reposts_count or 0,
+        'comments_count': values.comments_count or 0,
+        'attitudes_count': values.attitudes_count or 0,
+    }
+
+
+def _load_snapshot(connection, content_id):
+    """读取数据库中当前(修改/删除前)的记录"""
+    table = DebunkContent.__table__
+    row = connection.execute(
+        select(*[table.c[field] for field in TRACKED_FIELDS]).where(table.c.id == content_id)
+    ).first()
+    return _snapshot(row) if row is not None else None
+
+
+def _session_delta(target):
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault(_SESSION_KEY, StatsDelta())
+
+
+def _after_insert(mapper, connection, target):
+    delta = _session_delta(target)
+    if delta is not None:
+        delta.add(_snapshot(target))
+
+
+def _before_update(mapper, connection, target):
+    state = sa_inspect(target)
+    if not any(state.attrs[field].history.has_changes() for field in TRACKED_FIELDS):
+        return
+    delta = _session_delta(target)
+    old = _load_snapshot(connection, target.id)
+    if delta is None or old is None:
+        return
+    new = _snapshot(target)
+    # 日期和正文都没变时关键词不受影响，省去重新分词
+    keywords_changed = old['day'] != new['day'] or old['content'] != new['content']
+    delta.add(old, -1, keywords=keywords_changed)
+    delta.add(new, 1, keywords=keywords_changed)
+
+
+def _before_delete(mapper, connection, target):
+    delta = _session_delta(target)
+    old = _load_snapshot(connection, target.id)
+    if delta is not None and old is not None:
+        delta.add(old, -1)
+
+
+def _after_flush(session, flush_context):
+    delta = session.info.pop(_SESSION_KEY, None)
+    if delta:
+        apply_delta(session.connection(), delta)
+
+
+event.listen(DebunkContent, 'after_insert', _after_insert)
+event.listen(DebunkContent, 'before_update', _before_update)
+event.listen(DebunkContent, 'before_delete', _before_delete)
+event.listen(Session, 'after_flush', _after_flush)
+
+
+def _merge_rows(connection, table, key_columns, increments, fresh=False):
+    """把 {唯一键: {列: 增量}} 合并进汇总表
+
+    用一条 upsert 语句原子地累加(见 app.utils.upsert.increment_rows)，不先查已有行，
+    并发写入同一天/来源/状态或同一天/关键词时不会因为都没查到而重复插入、触发唯一键冲突；
+    fresh=True 表示相关日期的汇总行已清空(重建时)，只写入正增量
+    """
+    if not increments:
+        return
+    days = {key[0] for key in increments}
+    value_columns = list(next(iter(increments.values())).keys())
+    rows = [{**dict(zip(key_columns, key)), **values} for key, values in increments.items()
+            if not fresh or values[value_columns[0]] > 0]
+    increment_rows(connection, table, rows, key_columns, value_columns)
+    if fresh:
+        return
+
+    # 条数/权重扣减到 0 的行不再保留；扣减不存在的行(汇总表与原始数据不一致)插入的负值行也一并删除，等待重建修复
+    connection.execute(table.delete().where(and_(
+        table.c.day.in_(days),
+        table.c[value_columns[0]] <= (WEIGHT_TOLERANCE if table is ContentDailyKeyword.__table__ else 0)
+    )))
+
+
+def apply_delta(connection, delta, fresh=False):
+    """把增量写入三张汇总表"""
+    _merge_rows(connection, ContentDailyStat.__table__, ('day', 'source', 'status'), {
+        key: {'content_count': values[0], 'reposts_sum': values[1],
+              'comments_sum': values[2], 'attitudes_sum': values[3]}
+        for key, values in delta.stats.items() if any(values)
+    }, fresh)
+    _merge_rows(connection, ContentDailyRegion.__table__, ('day', 'region'), {
+        key: {'content_count': count} for key, count in delta.regions.items() if count
+    }, fresh)
+    _merge_rows(connection, ContentDailyKeyword.__table__, ('day', 'word'), {
+        key: {'weight': weight} for key, weight in delta.keywords.items() if abs(weight) > WEIGHT_TOLERANCE
+    }, fresh)
+
+
+def apply_changes(connection, changes):
+    """把绕过 ORM 的批量写入计入汇总表
+
+    Args:
+        changes: [(写入前的记录或None, 写入后的记录)]，记录为带 TRACKED_FIELDS 属性的对象或行
+    """
+    delta = StatsDelta()
+    for old, new in changes:
+        new = _snapshot(new)
+        if old is None:
+            delta.add(new)
+            continue
+        old = _snapshot(old)
+        if old == new:
+            continue
+        keywords_changed = old['day'] != new['day'] or old['content'] != new['content']
+        delta.add(old, -1, keywords=keywords_changed)
+        delta.add(new, 1, keywords=keywords_changed)
+    if delta:
+        apply_delta(connection, delta)
+
+
+def content_days(start_day=None, end_day=None):
+    """返回需要处理的日期列表，未指定时取原始数据的最早/最晚日期"""
+    if start_day is None or end_day is None:
+        first, last = db.session.query(func.min(DebunkContent.created_at),
+                                       func.max(DebunkContent.created_at)).one()
+        if first is None:
+            return []
+        start_day = start_day or first.date()
+        end_day = end_day or last.date()
+    return [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+
+
+def recompute_day(day):
+    """从原始数据重新计算某一天的汇总结果(不写库)，走 created_at 索引"""
+    begin = datetime.combine(day, datetime.min.time())
+    rows = db.session.query(*[getattr(DebunkContent, field) for field in TRACKED_FIELDS]).filter(
+        DebunkContent.created_at >= begin,
+        DebunkContent.created_at < begin + timedelta(days=1)
+    ).all()
+    delta = StatsDelta()
+    for row in rows:
+        delta.add(_snapshot(row))
+    return delta
+
+
+def _delete_day(connection, day):
+    for model in (ContentDailyStat, ContentDailyRegion, ContentDailyKeyword):
+        connection.execute(model.__table__.delete().where(model.day == day))
+
+
+def rebuild_stats(start_day=None, end_day=None):
+    """按天清空汇总行并从原始数据重建，每天一个事务，返回处理的天数"""
+    days = content_days(start_day, end_day)
+    for day in days:
+        connection = db.session.connection()
+        _delete_day(connection, day)
+        apply_delta(connection, recompute_day(day), fresh=True)
+        db.session.commit()
+    return len(days)
+
+
+def _stored_rows(model, day, key_columns, value_columns):
+    query = db.session.query(*[getattr(model, column) for column in key_columns + value_columns]) \
+        .filter(model.day == day)
+    width = len(key_columns)
+    return {tuple(row[:width]): (list(row[width:]) if len(value_columns) > 1 else row[width])
+            for row in query.all()}
+
+
+def check_day(day):
+    """比对某一天的汇总表与原始数据重新计算的结果，返回不一致项的描述列表"""
+    expected = recompute_day(day)
+    mismatches = []
+
+    def compare(name, actual, wanted, equal):
+        for key in sorted(set(actual) | set(wanted), key=str):
+            if not equal(actual.get(key), wanted.get(key)):
+                mismatches.append(f"{name} {key}: 汇总表={actual.get(key)} 原始数据={wanted.get(key)}")
+
+    compare('content_daily_stat',
+            _stored_rows(ContentDailyStat, day, ['day', 'source', 'status'],
+                         ['content_count', 'reposts_sum', 'comments_sum', 'attitudes_sum']),
+            {key: values for key, values in expected.stats.items() if values[0]},
+            lambda a, b: a == b)
+    compare('content_daily_region',
+            _stored_rows(ContentDailyRegion, day, ['day', 'region'], ['content_count']),
+            {key: count for key, count in expected.regions.items() if count},
+            lambda a, b: a == b)
+    compare('content_daily_keyword',
+            _stored_rows(ContentDailyKeyword, day, ['day', 'word'], ['weight']),
+            {key: weight for key, weight in expected.keywords.items() if weight > WEIGHT_TOLERANCE},
+            lambda a, b: abs((a or 0) - (b or 0)) <= WEIGHT_TOLERANCE * max(1, abs(b or 0)))
+    return mismatches
+
+
+def check_stats(start_day=None, end_day=None):
+    """逐天比对，返回 {日期: 不一致项列表}，只包含有差异的日期"""
+    result = {}
+    for day in content_days(start_day, end_day):
+        mismatches = check_day(day)
+        if mismatches:
+            result[day] = mismatches
+    return result
+
+
+def analyze_sentiment(status):
+    """简单的情感分析"""
+    if status == 'verified':
+        return 'positive'
+    elif status == 'false':
+        return 'negative'
+    return 'neutral'
+
+
+def get_visualization_data(days=30, keyword_limit=50, region_limit=10):
+    """从汇总表读取可视化数据(三次按日期范围的索引查询)"""
+    today = date.today()
+    start_day = today - timedelta(days=days - 1)
+    dates = [(today - timedelta(days=x)).strftime('%Y-%m-%d') for x in range(days)]
+
+    stat_rows = ContentDailyStat.query.filter(ContentDailyStat.day >= start_day).all()
+    region_rows = db.session.query(
+        ContentDailyRegion.region, func.sum(ContentDailyRegion.content_count).label('count')
+    ).filter(
+        ContentDailyRegion.day >= start_day
+    ).group_by(ContentDailyRegion.region).order_by(func.sum(ContentDailyRegion.content_count).desc()) \
+        .limit(region_limit).all()
+    keyword_rows = db.session.query(
+        ContentDailyKeyword.word, func.sum(ContentDailyKeyword.weight).label('weight')
+    ).filter(
+        ContentDailyKeyword.day >= start_day
+    ).group_by(ContentDailyKeyword.word).order_by(func.sum(ContentDailyKeyword.weight).desc()) \
+        .limit(keyword_limit).all()
+
+    total = sum(row.content_count for row in stat_rows)
+    source_counts = Counter()
+    status_counts = Counter()
+    daily_sentiments = {d: {'positive': 0, 'neutral': 0, 'negative': 0} for d in dates}
+    platform_sentiment = {
+        'weibo': {'positive': 0, 'neutral': 0, 'negative': 0},
+        'xinlang': {'positive': 0, 'neutral': 0, 'negative': 0}
+    }
+    daily_interactions = {d: {'shares': 0, 'comments': 0, 'reports': 0} for d in dates}
+    for row in stat_rows:
+        day = row.day.strftime('%Y-%m-%d')
+        sentiment = analyze_sentiment(row.status)
+        source_counts[row.source] += row.content_count
+        status_counts[row.status] += row.content_count
+        if day in daily_sentiments:
+            daily_sentiments[day][sentiment] += row.content_count
+            daily_interactions[day]['shares'] += row.reposts_sum
+            daily_interactions[day]['comments'] += row.comments_sum
+            daily_interactions[day]['reports'] += row.attitudes_sum
+        if row.source in platform_sentiment:
+            platform_sentiment[row.source][sentiment] += row.content_count
+
+    return {
+        'text_analysis': {
+            # 权重取每条内容关键词权重的平均值，与单条文本 extract_tags 的量级一致
+            'keyword_cloud': [{'word': row.word, 'weight': int(row.weight / total * 100) if total else 0}
+                              for row in keyword_rows],
+            'topic_distribution': [
+                {'topic': source, 'percentage': (count / total) * 100}
+                for source, count in source_counts.items()
+            ],
+            'credibility_scores': [
+                {'category': '可信度高', 'count': status_counts.get('verified', 0)},
+                {'category': '待核实', 'count': status_counts.get('pending', 0)},
+                {'category': '确定为谣言', 'count': status_counts.get('false', 0)}
+            ]
+        },
+        'sentiment_analysis': {
+            'timeline': {
+                'dates': dates,
+                'positive': [daily_sentiments[d]['positive'] for d in dates],
+                'neutral': [daily_sentiments[d]['neutral'] for d in dates],
+                'negative': [daily_sentiments[d]['negative'] for d in dates]
+            },
+            'platform_sentiment': platform_sentiment
+        },
+        'user_behavior': {
+            'interaction_stats': {
+                'dates': dates,
+                'shares': [daily_interactions[d]['shares'] for d in dates],
+                'comments': [daily_interactions[d]['comments'] for d in dates],
+                'reports': [daily_interactions[d]['reports'] for d in dates]
+            }
+        },
+        'geo_distribution': {
+            'regions': [{'name': row.region, 'value': int(row.count)} for row in region_rows]
+        }
+    }
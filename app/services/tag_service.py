@@ -0,0 +1,204 @@
+"""文章标签服务
+
+DebunkArticle.tags 仍保留逗号分隔的字符串(接口读写格式不变)，写入时由 SQLAlchemy
+mapper 事件同步到规范化的 tag / article_tag_association 表，并维护 tag.article_count
+物化计数。标签筛选走关联表索引，不再对 tags 字符串做 ILIKE 匹配。
+"""
+
+import logging
+import re
+from datetime import datetime
+
+from sqlalchemy import and_, event, false, func, select
+from sqlalchemy import inspect as sa_inspect
+
+from app import db
+from app.models.debunk import DebunkArticle, Tag, article_tag_association
+from app.utils.upsert import upsert_rows
+
+logger = logging.getLogger(__name__)
+
+# 标签名最大长度，与 Tag.name 列宽一致
+MAX_TAG_LENGTH = 50
+
+_SEPARATOR_PATTERN = re.compile(r'[,，]')
+
+
+def parse_tags(value):
+    """把逗号分隔的标签字符串(或列表)解析为去重后的标签名列表"""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        parts = value
+    else:
+        parts = _SEPARATOR_PATTERN.split(str(value))
+    names = []
+    seen = set()
+    for part in parts:
+        name = str(part).strip()[:MAX_TAG_LENGTH]
+        # MySQL 默认排序规则不区分大小写，去重时也忽略大小写
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+def _ensure_tags(connection, names):
+    """返回 {小写标签名: 标签ID}，不存在的标签自动创建
+
+    缺少的标签用 INSERT IGNORE / ON CONFLICT DO NOTHING 写入后重新查询，
+    并发写入同一个新标签时不会触发唯一键冲突
+    """
+    if not names:
+        return {}
+    tag_table = Tag.__table__
+
+    def select_tags(candidates):
+        rows = connection.execute(select(tag_table.c.id, tag_table.c.name).where(tag_table.c.name.in_(candidates)))
+        return {row.name.lower(): row.id for row in rows}
+
+    existing = select_tags(names)
+    missing = [name for name in names if name.lower() not in existing]
+    if missing:
+        now = datetime.now()
+        upsert_rows(connection, tag_table, [{'name': name, 'article_count': 0, 'created_at': now}
+                                            for name in missing], 'name', ())
+        existing.update(select_tags(missing))
+    return existing
+
+
+def _refresh_counts(connection, tag_ids=None):
+    """重新统计标签的文章数，tag_ids 为 None 时统计全部标签"""
+    if tag_ids is not None and not tag_ids:
+        return
+    tag_table = Tag.__table__
+    count_query = select(func.count()) \
+        .select_from(article_tag_association) \
+        .where(article_tag_association.c.tag_id == tag_table.c.id) \
+        .scalar_subquery()
+    statement = tag_table.update().values(article_count=count_query)
+    if tag_ids is not None:
+        statement = statement.where(tag_table.c.id.in_(list(tag_ids)))
+    connection.execute(statement)
+
+
+def sync_article_tags(connection, article_id, names):
+    """把文章的标签同步到关联表，只增删有变化的部分"""
+    new_ids = set(_ensure_tags(connection, names).values())
+    old_ids = {row.tag_id for row in connection.execute(
+        select(article_tag_association.c.tag_id).where(article_tag_association.c.article_id == article_id)
+    )}
+
+    removed = old_ids - new_ids
+    added = new_ids - old_ids
+    if removed:
+        connection.execute(article_tag_association.delete().where(and_(
+            article_tag_association.c.article_id == article_id,
+            article_tag_association.c.tag_id.in_(list(removed))
+        )))
+    if added:
+        connection.execute(article_tag_association.insert(),
+                           [{'article_id': article_id, 'tag_id': tag_id} for tag_id in added])
+    _refresh_counts(connection, removed | added)
+
+
+def _after_insert(mapper, connection, target):
+    sync_article_tags(connection, target.id, parse_tags(target.tags))
+
+
+def _after_update(mapper, connection, target):
+    if not sa_inspect(target).attrs.tags.history.has_changes():
+        return
+    sync_article_tags(connection, target.id, parse_tags(target.tags))
+
+
+def _before_delete(mapper, connection, target):
+    # 关联表有外键指向文章，需要在删除文章之前清理
+    sync_article_tags(connection, target.id, [])
+
+
+event.listen(DebunkArticle, 'after_insert', _after_insert)
+event.listen(DebunkArticle, 'after_update', _after_update)
+event.listen(DebunkArticle, 'before_delete', _before_delete)
+
+
+def filter_by_tags(query, names):
+    """按标签筛选文章，多个标签之间为 AND 关系
+
+    先一次查出标签ID，再按文章数从少到多逐个连接关联表，
+    每次连接都走 (tag_id, article_id) 索引，代价只与命中的行数相关
+    """
+    names = parse_tags(names)
+    if not names:
+        return query
+
+    tags = Tag.query.filter(Tag.name.in_(names)).order_by(Tag.article_count).all()
+    if len(tags) < len(names):
+        missing = set(names) - {tag.name for tag in tags}
+        logger.info(f"标签不存在: {missing}")
+        return query.filter(false())
+
+    for tag in tags:
+        association = article_tag_association.alias()
+        query = query.join(association, and_(
+            association.c.article_id == DebunkArticle.id,
+            association.c.tag_id == tag.id
+        ))
+    return query
+
+
+def list_tags(limit=None):
+    """获取所有可用标签及文章数，按文章数降序"""
+    query = Tag.query.filter(Tag.article_count > 0).order_by(Tag.article_count.desc(), Tag.id)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def add_article_tags(connection, articles):
+    """为一批新插入的文章写入标签关联并更新计数(绕过 ORM 的批量插入后调用)
+
+    Args:
+        articles: {文章ID: 逗号分隔的标签字符串}
+    """
+    parsed = [(article_id, parse_tags(tags)) for article_id, tags in articles.items()]
+    tag_ids = _ensure_tags(connection, parse_tags([name for _, names in parsed for name in names]))
+    pairs = {(article_id, tag_ids[name.lower()]) for article_id, names in parsed for name in names}
+    if pairs:
+        connection.execute(article_tag_association.insert(),
+                           [{'article_id': article_id, 'tag_id': tag_id} for article_id, tag_id in sorted(pairs)])
+    _refresh_counts(connection, {tag_id for _, tag_id in pairs})
+
+
+def rebuild_tags(batch_size=1000):
+    """根据 DebunkArticle.tags 字符串全量重建关联表和计数
+
+    用于绕过 ORM 事件的批量写入之后修复数据，返回处理的文章数
+    """
+    connection = db.session.connection()
+    connection.execute(article_tag_association.delete())
+
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(DebunkArticle.id, DebunkArticle.tags) \
+            .filter(DebunkArticle.id > last_id) \
+            .order_by(DebunkArticle.id) \
+            .limit(batch_size) \
+            .all()
+        if not rows:
+            break
+
+        parsed = [(row.id, parse_tags(row.tags)) for row in rows]
+        tag_ids = _ensure_tags(connection, parse_tags([name for _, names in parsed for name in names]))
+        pairs = {(article_id, tag_ids[name.lower()]) for article_id, names in parsed for name in names}
+        associations = [{'article_id': article_id, 'tag_id': tag_id} for article_id, tag_id in sorted(pairs)]
+        if associations:
+            connection.execute(article_tag_association.insert(), associations)
+
+        total += len(rows)
+        last_id = rows[-1].id
+
+    _refresh_counts(connection)
+    db.session.commit()
+    return total
@@ -0,0 +1,410 @@
+"""词频向量与关键词云服务
+
+每条 DebunkContent / NewsData 在写入时分词一次，稀疏词频向量保存在 term_vector 表，
+同时增量维护各语料的文档频率(term_doc_freq)和文档总数(term_corpus)。
+任意时间窗口/来源的关键词云只需读出窗口内的向量，用 scipy 稀疏矩阵求和后乘以 IDF，
+不再把原文拼接起来重新跑一遍 jieba TF-IDF。
+
+与全文索引一样由 mapper 事件维护，在 flush 结束时(session after_flush)批量写入；
+绕过 ORM 的批量写入之后可通过 `flask rebuild-term-vectors` 重建。
+"""
+
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+
+import jieba
+import jieba.analyse
+import numpy as np
+from scipy import sparse
+from sqlalchemy import and_, event, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models.debunk import DebunkContent
+from app.models.news_data import NewsData
+from app.models.term_vector import Term, TermDocFreq, TermCorpus, TermVector
+from app.utils.upsert import increment_rows, upsert_rows
+
+logger = logging.getLogger(__name__)
+
+# 词项最大长度，与 Term.term 列宽一致
+MAX_TERM_LENGTH = 64
+# 单个文档最多保存的词项数(按词频保留)，保证向量不超过 BLOB 列宽
+MAX_TERMS_PER_DOC = 4096
+# IN 查询每批的参数个数
+IN_BATCH_SIZE = 500
+# 文档频率缓存时间(秒)，IDF 随语料缓慢变化，不需要每次重新读取整张表
+DF_CACHE_SECONDS = 300
+
+_WORD_PATTERN = re.compile(r'\w', re.UNICODE)
+_SESSION_KEY = 'term_vector_pending'
+_DTYPE = np.dtype('<i4')
+
+
+def _load_stopwords():
+    stopwords = set(jieba.analyse.default_tfidf.stop_words)
+    path = os.path.join(os.path.dirname(__file__), 'data_processor', 'stopwords.txt')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            stopwords.update(line.strip() for line in f if line.strip())
+    except OSError as e:
+        logger.warning(f"加载停用词失败: {str(e)}")
+    return stopwords
+
+
+STOPWORDS = _load_stopwords()
+
+
+def tokenize(text):
+    """与 jieba.analyse.extract_tags 一致: 精确模式分词，去掉单字、停用词和纯标点"""
+    if not text:
+        return []
+    tokens = []
+    for token in jieba.lcut(str(text)):
+        token = token.strip().lower()
+        if len(token) < 2 or token in STOPWORDS or not _WORD_PATTERN.search(token):
+            continue
+        tokens.append(token[:MAX_TERM_LENGTH])
+    return tokens
+
+
+class Corpus:
+    """单个模型的语料配置"""
+
+    def __init__(self, doc_type, model, fields, time_fields, source_field):
+        self.doc_type = doc_type
+        self.model = model
+        self.fields = fields
+        # 依次取第一个非空的时间字段作为文档时间
+        self.time_fields = time_fields
+        self.source_field = source_field
+
+    @property
+    def tracked_fields(self):
+        return tuple(self.fields) + tuple(self.time_fields) + (self.source_field,)
+
+    def document(self, values):
+        """根据记录(对象或行)生成 (词频, 来源, 时间)"""
+        text = ' '.join(str(getattr(values, field)) for field in self.fields if getattr(values, field, None))
+        doc_time = next((getattr(values, field) for field in self.time_fields if getattr(values, field, None)), None)
+        return Counter(tokenize(text)), getattr(values, self.source_field, None), doc_time
+
+
+_corpora = {}
+
+
+def register_corpus(doc_type, model, fields, time_fields, source_field):
+    """注册需要保存词频向量的模型，并挂载增删改事件"""
+    corpus = Corpus(doc_type, model, fields, time_fields, source_field)
+    _corpora[doc_type] = corpus
+
+    def pending(target):
+        session = object_session(target)
+        if session is None:
+            return None
+        return session.info.setdefault(_SESSION_KEY, {}).setdefault(doc_type, {})
+
+    def after_insert(mapper, connection, target):
+        docs = pending(target)
+        if docs is not None:
+            docs[target.id] = corpus.document(target)
+
+    def after_update(mapper, connection, target):
+        state = sa_inspect(target)
+        if not any(state.attrs[field].history.has_changes() for field in corpus.tracked_fields):
+            return
+        docs = pending(target)
+        if docs is not None:
+            docs[target.id] = corpus.document(target)
+
+    def after_delete(mapper, connection, target):
+        docs = pending(target)
+        if docs is not None:
+            docs[target.id] = None
+
+    event.listen(model, 'after_insert', after_insert)
+    event.listen(model, 'after_update', after_update)
+    event.listen(model, 'after_delete', after_delete)
+    return corpus
+
+
+def get_corpus(doc_type):
+    if doc_type not in _corpora:
+        raise ValueError(f"未注册的语料类型: {doc_type}")
+    return _corpora[doc_type]
+
+
+def list_doc_types():
+    return list(_corpora.keys())
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop(_SESSION_KEY, None)
+    if not pending:
+        return
+    connection = session.connection()
+    for doc_type, docs in pending.items():
+        write_documents(connection, doc_type, docs)
+
+
+event.listen(Session, 'after_flush', _after_flush)
+
+
+def _chunks(items, size=IN_BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _collation_key(word):
+    """近似 MySQL 默认排序规则(不区分大小写和重音，忽略末尾空格)下的比较键"""
+    word = unicodedata.normalize('NFKD', word.casefold())
+    return ''.join(char for char in word if not unicodedata.combining(char)).rstrip(' ')
+
+
+def _select_terms(connection, words):
+    table = Term.__table__
+    rows = {}
+    for chunk in _chunks(words):
+        rows.update((row.term, row.id) for row in connection.execute(
+            select(table.c.id, table.c.term).where(table.c.term.in_(chunk))))
+    # 不区分大小写/重音的排序规则下查出的可能是写法不同的等价词项
+    folded = {_collation_key(term): term_id for term, term_id in rows.items()}
+    return {word: rows.get(word, folded.get(_collation_key(word))) for word in words
+            if word in rows or _collation_key(word) in folded}
+
+
+def _ensure_terms(connection, words):
+    """返回 {词项: 词项ID}，不存在的词项批量创建
+
+    缺少的词项用 INSERT IGNORE / ON CONFLICT DO NOTHING 写入后重新查询，
+    并发写入同一个新词时不会触发唯一键冲突
+    """
+    mapping = _select_terms(connection, words)
+    missing = [word for word in words if word not in mapping]
+    if missing:
+        upsert_rows(connection, Term.__table__, [{'term': word} for word in missing], 'term', ())
+        mapping.update(_select_terms(connection, missing))
+    return mapping
+
+
+def _merge_doc_freq(connection, doc_type, deltas):
+    """把 {词项ID: 增量} 原子地累加进文档频率表"""
+    deltas = {term_id: delta for term_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    table = TermDocFreq.__table__
+    increment_rows(connection, table, [{'doc_type': doc_type, 'term_id': term_id, 'df': delta}
+                                       for term_id, delta in deltas.items()], ('doc_type', 'term_id'), ['df'])
+    # 扣减到 0 的行(以及扣减不存在的行时插入的负值行)不再保留
+    decreased = [term_id for term_id, delta in deltas.items() if delta < 0]
+    for chunk in _chunks(decreased):
+        connection.execute(table.delete().where(and_(
+            table.c.doc_type == doc_type, table.c.term_id.in_(chunk), table.c.df <= 0)))
+
+
+def _merge_corpus_count(connection, doc_type, delta):
+    if not delta:
+        return
+    table = TermCorpus.__table__
+    if delta > 0:
+        increment_rows(connection, table, [{'doc_type': doc_type, 'doc_count': delta}], 'doc_type', ['doc_count'])
+    else:
+        connection.execute(table.update().where(table.c.doc_type == doc_type)
+                           .values(doc_count=table.c.doc_count + delta))
+
+
+def write_documents(connection, doc_type, docs):
+    """写入一批文档的词频向量，并增量更新文档频率和文档总数
+
+    Args:
+        docs: {doc_id: (词频Counter, 来源, 时间)}，值为 None 表示文档已删除
+    """
+    if not docs:
+        return
+    table = TermVector.__table__
+
+    # 旧向量的词项从文档频率中扣除
+    df_deltas = Counter()
+    old_ids = set()
+    for chunk in _chunks(docs):
+        for row in connection.execute(select(table.c.doc_id, table.c.term_ids).where(and_(
+                table.c.doc_type == doc_type, table.c.doc_id.in_(chunk)))):
+            old_ids.add(row.doc_id)
+            for term_id in np.frombuffer(row.term_ids, dtype=_DTYPE).tolist():
+                df_deltas[term_id] -= 1
+    for chunk in _chunks(old_ids):
+        connection.execute(table.delete().where(and_(table.c.doc_type == doc_type, table.c.doc_id.in_(chunk))))
+
+    documents = {doc_id: doc for doc_id, doc in docs.items() if doc is not None}
+    words = sorted({word for counts, _, _ in documents.values() for word in counts})
+    term_ids = _ensure_terms(connection, words) if words else {}
+
+    rows = []
+    for doc_id, (counts, source, doc_time) in documents.items():
+        # 排序规则下等价的不同写法对应同一个词项，计数合并，文档频率只算一次
+        merged = Counter()
+        for word, count in counts.most_common(MAX_TERMS_PER_DOC):
+            merged[term_ids[word]] += count
+        items = sorted(merged.items())
+        ids = np.array([term_id for term_id, _ in items], dtype=_DTYPE)
+        values = np.array([count for _, count in items], dtype=_DTYPE)
+        for term_id in ids.tolist():
+            df_deltas[term_id] += 1
+        rows.append({
+            'doc_type': doc_type,
+            'doc_id': doc_id,
+            'source': (source or '')[:100] or None,
+            'doc_time': doc_time,
+            'length': int(values.sum()),
+            'term_ids': ids.tobytes(),
+            'term_counts': values.tobytes(),
+        })
+    if rows:
+        connection.execute(table.insert(), rows)
+
+    _merge_doc_freq(connection, doc_type, df_deltas)
+    _merge_corpus_count(connection, doc_type, len(documents) - len(old_ids))
+
+
+def rebuild_vectors(doc_type, batch_size=1000):
+    """从数据库全量重建指定语料的词频向量和文档频率，返回处理的文档数"""
+    corpus = get_corpus(doc_type)
+    model = corpus.model
+    columns = [getattr(model, field) for field in dict.fromkeys(corpus.tracked_fields)]
+
+    for table in (TermVector.__table__, TermDocFreq.__table__, TermCorpus.__table__):
+        db.session.execute(table.delete().where(table.c.doc_type == doc_type))
+    db.session.commit()
+
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(model.id, *columns) \
+            .filter(model.id > last_id) \
+            .order_by(model.id) \
+            .limit(batch_size) \
+            .all()
+        if not rows:
+            break
+        write_documents(db.session.connection(), doc_type, {row.id: corpus.document(row) for row in rows})
+        db.session.commit()
+
+        total += len(rows)
+        last_id = rows[-1].id
+        logger.info(f"[{doc_type}] 已生成 {total} 条词频向量")
+
+    _df_cache.pop(doc_type, None)
+    return total
+
+
+_df_cache = {}
+
+
+def _doc_freq(doc_type):
+    """返回 (文档总数, 按词项ID索引的文档频率数组)，带缓存"""
+    cached = _df_cache.get(doc_type)
+    if cached and time.time() - cached[0] < DF_CACHE_SECONDS:
+        return cached[1], cached[2]
+
+    doc_count = db.session.query(TermCorpus.doc_count).filter(TermCorpus.doc_type == doc_type).scalar() or 0
+    rows = db.session.query(TermDocFreq.term_id, TermDocFreq.df).filter(TermDocFreq.doc_type == doc_type).all()
+    df = np.zeros(max((row.term_id for row in rows), default=0) + 1, dtype=np.int64)
+    if rows:
+        ids, counts = zip(*rows)
+        df[list(ids)] = counts
+    _df_cache[doc_type] = (time.time(), doc_count, df)
+    return doc_count, df
+
+
+def clear_cache():
+    _df_cache.clear()
+
+
+def keyword_cloud(doc_types='debunk_content', start=None, end=None, sources=None, top_n=50):
+    """计算时间窗口/来源范围内的关键词云
+
+    Args:
+        doc_types: 语料类型或列表
+        start/end: 文档时间范围 [start, end)
+        sources: 来源列表，为空时不限
+        top_n: 返回的关键词数
+
+    Returns:
+        (关键词列表 [{'word', 'weight'}], 参与计算的文档数)
+    """
+    if isinstance(doc_types, str):
+        doc_types = [doc_types]
+    for doc_type in doc_types:
+        get_corpus(doc_type)
+
+    query = db.session.query(TermVector.term_ids, TermVector.term_counts) \
+        .filter(TermVector.doc_type.in_(doc_types))
+    if start:
+        query = query.filter(TermVector.doc_time >= start)
+    if end:
+        query = query.filter(TermVector.doc_time < end)
+    if sources:
+        query = query.filter(TermVector.source.in_(sources))
+    rows = query.all()
+    if not rows:
+        return [], 0
+
+    # 把所有向量拼成一个 文档×词项 的稀疏矩阵，按列求和即窗口内的词频
+    ids = np.frombuffer(b''.join(row.term_ids for row in rows), dtype=_DTYPE)
+    counts = np.frombuffer(b''.join(row.term_counts for row in rows), dtype=_DTYPE)
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row.term_ids) // _DTYPE.itemsize for row in rows], out=indptr[1:])
+
+    doc_count = 0
+    df = np.zeros(1, dtype=np.int64)
+    for doc_type in doc_types:
+        type_count, type_df = _doc_freq(doc_type)
+        doc_count += type_count
+        if len(type_df) > len(df):
+            type_df = type_df.copy()
+            type_df[:len(df)] += df
+            df = type_df
+        else:
+            df[:len(type_df)] += type_df
+
+    width = max(int(ids.max()) + 1 if len(ids) else 1, len(df))
+    matrix = sparse.csr_matrix((counts, ids, indptr), shape=(len(rows), width))
+    tf = np.asarray(matrix.sum(axis=0)).ravel().astype(np.float64)
+    total = tf.sum()
+    if not total:
+        return [], len(rows)
+
+    df = np.pad(df, (0, width - len(df)))
+    # 缓存期间新出现的词项还没有文档频率，按窗口内出现的文档数估计
+    df = np.maximum(df, (matrix > 0).sum(axis=0).A1)
+    idf = np.maximum(np.log((max(doc_count, len(rows)) + 1) / (df + 1)), 0)
+    weights = tf / total * idf
+
+    top = np.argsort(-weights)[:top_n]
+    top = [int(term_id) for term_id in top if weights[term_id] > 0]
+    words = dict(db.session.query(Term.id, Term.term).filter(Term.id.in_(top)).all()) if top else {}
+    return [{'word': words[term_id], 'weight': int(weights[term_id] * 100)}
+            for term_id in top if term_id in words], len(rows)
+
+
+register_corpus(
+    'debunk_content',
+    DebunkContent,
+    fields=('content',),
+    time_fields=('created_at',),
+    source_field='source'
+)
+
+register_corpus(
+    'news_data',
+    NewsData,
+    fields=('title', 'content'),
+    time_fields=('pub_date', 'crawl_time'),
+    source_field='source'
+)
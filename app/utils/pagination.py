@@ -0,0 +1,165 @@
+"""列表分页工具
+
+所有按时间倒序的信息流接口共用:
+- 页码模式(默认): ?page=&per_page=，兼容原有 OFFSET 分页
+- 游标模式(可选): ?cursor=<上一页返回的 next_cursor>，首页传空字符串 cursor=
+  按 (时间, id) 做键集分页，翻到多深都只走索引范围扫描，不再 OFFSET
+- ?include_total=false 时跳过 COUNT(*) 统计，total/pages 返回 null
+"""
+
+import base64
+import json
+import math
+from datetime import datetime
+
+from sqlalchemy import DateTime, and_, false, or_
+
+
+class CursorError(ValueError):
+    """游标格式错误"""
+
+
+class FeedPage:
+    """一页数据及分页信息"""
+
+    def __init__(self, items, page, per_page, total=None, has_more=False, next_cursor=None):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.has_more = has_more
+        self.next_cursor = next_cursor
+
+    @property
+    def pages(self):
+        if self.total is None:
+            return None
+        return int(math.ceil(self.total / float(self.per_page))) if self.per_page else 0
+
+
+def parse_feed_args(args, default_per_page=20, max_per_page=None):
+    """从请求参数中解析分页参数"""
+    page = args.get('page', 1, type=int) or 1
+    per_page = args.get('per_page', default_per_page, type=int) or default_per_page
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+    if max_per_page:
+        per_page = min(per_page, max_per_page)
+    return {
+        'page': page,
+        'per_page': per_page,
+        'cursor': args.get('cursor'),  # None 表示页码模式，空字符串表示游标模式的第一页
+        'include_total': str(args.get('include_total', 'true')).lower() not in ('false', '0', 'no'),
+    }
+
+
+def encode_cursor(values):
+    """把排序键编码为不透明的游标字符串"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """解析游标字符串，按排序列类型还原取值"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except Exception:
+        raise CursorError('无效的游标')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise CursorError('无效的游标')
+
+    decoded = []
+    for column, value in zip(columns, values):
+        if value is not None and isinstance(column.type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise CursorError('无效的游标')
+        decoded.append(value)
+    return decoded
+
+
+def _is_nullable(column):
+    return getattr(getattr(column, 'expression', column), 'nullable', False)
+
+
+def _after_condition(columns, values, leading_nulls=True):
+    """构造"排在游标之后"的条件(所有列均为降序，NULL 视为最小值排在最后)
+
+    (c1, c2, id) 展开为:
+        c1 <= v1 AND (c1 < v1 OR (c1 = v1 AND (c2 <= v2 AND (...))))
+    外层的 c1 <= v1 让数据库可以直接在 (c1, c2, id) 索引上做范围扫描；
+    c1 可为空时再并上 c1 IS NULL (leading_nulls=False 时不并，由调用方单独补取)
+    """
+    column, value = columns[0], values[0]
+    rest = _after_condition(columns[1:], values[1:]) if len(columns) > 1 else None
+
+    if value is None:
+        # 游标停在 NULL 上，之后只可能是同为 NULL 且后续列更小的行
+        return and_(column.is_(None), rest) if rest is not None else false()
+
+    if rest is None:
+        condition = column < value
+    else:
+        condition = and_(column <= value, or_(column < value, and_(column == value, rest)))
+    if leading_nulls and _is_nullable(column):
+        condition = or_(condition, column.is_(None))
+    return condition
+
+
+def paginate_feed(query, order_columns, page=1, per_page=20, cursor=None, include_total=True):
+    """按排序列倒序分页
+
+    Args:
+        query: 已应用过滤条件、尚未排序的查询
+        order_columns: 排序列(均为降序)，最后一列必须唯一(通常是主键)；
+            为 None 时表示查询已自行排序(如按相关度)，只支持页码模式
+        page/per_page: 页码模式参数
+        cursor: 游标，None 为页码模式
+        include_total: 是否统计总数
+
+    Returns:
+        FeedPage
+    """
+    if order_columns is None:
+        cursor = None
+        ordered = query
+    else:
+        ordered = query.order_by(*[column.desc() for column in order_columns])
+
+    if cursor is None:
+        # 页码模式
+        if include_total:
+            pagination = ordered.paginate(page=page, per_page=per_page, error_out=False)
+            return FeedPage(pagination.items, page, per_page, total=pagination.total,
+                            has_more=pagination.has_next)
+        rows = ordered.limit(per_page + 1).offset((page - 1) * per_page).all()
+        return FeedPage(rows[:per_page], page, per_page, has_more=len(rows) > per_page)
+
+    # 游标模式
+    if not cursor:
+        rows = ordered.limit(per_page + 1).all()
+    else:
+        values = decode_cursor(cursor, order_columns)
+        leading = order_columns[0]
+        if values[0] is not None and _is_nullable(leading):
+            # 首列可为空时 OR IS NULL 会让索引范围扫描失效:
+            # 先取非空部分，不足一页再补上排在最后的 NULL 行
+            rows = ordered.filter(_after_condition(order_columns, values, leading_nulls=False)) \
+                .limit(per_page + 1).all()
+            if len(rows) <= per_page:
+                rows += ordered.filter(leading.is_(None)).limit(per_page + 1 - len(rows)).all()
+        else:
+            rows = ordered.filter(_after_condition(order_columns, values)).limit(per_page + 1).all()
+    items = rows[:per_page]
+    has_more = len(rows) > per_page
+
+    next_cursor = None
+    if has_more and items:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in order_columns])
+
+    total = query.order_by(None).count() if include_total else None
+    return FeedPage(items, page, per_page, total=total, has_more=has_more, next_cursor=next_cursor)
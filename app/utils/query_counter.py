@@ -0,0 +1,90 @@
+"""请求级 SQL 查询计数
+
+统计每个请求执行的 SQL 条数，用于发现 N+1 查询:
+- 视图函数可以用 @query_budget(n) 声明查询预算，超出时记录警告；
+  SQL_QUERY_BUDGET_STRICT 开启时(测试环境)直接抛出异常，让测试失败
+- SQL_QUERY_COUNT_HEADER 开启时在响应头 X-Query-Count 中返回本次请求的查询数
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_listener_installed = False
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """请求执行的 SQL 条数超出声明的预算"""
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context():
+        g._sql_query_count = g.get('_sql_query_count', 0) + 1
+
+
+def get_query_count():
+    """当前请求(应用上下文)内已执行的 SQL 条数"""
+    if not has_app_context():
+        return 0
+    return g.get('_sql_query_count', 0)
+
+
+@contextmanager
+def count_queries():
+    """统计代码块内执行的 SQL 条数
+
+    用法:
+        with count_queries() as counter:
+            ...
+        print(counter['count'])
+    """
+    counter = {'count': 0}
+    start = get_query_count()
+    try:
+        yield counter
+    finally:
+        counter['count'] = get_query_count() - start
+
+
+def query_budget(max_queries):
+    """声明视图函数允许执行的最大 SQL 条数
+
+    放在路由装饰器的最内层，只统计视图函数本身的查询(不含 JWT 校验等)
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = get_query_count()
+            response = fn(*args, **kwargs)
+            used = get_query_count() - start
+            if used > max_queries:
+                message = f"{request.endpoint} 执行了 {used} 条SQL，超出预算 {max_queries} 条"
+                if current_app.config.get('SQL_QUERY_BUDGET_STRICT'):
+                    raise QueryBudgetExceeded(message)
+                current_app.logger.warning(message)
+            return response
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
+
+
+def init_query_counter(app):
+    """注册 SQL 计数监听器和响应头"""
+    global _listener_installed
+    if not _listener_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        _listener_installed = True
+
+    @app.before_request
+    def reset_query_count():
+        # 已有应用上下文时(如测试、脚本)请求会复用同一个 g，需在请求开始时清零
+        g._sql_query_count = 0
+
+    @app.after_request
+    def add_query_count_header(response):
+        if app.config.get('SQL_QUERY_COUNT_HEADER'):
+            response.headers['X-Query-Count'] = str(get_query_count())
+        return response
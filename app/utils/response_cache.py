@@ -0,0 +1,335 @@
+"""公共只读接口的响应缓存
+
+热点只读接口(文章列表/详情、/api/analysis/*、/api/spider/stats)的响应缓存在 Redis 中，
+多个进程共享，测试环境使用 fakeredis:
+
+- 缓存键由端点名、路径参数和规范化后的查询参数(只取声明的参数、去空白、去空值、按名称排序)生成，
+  参数顺序不同或带无关参数(如防缓存的时间戳)的请求命中同一条缓存
+- 基于标签失效: 每个标签在 Redis 中有一个版本号，缓存条目记录写入时各标签的版本，
+  读取时版本不一致即视为失效。模型写入(ORM 增删改和批量 update/delete)在事务提交后
+  递增相关标签的版本，计算期间发生的写入也不会留下旧数据
+- 防击穿: 同一个键未命中时只有拿到锁的请求重新计算，其余请求等待其结果
+- 命中率统计: 各端点的 hit/miss/coalesced/error 计数保存在 Redis 中，见 get_stats()
+
+Redis 不可用时直接执行视图函数，并在一段时间内不再尝试连接。
+"""
+
+import json
+import time
+import hashlib
+import logging
+from functools import wraps
+
+from flask import current_app, has_app_context, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger('response_cache')
+
+_SESSION_KEY = 'response_cache_tags'
+# 等待其他请求计算结果时的轮询间隔(秒)
+_POLL_INTERVAL = 0.05
+# Redis 出错后暂停使用缓存的时间(秒)
+_RETRY_AFTER = 30
+
+# 模型 -> (整表标签, 行标签函数)
+_watched = {}
+
+
+def create_redis_client(url):
+    """由 URL 创建 Redis 客户端，fakeredis:// 用于测试"""
+    if url.startswith('fakeredis://'):
+        import fakeredis
+        return fakeredis.FakeRedis(server=fakeredis.FakeServer())
+    import redis
+    return redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+
+class ResponseCache:
+    """Redis 响应缓存
+
+    Args:
+        client: Redis 客户端
+        default_ttl: 默认缓存时间(秒)
+        lock_timeout: 单次重新计算的锁超时(秒)，也是其他请求等待结果的最长时间
+        key_prefix: Redis 键前缀
+    """
+
+    def __init__(self, client, default_ttl=60, lock_timeout=5, key_prefix='tg:'):
+        self.client = client
+        self.default_ttl = default_ttl
+        self.lock_timeout = lock_timeout
+        self.key_prefix = key_prefix
+        self._down_until = 0
+
+    @property
+    def available(self):
+        return time.monotonic() >= self._down_until
+
+    def _failed(self, e):
+        logger.warning(f"响应缓存 Redis 不可用，{_RETRY_AFTER} 秒内跳过缓存: {str(e)}")
+        self._down_until = time.monotonic() + _RETRY_AFTER
+
+    def _tag_key(self, tag):
+        return f'{self.key_prefix}tag:{tag}'
+
+    def make_key(self, endpoint, view_args, params=None):
+        """由端点、路径参数和查询参数生成缓存键"""
+        args = []
+        for name in sorted(set(request.args.keys()) if params is None else params):
+            values = [value.strip() for value in request.args.getlist(name)]
+            values = [value for value in values if value]
+            if values:
+                args.append([name, values])
+        raw = json.dumps([sorted(view_args.items()), args], ensure_ascii=False, default=str)
+        digest = hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+        return f'{self.key_prefix}resp:{endpoint}:{digest}'
+
+    def _read(self, key, tags):
+        """读取缓存条目和各标签的当前版本，返回 (条目或None, 当前版本)"""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(key)
+        for tag in tags:
+            pipe.get(self._tag_key(tag))
+        raw, *versions = pipe.execute()
+        versions = [int(version or 0) for version in versions]
+        if raw is None:
+            return None, versions
+        header, _, body = raw.partition(b'\n')
+        header = json.loads(header)
+        if header['versions'] != versions:
+            return None, versions
+        return (header, body), versions
+
+    def _write(self, key, versions, response, ttl):
+        header = json.dumps({
+            'versions': versions,
+            'status': response.status_code,
+            'content_type': response.content_type
+        })
+        self.client.set(key, header.encode('utf-8') + b'\n' + response.get_data(), px=int(ttl * 1000))
+
+    def _count(self, endpoint, outcome):
+        try:
+            self.client.hincrby(f'{self.key_prefix}stats', f'{endpoint}:{outcome}', 1)
+        except Exception as e:
+            self._failed(e)
+
+    @staticmethod
+    def _build(entry, outcome):
+        header, body = entry
+        response = current_app.response_class(body, status=header['status'], content_type=header['content_type'])
+        response.headers['X-Cache'] = outcome
+        return response
+
+    def serve(self, endpoint, key, tags, ttl, compute):
+        """返回缓存的响应，未命中时单飞计算并写入缓存"""
+        if not self.available:
+            return make_response(compute())
+        try:
+            entry, versions = self._read(key, tags)
+            if entry is not None:
+                self._count(endpoint, 'hit')
+                return self._build(entry, 'HIT')
+
+            lock_key = key + ':lock'
+            acquired = self.client.set(lock_key, b'1', nx=True, px=int(self.lock_timeout * 1000))
+            if not acquired:
+                # 其他请求正在计算，等待其结果
+                deadline = time.monotonic() + self.lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(_POLL_INTERVAL)
+                    entry, versions = self._read(key, tags)
+                    if entry is not None:
+                        self._count(endpoint, 'coalesced')
+                        return self._build(entry, 'COALESCED')
+                    if not self.client.exists(lock_key):
+                        break
+        except Exception as e:
+            self._failed(e)
+            self._count(endpoint, 'error')
+            return make_response(compute())
+
+        self._count(endpoint, 'miss')
+        try:
+            response = make_response(compute())
+            if response.status_code == 200 and not response.is_streamed:
+                try:
+                    self._write(key, versions, response, ttl)
+                except Exception as e:
+                    self._failed(e)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        finally:
+            if acquired:
+                try:
+                    self.client.delete(lock_key)
+                except Exception as e:
+                    self._failed(e)
+
+    def invalidate(self, *tags):
+        """使带有这些标签的缓存全部失效"""
+        if not tags or not self.available:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for tag in tags:
+                pipe.incr(self._tag_key(tag))
+            pipe.execute()
+        except Exception as e:
+            self._failed(e)
+
+    def get_stats(self):
+        """各端点及总体的命中统计"""
+        outcomes = ('hit', 'miss', 'coalesced', 'error')
+        endpoints = {}
+        for field, value in self.client.hgetall(f'{self.key_prefix}stats').items():
+            endpoint, _, outcome = field.decode('utf-8').rpartition(':')
+            endpoints.setdefault(endpoint, dict.fromkeys(outcomes, 0))[outcome] = int(value)
+
+        def with_ratio(counts):
+            served = counts['hit'] + counts['coalesced']
+            total = served + counts['miss'] + counts['error']
+            counts['hit_ratio'] = round(served / total, 4) if total else 0.0
+            return counts
+
+        total = dict.fromkeys(outcomes, 0)
+        for counts in endpoints.values():
+            for outcome in outcomes:
+                total[outcome] += counts[outcome]
+        return {
+            'endpoints': {endpoint: with_ratio(counts) for endpoint, counts in sorted(endpoints.items())},
+            'total': with_ratio(total)
+        }
+
+    def reset_stats(self):
+        self.client.delete(f'{self.key_prefix}stats')
+
+
+def get_response_cache():
+    """当前应用的响应缓存，未启用时返回 None"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('response_cache')
+
+
+def cached_response(tags, ttl=None, params=None):
+    """缓存视图函数的响应(只缓存 GET 请求的 200 响应)
+
+    放在 @swag_from 之下、@query_budget 之上，命中时不执行视图函数
+
+    Args:
+        tags: 失效标签列表，可以引用路径参数，如 'debunk_article:{article_id}'
+        ttl: 缓存时间(秒)，默认取 RESPONSE_CACHE_DEFAULT_TTL
+        params: 参与缓存键的查询参数，None 表示全部参数
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            if cache is None or request.method != 'GET':
+                return fn(*args, **kwargs)
+            view_args = request.view_args or {}
+            key = cache.make_key(request.endpoint, view_args, params)
+            resolved = [tag.format(**view_args) for tag in tags]
+            return cache.serve(request.endpoint, key, resolved, ttl or cache.default_ttl,
+                               lambda: fn(*args, **kwargs))
+        wrapper.cache_tags = tags
+        return wrapper
+    return decorator
+
+
+def watch_model(model, tags, row_tags=None):
+    """模型写入后使标签失效
+
+    Args:
+        model: ORM 模型
+        tags: 任意一行写入都会失效的标签
+        row_tags: 函数，返回单行写入时额外失效的标签；批量 update/delete 无法确定行，
+            改为失效 '<表名>:*'，按行缓存的接口需同时带上这个标签
+    """
+    _watched[model] = (tuple(tags), row_tags)
+
+
+def model_tags(model):
+    """模型整表写入时需要失效的标签"""
+    tags, row_tags = _watched.get(model, ((), None))
+    if row_tags is not None:
+        tags += (f'{model.__tablename__}:*',)
+    return tags
+
+
+def invalidate_models(*models):
+    """不经过 ORM 会话写入(如 Core 批量更新)后手动失效相关缓存"""
+    cache = get_response_cache()
+    if cache is not None:
+        cache.invalidate(*{tag for model in models for tag in model_tags(model)})
+
+
+def _pending(session):
+    return session.info.setdefault(_SESSION_KEY, set())
+
+
+def _after_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        watched = _watched.get(type(obj))
+        if watched is None:
+            continue
+        tags, row_tags = watched
+        pending = _pending(session)
+        pending.update(tags)
+        if row_tags is not None:
+            pending.update(row_tags(obj))
+
+
+def _do_orm_execute(orm_execute_state):
+    # 批量 insert/update/delete 不触发 flush，按整表失效
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in _watched:
+        _pending(orm_execute_state.session).update(model_tags(mapper.class_))
+
+
+def _after_commit(session):
+    tags = session.info.pop(_SESSION_KEY, None)
+    if tags:
+        cache = get_response_cache()
+        if cache is not None:
+            cache.invalidate(*sorted(tags))
+
+
+def _after_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+event.listen(Session, 'after_flush', _after_flush)
+event.listen(Session, 'do_orm_execute', _do_orm_execute)
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_rollback', _after_rollback)
+
+
+def init_response_cache(app):
+    """创建 Redis 客户端并注册需要失效缓存的模型"""
+    if not app.config.get('RESPONSE_CACHE_ENABLED'):
+        return None
+    cache = ResponseCache(
+        create_redis_client(app.config['RESPONSE_CACHE_REDIS_URL']),
+        default_ttl=app.config.get('RESPONSE_CACHE_DEFAULT_TTL', 60),
+        lock_timeout=app.config.get('RESPONSE_CACHE_LOCK_TIMEOUT', 5),
+        key_prefix=app.config.get('RESPONSE_CACHE_KEY_PREFIX', 'tg:')
+    )
+    app.extensions['response_cache'] = cache
+
+    from app.models.debunk import (DebunkArticle, RumorReport, ClarificationReport,
+                                   DebunkContent, WeiboDebunk, XinlangDebunk)
+    from app.models.news_data import NewsData
+    watch_model(DebunkArticle, ['debunk_article'], lambda obj: [f'debunk_article:{obj.id}'])
+    # 报道通过关联表挂在文章下，修改报道时使所有文章详情失效
+    watch_model(RumorReport, ['debunk_article:*'])
+    watch_model(ClarificationReport, ['debunk_article:*'])
+    watch_model(DebunkContent, ['analysis'])
+    watch_model(NewsData, ['analysis'])
+    watch_model(WeiboDebunk, ['spider_stats'])
+    watch_model(XinlangDebunk, ['spider_stats'])
+    return cache
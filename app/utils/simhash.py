@@ -0,0 +1,121 @@
+"""SimHash 指纹与分段索引
+
+64 位 SimHash: 每个特征(词项)的 64 位哈希按位投票，权重为词频，结果中为 1 的位表示
+正权重占优。措辞略有不同的两段文本指纹只差少数几位，用汉明距离判断是否近似重复。
+
+分段(banding)查找: 把指纹切成 k+1 段，汉明距离不超过 k 的两个指纹至少有一段完全相同
+(抽屉原理)，因此只需按各段精确查找候选，再计算汉明距离过滤，不必和所有指纹比较。
+"""
+
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+
+BITS = 64
+_SIGN_BIT = 1 << (BITS - 1)
+_MASK = (1 << BITS) - 1
+
+
+@lru_cache(maxsize=200000)
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash(features):
+    """计算 64 位 SimHash
+
+    Args:
+        features: {特征: 权重}(如词频 Counter)
+
+    Returns:
+        int: 无符号 64 位指纹，没有特征时返回 None
+    """
+    if not features:
+        return None
+    hashes = np.array([_feature_hash(feature) for feature in features], dtype=np.uint64)
+    weights = np.array(list(features.values()), dtype=np.float64)
+    # 每个哈希展开成 64 个比特(低位在前)，按权重投票
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    votes = weights @ (bits.astype(np.float64) * 2 - 1)
+    return int(np.packbits(votes > 0, bitorder='little').view('<u8')[0])
+
+
+def hamming(a, b):
+    """两个指纹的汉明距离"""
+    return ((a ^ b) & _MASK).bit_count()
+
+
+def to_signed(value):
+    """无符号 64 位 -> 有符号(数据库 BIGINT)"""
+    return value - (1 << BITS) if value is not None and value & _SIGN_BIT else value
+
+
+def to_unsigned(value):
+    """有符号(数据库 BIGINT) -> 无符号 64 位"""
+    return value & _MASK if value is not None else None
+
+
+def band_values(value, bands):
+    """把指纹切成 bands 段，返回各段的值"""
+    width = BITS // bands
+    mask = (1 << width) - 1
+    return [(value >> (band * width)) & mask for band in range(bands)]
+
+
+class SimHashIndex:
+    """内存中的分段索引(只读)，用于全量重建聚类和基准测试
+
+    每段保存按段值排序的数组，查找时二分定位，100 万个指纹约占 32MB
+
+    Args:
+        ids: 文档ID数组
+        hashes: 无符号 64 位指纹数组
+        max_distance: 最大汉明距离 k，切成 k+1 段
+    """
+
+    def __init__(self, ids, hashes, max_distance=3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.width = BITS // self.bands
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        mask = np.uint64((1 << self.width) - 1)
+        # 段值和下标用够用的最小类型保存
+        value_type = np.uint16 if self.width <= 16 else np.uint32 if self.width <= 32 else np.uint64
+        order_type = np.int32 if len(self.hashes) < 2 ** 31 else np.int64
+        self._sorted = []
+        for band in range(self.bands):
+            values = ((self.hashes >> np.uint64(band * self.width)) & mask).astype(value_type)
+            order = np.argsort(values, kind='stable').astype(order_type)
+            self._sorted.append((values[order], order))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def candidates(self, value):
+        """至少有一段相同的指纹下标"""
+        found = []
+        for band, band_value in enumerate(band_values(value, self.bands)):
+            values, order = self._sorted[band]
+            # 用同类型的标量查找，避免 numpy 把整个数组转换成 float64
+            band_value = values.dtype.type(band_value)
+            start = np.searchsorted(values, band_value, side='left')
+            end = np.searchsorted(values, band_value, side='right')
+            if end > start:
+                found.append(order[start:end])
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def query(self, value, max_distance=None):
+        """查找汉明距离不超过 max_distance 的文档，返回 [(文档ID, 距离)]，按距离升序"""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        positions = self.candidates(value)
+        if not len(positions):
+            return []
+        xor = self.hashes[positions] ^ np.uint64(value)
+        distances = np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+        matched = np.nonzero(distances <= max_distance)[0]
+        result = sorted(zip(distances[matched].tolist(), self.ids[positions[matched]].tolist()))
+        return [(doc_id, distance) for distance, doc_id in result]
@@ -0,0 +1,261 @@
+"""文本规范化
+
+数据处理器、爬虫清洗管道、微博搜索爬虫和数据迁移脚本共用的文本清洗内核。
+正则全部预编译，每种清洗规则(profile)是一组按顺序执行的步骤，最后去掉首尾空白:
+
+- clean: 去HTML标签、合并空白、去除特殊字符(原 DataProcessor/DataCleanPipeline.clean_text)
+- weibo_html: 解码HTML实体、去标签、整理换行和空格(原 weibo_search.clean_html_text)
+- html_text: 提取HTML正文、去除URL、合并空白(原 migrate_data.clean_text，不再依赖 BeautifulSoup)
+
+除单条调用外还提供:
+- 批量接口 normalize_batch: 批内相同文本只处理一次
+- 流式接口 normalize_stream: 大文档按块处理，只在不会影响匹配结果的位置切分
+- 可选的结果缓存: 以内容哈希为键的 LRU，适合同一内容被反复抓取/处理的场景
+"""
+
+import re
+import html
+import hashlib
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+# HTML标签
+TAG_PATTERN = re.compile(r'<[^>]+>')
+# 标准HTML标签(标签名以字母开头，或为结束标签/注释/声明)，单独的 < 视为正文
+HTML_TAG_PATTERN = re.compile(r'<[a-zA-Z/!?][^>]*>')
+# HTML注释、脚本和样式(提取正文时连同内容一起去掉)
+HIDDEN_BLOCK_PATTERN = re.compile(r'<!--.*?-->|<(script|style|template)\b[^>]*>.*?</\1\s*>', re.S | re.I)
+# 空白字符
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# 保留字母数字、空白、中文和常用中文标点以外的字符
+SPECIAL_CHAR_PATTERN = re.compile(r'[^\w\s\u4e00-\u9fff。，、；：""（）《》？！]')
+# 换行两侧的空白
+NEWLINE_SPACE_PATTERN = re.compile(r'\s*\n\s*')
+# 连续空格
+SPACES_PATTERN = re.compile(r' +')
+# URL
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+
+# 流式处理时查找未闭合的标签(包括实体编码的尖括号)和脚本/样式块
+_ENTITY_LT_PATTERN = re.compile(r'&(?:lt|#0*60|#x0*3c);', re.I)
+_ENTITY_GT_PATTERN = re.compile(r'&(?:gt|#0*62|#x0*3e);', re.I)
+_BLOCK_OPEN_PATTERN = re.compile(r'<!--|<(?:script|style|template)\b', re.I)
+
+
+PROFILES = {
+    'clean': (
+        lambda text: TAG_PATTERN.sub(' ', text),
+        lambda text: WHITESPACE_PATTERN.sub(' ', text),
+        lambda text: SPECIAL_CHAR_PATTERN.sub('', text),
+    ),
+    'weibo_html': (
+        html.unescape,
+        lambda text: TAG_PATTERN.sub('', text),
+        lambda text: NEWLINE_SPACE_PATTERN.sub('\n', text),
+        lambda text: SPACES_PATTERN.sub(' ', text),
+    ),
+    'html_text': (
+        lambda text: HIDDEN_BLOCK_PATTERN.sub(' ', text),
+        lambda text: HTML_TAG_PATTERN.sub(' ', text),
+        html.unescape,
+        lambda text: URL_PATTERN.sub('', text),
+        lambda text: WHITESPACE_PATTERN.sub(' ', text),
+    ),
+}
+
+
+# 会去掉脚本/样式块的规则，流式处理时不能在块内切分
+HIDDEN_BLOCK_PROFILES = {'html_text'}
+
+
+class TextNormalizer:
+    """按指定规则清洗文本
+
+    Args:
+        profile: 清洗规则名称，见 PROFILES
+        cache_size: 结果缓存条数，0 表示不缓存
+    """
+
+    def __init__(self, profile='clean', cache_size=0):
+        if profile not in PROFILES:
+            raise ValueError(f"未知的文本清洗规则: {profile}")
+        self.profile = profile
+        self.steps = PROFILES[profile]
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _apply(self, text):
+        """依次执行各步骤(不去首尾空白)"""
+        for step in self.steps:
+            text = step(text)
+        return text
+
+    @staticmethod
+    def _cache_key(text):
+        # 以哈希作为键，缓存不持有原文
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    def normalize(self, text):
+        """清洗单条文本，空值返回空字符串"""
+        if not text:
+            return ""
+        if not self.cache_size:
+            return self._apply(text).strip()
+
+        key = self._cache_key(text)
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        result = self._apply(text).strip()
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    __call__ = normalize
+
+    def normalize_batch(self, texts):
+        """批量清洗，批内重复的文本只处理一次，返回与输入等长的列表"""
+        results = {}
+        output = []
+        for text in texts:
+            if not text:
+                output.append("")
+                continue
+            result = results.get(text)
+            if result is None:
+                result = results[text] = self.normalize(text)
+            output.append(result)
+        return output
+
+    def normalize_stream(self, source, chunk_size=64 * 1024):
+        """流式清洗大文档，逐段产出结果，各段拼接后与 normalize(全文) 一致
+
+        Args:
+            source: 字符串、带 read() 方法的文本文件对象或字符串块的可迭代对象
+            chunk_size: 每次处理的字符数
+        """
+        buffer = ''
+        pending_space = ''
+        started = False
+        for chunk in _iter_chunks(source, chunk_size):
+            buffer += chunk
+            if len(buffer) < chunk_size:
+                continue
+            cut = _safe_cut(buffer, hidden_blocks=self.profile in HIDDEN_BLOCK_PROFILES)
+            if cut <= 0:
+                continue
+            piece, buffer = buffer[:cut], buffer[cut:]
+            output = self._apply(piece)
+            # 首段去掉开头空白，每段末尾的空白留到下一段有内容时再输出(全文末尾的空白丢弃)
+            if not started:
+                output = output.lstrip()
+            body = output.rstrip()
+            if body:
+                yield pending_space + body if started else body
+                started = True
+                pending_space = output[len(body):]
+            elif started:
+                pending_space += output
+        output = self._apply(buffer)
+        if not started:
+            output = output.lstrip()
+        body = output.rstrip()
+        if body:
+            yield pending_space + body if started else body
+
+    def cache_info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache), 'max_size': self.cache_size}
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+def _iter_chunks(source, chunk_size):
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        for chunk in source:
+            if chunk:
+                yield chunk
+
+
+def _last_marker(text, end, char, entity_pattern):
+    """返回 end 之前最后一个尖括号(或其实体编码)的位置，没有时返回 -1"""
+    position = text.rfind(char, 0, end)
+    amp = text.rfind('&', 0, end)
+    while amp > position:
+        if entity_pattern.match(text, amp):
+            return amp
+        amp = text.rfind('&', 0, amp)
+    return position
+
+
+def _safe_cut(buffer, hidden_blocks=False):
+    """返回可以安全切分的位置，切分点前后分别清洗的结果与整体清洗一致
+
+    切分点选在非ASCII、非空白字符(通常是汉字)之后: 这类字符不属于空白、实体和URL的
+    匹配范围，只要不在未闭合的标签内(以及提取正文时不在脚本/样式块内)，
+    切分就不会改变各步骤的匹配结果。找不到时返回 0，继续累积数据。
+    """
+    limit = len(buffer)
+    blocks = []
+    if hidden_blocks:
+        blocks = [match.span() for match in HIDDEN_BLOCK_PATTERN.finditer(buffer)]
+        unclosed = _BLOCK_OPEN_PATTERN.search(buffer, blocks[-1][1] if blocks else 0)
+        if unclosed is not None:
+            limit = unclosed.start()
+
+    while limit > 0:
+        position = limit - 1
+        while position >= 0 and (ord(buffer[position]) < 128 or buffer[position].isspace()):
+            position -= 1
+        if position < 0:
+            return 0
+        cut = position + 1
+        tag_open = _last_marker(buffer, cut, '<', _ENTITY_LT_PATTERN)
+        if tag_open >= 0 and tag_open > _last_marker(buffer, cut, '>', _ENTITY_GT_PATTERN):
+            # 位于标签内部，退到标签开始之前
+            limit = tag_open
+            continue
+        index = bisect_right(blocks, (cut,)) - 1
+        if index >= 0 and blocks[index][1] > cut:
+            # 位于脚本/样式块内部
+            limit = blocks[index][0]
+            continue
+        return cut
+    return 0
+
+
+_normalizers = {}
+
+
+def get_normalizer(profile='clean'):
+    """获取指定规则的共享清洗器(不带缓存)"""
+    normalizer = _normalizers.get(profile)
+    if normalizer is None:
+        normalizer = _normalizers[profile] = TextNormalizer(profile)
+    return normalizer
+
+
+def normalize_text(text, profile='clean'):
+    """按指定规则清洗单条文本"""
+    return get_normalizer(profile).normalize(text)
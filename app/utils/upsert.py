@@ -0,0 +1,122 @@
+"""按唯一键批量写入(upsert)
+
+多行 INSERT 遇到唯一键冲突时改为更新指定列:
+- MySQL/MariaDB: INSERT ... ON DUPLICATE KEY UPDATE
+- SQLite/PostgreSQL: INSERT ... ON CONFLICT (key) DO UPDATE
+- 其他数据库: 由调用方先查出已存在的键，拆成批量 UPDATE 和多行 INSERT
+
+increment_rows 用同样的语法把增量原子地累加到已有行(col = col + 新值)，
+并发写入同一个键时不会因为先查后插而触发唯一键冲突。
+"""
+
+from sqlalchemy import and_, bindparam
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+# 每条 INSERT 包含的行数
+CHUNK_SIZE = 500
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _key_columns(key):
+    return (key,) if isinstance(key, str) else tuple(key)
+
+
+def upsert_rows(connection, table, rows, key, update_columns, existing=()):
+    """按唯一键批量写入
+
+    Args:
+        connection: 数据库连接
+        table: 目标表
+        rows: 行字典列表，各行的键必须一致
+        key: 唯一键列名，联合唯一键时为列名元组
+        update_columns: 键冲突时更新的列，为空时忽略冲突的行(INSERT IGNORE / DO NOTHING)
+        existing: 已存在的键(只在不支持 upsert 语法的数据库上使用，联合唯一键时为元组)
+    """
+    if not rows:
+        return
+    key_columns = _key_columns(key)
+    dialect = connection.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        for chunk in _chunks(rows):
+            statement = mysql.insert(table).values(chunk)
+            if update_columns:
+                statement = statement.on_duplicate_key_update(
+                    {name: statement.inserted[name] for name in update_columns})
+            else:
+                statement = statement.prefix_with('IGNORE')
+            connection.execute(statement)
+    elif dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        for chunk in _chunks(rows):
+            statement = insert(table).values(chunk)
+            if update_columns:
+                statement = statement.on_conflict_do_update(
+                    index_elements=[table.c[column] for column in key_columns],
+                    set_={name: statement.excluded[name] for name in update_columns})
+            else:
+                statement = statement.on_conflict_do_nothing(
+                    index_elements=[table.c[column] for column in key_columns])
+            connection.execute(statement)
+    else:
+        existing = set(existing)
+
+        def row_key(row):
+            return row[key] if isinstance(key, str) else tuple(row[column] for column in key_columns)
+
+        updates = [row for row in rows if row_key(row) in existing]
+        inserts = [row for row in rows if row_key(row) not in existing]
+        if updates and update_columns:
+            connection.execute(
+                table.update().where(and_(*[table.c[column] == bindparam(f'_key_{column}')
+                                            for column in key_columns]))
+                .values({name: bindparam(f'_{name}') for name in update_columns}),
+                [{**{f'_key_{column}': row[column] for column in key_columns},
+                  **{f'_{name}': row[name] for name in update_columns}} for row in updates])
+        for chunk in _chunks(inserts):
+            connection.execute(table.insert().values(chunk))
+
+
+def increment_rows(connection, table, rows, key, increment_columns):
+    """按唯一键累加: 键不存在时插入，存在时把 increment_columns 加到已有值上
+
+    MySQL/SQLite/PostgreSQL 上是一条原子的 upsert 语句，不需要先查出已有的键；
+    其他数据库逐行先 UPDATE，没有更新到行时再 INSERT
+
+    Args:
+        rows: 行字典列表，各行的键必须一致，同一批内唯一键不能重复
+        key: 唯一键列名，联合唯一键时为列名元组
+        increment_columns: 累加的列
+    """
+    if not rows:
+        return
+    key_columns = _key_columns(key)
+    dialect = connection.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        for chunk in _chunks(rows):
+            statement = mysql.insert(table).values(chunk)
+            statement = statement.on_duplicate_key_update(
+                {name: table.c[name] + statement.inserted[name] for name in increment_columns})
+            connection.execute(statement)
+    elif dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        for chunk in _chunks(rows):
+            statement = insert(table).values(chunk)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c[column] for column in key_columns],
+                set_={name: table.c[name] + statement.excluded[name] for name in increment_columns})
+            connection.execute(statement)
+    else:
+        condition = and_(*[table.c[column] == bindparam(f'_key_{column}') for column in key_columns])
+        statement = table.update().where(condition).values(
+            {name: table.c[name] + bindparam(f'_{name}') for name in increment_columns})
+        for row in rows:
+            result = connection.execute(statement, {
+                **{f'_key_{column}': row[column] for column in key_columns},
+                **{f'_{name}': row[name] for name in increment_columns}})
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(row))
@@ -34,9 +34,104 @@ def drop_db_command():
         db.drop_all()
         click.echo('成功删除所有表。')
 
+@click.command('rebuild-search-index')
+@click.option('--doc-type', default='all', help='索引类型: all/debunk_article/debunk_content')
+@click.option('--batch-size', default=1000, help='每批处理的记录数')
+@with_appcontext
+def rebuild_search_index_command(doc_type, batch_size):
+    """从数据库全量重建全文检索倒排索引"""
+    from app.services import search_service
+    doc_types = search_service.list_doc_types() if doc_type == 'all' else [doc_type]
+    for name in doc_types:
+        total = search_service.rebuild_index(name, batch_size=batch_size)
+        click.echo(f'[{name}] 索引重建完成，共 {total} 条记录。')
+
+@click.command('rebuild-tags')
+@click.option('--batch-size', default=1000, help='每批处理的文章数')
+@with_appcontext
+def rebuild_tags_command(batch_size):
+    """根据文章的 tags 字段重建标签关联表和标签计数"""
+    from app.services import tag_service
+    total = tag_service.rebuild_tags(batch_size=batch_size)
+    click.echo(f'标签重建完成，共处理 {total} 篇文章。')
+
+@click.command('rebuild-term-vectors')
+@click.option('--doc-type', default='all', help='语料类型(debunk_content/news_data)，默认全部')
+@click.option('--batch-size', default=1000, help='每批处理的记录数')
+@with_appcontext
+def rebuild_term_vectors_command(doc_type, batch_size):
+    """重建词频向量和文档频率表(用于关键词云)"""
+    from app.services import term_vector_service
+    doc_types = term_vector_service.list_doc_types() if doc_type == 'all' else [doc_type]
+    for name in doc_types:
+        total = term_vector_service.rebuild_vectors(name, batch_size=batch_size)
+        click.echo(f'[{name}] 词频向量重建完成，共 {total} 条记录。')
+
+@click.command('rebuild-simhash')
+@click.option('--batch-size', default=1000, help='每批处理的记录数')
+@with_appcontext
+def rebuild_simhash_command(batch_size):
+    """重新计算 SimHash 指纹、分段索引和近似重复分组"""
+    from app.services import near_duplicate_service
+    total, clusters = near_duplicate_service.rebuild(batch_size=batch_size)
+    click.echo(f'近似重复分组重建完成，共 {total} 条记录，{clusters} 个分组。')
+
+def _parse_days(start, end, days):
+    """把命令行的日期范围参数转成 (start_day, end_day)"""
+    from datetime import date, datetime, timedelta
+    start_day = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+    end_day = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+    if days:
+        end_day = end_day or date.today()
+        start_day = end_day - timedelta(days=days - 1)
+    return start_day, end_day
+
+@click.command('rebuild-content-stats')
+@click.option('--start', default=None, help='开始日期 YYYY-MM-DD，默认为最早的数据')
+@click.option('--end', default=None, help='结束日期 YYYY-MM-DD，默认为最新的数据')
+@click.option('--days', default=None, type=int, help='只处理最近N天(优先于 --start)')
+@with_appcontext
+def rebuild_content_stats_command(start, end, days):
+    """从爬虫内容原始数据回填/重建按天汇总的统计表"""
+    from app.services import stats_service
+    start_day, end_day = _parse_days(start, end, days)
+    total = stats_service.rebuild_stats(start_day, end_day)
+    click.echo(f'统计汇总重建完成，共处理 {total} 天。')
+
+@click.command('check-content-stats')
+@click.option('--start', default=None, help='开始日期 YYYY-MM-DD，默认为最早的数据')
+@click.option('--end', default=None, help='结束日期 YYYY-MM-DD，默认为最新的数据')
+@click.option('--days', default=30, type=int, help='只检查最近N天(优先于 --start)，0 表示不限')
+@click.option('--fix', is_flag=True, help='重建不一致的日期')
+@with_appcontext
+def check_content_stats_command(start, end, days, fix):
+    """比对统计汇总表与原始数据重新计算的结果"""
+    from app.services import stats_service
+    start_day, end_day = _parse_days(start, end, days)
+    result = stats_service.check_stats(start_day, end_day)
+    if not result:
+        click.echo('统计汇总与原始数据一致。')
+        return
+    for day, mismatches in sorted(result.items()):
+        click.echo(f'[{day}] {len(mismatches)} 项不一致')
+        for line in mismatches[:20]:
+            click.echo(f'  {line}')
+    if fix:
+        for day in sorted(result):
+            stats_service.rebuild_stats(day, day)
+        click.echo(f'已重建 {len(result)} 天的统计汇总。')
+    else:
+        raise SystemExit(1)
+
 # 向Flask CLI添加自定义命令
 app.cli.add_command(init_db_command)
 app.cli.add_command(drop_db_command)
+app.cli.add_command(rebuild_search_index_command)
+app.cli.add_command(rebuild_tags_command)
+app.cli.add_command(rebuild_content_stats_command)
+app.cli.add_command(check_content_stats_command)
+app.cli.add_command(rebuild_term_vectors_command)
+app.cli.add_command(rebuild_simhash_command)
 
 if __name__ == '__main__':
     with app.app_context():
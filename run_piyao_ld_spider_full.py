@@ -9,47 +9,38 @@ import os
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from spider.piyao_ld_spider import run_spider
+from spider.piyao_ld_spider import PiyaoLdSpider, setup_logging
 
 def main():
     """主函数"""
     print("开始完整爬取辟谣网站 ld.htm 页面...")
     print("=" * 60)
     
-    # 爬取所有文章（不限制数量）
-    results = run_spider(max_articles=None)
+    # 爬取所有文章（不限制数量），默认只爬取新增或变化的文章，加 --full 全量重新爬取
+    # 上次运行中断时自动从断点继续，加 --restart 忽略断点
+    setup_logging()
+    spider = PiyaoLdSpider(incremental='--full' not in sys.argv)
+    stats = spider.crawl(max_articles=None, resume='--restart' not in sys.argv)
     
-    if results:
-        print(f"\n✅ 爬取成功！共爬取 {len(results)} 篇文章")
-        print("\n文章摘要:")
-        print("-" * 40)
-        for i, article in enumerate(results, 1):
-            title = article.get('title', '无标题')
-            url = article.get('url', '无URL')
-            content_length = len(article.get('content', ''))
-            print(f"{i:2d}. {title}")
-            print(f"    URL: {url}")
-            print(f"    内容长度: {content_length} 字符")
-            print()
-            
-        # 统计信息
-        total_content_length = sum(len(article.get('content', '')) for article in results)
-        avg_content_length = total_content_length // len(results) if results else 0
+    if stats is None:
+        print("❌ 爬取失败！请检查日志文件 piyao_ld_spider.log")
+    elif stats['written'] or stats['resumed']:
+        print(f"\n✅ 爬取成功！共爬取 {stats['written'] + stats['resumed']} 篇文章")
+        if stats['resumed']:
+            print(f"- 其中 {stats['resumed']} 篇在上次中断前已完成")
         
+        # 统计信息
         print("=" * 60)
         print("统计信息:")
-        print(f"- 总文章数: {len(results)}")
-        print(f"- 总内容长度: {total_content_length:,} 字符")
-        print(f"- 平均内容长度: {avg_content_length:,} 字符")
-        
+        print(f"- 跳过(未变化): {stats['skipped']} 篇")
+        print(f"- 失败: {stats['failed']} 篇")
     else:
-        print("❌ 爬取失败！请检查日志文件 piyao_ld_spider.log")
+        print(f"\n✅ 没有新增或变化的文章(跳过 {stats['skipped']} 篇，失败 {stats['failed']} 篇)")
     
     print("=" * 60)
     print("爬取完成！")
     print("结果文件:")
-    print("- piyao_ld_results.json (完整数据)")
-    print("- piyao_ld_summary.json (摘要数据)")
+    print("- piyao_ld_results.jsonl (完整数据，每行一篇文章，多次运行追加写入)")
     print("- piyao_ld_spider.log (日志文件)")
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+广告过滤基准测试: 逐段落逐关键词/逐模式查找 vs AdFilter 单次扫描
+
+原有路径即改造前 DataProcessor.filter_ads / DataCleanPipeline.filter_ads 的写法。
+语料默认使用仓库根目录下爬取的辟谣文章(piyao_results.json / piyao_ld_results.json)，
+另按比例在文章中插入广告段落，两种写法的输出必须完全一致。
+
+用法:
+    python scripts/benchmark_ad_filter.py --repeat 200
+    python scripts/benchmark_ad_filter.py --corpus data/articles.json --ad-ratio 0.2
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import random
+import argparse
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app.scraper import settings  # noqa: E402
+from app.scraper.ad_filter import AdFilter, ahocorasick  # noqa: E402
+
+AD_PARAGRAPHS = [
+    '限时优惠，点击购买立享八折',
+    '购买链接：https://shop.example.com/item/1',
+    '加入我们的微信群：truthguardian2024 获取更多资讯',
+    '联系方式：13800000000 欢迎咨询',
+    '更多详情请访问 www.example.cn',
+    '送礼：关注即送精美礼品一份',
+]
+
+
+def legacy_filter_ads(text, ad_keywords, ad_patterns):
+    """改造前的写法"""
+    paragraphs = re.split(r'\n+', text)
+    filtered_paragraphs = []
+
+    for para in paragraphs:
+        is_ad = False
+
+        for keyword in ad_keywords:
+            if keyword in para:
+                is_ad = True
+                break
+
+        if not is_ad:
+            for pattern in ad_patterns:
+                if re.search(pattern, para):
+                    is_ad = True
+                    break
+
+        if not is_ad:
+            filtered_paragraphs.append(para)
+
+    return '\n'.join(filtered_paragraphs)
+
+
+def load_corpus(paths, ad_ratio, seed):
+    rng = random.Random(seed)
+    texts = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                content = item.get('content') or ''
+                if not content:
+                    continue
+                paragraphs = content.split('\n')
+                for _ in range(int(len(paragraphs) * ad_ratio)):
+                    paragraphs.insert(rng.randint(0, len(paragraphs)), rng.choice(AD_PARAGRAPHS))
+                texts.append('\n'.join(paragraphs))
+    return texts
+
+
+def timed(fn, texts, repeat):
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        results = [fn(text) for text in texts]
+    return (time.perf_counter() - begin) * 1000, results
+
+
+def main():
+    default_corpus = [os.path.join(project_root, name) for name in ('piyao_results.json', 'piyao_ld_results.json')]
+
+    parser = argparse.ArgumentParser(description='广告过滤基准测试')
+    parser.add_argument('--corpus', nargs='+', default=default_corpus, help='JSON 文章列表文件(需包含 content 字段)')
+    parser.add_argument('--ad-ratio', type=float, default=0.1, help='插入的广告段落数占原段落数的比例')
+    parser.add_argument('--repeat', type=int, default=100, help='整个语料重复处理的次数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus, args.ad_ratio, args.seed)
+    paragraphs = sum(len(re.split(r'\n+', text)) for text in texts)
+    print(f"语料: {len(texts)} 篇文章, {paragraphs} 个段落, {sum(len(t) for t in texts)} 个字符")
+    print(f"Aho-Corasick: {'pyahocorasick' if ahocorasick else '未安装，关键词并入合并正则'}")
+
+    config = settings.TRUTH_GUARDIAN_SETTINGS['AD_FILTER']
+    keywords, patterns = config['KEYWORDS'], config['PATTERNS']
+    ad_filter = AdFilter(keywords, patterns, config_file='')
+
+    legacy_ms, legacy_results = timed(lambda text: legacy_filter_ads(text, keywords, patterns), texts, args.repeat)
+    engine_ms, engine_results = timed(ad_filter.filter, texts, args.repeat)
+    if legacy_results != engine_results:
+        print("错误: 两种写法的过滤结果不一致")
+        return 1
+
+    removed = paragraphs - sum(len(re.split(r'\n+', text)) for text in engine_results if text)
+    total = len(texts) * args.repeat
+    print(f"过滤掉 {removed} 个广告段落，两种写法结果一致")
+    print("\n" + "=" * 56)
+    print(f"{'写法':<16}{'总耗时(ms)':>14}{'每篇(us)':>12}{'加速':>10}")
+    print("-" * 56)
+    print(f"{'逐段落查找':<16}{legacy_ms:>14.1f}{legacy_ms * 1000 / total:>12.1f}{'1.0x':>10}")
+    print(f"{'AdFilter':<16}{engine_ms:>14.1f}{engine_ms * 1000 / total:>12.1f}{legacy_ms / engine_ms:>9.1f}x")
+    print("=" * 56)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
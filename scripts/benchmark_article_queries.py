@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+辟谣文章列表/详情接口 SQL 条数与耗时基准测试: 懒加载 vs 预加载
+
+懒加载路径即改造前的写法(循环内逐条访问 article.author / 报道集合)，
+预加载路径使用 app.services.article_query 中的 joinedload/selectinload 策略。
+另外通过测试客户端请求真实接口，读取响应头 X-Query-Count。
+
+用法:
+    python scripts/benchmark_article_queries.py --articles 2000 --repeat 20
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+
+def seed(db, article_count, author_count, reports_per_article):
+    """生成测试数据"""
+    from app.models.user import User
+    from app.models.debunk import DebunkArticle, RumorReport, ClarificationReport
+
+    db.drop_all()
+    db.create_all()
+
+    authors = [User(user_name=f'bench{i}', password_hash='x') for i in range(author_count)]
+    db.session.add_all(authors)
+    db.session.flush()
+
+    for i in range(article_count):
+        article = DebunkArticle(
+            title=f'基准测试文章{i}',
+            content='基准测试内容' * 20,
+            summary='摘要',
+            author_id=authors[i % author_count].id,
+            status='published',
+            tags='健康,科技'
+        )
+        for j in range(reports_per_article):
+            article.rumor_reports.append(RumorReport(title=f'谣言{i}-{j}', content='谣言内容'))
+            article.clarification_reports.append(ClarificationReport(title=f'澄清{i}-{j}', content='澄清内容'))
+        db.session.add(article)
+        if i % 500 == 499:
+            db.session.commit()
+    db.session.commit()
+
+
+def measure(fn, repeat):
+    """返回 (查询条数, 耗时中位数ms)"""
+    from app import db
+    from app.utils.query_counter import count_queries
+
+    costs = []
+    queries = 0
+    for _ in range(repeat):
+        db.session.expunge_all()  # 清空身份映射，避免命中会话缓存
+        with count_queries() as counter:
+            start = time.perf_counter()
+            fn()
+            costs.append((time.perf_counter() - start) * 1000)
+        queries = counter['count']
+    costs.sort()
+    return queries, costs[len(costs) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='辟谣文章列表/详情 SQL 条数基准测试')
+    parser.add_argument('--articles', type=int, default=2000, help='文章数量')
+    parser.add_argument('--authors', type=int, default=200, help='作者数量')
+    parser.add_argument('--reports', type=int, default=5, help='每篇文章关联的谣言/澄清报道数')
+    parser.add_argument('--repeat', type=int, default=20, help='每项重复次数(取中位数)')
+    parser.add_argument('--database-url', default='sqlite:////tmp/truth_guardian_query_bench.db',
+                        help='基准测试使用的数据库(会清空重建所有表)')
+    args = parser.parse_args()
+
+    # 测试配置读取 TEST_DATABASE_URL，必须在导入 app 之前设置
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    from app.models.debunk import DebunkArticle
+    from app.services import article_query
+
+    app = create_app('test')
+    with app.app_context():
+        seed(db, args.articles, args.authors, args.reports)
+        client = app.test_client()
+
+        print("\n" + "=" * 78)
+        print(f"{'场景':<16}{'懒加载SQL':>10}{'懒加载(ms)':>12}{'预加载SQL':>10}{'预加载(ms)':>12}{'接口SQL':>9}{'接口(ms)':>9}")
+        print("-" * 78)
+        for per_page in (10, 50, 100):
+            def lazy_list():
+                pagination = DebunkArticle.query.order_by(DebunkArticle.created_at.desc()) \
+                    .paginate(page=1, per_page=per_page)
+                return [article_query.serialize_list_item(article) for article in pagination.items]
+
+            def eager_list():
+                pagination = article_query.list_query(DebunkArticle.query.order_by(DebunkArticle.created_at.desc())) \
+                    .paginate(page=1, per_page=per_page)
+                return [article_query.serialize_list_item(article) for article in pagination.items]
+
+            def endpoint():
+                response = client.get(f'/api/debunk/articles?per_page={per_page}')
+                endpoint.queries = int(response.headers.get('X-Query-Count', 0))
+
+            lazy_queries, lazy_ms = measure(lazy_list, args.repeat)
+            eager_queries, eager_ms = measure(eager_list, args.repeat)
+            _, endpoint_ms = measure(endpoint, args.repeat)
+            print(f"{'列表 per_page=' + str(per_page):<16}{lazy_queries:>10}{lazy_ms:>12.1f}"
+                  f"{eager_queries:>10}{eager_ms:>12.1f}{endpoint.queries:>9}{endpoint_ms:>9.1f}")
+
+        def lazy_detail():
+            return article_query.serialize_detail(DebunkArticle.query.get(1))
+
+        def eager_detail():
+            return article_query.serialize_detail(article_query.get_article_detail(1))
+
+        def detail_endpoint():
+            response = client.get('/api/debunk/articles/1')
+            detail_endpoint.queries = int(response.headers.get('X-Query-Count', 0))
+
+        lazy_queries, lazy_ms = measure(lazy_detail, args.repeat)
+        eager_queries, eager_ms = measure(eager_detail, args.repeat)
+        _, endpoint_ms = measure(detail_endpoint, args.repeat)
+        print(f"{'详情':<16}{lazy_queries:>10}{lazy_ms:>12.1f}"
+              f"{eager_queries:>10}{eager_ms:>12.1f}{detail_endpoint.queries:>9}{endpoint_ms:>9.1f}")
+        print("=" * 78)
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
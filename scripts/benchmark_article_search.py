@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+辟谣文章搜索基准测试: 多列 ILIKE 全表扫描 vs 全文倒排索引(BM25)
+
+默认在独立的 sqlite 文件库中生成 10 万篇模拟文章，也可以通过 --database-url
+指向一个空的 MySQL 测试库。不要指向生产库，脚本会清空 debunk_article 表。
+
+用法:
+    python scripts/benchmark_article_search.py --count 100000 --repeat 5
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+# 测试词表: 常见谣言主题词 + 日常填充词
+TOPIC_WORDS = [
+    '疫苗', '新冠', '核污水', '食品安全', '转基因', '致癌', '地震', '台风', '养老金',
+    '高考', '微波炉', '隔夜菜', '味精', '碘盐', '5G基站', '手机辐射', '献血', '艾滋病',
+    '流感', '口罩', '酸性体质', '量子', '保健品', '减肥药', '塑料大米', '假鸡蛋',
+]
+FILLER_WORDS = [
+    '专家', '表示', '网传', '消息', '经过', '核实', '该说法', '没有', '科学', '依据',
+    '相关部门', '提醒', '广大', '网友', '不信谣', '不传谣', '近日', '有人', '声称',
+    '记者', '采访', '了解到', '实际上', '研究', '结果', '显示', '官方', '通报', '情况',
+]
+
+
+def make_text(rng, length):
+    words = []
+    for _ in range(length):
+        words.append(rng.choice(TOPIC_WORDS) if rng.random() < 0.08 else rng.choice(FILLER_WORDS))
+    return '，'.join(''.join(words[i:i + 6]) for i in range(0, len(words), 6)) + '。'
+
+
+def generate_articles(db, count, batch_size, seed):
+    """使用 Core 批量插入模拟数据(绕过 ORM 事件，索引稍后统一重建)"""
+    from app.models.debunk import DebunkArticle
+
+    rng = random.Random(seed)
+    table = DebunkArticle.__table__
+    db.session.execute(table.delete())
+    db.session.commit()
+
+    base_time = datetime.now()
+    for start in range(0, count, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, count)):
+            rows.append({
+                'title': make_text(rng, 6)[:100],
+                'content': make_text(rng, rng.randint(40, 120)),
+                'summary': make_text(rng, 12)[:200],
+                'source': '基准测试',
+                'author_id': 1,
+                'status': rng.choice(['draft', 'published']),
+                'created_at': base_time - timedelta(minutes=i),
+                'tags': ','.join(rng.sample(TOPIC_WORDS, 2)),
+            })
+        db.session.execute(table.insert(), rows)
+        db.session.commit()
+        print(f"已生成 {min(start + batch_size, count)}/{count} 篇文章")
+
+
+def ilike_query(keyword):
+    """与改造前 get_articles 相同的查询"""
+    from app.models.debunk import DebunkArticle
+
+    pattern = f"%{keyword}%"
+    return DebunkArticle.query.filter(
+        (DebunkArticle.title.ilike(pattern)) |
+        (DebunkArticle.content.ilike(pattern)) |
+        (DebunkArticle.summary.ilike(pattern)) |
+        (DebunkArticle.tags.ilike(pattern))
+    ).order_by(DebunkArticle.created_at.desc())
+
+
+def index_query(keyword):
+    from app.models.debunk import DebunkArticle
+    from app.services import search_service
+
+    return search_service.apply_search('debunk_article', DebunkArticle.query, keyword)
+
+
+def timed_paginate(build_query, keyword, repeat, per_page):
+    """模拟列表接口: 构建查询 + 分页(含 total 统计)"""
+    costs = []
+    total = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pagination = build_query(keyword).paginate(page=1, per_page=per_page, error_out=False)
+        total = pagination.total
+        costs.append((time.perf_counter() - start) * 1000)
+    costs.sort()
+    return costs[len(costs) // 2], total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='辟谣文章搜索基准测试')
+    parser.add_argument('--count', type=int, default=100000, help='生成的文章数量')
+    parser.add_argument('--repeat', type=int, default=5, help='每个查询重复次数(取中位数)')
+    parser.add_argument('--per-page', type=int, default=10, help='每页条数')
+    parser.add_argument('--batch-size', type=int, default=2000, help='生成数据和重建索引的批大小')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--database-url', default='sqlite:////tmp/truth_guardian_search_bench.db',
+                        help='基准测试使用的数据库')
+    parser.add_argument('--skip-generate', action='store_true', help='复用已有数据，不重新生成')
+    args = parser.parse_args()
+
+    # 测试配置读取 TEST_DATABASE_URL，必须在导入 app 之前设置
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    from app.services import search_service
+
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+
+        if not args.skip_generate:
+            start = time.perf_counter()
+            generate_articles(db, args.count, args.batch_size, args.seed)
+            print(f"生成数据耗时: {time.perf_counter() - start:.1f}s")
+
+            start = time.perf_counter()
+            total = search_service.rebuild_index('debunk_article', batch_size=args.batch_size)
+            print(f"重建索引耗时: {time.perf_counter() - start:.1f}s，共 {total} 篇")
+
+        keywords = ['疫苗', '核污水', '手机辐射', '塑料大米', '专家表示', '不存在的词']
+
+        print("\n" + "=" * 72)
+        print(f"{'关键词':<12}{'ILIKE(ms)':>12}{'命中':>10}{'索引(ms)':>12}{'命中':>10}{'加速比':>10}")
+        print("-" * 72)
+        for keyword in keywords:
+            ilike_ms, ilike_total = timed_paginate(ilike_query, keyword, args.repeat, args.per_page)
+            index_ms, index_total = timed_paginate(index_query, keyword, args.repeat, args.per_page)
+            speedup = ilike_ms / index_ms if index_ms else float('inf')
+            print(f"{keyword:<12}{ilike_ms:>12.1f}{ilike_total:>10}{index_ms:>12.1f}{index_total:>10}{speedup:>9.1f}x")
+        print("=" * 72)
+        print("注: 倒排索引按词匹配，ILIKE 按子串匹配，两者命中数可能略有差异")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+头条爬虫浏览器池基准测试: 每个页面新建浏览器 vs 浏览器池
+
+模拟 read_more_page 的详情页抓取: 多个线程各自加载一批页面，分别用两种方式获取浏览器:
+- 改造前: 每个页面新建一个浏览器，加载完关闭
+- 改造后: 从浏览器池借用常驻的浏览器(可选屏蔽图片和字体)
+
+默认使用替身浏览器(按 --startup / --page 睡眠)，不需要安装 Chrome；
+加 --chrome 时用真实的无头 Chrome 加载 --url 指定的页面，同时对比是否屏蔽图片和字体。
+
+用法:
+    python scripts/benchmark_browser_pool.py --pages 40 --threads 4
+    python scripts/benchmark_browser_pool.py --chrome --url https://www.toutiao.com --pages 10
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+import concurrent.futures
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from spider.toutiao_search.browser_pool import BrowserPool, create_chrome_driver
+
+
+class SleepDriver:
+    """替身浏览器: 启动和加载页面按给定耗时睡眠"""
+
+    def __init__(self, startup, page, rng):
+        self.page = page
+        self.rng = rng
+        time.sleep(startup * rng.uniform(0.8, 1.2))
+
+    def get(self, url):
+        time.sleep(self.page * self.rng.uniform(0.5, 1.5))
+
+    def quit(self):
+        pass
+
+
+def run_scenario(pool, urls, threads):
+    """用 threads 个线程通过 pool 加载所有页面，返回总耗时"""
+    def load(url):
+        with pool.lease() as driver:
+            driver.get(url)
+
+    begin = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(load, urls))
+    return time.perf_counter() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser(description='头条爬虫浏览器池基准测试')
+    parser.add_argument('--pages', type=int, default=40, help='加载的页面数')
+    parser.add_argument('--threads', type=int, default=4, help='并发线程数(也是浏览器池大小)')
+    parser.add_argument('--max-pages', type=int, default=50, help='每个浏览器加载多少页面后重建')
+    parser.add_argument('--startup', type=float, default=1.5, help='替身浏览器启动耗时(秒)')
+    parser.add_argument('--page', type=float, default=0.3, help='替身浏览器加载页面耗时(秒)')
+    parser.add_argument('--chrome', action='store_true', help='使用真实的无头 Chrome')
+    parser.add_argument('--url', default='https://www.toutiao.com', help='--chrome 时加载的页面')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    urls = [args.url] * args.pages
+    if args.chrome:
+        scenarios = [
+            ('改造前(每页新建浏览器)', lambda: create_chrome_driver(block_resources=False), 0),
+            ('浏览器池', lambda: create_chrome_driver(block_resources=False), args.max_pages),
+            ('浏览器池+屏蔽图片字体', lambda: create_chrome_driver(block_resources=True), args.max_pages),
+        ]
+    else:
+        factory = lambda: SleepDriver(args.startup, args.page, rng)
+        scenarios = [
+            ('改造前(每页新建浏览器)', factory, 0),
+            ('浏览器池', factory, args.max_pages),
+        ]
+
+    rows = []
+    for name, factory, max_pages in scenarios:
+        # 每页新建浏览器等价于每个浏览器只加载 1 个页面
+        pool = BrowserPool(size=args.threads, max_pages=max_pages or 1, driver_factory=factory)
+        elapsed = run_scenario(pool, urls, args.threads)
+        pool.close()
+        rows.append((name, elapsed, pool.get_metrics()))
+
+    print("\n" + "=" * 92)
+    print(f"页面数: {args.pages}，线程数/浏览器池大小: {args.threads}，"
+          f"{'真实 Chrome: ' + args.url if args.chrome else '替身浏览器'}")
+    print("-" * 92)
+    print(f"{'方式':<22}{'总耗时(s)':>10}{'页面/秒':>9}{'启动次数':>9}{'节省启动':>9}"
+          f"{'页面p50(s)':>11}{'页面p95(s)':>11}{'单页总耗时(s)':>14}")
+    print("-" * 92)
+    for name, elapsed, metrics in rows:
+        latency = metrics['page_latency']
+        print(f"{name:<22}{elapsed:>10.2f}{args.pages / elapsed:>9.2f}{metrics['startups']:>9}"
+              f"{metrics['startups_avoided']:>9}{latency['p50']:>11.2f}{latency['p95']:>11.2f}"
+              f"{elapsed * args.threads / args.pages:>14.2f}")
+    print("=" * 92)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
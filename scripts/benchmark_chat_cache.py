@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+聊天回复缓存基准测试
+
+回放一组带重复的谣言提问(热门谣言按 Zipf 分布反复出现，每次随机选一种措辞)，
+未命中时按 --upstream 毫秒模拟供应商调用，统计:
+- 精确缓存 / 精确+语义缓存的命中率和省下的上游调用
+- 命中时的查找耗时 p50/p99(字符二元组 SimHash + Redis 读取)
+
+默认使用 fakeredis，--redis-url 指定真实 Redis 时包含网络往返。
+
+用法:
+    python scripts/benchmark_chat_cache.py --requests 2000
+    python scripts/benchmark_chat_cache.py --redis-url redis://localhost:6379/15
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app.services.chat.cache import ChatCache
+from app.utils.response_cache import create_redis_client
+
+# 每个谣言的几种问法
+RUMORS = [
+    ['5G基站辐射致癌吗', '5G基站的辐射会致癌吗？', '5G 基站辐射致癌吗?'],
+    ['喝板蓝根能预防新冠吗', '喝板蓝根可以预防新冠吗', '板蓝根能预防新冠吗？'],
+    ['吃香蕉会致癌吗', '香蕉致癌是真的吗', '吃香蕉会不会致癌'],
+    ['微波炉加热食物会致癌吗', '用微波炉加热的食物会致癌吗？', '微波炉加热食物致癌吗'],
+    ['隔夜菜不能吃吗', '隔夜菜到底能不能吃', '隔夜的菜不能吃吗？'],
+    ['手机充电时打电话会爆炸吗', '边充电边打电话手机会爆炸吗', '手机充电时打电话会不会爆炸'],
+    ['自来水里的氯会致癌吗', '自来水中的氯会致癌吗？', '自来水含氯会致癌吗'],
+    ['味精吃多了会变傻吗', '吃味精会变傻吗', '味精吃多了会不会变傻'],
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def run(cache, questions, upstream):
+    hits = {'exact': [], 'semantic': []}
+    misses = 0
+    for question in questions:
+        messages = [{'role': 'user', 'content': question}]
+        begin = time.perf_counter()
+        lookup = cache.prepare('coze', 'coze-rumor-crusher', messages, {})
+        result = cache.get(lookup)
+        if result is not None:
+            hits[result['cache']['type']].append((time.perf_counter() - begin) * 1000)
+            continue
+        misses += 1
+        time.sleep(upstream / 1000)
+        cache.put(lookup, {
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': f'关于「{question}」的辟谣结论'},
+                         'finish_reason': 'stop'}],
+            'usage': {'total_tokens': 800},
+            'server_latency_ms': upstream,
+        })
+    return hits, misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='聊天回复缓存基准测试')
+    parser.add_argument('--requests', type=int, default=2000, help='回放的提问数')
+    parser.add_argument('--long-tail', type=int, default=400, help='只出现一次的长尾提问数')
+    parser.add_argument('--upstream', type=int, default=5, help='未命中时模拟的供应商耗时(毫秒)，不计入命中耗时')
+    parser.add_argument('--redis-url', default='fakeredis://', help='Redis 地址')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) for rank in range(len(RUMORS))]
+    questions = [rng.choice(rng.choices(RUMORS, weights)[0]) for _ in range(args.requests - args.long_tail)]
+    questions += [f'第{index}号长尾谣言的说法是真的吗' for index in range(args.long_tail)]
+    rng.shuffle(questions)
+
+    rows = []
+    for name, semantic in [('精确缓存', False), ('精确+语义缓存', True)]:
+        client = create_redis_client(args.redis_url)
+        if not args.redis_url.startswith('fakeredis://'):
+            client.flushdb()
+        cache = ChatCache(client, semantic=semantic, token_price={'coze': 0.02})
+        hits, misses = run(cache, questions, args.upstream)
+        stats = cache.get_stats()['total']
+        rows.append((name, stats, hits, misses))
+
+    print("\n" + "=" * 96)
+    print(f"提问数: {len(questions)}(热门谣言 {len(RUMORS)} 个 x 3 种问法，长尾 {args.long_tail} 个)，Redis: {args.redis_url}")
+    print("-" * 96)
+    print(f"{'方式':<16}{'命中率':>8}{'精确命中':>9}{'语义命中':>9}{'上游调用':>9}{'省下token':>11}"
+          f"{'精确p50(ms)':>12}{'精确p99(ms)':>12}{'语义p50(ms)':>12}")
+    print("-" * 96)
+    for name, stats, hits, misses in rows:
+        print(f"{name:<16}{stats['hit_ratio']:>8.1%}{stats['hit_exact']:>9}{stats['hit_semantic']:>9}{misses:>9}"
+              f"{stats['saved_tokens']:>11}{percentile(hits['exact'], 0.5):>12.2f}"
+              f"{percentile(hits['exact'], 0.99):>12.2f}{percentile(hits['semantic'], 0.5):>12.2f}")
+    print("=" * 96)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+聊天网关突发负载测试
+
+本地启动一个模拟供应商(每次调用耗时 --upstream 毫秒，同时处理超过 --capacity 个请求后每多一个并发请求都会变慢，
+模拟供应商过载)，用 --clients 个并发客户端在一瞬间发出 --requests 个提问(热门谣言按 Zipf 分布重复出现)，
+分别在不经过网关和经过网关(限流 + 合并相同请求)时统计:
+- 上游调用次数和省下的调用
+- 成功请求的延迟 p50/p99，以及被拒绝(429)的请求数
+
+用法:
+    python scripts/benchmark_chat_gateway.py --requests 400 --clients 100
+    python scripts/benchmark_chat_gateway.py --max-concurrency 16 --max-queue 64
+"""
+
+import sys
+import os
+import time
+import random
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app.services.chat.cache import request_digest
+from app.services.chat.gateway import ChatGateway, GatewayRejected
+from app.services.chat.transport import ProviderTransport
+
+RUMORS = ['5G基站辐射致癌吗', '喝板蓝根能预防新冠吗', '吃香蕉会致癌吗', '微波炉加热食物会致癌吗',
+          '隔夜菜不能吃吗', '手机充电时打电话会爆炸吗', '自来水里的氯会致癌吗', '味精吃多了会变傻吗']
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        with server.lock:
+            server.calls += 1
+            server.active += 1
+            overload = max(0, server.active - server.capacity)
+        time.sleep(server.upstream * (1 + overload * 0.1))
+        with server.lock:
+            server.active -= 1
+        payload = b'{"choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}}]}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def run(url, questions, clients, gateway):
+    transport = ProviderTransport(url, pool_size=clients, trust_env=False)
+    latencies, rejected = [], 0
+    lock = threading.Lock()
+
+    def ask(question):
+        nonlocal rejected
+        messages = [{'role': 'user', 'content': question}]
+
+        def call():
+            return transport.post(url, json={'model': 'mock', 'messages': messages}).json()
+
+        begin = time.perf_counter()
+        try:
+            if gateway is None:
+                call()
+            else:
+                gateway.complete('mock', request_digest('mock', 'mock', messages, {}), call)
+        except GatewayRejected:
+            with lock:
+                rejected += 1
+            return
+        with lock:
+            latencies.append((time.perf_counter() - begin) * 1000)
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(ask, questions))
+    elapsed = time.perf_counter() - begin
+    transport.session.close()
+    return latencies, rejected, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='聊天网关突发负载测试')
+    parser.add_argument('--requests', type=int, default=400, help='突发的提问数')
+    parser.add_argument('--clients', type=int, default=100, help='并发客户端数')
+    parser.add_argument('--unique', type=float, default=0.3, help='只出现一次的长尾提问占比')
+    parser.add_argument('--upstream', type=int, default=200, help='模拟的供应商耗时(毫秒)')
+    parser.add_argument('--capacity', type=int, default=8, help='模拟供应商不变慢的最大并发数')
+    parser.add_argument('--max-concurrency', type=int, default=8, help='网关每个供应商的最大并发数')
+    parser.add_argument('--max-queue', type=int, default=64, help='网关等待队列长度')
+    parser.add_argument('--queue-timeout', type=float, default=10, help='网关排队超时(秒)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    # 拒绝请求时每次都会记录警告，压测时不输出
+    logging.getLogger('app.services.chat.gateway').setLevel(logging.ERROR)
+
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) for rank in range(len(RUMORS))]
+    unique = int(args.requests * args.unique)
+    questions = rng.choices(RUMORS, weights, k=args.requests - unique)
+    questions += [f'第{index}号长尾谣言的说法是真的吗' for index in range(unique)]
+    rng.shuffle(questions)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockProviderHandler)
+    server.daemon_threads = True
+    server.request_queue_size = args.clients * 2
+    server.lock = threading.Lock()
+    server.upstream = args.upstream / 1000
+    server.capacity = args.capacity
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/v1/chat/completions'
+
+    rows = []
+    for name, gateway in [
+        ('直连供应商', None),
+        ('网关(仅限流)', ChatGateway(args.max_concurrency, max_queue=args.max_queue,
+                                 queue_timeout=args.queue_timeout, coalesce=False)),
+        ('网关(限流+合并)', ChatGateway(args.max_concurrency, max_queue=args.max_queue,
+                                  queue_timeout=args.queue_timeout)),
+    ]:
+        server.calls = server.active = 0
+        latencies, rejected, elapsed = run(url, questions, args.clients, gateway)
+        rows.append((name, server.calls, latencies, rejected, elapsed))
+
+    server.shutdown()
+    server.server_close()
+
+    print("\n" + "=" * 92)
+    print(f"突发提问: {len(questions)}(长尾 {unique} 个)，并发客户端: {args.clients}，"
+          f"供应商耗时: {args.upstream}ms(超过 {args.capacity} 并发后变慢)")
+    print(f"网关: 每供应商并发 {args.max_concurrency}，队列 {args.max_queue}，排队超时 {args.queue_timeout}s")
+    print("-" * 92)
+    print(f"{'方式':<16}{'上游调用':>9}{'省下调用':>9}{'成功':>7}{'429':>6}"
+          f"{'p50(ms)':>10}{'p99(ms)':>10}{'最大(ms)':>10}{'总耗时(s)':>11}")
+    print("-" * 92)
+    for name, calls, latencies, rejected, elapsed in rows:
+        print(f"{name:<16}{calls:>9}{len(questions) - calls - rejected:>9}{len(latencies):>7}{rejected:>6}"
+              f"{percentile(latencies, 0.5):>10.0f}{percentile(latencies, 0.99):>10.0f}"
+              f"{max(latencies, default=0):>10.0f}{elapsed:>11.2f}")
+    print("=" * 92)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
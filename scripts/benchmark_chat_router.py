@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+聊天供应商路由基准测试
+
+本地启动两个模拟供应商:
+- primary: 通常 --fast 毫秒返回，但有 --tail-ratio 的请求要 --tail 毫秒(长尾)，另有 --error-ratio 的请求返回 503
+- backup: 稳定 --backup 毫秒返回
+
+用 --clients 个并发客户端发出 --requests 个请求，分别统计:
+- 固定使用 primary(失败直接返回错误)
+- 路由(按耗时和错误率选择，失败切换)
+- 路由 + 对冲(primary 超过其 p95 耗时未返回时同时请求 backup)
+的成功率、延迟 p50/p99 和上游调用次数
+
+用法:
+    python scripts/benchmark_chat_router.py --requests 300
+    python scripts/benchmark_chat_router.py --tail-ratio 0.1 --error-ratio 0.05
+"""
+
+import sys
+import os
+import time
+import random
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app.services.chat.router import ProviderRouter
+from app.services.chat.transport import ProviderTransport
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        with server.lock:
+            server.calls += 1
+            roll = server.rng.random()
+        status = 200
+        if roll < server.error_ratio:
+            status = 503
+            delay = server.fast
+        elif roll < server.error_ratio + server.tail_ratio:
+            delay = server.tail
+        else:
+            delay = server.fast
+        time.sleep(delay)
+        payload = b'{"choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}}]}'
+        if status != 200:
+            payload = b'{"error": {"message": "overloaded", "type": "server_error"}}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_provider(fast, tail=0.0, tail_ratio=0.0, error_ratio=0.0, seed=0):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockProviderHandler)
+    server.daemon_threads = True
+    server.request_queue_size = 256
+    server.lock = threading.Lock()
+    server.rng = random.Random(seed)
+    server.calls = 0
+    server.fast, server.tail = fast / 1000, tail / 1000
+    server.tail_ratio, server.error_ratio = tail_ratio, error_ratio
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def run(servers, router, requests, clients):
+    transports = {name: ProviderTransport(f'http://127.0.0.1:{server.server_address[1]}', pool_size=clients * 2,
+                                          trust_env=False) for name, server in servers.items()}
+    routes = [('primary', 'mock'), ('backup', 'mock')]
+    latencies, failed = [], 0
+    lock = threading.Lock()
+
+    def call(provider, model):
+        response = transports[provider].post(f'{transports[provider].base_url}/v1/chat/completions',
+                                             json={'model': model, 'messages': []})
+        if response.status_code != 200:
+            return {'error': response.json()['error'], 'status_code': response.status_code}
+        return response.json()
+
+    def ask(_):
+        nonlocal failed
+        begin = time.perf_counter()
+        result = router.complete(routes, call) if router is not None else call(*routes[0])
+        with lock:
+            if 'error' in result:
+                failed += 1
+            else:
+                latencies.append((time.perf_counter() - begin) * 1000)
+
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(ask, range(requests)))
+    # 等待对冲中落后的请求结束，计入上游调用
+    time.sleep(max(server.tail for server in servers.values()))
+    for transport in transports.values():
+        transport.session.close()
+    return latencies, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='聊天供应商路由基准测试')
+    parser.add_argument('--requests', type=int, default=300, help='请求数')
+    parser.add_argument('--clients', type=int, default=10, help='并发客户端数')
+    parser.add_argument('--fast', type=int, default=100, help='primary 通常的耗时(毫秒)')
+    parser.add_argument('--tail', type=int, default=2000, help='primary 长尾请求的耗时(毫秒)')
+    parser.add_argument('--tail-ratio', type=float, default=0.05, help='primary 长尾请求占比')
+    parser.add_argument('--error-ratio', type=float, default=0.03, help='primary 返回 503 的占比')
+    parser.add_argument('--backup', type=int, default=250, help='backup 的耗时(毫秒)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    # 切换和对冲时每次都会记录日志，压测时不输出
+    logging.getLogger('app.services.chat.router').setLevel(logging.ERROR)
+
+    rows = []
+    for name, router in [
+        ('固定 primary', None),
+        ('路由(失败切换)', ProviderRouter([('primary', 'mock'), ('backup', 'mock')], eject_failures=1000)),
+        ('路由+对冲', ProviderRouter([('primary', 'mock'), ('backup', 'mock')], eject_failures=1000, hedge=True,
+                                 hedge_delay=args.fast * 2 / 1000)),
+    ]:
+        servers = {
+            'primary': start_provider(args.fast, args.tail, args.tail_ratio, args.error_ratio, args.seed),
+            'backup': start_provider(args.backup, seed=args.seed),
+        }
+        latencies, failed = run(servers, router, args.requests, args.clients)
+        calls = sum(server.calls for server in servers.values())
+        for server in servers.values():
+            server.shutdown()
+            server.server_close()
+        rows.append((name, latencies, failed, calls))
+
+    print("\n" + "=" * 84)
+    print(f"请求数: {args.requests}，并发客户端: {args.clients}")
+    print(f"primary: {args.fast}ms，{args.tail_ratio:.0%} 长尾 {args.tail}ms，{args.error_ratio:.0%} 返回 503；"
+          f"backup: {args.backup}ms")
+    print("-" * 84)
+    print(f"{'方式':<16}{'成功率':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'最大(ms)':>10}{'上游调用':>10}")
+    print("-" * 84)
+    for name, latencies, failed, calls in rows:
+        print(f"{name:<16}{len(latencies) / args.requests:>8.1%}{percentile(latencies, 0.5):>10.0f}"
+              f"{percentile(latencies, 0.95):>10.0f}{percentile(latencies, 0.99):>10.0f}"
+              f"{max(latencies, default=0):>10.0f}{calls:>10}")
+    print("=" * 84)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+聊天流式输出基准测试: 完整响应 vs SSE 流式的首字时间
+
+启动本地的 OpenAI 兼容模拟服务，按 --first-token 延迟输出第一个 token，之后每隔 --token-delay 输出一个，
+通过 /api/chat/completions 分别测量:
+- 改造前: 非流式请求，客户端等到完整响应才能显示内容
+- 改造后: stream=true，客户端收到第一个内容数据块的时间(首字时间)以及完整输出的时间
+
+用法:
+    python scripts/benchmark_chat_streaming.py --requests 20 --tokens 200
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """按给定节奏生成 token 的 OpenAI 兼容接口，支持 stream 和非 stream"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        config = self.server.config
+        tokens = [f"字{i}" for i in range(config['tokens'])]
+
+        if not body.get('stream'):
+            time.sleep(config['first_token'] + config['token_delay'] * (len(tokens) - 1))
+            payload = json.dumps({
+                'id': 'chatcmpl-mock', 'object': 'chat.completion', 'model': body['model'],
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                             'finish_reason': 'stop'}],
+            }, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        time.sleep(config['first_token'])
+        for index, token in enumerate(tokens):
+            if index:
+                time.sleep(config['token_delay'])
+            event = {'id': 'chatcmpl-mock', 'object': 'chat.completion.chunk', 'model': body['model'],
+                     'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]}
+            self.write_chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n")
+        self.write_chunk('data: [DONE]\n\n')
+        self.write_chunk('')
+
+    def write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='聊天流式输出首字时间基准测试')
+    parser.add_argument('--requests', type=int, default=20, help='每种方式的请求数')
+    parser.add_argument('--tokens', type=int, default=200, help='每个回答的 token 数')
+    parser.add_argument('--first-token', type=float, default=0.3, help='模拟服务输出第一个 token 前的耗时(秒)')
+    parser.add_argument('--token-delay', type=float, default=0.02, help='模拟服务相邻 token 的间隔(秒)')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockOpenAIHandler)
+    server.daemon_threads = True
+    server.config = {'tokens': args.tokens, 'first_token': args.first_token, 'token_delay': args.token_delay}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    app = create_app('test')
+    app.config.update(OPENAI_API_BASE=f'http://127.0.0.1:{server.server_address[1]}/v1',
+                      OPENAI_API_KEY='sk-mock', OPENAI_API_PROXY=None)
+    with app.app_context():
+        db.create_all()
+        user = User(user_name='benchmark', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        headers = {'Authorization': 'Bearer ' + create_access_token(identity=user)}
+        client = app.test_client()
+        body = {'provider': 'openai', 'model': 'gpt-3.5-turbo',
+                'messages': [{'role': 'user', 'content': '这条消息是真的吗？'}]}
+
+        full_latency = []
+        for _ in range(args.requests):
+            begin = time.perf_counter()
+            response = client.post('/api/chat/completions', headers=headers, json=body)
+            response.get_json()
+            full_latency.append(time.perf_counter() - begin)
+
+        first_token, stream_total = [], []
+        for _ in range(args.requests):
+            begin = time.perf_counter()
+            response = client.post('/api/chat/completions', headers=headers, buffered=False,
+                                   json=dict(body, stream=True))
+            first = None
+            for data in response.response:
+                if first is None and b'"content"' in data:
+                    first = time.perf_counter() - begin
+            response.close()
+            first_token.append(first)
+            stream_total.append(time.perf_counter() - begin)
+
+    server.shutdown()
+
+    print("\n" + "=" * 72)
+    print(f"请求数: {args.requests}，每个回答 {args.tokens} 个 token，"
+          f"首个 token {args.first_token * 1000:.0f}ms，之后每 {args.token_delay * 1000:.0f}ms 一个")
+    print("-" * 72)
+    print(f"{'指标':<28}{'p50(ms)':>12}{'p95(ms)':>12}{'均值(ms)':>12}")
+    print("-" * 72)
+    for name, values in [('改造前: 完整响应', full_latency), ('流式: 首字时间', first_token),
+                         ('流式: 完整输出', stream_total)]:
+        values = [value * 1000 for value in values]
+        print(f"{name:<28}{percentile(values, 0.5):>12.1f}{percentile(values, 0.95):>12.1f}"
+              f"{statistics.mean(values):>12.1f}")
+    print("=" * 72)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+聊天供应商 HTTP 传输基准测试: 每次请求新建连接 vs 供应商连接池
+
+启动一个本地的 OpenAI 兼容模拟服务(/v1/chat/completions 立即返回固定结果，可用 --delay 模拟生成耗时)，
+分别用两种方式发送相同的聊天请求，统计客户端看到的额外开销(总耗时减去服务端处理耗时)的 p50/p99:
+- 改造前: 模块级 requests.post，每次请求建立新的 TCP(加 --tls 时还有 TLS)连接
+- 改造后: app.services.chat.transport 的共享连接池
+
+加 --tls 时用 openssl 生成自签名证书，模拟真实供应商的 HTTPS 握手。
+
+用法:
+    python scripts/benchmark_chat_transport.py --requests 500
+    python scripts/benchmark_chat_transport.py --tls --requests 500 --threads 8
+"""
+
+import sys
+import os
+import ssl
+import json
+import time
+import tempfile
+import argparse
+import threading
+import subprocess
+import statistics
+import concurrent.futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+import urllib3
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app.services.chat.transport import ProviderTransport
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """OpenAI 兼容的 chat/completions 模拟接口"""
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写出，不关闭 Nagle 时长连接上每个请求会多等一个延迟确认(约 40ms)
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        payload = json.dumps({
+            'id': 'chatcmpl-mock',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': '经核实，该消息不实。'},
+                         'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 10, 'completion_tokens': 8, 'total_tokens': 18},
+        }, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(delay, tls):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockOpenAIHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.connections = 0
+    server.lock = threading.Lock()
+    scheme = 'http'
+    if tls:
+        workdir = tempfile.mkdtemp()
+        cert, key = os.path.join(workdir, 'cert.pem'), os.path.join(workdir, 'key.pem')
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                        '-subj', '/CN=127.0.0.1', '-keyout', key, '-out', cert],
+                       check=True, capture_output=True)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = 'https'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def run_scenario(post, url, count, threads):
+    """并发发送 count 个请求，返回每个请求的耗时(秒)和总耗时"""
+    data = {'model': 'gpt-3.5-turbo', 'messages': [{'role': 'user', 'content': '这条消息是真的吗？'}]}
+    headers = {'Authorization': 'Bearer sk-mock', 'Content-Type': 'application/json'}
+
+    def call(_):
+        begin = time.perf_counter()
+        response = post(url, headers=headers, json=data)
+        response.json()
+        return time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(call, range(count)))
+    return latencies, time.perf_counter() - begin
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='聊天供应商 HTTP 传输基准测试')
+    parser.add_argument('--requests', type=int, default=500, help='每种方式发送的请求数')
+    parser.add_argument('--threads', type=int, default=4, help='并发线程数')
+    parser.add_argument('--delay', type=float, default=0.0, help='模拟服务端生成耗时(秒)')
+    parser.add_argument('--tls', action='store_true', help='模拟服务使用 HTTPS(自签名证书)')
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.delay, args.tls)
+    url = f"{base_url}/chat/completions"
+    transport = ProviderTransport(base_url, trust_env=False, verify=False, pool_size=args.threads)
+
+    def old_post(url, **kwargs):
+        return requests.post(url, timeout=120, verify=False, proxies={'http': None, 'https': None}, **kwargs)
+
+    scenarios = [
+        ('改造前(每次新建连接)', old_post),
+        ('供应商连接池', transport.post),
+    ]
+
+    rows = []
+    for name, post in scenarios:
+        # 预热，排除首次导入和证书加载的耗时
+        run_scenario(post, url, args.threads, args.threads)
+        server.connections = 0
+        latencies, elapsed = run_scenario(post, url, args.requests, args.threads)
+        overhead = [(latency - args.delay) * 1000 for latency in latencies]
+        rows.append((name, elapsed, server.connections, overhead))
+
+    transport.close()
+    server.shutdown()
+
+    print("\n" + "=" * 84)
+    print(f"请求数: {args.requests}，线程数: {args.threads}，协议: {'HTTPS' if args.tls else 'HTTP'}，"
+          f"模拟生成耗时: {args.delay * 1000:.0f}ms")
+    print("-" * 84)
+    print(f"{'方式':<22}{'总耗时(s)':>10}{'请求/秒':>9}{'新建连接':>9}"
+          f"{'开销p50(ms)':>12}{'开销p99(ms)':>12}{'开销均值(ms)':>12}")
+    print("-" * 84)
+    for name, elapsed, connections, overhead in rows:
+        print(f"{name:<22}{elapsed:>10.2f}{args.requests / elapsed:>9.0f}{connections:>9}"
+              f"{percentile(overhead, 0.5):>12.2f}{percentile(overhead, 0.99):>12.2f}"
+              f"{statistics.mean(overhead):>12.2f}")
+    print("=" * 84)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
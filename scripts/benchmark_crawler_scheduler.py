@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+爬虫任务调度基准测试: 每个爬虫一个进程 vs 优先级队列 + 工作进程池
+
+用睡眠模拟抓取的替身爬虫生成一批任务(爬虫任务量不均匀，耗时随机，部分为高优先级)，分别用两种配置执行:
+- 改造前: 每个爬虫一个进程，同一爬虫的任务依次执行，忽略优先级
+  (等价于工作进程数 = 爬虫数、每个爬虫并发 1、所有任务优先级相同)
+- 改造后: 固定数量的工作进程，按优先级派发，每个爬虫有并发上限
+
+统计总耗时、工作进程利用率(繁忙时间 / (进程数 × 运行时间))，以及按优先级分组的排队等待时间。
+任务状态写入 crawl_task 表(与线上相同)。
+
+用法:
+    python scripts/benchmark_crawler_scheduler.py --tasks 200 --workers 8
+"""
+
+import sys
+import os
+import time
+import random
+import logging
+import argparse
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+# 各爬虫的任务量权重，模拟微博任务远多于其他爬虫
+SPIDER_WEIGHTS = {'weibo': 6, 'xinlang': 2, 'news': 1, 'gov': 1}
+
+
+class SleepSpider:
+    """替身爬虫: 关键词形如 'task-<序号>:<耗时>'，按耗时睡眠"""
+
+    def run_many(self, keywords, max_pages=5, config=None, start_page=1):
+        time.sleep(float(keywords[0].rsplit(':', 1)[1]))
+        return {'items': max_pages - start_page + 1}
+
+
+def generate_tasks(count, seed, high_ratio):
+    rng = random.Random(seed)
+    names = list(SPIDER_WEIGHTS)
+    weights = list(SPIDER_WEIGHTS.values())
+    return [(rng.choices(names, weights)[0], f'task-{i}:{rng.uniform(0.05, 0.3):.3f}',
+             9 if rng.random() < high_ratio else 0) for i in range(count)]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬虫任务调度基准测试')
+    parser.add_argument('--tasks', type=int, default=200, help='任务数')
+    parser.add_argument('--workers', type=int, default=8, help='改造后的工作进程数')
+    parser.add_argument('--spider-concurrency', type=int, default=4, help='改造后每个爬虫的并发上限')
+    parser.add_argument('--high-ratio', type=float, default=0.2, help='高优先级任务比例')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--database-url', default='sqlite:////tmp/truth_guardian_scheduler_bench.db',
+                        help='基准测试使用的数据库(会清空重建所有表)')
+    args = parser.parse_args()
+
+    # 测试配置读取 TEST_DATABASE_URL，必须在导入 app 之前设置
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    from app.models.crawl_task import CrawlTask
+    from app.scraper.crawler import CrawlerManager
+
+    logging.getLogger('crawler_manager').setLevel(logging.WARNING)
+    app = create_app('test')
+    tasks = generate_tasks(args.tasks, args.seed, args.high_ratio)
+    spiders = {name: SleepSpider for name in SPIDER_WEIGHTS}
+    scenarios = [
+        ('改造前(每爬虫一进程)', {'WORKERS': len(spiders), 'SPIDER_CONCURRENCY': {}, 'DEFAULT_CONCURRENCY': 1}, False),
+        ('改造后(进程池+优先级)', {'WORKERS': args.workers, 'SPIDER_CONCURRENCY': {},
+                             'DEFAULT_CONCURRENCY': args.spider_concurrency}, True),
+    ]
+
+    rows = []
+    with app.app_context():
+        for name, config, use_priority in scenarios:
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            manager = CrawlerManager(app, spiders=spiders, config=dict(config, POLL_INTERVAL=0.05))
+            for spider, keyword, priority in tasks:
+                manager.add_task(spider, priority if use_priority else 0, keyword, 1, 1)
+            begin = time.perf_counter()
+            manager.start()
+            manager.wait()
+            elapsed = time.perf_counter() - begin
+            metrics = manager.get_metrics()
+            manager.stop()
+
+            # 按任务原本的优先级分组统计排队时间
+            priorities = {keyword: priority for _, keyword, priority in tasks}
+            waits = {0: [], 9: []}
+            for row in CrawlTask.query.all():
+                waits[priorities[row.keyword]].append((row.started_at - row.created_at).total_seconds())
+            rows.append((name, config['WORKERS'], elapsed, metrics, waits))
+
+    print("\n" + "=" * 96)
+    print(f"任务数: {args.tasks} (高优先级 {args.high_ratio:.0%})，爬虫任务量权重: {SPIDER_WEIGHTS}")
+    print("-" * 96)
+    print(f"{'调度方式':<22}{'进程数':>6}{'总耗时(s)':>11}{'利用率':>9}{'排队p50(s)':>12}{'排队p95(s)':>12}"
+          f"{'高优先级p50':>12}{'高优先级p95':>12}")
+    print("-" * 96)
+    for name, workers, elapsed, metrics, waits in rows:
+        high = waits[9]
+        print(f"{name:<22}{workers:>6}{elapsed:>11.2f}{metrics['utilization']:>9.1%}"
+              f"{metrics['queue_wait']['p50']:>12.2f}{metrics['queue_wait']['p95']:>12.2f}"
+              f"{percentile(high, 50):>12.2f}{percentile(high, 95):>12.2f}")
+    print("=" * 96)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+信息流分页基准测试: OFFSET 页码分页 vs 键集(游标)分页
+
+分别在第 1 页和第 N 页(默认 5000)测量:
+- 页码模式 + COUNT(原有写法)
+- 页码模式, include_total=false
+- 游标模式, include_total=false (游标取自第 N-1 页最后一条记录)
+
+用法:
+    python scripts/benchmark_feed_pagination.py --pages 5000 --per-page 20 --repeat 10
+"""
+
+import sys
+import os
+import time
+import argparse
+from datetime import datetime, timedelta
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+
+def seed(db, count):
+    """批量生成辟谣文章和消息(时间有重复，检验 id 作为第二排序键)"""
+    from app.models.user import User
+    from app.models.debunk import DebunkArticle
+    from app.models.message import Message
+
+    db.drop_all()
+    db.create_all()
+
+    author = User(user_name='bench', password_hash='x')
+    db.session.add(author)
+    db.session.commit()
+
+    base = datetime(2025, 1, 1)
+    batch = 5000
+    for start in range(0, count, batch):
+        stop = min(start + batch, count)
+        db.session.execute(DebunkArticle.__table__.insert(), [
+            {'title': f'基准测试文章{i}', 'content': '内容', 'author_id': author.id,
+             'status': 'published', 'created_at': base + timedelta(seconds=i // 2)}
+            for i in range(start, stop)
+        ])
+        db.session.execute(Message.__table__.insert(), [
+            {'sender_id': 2, 'receiver_id': 1, 'title': '消息', 'msg_type': 'text', 'content': '内容',
+             'priority': 0, 'is_read': False, 'send_time': base + timedelta(seconds=i // 2)}
+            for i in range(start, stop)
+        ])
+        db.session.commit()
+
+
+def timed(fn, repeat):
+    """返回耗时中位数(ms)"""
+    from app import db
+
+    costs = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        fn()
+        costs.append((time.perf_counter() - start) * 1000)
+    costs.sort()
+    return costs[len(costs) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='信息流分页基准测试')
+    parser.add_argument('--pages', type=int, default=5000, help='深翻页页码')
+    parser.add_argument('--per-page', type=int, default=20, help='每页条数')
+    parser.add_argument('--repeat', type=int, default=10, help='每项重复次数(取中位数)')
+    parser.add_argument('--skip-generate', action='store_true', help='复用已生成的数据')
+    parser.add_argument('--database-url', default='sqlite:////tmp/truth_guardian_feed_bench.db',
+                        help='基准测试使用的数据库(会清空重建所有表)')
+    args = parser.parse_args()
+
+    # 测试配置读取 TEST_DATABASE_URL，必须在导入 app 之前设置
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    from app.models.debunk import DebunkArticle
+    from app.models.message import Message
+    from app.utils.pagination import paginate_feed, encode_cursor
+
+    app = create_app('test')
+    with app.app_context():
+        count = args.pages * args.per_page
+        if not args.skip_generate:
+            print(f"生成 {count} 篇文章和 {count} 条消息...")
+            seed(db, count)
+
+        feeds = [
+            ('文章列表', DebunkArticle.query, [DebunkArticle.created_at, DebunkArticle.id]),
+            ('收到的消息', Message.query.filter(Message.receiver_id == 1), [Message.send_time, Message.id]),
+        ]
+
+        print("\n" + "=" * 78)
+        print(f"{'信息流':<10}{'页码':>8}{'OFFSET+COUNT(ms)':>20}{'OFFSET(ms)':>14}{'游标(ms)':>12}")
+        print("-" * 78)
+        for name, query, columns in feeds:
+            for page in (1, args.pages):
+                # 游标取上一页最后一条记录的排序键，模拟客户端逐页翻到第 page 页
+                cursor = ''
+                if page > 1:
+                    last = query.order_by(*[column.desc() for column in columns]) \
+                        .offset((page - 1) * args.per_page - 1).first()
+                    cursor = encode_cursor([getattr(last, column.key) for column in columns])
+
+                offset_count_ms = timed(lambda: paginate_feed(query, columns, page=page, per_page=args.per_page),
+                                        args.repeat)
+                offset_ms = timed(lambda: paginate_feed(query, columns, page=page, per_page=args.per_page,
+                                                        include_total=False), args.repeat)
+                cursor_ms = timed(lambda: paginate_feed(query, columns, per_page=args.per_page, cursor=cursor,
+                                                        include_total=False), args.repeat)
+
+                # 两种方式取到的必须是同一页
+                offset_ids = [item.id for item in paginate_feed(query, columns, page=page, per_page=args.per_page,
+                                                                include_total=False).items]
+                cursor_ids = [item.id for item in paginate_feed(query, columns, per_page=args.per_page,
+                                                                cursor=cursor, include_total=False).items]
+                assert offset_ids == cursor_ids, f'{name} 第 {page} 页结果不一致'
+
+                print(f"{name:<10}{page:>8}{offset_count_ms:>20.2f}{offset_ms:>14.2f}{cursor_ms:>12.2f}")
+        print("=" * 78)
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+关键词云基准测试: 拼接原文跑 jieba TF-IDF vs 累加已保存的词频向量
+
+原有路径即改造前 analysis.extract_keywords 的写法: 读出窗口内全部内容，
+拼接成一个字符串后调用 jieba.analyse.extract_tags。
+新路径使用 app.services.term_vector_service.keyword_cloud。
+
+两者的 IDF 来源不同: 原路径用 jieba 自带的通用语料 IDF，新路径用本库语料的文档频率，
+几乎每篇都出现的词(如"网传""核实")会被压低，所以"前20重合"一列只作参考。
+
+用法:
+    python scripts/benchmark_keyword_cloud.py --count 20000 --repeat 3
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmark_article_search import make_text  # noqa: E402
+
+
+def generate_contents(db, count, batch_size, seed):
+    """使用 Core 批量插入模拟数据(绕过 ORM 事件，词频向量稍后统一重建)"""
+    from app.models.debunk import DebunkContent
+
+    rng = random.Random(seed)
+    table = DebunkContent.__table__
+    db.session.execute(table.delete())
+    db.session.commit()
+
+    base_time = datetime.now()
+    for start in range(0, count, batch_size):
+        db.session.execute(table.insert(), [{
+            'source': rng.choice(['weibo', 'xinlang']),
+            'content_id': f'bench-{i}',
+            'content': make_text(rng, rng.randint(40, 120)),
+            'status': 'pending',
+            'created_at': base_time - timedelta(minutes=i * 3),
+        } for i in range(start, min(start + batch_size, count))])
+        db.session.commit()
+    print(f"已生成 {count} 条内容")
+
+
+def legacy_cloud(start, end, source=None):
+    """改造前的写法"""
+    import jieba.analyse
+    from app.models.debunk import DebunkContent
+
+    query = DebunkContent.query.filter(DebunkContent.created_at >= start, DebunkContent.created_at < end)
+    if source:
+        query = query.filter(DebunkContent.source == source)
+    texts = [c.content for c in query.all() if c.content]
+    keywords = jieba.analyse.extract_tags(' '.join(texts), topK=50, withWeight=True)
+    return [word for word, _ in keywords]
+
+
+def vector_cloud(start, end, source=None):
+    from app.services import term_vector_service
+
+    keywords, _ = term_vector_service.keyword_cloud(start=start, end=end, sources=[source] if source else None)
+    return [item['word'] for item in keywords]
+
+
+def timed(fn, repeat):
+    costs = []
+    result = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = fn()
+        costs.append((time.perf_counter() - begin) * 1000)
+    costs.sort()
+    return costs[len(costs) // 2], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='关键词云基准测试')
+    parser.add_argument('--count', type=int, default=20000, help='模拟内容数量')
+    parser.add_argument('--batch-size', type=int, default=2000, help='插入/重建批大小')
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数(取中位数)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--skip-generate', action='store_true', help='复用已生成的数据')
+    parser.add_argument('--database-url', default='sqlite:////tmp/truth_guardian_keyword_bench.db',
+                        help='基准测试使用的数据库(会清空 debunk_content 和词频向量表)')
+    args = parser.parse_args()
+
+    # 测试配置读取 TEST_DATABASE_URL，必须在导入 app 之前设置
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    from app.services import term_vector_service
+
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        if not args.skip_generate:
+            generate_contents(db, args.count, args.batch_size, args.seed)
+            begin = time.perf_counter()
+            term_vector_service.rebuild_vectors('debunk_content', batch_size=args.batch_size)
+            print(f"词频向量重建耗时 {time.perf_counter() - begin:.1f}s")
+
+        now = datetime.now() + timedelta(minutes=1)
+        windows = [
+            ('最近1天', now - timedelta(days=1), None),
+            ('最近7天', now - timedelta(days=7), None),
+            ('最近30天', now - timedelta(days=30), None),
+            ('最近30天/weibo', now - timedelta(days=30), 'weibo'),
+        ]
+
+        print("\n" + "=" * 72)
+        print(f"{'窗口':<18}{'原路径(ms)':>12}{'向量(ms)':>12}{'加速':>8}{'前20重合':>10}")
+        print("-" * 72)
+        for name, start, source in windows:
+            legacy_ms, legacy_words = timed(lambda: legacy_cloud(start, now, source), args.repeat)
+            term_vector_service.clear_cache()
+            vector_ms, vector_words = timed(lambda: vector_cloud(start, now, source), args.repeat)
+            overlap = len(set(legacy_words[:20]) & set(vector_words[:20]))
+            print(f"{name:<18}{legacy_ms:>12.1f}{vector_ms:>12.1f}{legacy_ms / vector_ms:>7.1f}x{overlap:>10}")
+        print("=" * 72)
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
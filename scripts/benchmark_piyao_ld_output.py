@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+辟谣 ld.htm 爬虫输出基准测试: 内存中的结果列表 + JSON vs 逐篇追加的 JSONL
+
+在本地生成列表页和详情页(fixtures)，用替身 session 回放，分别执行:
+- 改造前: 结果放在内存列表里，爬完后 json.dump(indent=2) 写 piyao_ld_results.json 和摘要文件，
+  导入时 json.load 整个文件
+- 改造后: PiyaoLdSpider.crawl() 每篇文章追加一行 JSONL 并记录断点，导入时逐行读取
+
+每种方式在单独的子进程中运行，统计爬取和读取阶段的总耗时和进程峰值内存(RSS)。
+
+用法:
+    python scripts/benchmark_piyao_ld_output.py --articles 50000
+"""
+
+import sys
+import os
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from spider.crawl_state import NOT_MODIFIED
+from spider.jsonl import iter_records
+from spider.piyao_ld_spider import PiyaoLdSpider
+
+BASE_URL = 'https://www.piyao.org.cn'
+
+
+def generate_fixtures(directory, articles, paragraphs):
+    """生成列表页和详情页"""
+    os.makedirs(os.path.join(directory, 'detail'), exist_ok=True)
+    links = []
+    for i in range(articles):
+        title = f'网传某地出现新型谣言第{i}号？官方辟谣'
+        links.append(f'<li><h2><a href="/{i}.htm" target="_blank" aria-arttitle="{title}">{title}</a></h2></li>')
+        body = ''.join(f'<p>第{j}段: 经核实，该说法没有任何科学依据，相关部门已经发布权威说明，请广大网友不信谣不传谣。</p>'
+                       for j in range(paragraphs))
+        with open(os.path.join(directory, 'detail', f'{i}.htm'), 'w', encoding='utf-8') as f:
+            f.write(f'<html><body><div class="content"><div class="con_left left"><div><div class="con_tit">'
+                    f'<h2>{title}</h2><span class="time">2024-01-01</span><span class="source">中国互联网联合辟谣平台</span>'
+                    f'</div><div class="con_txt">{body}</div></div></div></div></body></html>')
+    with open(os.path.join(directory, 'list.htm'), 'w', encoding='utf-8') as f:
+        f.write(f'<html><body><ul id="list">{"".join(links)}</ul></body></html>')
+
+
+class FixtureResponse:
+    def __init__(self, text):
+        self.status_code = 200
+        self.text = text
+        self.headers = {}
+        self.encoding = None
+
+    def raise_for_status(self):
+        pass
+
+
+class FixtureSession:
+    """从 fixtures 目录回放页面"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def get(self, url, headers=None, **kwargs):
+        path = url[len(BASE_URL):].lstrip('/')
+        if path == 'ld.htm':
+            path = 'list.htm'
+        else:
+            path = os.path.join('detail', path)
+        with open(os.path.join(self.directory, path), 'r', encoding='utf-8') as f:
+            return FixtureResponse(f.read())
+
+
+def make_spider(fixtures, workdir):
+    spider = PiyaoLdSpider(
+        state_path=os.path.join(workdir, 'state.json'), incremental=False,
+        output_file=os.path.join(workdir, 'piyao_ld_results.jsonl'),
+        checkpoint_path=os.path.join(workdir, 'checkpoint.json')
+    )
+    spider.session = FixtureSession(fixtures)
+    spider.delay = 0
+    return spider
+
+
+def legacy_crawl(spider, workdir):
+    """改造前的爬取流程: 全部结果留在内存中，结束时整体写出"""
+    articles = spider.parse_list_page()
+    results = []
+    for article in articles:
+        detail = spider.parse_detail_page(article['url'])
+        if detail and detail is not NOT_MODIFIED:
+            detail.update({
+                'list_title': article['title'],
+                'aria_title': article.get('aria_title', ''),
+                'target': article.get('target', '')
+            })
+            results.append(detail)
+    output_file = os.path.join(workdir, 'piyao_ld_results.json')
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    summary = [{'title': r.get('title', ''), 'url': r.get('url', '')} for r in results]
+    with open(os.path.join(workdir, 'piyao_ld_summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return output_file
+
+
+def run_mode(mode, fixtures, workdir, result_queue):
+    spider = make_spider(fixtures, workdir)
+    begin = time.perf_counter()
+    if mode == 'legacy':
+        output_file = legacy_crawl(spider, workdir)
+    else:
+        output_file = spider.crawl()['output']
+    crawl_time = time.perf_counter() - begin
+    crawl_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    begin = time.perf_counter()
+    if mode == 'legacy':
+        with open(output_file, 'r', encoding='utf-8') as f:
+            count = sum(1 for _ in json.load(f))
+    else:
+        count = sum(1 for _ in iter_records(output_file))
+    read_time = time.perf_counter() - begin
+    result_queue.put({
+        'count': count,
+        'crawl_time': crawl_time,
+        'read_time': read_time,
+        'crawl_rss': crawl_rss,
+        'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'size': os.path.getsize(output_file),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='辟谣 ld.htm 爬虫输出基准测试')
+    parser.add_argument('--articles', type=int, default=50000, help='文章数')
+    parser.add_argument('--paragraphs', type=int, default=20, help='每篇文章的段落数')
+    parser.add_argument('--workdir', default=None, help='fixtures 和输出目录(默认临时目录，结束后删除)')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='piyao_ld_bench_')
+    fixtures = os.path.join(workdir, 'fixtures')
+    print(f"生成 {args.articles} 篇文章的 fixtures: {fixtures}")
+    generate_fixtures(fixtures, args.articles, args.paragraphs)
+
+    # 子进程只继承空的解释器状态，峰值内存互不影响
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    try:
+        for mode, name in [('legacy', '改造前(列表+JSON)'), ('stream', '改造后(JSONL+断点)')]:
+            output_dir = os.path.join(workdir, mode)
+            os.makedirs(output_dir, exist_ok=True)
+            result_queue = context.Queue()
+            process = context.Process(target=run_mode, args=(mode, fixtures, output_dir, result_queue))
+            process.start()
+            result = result_queue.get()
+            process.join()
+            rows.append((name, result))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 92)
+    print(f"文章数: {args.articles}，每篇 {args.paragraphs} 段")
+    print("-" * 92)
+    print(f"{'方式':<22}{'文章数':>8}{'爬取(s)':>10}{'读取(s)':>10}{'总耗时(s)':>11}"
+          f"{'爬取峰值RSS(MB)':>16}{'总峰值RSS(MB)':>15}{'文件(MB)':>10}")
+    print("-" * 92)
+    for name, result in rows:
+        print(f"{name:<22}{result['count']:>8}{result['crawl_time']:>10.2f}{result['read_time']:>10.2f}"
+              f"{result['crawl_time'] + result['read_time']:>11.2f}{result['crawl_rss'] / 1024:>16.1f}"
+              f"{result['peak_rss'] / 1024:>15.1f}{result['size'] / 1024 / 1024:>10.1f}")
+    print("=" * 92)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+搜索爬虫抓取基准测试: 同步逐页抓取 vs 异步引擎并发抓取
+
+两种写法都请求本地回放服务器(app.scraper.replay_server)，不访问真实站点:
+- 同步: 改造前 run() 的写法(requests 逐个关键词、逐页抓取，去掉页面间固定等待)，攒批提交
+- 异步: run_many() 使用的 AsyncSearchEngine，关键词 × 页码并发抓取，异步攒批提交
+
+回放的响应默认按微博/新浪搜索接口的格式生成(正文取自仓库根目录下爬取的辟谣文章)，
+也可以用 --responses 指定 AsyncSearchEngine(record_path=...) 录制的真实响应。
+回放服务器对每个请求模拟固定延迟(--latency)，并按 --error-rate 的概率返回 503 以触发重试。
+
+用法:
+    python scripts/benchmark_search_engine.py --keywords 10 --pages 10 --latency 0.05
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+
+def load_paragraphs():
+    paragraphs = []
+    for name in ('piyao_results.json', 'piyao_ld_results.json'):
+        with open(os.path.join(project_root, name), 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                paragraphs.extend(p.strip() for p in (item.get('content') or '').split('\n') if len(p.strip()) > 10)
+    return paragraphs
+
+
+def generate_responses(spiders, pages, seed):
+    """按两个搜索接口的格式生成录制响应(每个爬虫 pages 页)"""
+    rng = random.Random(seed)
+    paragraphs = load_paragraphs()
+    base_time = datetime(2025, 3, 1, 12, 0, 0)
+    weibo, xinlang = spiders
+    records = []
+    for page in range(1, pages + 1):
+        cards = [{'card_type': 9, 'mblog': {
+            'mid': f'{page}{i:03d}',
+            'text': f'<span>{rng.choice(paragraphs)[:300]}</span>',
+            'created_at': (base_time - timedelta(hours=page * 10 + i)).strftime('%a %b %d %H:%M:%S +0800 %Y'),
+            'user': {'id': rng.randint(1, 200), 'screen_name': f'用户{rng.randint(1, 200)}', 'verified': False},
+            'region_name': rng.choice(['发布于 北京', '发布于 上海', '']),
+            'attitudes_count': rng.randint(0, 1000),
+            'comments_count': rng.randint(0, 100),
+            'reposts_count': rng.randint(0, 100),
+        }} for i in range(10)]
+        request = weibo.build_request('辟谣', page)
+        records.append({'url': request['url'], 'params': None, 'body': {'ok': 1, 'data': {'cards': cards}}})
+
+        results = [{
+            'id': f'{page}{i:03d}',
+            'docid': f'doc{page}{i:03d}',
+            'title': rng.choice(paragraphs)[:40],
+            'media': '新浪新闻',
+            'url': f'https://news.sina.com.cn/{page}/{i}.shtml',
+            'datetime': (base_time - timedelta(hours=page * 20 + i)).strftime('%Y-%m-%d %H:%M:%S'),
+        } for i in range(20)]
+        request = xinlang.build_request('辟谣', page)
+        records.append({'url': request['url'], 'params': request['params'], 'body': {'data': {'results': results}}})
+    return records
+
+
+def point_to(spider, base_url):
+    """把爬虫的搜索接口和入库接口都指向回放服务器"""
+    spider.search_url = base_url + urlsplit(spider.search_url).path
+    spider.api_base_url = base_url
+
+
+def run_sync(spider, keywords, max_pages):
+    """改造前 run() 的写法(去掉页面间等待)，返回抓取的页数"""
+    spider.login()
+    pages = 0
+    for keyword in keywords:
+        for page in range(1, max_pages + 1):
+            response = spider.search(keyword, page)
+            if not response:
+                continue
+            pages += 1
+            for data in spider.parse_response(response, keyword):
+                spider.save_to_api(data)
+    spider.flush_to_api()
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='搜索爬虫抓取基准测试')
+    parser.add_argument('--keywords', type=int, default=10, help='关键词数量')
+    parser.add_argument('--pages', type=int, default=10, help='每个关键词抓取的页数')
+    parser.add_argument('--latency', type=float, default=0.05, help='回放服务器每个请求的模拟延迟(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='回放服务器返回 503 的概率')
+    parser.add_argument('--concurrency', type=int, default=32, help='异步引擎总并发')
+    parser.add_argument('--per-host', type=int, default=16, help='异步引擎每个主机的并发上限')
+    parser.add_argument('--responses', help='录制的响应(JSONL)，不指定时按接口格式生成')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    from app.scraper.replay_server import ReplayServer, load_responses
+    from app.scraper.spiders.weibo_search import WeiboSearchSpider
+    from app.scraper.spiders.xinlang_search import XinlangSearchSpider
+
+    logging.getLogger().setLevel(logging.ERROR)
+    spider_classes = (WeiboSearchSpider, XinlangSearchSpider)
+    if args.responses:
+        responses = load_responses(args.responses)
+    else:
+        responses = generate_responses([cls() for cls in spider_classes], 20, args.seed)
+    server = ReplayServer(responses, latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+
+    # 回放服务器在后台线程的事件循环中运行，同步写法和异步引擎都通过 HTTP 访问
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    base_url = asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+
+    keywords = [f'关键词{i}' for i in range(args.keywords)]
+    config = {
+        'CONCURRENCY': args.concurrency,
+        'PER_HOST': args.per_host,
+        'HOST_LIMITS': {},
+        'BACKOFF_BASE': 0.05,
+        'BACKOFF_MAX': 1,
+    }
+    rows = []
+    for cls in spider_classes:
+        spider = cls()
+        point_to(spider, base_url)
+        begin = time.perf_counter()
+        pages = run_sync(spider, keywords, args.pages)
+        elapsed = time.perf_counter() - begin
+        rows.append((f'{spider.source}/同步', pages, elapsed))
+
+        spider = cls()
+        point_to(spider, base_url)
+        stats = spider.run_many(keywords, args.pages, config=config)
+        rows.append((f'{spider.source}/异步', stats['pages'], stats['elapsed']))
+        assert stats['pages_failed'] == 0, "重试后仍有页面抓取失败"
+
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+    total = args.keywords * args.pages
+    print("\n" + "=" * 64)
+    print(f"关键词 {args.keywords} × 页数 {args.pages}，模拟延迟 {args.latency * 1000:.0f}ms，"
+          f"错误率 {args.error_rate:.0%}，并发 {args.concurrency}/每主机 {args.per_host}")
+    print("-" * 64)
+    print(f"{'写法':<20}{'成功页数':>10}{'耗时(s)':>12}{'页/秒':>12}")
+    print("-" * 64)
+    for name, pages, elapsed in rows:
+        print(f"{name:<20}{f'{pages}/{total}':>10}{elapsed:>12.2f}{pages / elapsed:>12.1f}")
+    print("-" * 64)
+    print(f"回放服务器: 请求 {server.stats['requests']}，注入错误 {server.stats['errors']}，"
+          f"入库 {server.stats['items']} 条 / {server.stats['batches']} 批")
+    print("=" * 64)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+SimHash 近似重复查找基准测试: 分段索引 vs 逐个比较汉明距离
+
+随机生成 N 个 64 位指纹，再从中抽取若干个翻转 1~3 位作为查询(保证存在近似重复)，比较:
+- 暴力扫描: numpy 对全部指纹异或后统计比特数
+- 内存分段索引(app.utils.simhash.SimHashIndex): 4 段各 16 位，二分定位候选后过滤
+- 数据库分段索引(simhash_band 表，near_duplicate_service 入库时使用的查找方式)
+
+用法:
+    python scripts/benchmark_simhash.py --count 1000000 --db-count 1000000
+"""
+
+import sys
+import os
+import time
+import argparse
+
+import numpy as np
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+
+def generate(count, queries, seed):
+    rng = np.random.default_rng(seed)
+    hashes = rng.integers(0, 2 ** 64, size=count, dtype=np.uint64)
+    targets = rng.integers(0, count, size=queries)
+    values = []
+    for target in targets:
+        value = int(hashes[target])
+        for bit in rng.choice(64, size=int(rng.integers(1, 4)), replace=False):
+            value ^= 1 << int(bit)
+        values.append(value)
+    return hashes, targets, values
+
+
+def brute_force(hashes, value, max_distance):
+    xor = hashes ^ np.uint64(value)
+    distances = np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+    return np.nonzero(distances <= max_distance)[0]
+
+
+def percentile(samples, q):
+    return float(np.percentile(np.array(samples) * 1000, q))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SimHash 近似重复查找基准测试')
+    parser.add_argument('--count', type=int, default=1000000, help='指纹数量')
+    parser.add_argument('--queries', type=int, default=1000, help='查询次数')
+    parser.add_argument('--brute-queries', type=int, default=20, help='暴力扫描的查询次数(较慢)')
+    parser.add_argument('--db-count', type=int, default=1000000, help='写入数据库分段索引的指纹数量，0 表示跳过')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--database-url', default='sqlite:////tmp/truth_guardian_simhash_bench.db',
+                        help='基准测试使用的数据库(会清空重建所有表)')
+    args = parser.parse_args()
+
+    from app.utils.simhash import SimHashIndex, band_values, to_signed
+
+    hashes, targets, values = generate(args.count, args.queries, args.seed)
+    rows = []
+
+    # 暴力扫描
+    samples = []
+    for value in values[:args.brute_queries]:
+        begin = time.perf_counter()
+        brute_force(hashes, value, 3)
+        samples.append(time.perf_counter() - begin)
+    rows.append(('暴力扫描', samples))
+
+    # 内存分段索引
+    begin = time.perf_counter()
+    index = SimHashIndex(np.arange(args.count), hashes, max_distance=3)
+    build_time = time.perf_counter() - begin
+    index_bytes = sum(values_.nbytes + order.nbytes for values_, order in index._sorted) + index.hashes.nbytes
+    samples = []
+    for target, value in zip(targets, values):
+        begin = time.perf_counter()
+        result = index.query(value)
+        samples.append(time.perf_counter() - begin)
+        assert int(target) in [doc_id for doc_id, _ in result]
+    rows.append(('内存分段索引', samples))
+    for value in values[:args.brute_queries]:
+        assert sorted(doc_id for doc_id, _ in index.query(value)) == brute_force(hashes, value, 3).tolist()
+
+    # 数据库分段索引
+    db_build_time = None
+    if args.db_count:
+        # 测试配置读取 TEST_DATABASE_URL，必须在导入 app 之前设置
+        os.environ['TEST_DATABASE_URL'] = args.database_url
+        from app import create_app, db
+        from app.models.near_duplicate import SimHashBand
+        from app.services import near_duplicate_service
+
+        app = create_app('test')
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            begin = time.perf_counter()
+            connection = db.session.connection()
+            batch = []
+            for doc_id, value in enumerate(hashes[:args.db_count].tolist()):
+                signed = to_signed(value)
+                batch.extend({'doc_type': 'debunk_content', 'doc_id': doc_id, 'band': band, 'value': band_value,
+                              'simhash': signed}
+                             for band, band_value in enumerate(band_values(value, near_duplicate_service.BANDS)))
+                if len(batch) >= 40000:
+                    connection.execute(SimHashBand.__table__.insert(), batch)
+                    batch = []
+            if batch:
+                connection.execute(SimHashBand.__table__.insert(), batch)
+            db.session.commit()
+            db_build_time = time.perf_counter() - begin
+
+            samples = []
+            connection = db.session.connection()
+            for target, value in zip(targets, values):
+                if target >= args.db_count:
+                    continue
+                begin = time.perf_counter()
+                result = near_duplicate_service._candidates(connection, value)
+                samples.append(time.perf_counter() - begin)
+                assert ('debunk_content', int(target)) in result
+            rows.append((f'数据库分段索引({args.db_count})', samples))
+            db.session.remove()
+
+    print("\n" + "=" * 72)
+    print(f"指纹数量: {args.count}，最大汉明距离: 3")
+    print(f"内存分段索引构建耗时: {build_time:.2f}s，占用 {index_bytes / 1024 / 1024:.1f} MB")
+    if db_build_time is not None:
+        print(f"数据库分段索引写入耗时: {db_build_time:.2f}s ({args.db_count} 个指纹)")
+    print("-" * 72)
+    print(f"{'查找方式':<28}{'次数':>8}{'p50(ms)':>12}{'p99(ms)':>12}{'平均(ms)':>12}")
+    print("-" * 72)
+    for name, samples in rows:
+        print(f"{name:<28}{len(samples):>8}{percentile(samples, 50):>12.3f}{percentile(samples, 99):>12.3f}"
+              f"{np.mean(samples) * 1000:>12.3f}")
+    print("=" * 72)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+爬虫数据入库基准测试: 逐条 POST /api/spider/data vs 批量 POST /api/spider/data/batch
+
+逐条接口即改造前三个爬虫的写法: 每条数据一次请求，接口内先查重、插入原始表、flush、
+插入 debunk_content 再提交。批量接口每批一次请求、每张表一次 IN 查询、多行 upsert、一次提交。
+两种写法都经过 Flask 测试客户端(含 JWT 校验)，统计汇总、全文索引、词频向量同步维护。
+
+微博正文取自仓库根目录下爬取的辟谣文章(piyao_results.json / piyao_ld_results.json)。
+
+用法:
+    python scripts/benchmark_spider_ingest.py --count 2000 --batch-size 200
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+
+def load_paragraphs():
+    paragraphs = []
+    for name in ('piyao_results.json', 'piyao_ld_results.json'):
+        with open(os.path.join(project_root, name), 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                paragraphs.extend(p.strip() for p in (item.get('content') or '').split('\n') if len(p.strip()) > 10)
+    return paragraphs
+
+
+def generate_items(count, seed, prefix):
+    rng = random.Random(seed)
+    paragraphs = load_paragraphs()
+    base_time = datetime(2025, 3, 1, 12, 0, 0)
+    return [{
+        'content': rng.choice(paragraphs)[:500],
+        'weibo_mid_id': f'{prefix}{i}',
+        'weibo_user_id': str(rng.randint(1, 200)),
+        'weibo_user_name': f'用户{rng.randint(1, 200)}',
+        'region': rng.choice(['北京', '上海', '广东', '四川', '']),
+        'attitudes_count': rng.randint(0, 1000),
+        'comments_count': rng.randint(0, 100),
+        'reposts_count': rng.randint(0, 100),
+        'created_at': (base_time - timedelta(hours=i % 240)).strftime('%Y-%m-%d %H:%M:%S'),
+        'search_query': '辟谣',
+        'status': 'pending'
+    } for i in range(count)]
+
+
+def run_single(client, headers, items):
+    for data in items:
+        response = client.post('/api/spider/data', json={'source': 'weibo', 'data': data}, headers=headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def run_batch(client, headers, items, batch_size):
+    for start in range(0, len(items), batch_size):
+        chunk = items[start:start + batch_size]
+        response = client.post('/api/spider/data/batch', headers=headers, json={
+            'items': [{'source': 'weibo', 'data': data} for data in chunk]
+        })
+        assert response.status_code == 200, response.get_data(as_text=True)
+        assert response.get_json()['data']['failed'] == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬虫数据入库基准测试')
+    parser.add_argument('--count', type=int, default=2000, help='入库条数')
+    parser.add_argument('--batch-size', type=int, default=200, help='批量接口每批条数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--database-url', default='sqlite:////tmp/truth_guardian_ingest_bench.db',
+                        help='基准测试使用的数据库(会清空重建所有表)')
+    args = parser.parse_args()
+
+    # 测试配置读取 TEST_DATABASE_URL，必须在导入 app 之前设置
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    import logging
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.models.user import User
+    from app.models.debunk import DebunkContent
+    from app.services import stats_service
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    app = create_app('test')
+    # 基准只关心入库耗时，关闭查询预算检查
+    app.config['SQL_QUERY_BUDGET_STRICT'] = False
+    client = app.test_client()
+
+    rows = []
+    with app.app_context():
+        for name, prefix in (('逐条接口', 'single'), ('批量接口', 'batch')):
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            user = User(user_name='spider', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            headers = {'Authorization': 'Bearer ' + create_access_token(identity=user)}
+            items = generate_items(args.count, args.seed, prefix)
+
+            begin = time.perf_counter()
+            if prefix == 'single':
+                run_single(client, headers, items)
+            else:
+                run_batch(client, headers, items, args.batch_size)
+            elapsed = time.perf_counter() - begin
+
+            assert DebunkContent.query.count() == args.count
+            assert stats_service.check_stats() == {}, "统计汇总与原始数据不一致"
+            rows.append((name, elapsed, args.count / elapsed))
+
+            if prefix == 'batch':
+                # 重复提交(全部走更新路径)
+                begin = time.perf_counter()
+                run_batch(client, headers, items, args.batch_size)
+                elapsed = time.perf_counter() - begin
+                rows.append(('批量接口/重复提交', elapsed, args.count / elapsed))
+
+    print("\n" + "=" * 60)
+    print(f"{'写法':<20}{'耗时(s)':>12}{'条/秒':>12}")
+    print("-" * 60)
+    for name, elapsed, rate in rows:
+        print(f"{name:<20}{elapsed:>12.2f}{rate:>12.1f}")
+    print("-" * 60)
+    print(f"批量接口加速: {rows[1][2] / rows[0][2]:.1f}x (每批 {args.batch_size} 条)")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
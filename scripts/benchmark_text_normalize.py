@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+文本规范化基准测试: 改造前各处的 clean_text 写法 vs app.utils.text_normalize
+
+每组先校验两种写法输出完全一致，再比较耗时:
+- clean / weibo_html / html_text 三种规则的单条清洗
+- 批量清洗(批内含重复文本)
+- 带缓存的重复清洗(同一内容反复抓取)
+- 大文档流式清洗
+
+语料使用仓库根目录下爬取的辟谣文章(piyao_results.json / piyao_ld_results.json)，
+并包装成带标签、实体、链接的 HTML。
+
+用法:
+    python scripts/benchmark_text_normalize.py --repeat 20
+"""
+
+import os
+import re
+import sys
+import json
+import html
+import time
+import random
+import argparse
+
+from bs4 import BeautifulSoup
+
+# 添加项目根目录到系统路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app.utils.text_normalize import TextNormalizer  # noqa: E402
+
+
+def legacy_clean_text(text):
+    """改造前 DataProcessor.clean_text / DataCleanPipeline.clean_text"""
+    if not text:
+        return ""
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s\u4e00-\u9fff。，、；：""（）《》？！]', '', text)
+    text = re.sub(r'\n\s*\n', '\n', text)
+    return text.strip()
+
+
+def legacy_clean_html_text(text):
+    """改造前 weibo_search.clean_html_text"""
+    if not text:
+        return ""
+    text = html.unescape(text)
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'<a[^>]*>@([^<]+)</a>', r'@\1', text)
+    text = re.sub(r'<a[^>]*>#([^<]+)#</a>', r'#\1#', text)
+    text = re.sub(r'<a[^>]*>([^<]+)</a>', r'\1', text)
+    text = re.sub(r'<img[^>]*/?>', '', text)
+    text = re.sub(r'<video[^>]*>.*?</video>', '', text, flags=re.DOTALL)
+    text = re.sub(r'\s*\n\s*', '\n', text)
+    text = re.sub(r' +', ' ', text)
+    text = text.strip()
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text
+
+
+def legacy_migrate_clean_text(text):
+    """改造前 migrate_data.clean_text"""
+    if not text:
+        return ""
+    soup = BeautifulSoup(text, 'html.parser')
+    text = soup.get_text(separator=' ', strip=True)
+    url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+    text = re.sub(url_pattern, '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+LEGACY = {
+    'clean': legacy_clean_text,
+    'weibo_html': legacy_clean_html_text,
+    'html_text': legacy_migrate_clean_text,
+}
+
+
+def load_articles():
+    texts = []
+    for name in ('piyao_results.json', 'piyao_ld_results.json'):
+        with open(os.path.join(project_root, name), 'r', encoding='utf-8') as f:
+            texts.extend(item['content'] for item in json.load(f) if item.get('content'))
+    return texts
+
+
+def to_html(text, rng):
+    """把纯文本包装成爬取页面中常见的 HTML 片段"""
+    parts = []
+    for para in text.split('\n'):
+        if not para.strip():
+            continue
+        if rng.random() < 0.3:
+            para = para[:20] + '<a href="https://m.weibo.cn/search?q=%23辟谣%23">#辟谣#</a>' + para[20:]
+        if rng.random() < 0.2:
+            para += ' 详见 https://www.piyao.org.cn/detail.html &amp; 转发&gt;&gt;'
+        if rng.random() < 0.1:
+            para += '<img src="https://img.example.com/1.jpg"/>'
+        parts.append(f'<p class="content">  {para}  </p>\n')
+    return '<div>' + ''.join(parts) + '</div>'
+
+
+def build_corpus(seed):
+    rng = random.Random(seed)
+    return [to_html(text, rng) for text in load_articles()]
+
+
+def timed(fn, repeat):
+    costs = []
+    result = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = fn()
+        costs.append((time.perf_counter() - begin) * 1000)
+    costs.sort()
+    return costs[len(costs) // 2], result
+
+
+def run_benchmarks(repeat=10, seed=42):
+    """运行全部基准，返回 [(名称, 原写法ms, 新写法ms)]，输出不一致时抛出 AssertionError"""
+    corpus = build_corpus(seed)
+    rows = []
+
+    for profile, legacy in LEGACY.items():
+        normalizer = TextNormalizer(profile)
+        legacy_ms, expected = timed(lambda: [legacy(text) for text in corpus], repeat)
+        new_ms, actual = timed(lambda: [normalizer.normalize(text) for text in corpus], repeat)
+        assert actual == expected, f"{profile} 规则输出不一致"
+        rows.append((f'单条/{profile}', legacy_ms, new_ms))
+
+    # 批量: 一页数据中转发/重复抓取的内容约占一半
+    batch = corpus + corpus[: len(corpus) // 2] * 2
+    normalizer = TextNormalizer('clean')
+    legacy_ms, expected = timed(lambda: [legacy_clean_text(text) for text in batch], repeat)
+    new_ms, actual = timed(lambda: normalizer.normalize_batch(batch), repeat)
+    assert actual == expected, "批量清洗输出不一致"
+    rows.append(('批量/clean', legacy_ms, new_ms))
+
+    # 缓存: 同一批内容被多轮抓取
+    cached = TextNormalizer('clean', cache_size=4096)
+    cached.normalize_batch(corpus)
+    legacy_ms, expected = timed(lambda: [legacy_clean_text(text) for text in corpus], repeat)
+    new_ms, actual = timed(lambda: [cached.normalize(text) for text in corpus], repeat)
+    assert actual == expected, "缓存清洗输出不一致"
+    rows.append(('缓存命中/clean', legacy_ms, new_ms))
+
+    # 流式: 全部文章拼成一个大文档
+    document = '\n'.join(corpus) * 5
+    for profile in ('clean', 'html_text'):
+        normalizer = TextNormalizer(profile)
+        legacy_ms, expected = timed(lambda: LEGACY[profile](document), max(1, repeat // 5))
+        new_ms, actual = timed(lambda: ''.join(normalizer.normalize_stream(document, chunk_size=16 * 1024)),
+                               max(1, repeat // 5))
+        assert actual == expected, f"{profile} 流式清洗输出不一致"
+        rows.append((f'流式/{profile}', legacy_ms, new_ms))
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文本规范化基准测试')
+    parser.add_argument('--repeat', type=int, default=10, help='每项重复次数(取中位数)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    rows = run_benchmarks(args.repeat, args.seed)
+    print("\n" + "=" * 60)
+    print(f"{'场景':<20}{'原写法(ms)':>14}{'新写法(ms)':>14}{'加速':>10}")
+    print("-" * 60)
+    for name, legacy_ms, new_ms in rows:
+        print(f"{name:<20}{legacy_ms:>14.2f}{new_ms:>14.2f}{legacy_ms / new_ms:>9.1f}x")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
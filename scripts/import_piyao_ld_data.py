@@ -1,129 +1,85 @@
 #!/usr/bin/env python3
 """
 导入辟谣 ld.htm 页面爬虫JSON数据到数据库
+
+按 (来源, 标题) 去重后分块写入 debunk_article，每块提交一次，中断后再次运行从断点继续。
+
+用法:
+    python scripts/import_piyao_ld_data.py
+    python scripts/import_piyao_ld_data.py --file piyao_ld_results.jsonl --chunk-size 2000
+    python scripts/import_piyao_ld_data.py --dry-run    # 只统计去重率，不写数据库
 """
 
 import sys
 import os
-import json
-from datetime import datetime
+import logging
+import argparse
 
 # 添加项目根目录到系统路径
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
-from app import create_app, db
-from app.models.debunk import DebunkContent, DebunkArticle
+from app import create_app
+from app.models.debunk import DebunkArticle
+from app.services.bulk_import import BulkImporter, CHUNK_SIZE, piyao_article_record
+from spider.crawl_state import CrawlCheckpoint
+from spider.jsonl import iter_records
 
-def import_piyao_ld_json():
-    """导入辟谣 ld.htm 页面JSON数据到数据库"""
-    json_file = os.path.join(project_root, 'piyao_ld_results.json')
-    
+
+def default_file():
+    """优先读取爬虫输出的 piyao_ld_results.jsonl，没有时读取旧版的 piyao_ld_results.json"""
+    json_file = os.path.join(project_root, 'piyao_ld_results.jsonl')
+    if not os.path.exists(json_file):
+        json_file = os.path.join(project_root, 'piyao_ld_results.json')
+    return json_file
+
+
+def import_piyao_ld_json(json_file=None, chunk_size=CHUNK_SIZE, dry_run=False, resume=True):
+    """导入辟谣 ld.htm 页面JSON/JSONL数据到数据库"""
+    json_file = json_file or default_file()
     print(f"查找JSON文件: {json_file}")
-    
+
     if not os.path.exists(json_file):
         print(f"JSON文件不存在: {json_file}")
         print("请先运行辟谣 ld.htm 页面爬虫生成数据文件")
         return False
-    
+
     app = create_app()
     with app.app_context():
+        checkpoint = CrawlCheckpoint(os.path.join(project_root, 'crawls/state/import_piyao_ld.checkpoint.json'))
+        if not resume:
+            checkpoint.clear()
+        importer = BulkImporter(DebunkArticle, piyao_article_record, chunk_size=chunk_size,
+                                dry_run=dry_run, checkpoint=checkpoint)
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            print(f"读取到 {len(data)} 条记录")
-            
-            success_count = 0
-            skip_count = 0
-            error_count = 0
-            
-            for index, item in enumerate(data, 1):
-                try:
-                    title = item.get('title', '').strip()
-                    content = item.get('content', '').strip()
-                    url = item.get('url', '').strip()
-                    
-                    if not title:
-                        print(f"记录 {index}: 标题为空，跳过")
-                        skip_count += 1
-                        continue
-                    
-                    if not content:
-                        print(f"记录 {index}: 内容为空，跳过")
-                        skip_count += 1
-                        continue
-                    
-                    # 检查是否已存在（基于标题）
-                    existing = DebunkArticle.query.filter_by(
-                        title=title
-                    ).first()
-
-                    if existing:
-                        print(f"记录 {index}: 已存在 - {title[:50]}...")
-                        skip_count += 1
-                        continue
-
-                    # 提取发布时间和来源信息
-                    publish_time = item.get('publish_time', '')
-                    source_info = item.get('source', '辟谣平台')
-
-                    # 创建新记录 - 使用 DebunkArticle 模型
-                    debunk_article = DebunkArticle(
-                        title=title,
-                        content=content,
-                        summary=content[:200] + '...' if len(content) > 200 else content,  # 生成摘要
-                        source='piyao.org.cn',
-                        author_id=1,  # 使用默认作者ID
-                        status='published',
-                        created_at=datetime.now(),
-                        published_at=datetime.now(),  # 设置发布时间为当前时间
-                        tags='辟谣,官方'  # 添加默认标签
-                    )
-                    
-                    # 如果有发布时间信息，尝试解析
-                    if publish_time:
-                        try:
-                            # 这里可以根据实际的时间格式进行解析
-                            # 暂时使用当前时间
-                            pass
-                        except:
-                            pass
-
-                    db.session.add(debunk_article)
-                    success_count += 1
-                    print(f"记录 {index}: 成功添加 - {title[:50]}...")
-                    
-                except Exception as e:
-                    error_count += 1
-                    print(f"记录 {index}: 处理失败 - {str(e)}")
-                    continue
-            
-            # 提交所有更改
-            db.session.commit()
-            print(f"\n导入完成:")
-            print(f"  成功: {success_count} 条")
-            print(f"  跳过: {skip_count} 条")
-            print(f"  错误: {error_count} 条")
-            
-            return success_count > 0
-            
-        except json.JSONDecodeError as e:
+            stats = importer.run(iter_records(json_file), name=os.path.abspath(json_file))
+        except ValueError as e:
             print(f"JSON文件格式错误: {str(e)}")
             return False
         except Exception as e:
-            db.session.rollback()
-            print(f"导入失败: {str(e)}")
+            print(f"导入失败(已提交的部分保留，再次运行从断点继续): {str(e)}")
             return False
 
+        print(f"\n{'统计完成' if dry_run else '导入完成'}: {importer.report()}")
+        return dry_run or stats['created'] > 0
+
+
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='导入辟谣 ld.htm 页面数据到数据库')
+    parser.add_argument('--file', default=None, help='数据文件(.jsonl 或 .json)，默认 piyao_ld_results.jsonl')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='每块插入并提交的记录数')
+    parser.add_argument('--dry-run', action='store_true', help='只解析和去重，统计去重率，不写数据库')
+    parser.add_argument('--restart', action='store_true', help='忽略上次中断的断点，从头导入')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     print("=" * 60)
     print("开始导入辟谣 ld.htm 页面数据到数据库")
     print("=" * 60)
-    
-    success = import_piyao_ld_json()
-    
+
+    success = import_piyao_ld_json(args.file, args.chunk_size, args.dry_run, resume=not args.restart)
+
     if success:
         print("\n✅ 导入成功完成")
         print("\n使用方法:")
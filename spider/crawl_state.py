@@ -0,0 +1,193 @@
+"""
+爬取状态存储
+
+为增量爬取保存每个 URL 的 ETag、Last-Modified、正文哈希和列表项哈希:
+- 请求时带上 If-None-Match / If-Modified-Since，服务器返回 304 时不再下载和解析
+- 服务器不支持条件请求时，用正文哈希判断页面是否变化
+- 列表项(标题、链接等)和上次成功爬取时相同的文章直接跳过，不请求详情页
+- 列表页的 ETag/哈希等到所有文章处理完才记录，中途退出后再次运行不会把列表页当作未变化
+
+状态保存在 JSON 文件中(先写临时文件再替换，中途退出不会损坏)。
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+
+# 页面未变化(304 或正文哈希相同)
+NOT_MODIFIED = object()
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class CrawlStateStore:
+    def __init__(self, path, autosave=30):
+        """
+        Args:
+            path: 状态文件路径
+            autosave: 有更新时每隔多少秒保存一次，避免中途退出丢失太多状态。
+                每次保存都要写出全部 URL，按时间而不是按更新次数保存，
+                文章很多时写盘总量不会随文章数平方增长
+        """
+        self.path = path
+        self.autosave = autosave
+        self.logger = logging.getLogger(__name__)
+        self.pages = {}
+        # 暂不记录的页面信息 {url: ETag/哈希等}，调用 commit_page 后写入 pages
+        self.pending = {}
+        self._dirty = 0
+        self._saved_at = time.monotonic()
+        self.stats = {
+            'requests': 0,       # 实际发出的请求数
+            'fetched': 0,        # 新页面或内容有变化的页面
+            'not_modified': 0,   # 服务器返回 304
+            'unchanged': 0,      # 返回 200 但正文哈希相同
+            'skipped': 0,        # 列表项未变化，没有请求详情页
+        }
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.pages = json.load(f)
+            self.logger.info(f"加载爬取状态: {self.path}, 共 {len(self.pages)} 个URL")
+        except (OSError, ValueError) as e:
+            self.logger.error(f"加载爬取状态失败，重新开始: {self.path}, 错误: {str(e)}")
+            self.pages = {}
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.pages, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = 0
+        self._saved_at = time.monotonic()
+
+    def _touch(self):
+        self._dirty += 1
+        if self.autosave and time.monotonic() - self._saved_at >= self.autosave:
+            self.save()
+
+    def conditional_headers(self, url):
+        """上次响应的 ETag / Last-Modified 对应的条件请求头"""
+        page = self.pages.get(url, {})
+        headers = {}
+        if page.get('etag'):
+            headers['If-None-Match'] = page['etag']
+        if page.get('last_modified'):
+            headers['If-Modified-Since'] = page['last_modified']
+        return headers
+
+    def fetch(self, session, url, headers=None, conditional=True, encoding='utf-8', defer=False, **kwargs):
+        """请求页面，页面未变化时返回 NOT_MODIFIED，否则返回正文
+
+        defer=True 时新的 ETag/哈希先暂存，调用 commit_page 后才写入状态(自动保存也不会写出)，
+        用于列表页: 列表中的文章全部处理完之前中断，下次运行仍会重新处理列表。
+        请求失败时抛出 requests 的异常，由调用方处理。
+        """
+        headers = dict(headers or {})
+        if conditional:
+            headers.update(self.conditional_headers(url))
+        self.stats['requests'] += 1
+        response = session.get(url, headers=headers, **kwargs)
+        if response.status_code == 304:
+            self.stats['not_modified'] += 1
+            return NOT_MODIFIED
+        response.raise_for_status()
+        response.encoding = encoding
+        text = response.text
+
+        digest = content_hash(text)
+        changed = self.pages.get(url, {}).get('hash') != digest
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'hash': digest,
+            'fetched_at': time.time(),
+        }
+        if defer:
+            self.pending[url] = validators
+        else:
+            self.pages.setdefault(url, {}).update(validators)
+            self._touch()
+        if conditional and not changed:
+            self.stats['unchanged'] += 1
+            return NOT_MODIFIED
+        self.stats['fetched'] += 1
+        return text
+
+    def commit_page(self, url):
+        """记录 defer=True 请求时暂存的页面信息"""
+        validators = self.pending.pop(url, None)
+        if validators:
+            self.pages.setdefault(url, {}).update(validators)
+            self._touch()
+
+    def entry_changed(self, url, entry):
+        """列表项和上次成功爬取时相比是否有变化(新文章也算变化)"""
+        return self.pages.get(url, {}).get('entry') != content_hash(json.dumps(entry, sort_keys=True, ensure_ascii=False))
+
+    def commit_entry(self, url, entry):
+        """文章处理成功后记录列表项，下次列表项不变时跳过"""
+        self.pages.setdefault(url, {})['entry'] = content_hash(json.dumps(entry, sort_keys=True, ensure_ascii=False))
+        self._touch()
+
+    def skip(self, url):
+        """列表项未变化，没有请求详情页"""
+        self.stats['skipped'] += 1
+
+    def invalidate(self, url):
+        """清除 URL 的缓存信息，下次请求时完整下载(处理失败的页面需要重新爬取)"""
+        self.pending.pop(url, None)
+        page = self.pages.get(url)
+        if page:
+            for field in ('etag', 'last_modified', 'hash', 'entry'):
+                page.pop(field, None)
+            self._touch()
+
+    def report(self):
+        skipped = self.stats['skipped'] + self.stats['not_modified'] + self.stats['unchanged']
+        return (f"请求 {self.stats['requests']} 次, 新增或变化 {self.stats['fetched']} 个页面, "
+                f"跳过 {skipped} 个页面(列表项未变 {self.stats['skipped']}, "
+                f"304 {self.stats['not_modified']}, 内容未变 {self.stats['unchanged']})")
+
+
+class CrawlCheckpoint:
+    """断点信息: 本次运行从输出文件的哪个位置开始写入
+
+    运行开始时保存，正常结束时删除。中断后重新运行时，输出文件中 start 之后的
+    完整记录就是上次已完成的文章(每篇文章写完立即刷新，不需要逐篇更新断点)。
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, **data):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
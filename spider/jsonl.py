@@ -0,0 +1,97 @@
+"""
+JSONL 输出和读取
+
+爬虫每处理完一篇文章就追加一行并刷新到磁盘，不在内存中保留全部结果；
+导入脚本逐行读取，内存占用与文件大小无关。
+"""
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlWriter:
+    """追加写入 JSONL 文件，每条记录写完立即刷新"""
+
+    def __init__(self, path, fsync=False):
+        """
+        Args:
+            path: 输出文件路径
+            fsync: 是否每条记录都 fsync(断电也不丢数据，但更慢)
+        """
+        self.path = path
+        self.fsync = fsync
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'ab')
+
+    @property
+    def offset(self):
+        """已写入的字节数，用于断点续爬"""
+        return self.file.tell()
+
+    def recover(self, start, key='url'):
+        """从 start 开始检查已写入的记录，截掉末尾写了一半的行，返回已写入记录的 key 集合"""
+        keys = set()
+        end = start
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                keys.add(record.get(key))
+                end += len(line)
+        if end < self.offset:
+            logger.warning(f"截掉中断时写了一半的内容: {self.path}, {self.offset - end} 字节")
+            self.file.truncate(end)
+            self.file.seek(end)
+        return keys
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_jsonl(path, start=0, end=None):
+    """逐行读取 JSONL 文件中 [start, end) 字节范围内的记录，跳过无法解析的行(如中断时写了一半的行)"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        line_no = 0
+        while end is None or f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            line_no += 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"跳过无法解析的行: {path} 第 {line_no} 行")
+
+
+def iter_records(path):
+    """读取爬虫结果文件: .jsonl 逐行读取，旧的 .json 数组文件整体加载"""
+    if path.endswith('.jsonl'):
+        yield from iter_jsonl(path)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from json.load(f)
@@ -18,7 +18,8 @@ from urllib.parse import urljoin
 API_CONFIG = {
     'base_url': 'http://localhost:5005',
     'username': 'user1',
-    'password': 'user1123456'
+    'password': 'user1123456',
+    'batch_size': 50  # 攒够多少条后批量提交
 }
 
 class PiyaoSpider:
@@ -34,6 +35,8 @@ class PiyaoSpider:
             'existing': 0, # 已存在数
             'error': 0     # 错误数
         }
+        # 待批量提交的数据
+        self.buffer = []
         # 登录获取token
         if not self.login():
             raise Exception("API登录失败")
@@ -262,44 +265,52 @@ class PiyaoSpider:
         return article_data
 
     def save_to_api(self, data):
-        """保存数据到API"""
-        url = f"{self.api_base_url}/api/spider/data"
+        """加入待提交缓冲区，攒够一批后批量保存到API"""
+        self.buffer.append(data)
+        if len(self.buffer) >= API_CONFIG['batch_size']:
+            return self.flush_to_api()
+        return True
+
+    def flush_to_api(self):
+        """批量保存缓冲区中的数据到API"""
+        if not self.buffer:
+            return True
+        items, self.buffer = self.buffer, []
+        url = f"{self.api_base_url}/api/spider/data/batch"
         headers = {
             'Authorization': f'Bearer {self.token}',
             'Content-Type': 'application/json'
         }
         
         payload = {
-            'source': 'piyao',
-            'data': data
+            'items': [{'source': 'piyao', 'data': data} for data in items]
         }
         
-        self.logger.info(f"准备保存数据到API: {url}")
-        # self.logger.info(f"请求Headers: {headers}")
-        # self.logger.info(f"请求数据: {json.dumps(payload, ensure_ascii=False)}")
+        self.logger.info(f"准备批量保存 {len(items)} 条数据到API: {url}")
         
         try:
             response = requests.post(url, json=payload, headers=headers)
             self.logger.info(f"API响应状态码: {response.status_code}")
-            self.logger.info(f"API响应内容: {response.text}")
             
-            self.stats['total'] += 1
+            self.stats['total'] += len(items)
             
             if response.status_code == 200:
-                self.stats['new'] += 1
-                self.logger.info("数据保存成功")
-                return True
-            elif response.status_code == 400 and "已存在" in response.text:
-                self.stats['existing'] += 1
-                self.logger.info("该文章已存在，跳过")
+                result = response.json()['data']
+                self.stats['new'] += result['created']
+                self.stats['existing'] += result['updated']
+                self.stats['error'] += result['failed']
+                for item in result['results']:
+                    if item['status'] == 'error':
+                        self.logger.error(f"数据保存失败: {items[item['index']].get('title')}, {item['message']}")
+                self.logger.info(f"批量保存完成: 新增 {result['created']}, 更新 {result['updated']}, 失败 {result['failed']}")
                 return True
             else:
-                self.stats['error'] += 1
+                self.stats['error'] += len(items)
                 self.logger.error(f"API请求失败，状态码: {response.status_code}, 响应内容: {response.text}")
                 return False
                 
         except Exception as e:
-            self.stats['error'] += 1
+            self.stats['error'] += len(items)
             self.logger.error(f"保存数据时发生错误: {str(e)}")
             return False
 
@@ -334,11 +345,15 @@ class PiyaoSpider:
                 # 添加延时，避免请求过快
                 time.sleep(2)
 
+            # 提交不足一批的剩余数据
+            self.flush_to_api()
             # 记录统计信息
             self.logger.info(f"爬取完成，统计信息：{json.dumps(self.stats, ensure_ascii=False)}")
             return results
 
         finally:
+            # 出错时已爬取的数据仍然提交
+            self.flush_to_api()
             # 确保关闭浏览器
             self.driver.quit()
 
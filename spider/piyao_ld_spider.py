@@ -7,11 +7,24 @@ from bs4 import BeautifulSoup
 import logging
 import time
 from urllib.parse import urljoin
-import json
+from spider.crawl_state import CrawlStateStore, CrawlCheckpoint, NOT_MODIFIED
+from spider.jsonl import JsonlWriter
 import os
 
 class PiyaoLdSpider:
-    def __init__(self):
+    def __init__(self, state_path='crawls/state/piyao_ld.json', incremental=True,
+                 output_file='piyao_ld_results.jsonl', checkpoint_path='crawls/state/piyao_ld.checkpoint.json'):
+        """
+        Args:
+            state_path: 爬取状态文件，保存每个URL的 ETag/Last-Modified/内容哈希
+            incremental: 只爬取新增或变化的文章；为 False 时全量重新爬取(仍会更新状态)
+            output_file: 结果文件(JSONL)，每篇文章追加一行
+            checkpoint_path: 断点文件，中断后再次运行时从断点继续
+        """
+        self.output_file = output_file
+        self.checkpoint = CrawlCheckpoint(checkpoint_path)
+        # 文章之间的请求间隔(秒)
+        self.delay = 2
         self.base_url = "https://www.piyao.org.cn"
         self.list_url = "https://www.piyao.org.cn/ld.htm"
         self.headers = {
@@ -21,28 +34,41 @@ class PiyaoLdSpider:
             'Connection': 'keep-alive'
         }
         self.logger = logging.getLogger(__name__)
+        self.incremental = incremental
+        self.state = CrawlStateStore(state_path)
+        # 复用连接
+        self.session = requests.Session()
 
-    def get_page_content(self, url):
-        """获取页面内容"""
+    def get_page_content(self, url, conditional=False, defer=False):
+        """获取页面内容
+
+        conditional=True 时发送条件请求，页面和上次相比没有变化时返回 NOT_MODIFIED；
+        defer=True 时页面的 ETag/哈希等到调用 state.commit_page 后才记录
+        """
         try:
             self.logger.info(f"正在请求页面: {url}")
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()  # 检查响应状态
-            response.encoding = 'utf-8'
+            content = self.state.fetch(self.session, url, headers=self.headers,
+                                       conditional=conditional and self.incremental, defer=defer, timeout=10)
+            if content is NOT_MODIFIED:
+                self.logger.info(f"页面未变化: {url}")
+                return content
             
             # 记录响应状态
-            self.logger.info(f"页面请求成功: {url}, 状态码: {response.status_code}")
+            self.logger.info(f"页面请求成功: {url}")
             
-            return response.text
+            return content
         except requests.exceptions.RequestException as e:
             self.logger.error(f"请求失败: {url}, 错误类型: {type(e).__name__}, 错误信息: {str(e)}")
             return None
 
-    def parse_list_page(self):
-        """解析列表页面，获取文章链接"""
-        content = self.get_page_content(self.list_url)
-        if not content:
-            return None
+    def parse_list_page(self, conditional=True):
+        """解析列表页面，获取文章链接，conditional=True 且列表页未变化时返回 NOT_MODIFIED
+
+        列表页的 ETag/哈希在所有文章处理完后由 crawl 记录
+        """
+        content = self.get_page_content(self.list_url, conditional=conditional, defer=True)
+        if content is NOT_MODIFIED or not content:
+            return content or None
 
         soup = BeautifulSoup(content, 'html.parser')
         articles = []
@@ -96,10 +122,10 @@ class PiyaoLdSpider:
         return articles
 
     def parse_detail_page(self, url):
-        """解析详情页面，获取标题和内容"""
-        content = self.get_page_content(url)
-        if not content:
-            return None
+        """解析详情页面，获取标题和内容，页面未变化时返回 NOT_MODIFIED"""
+        content = self.get_page_content(url, conditional=True)
+        if content is NOT_MODIFIED or not content:
+            return content or None
 
         soup = BeautifulSoup(content, 'html.parser')
         article_data = {'url': url}
@@ -157,12 +183,25 @@ class PiyaoLdSpider:
 
         return article_data
 
-    def crawl(self, max_articles=None):
-        """开始爬取"""
+    def crawl(self, max_articles=None, resume=True):
+        """开始爬取
+
+        每篇文章处理完立即追加到 output_file 并记录断点；resume=True 时如果上次运行中断，
+        跳过上次已写入的文章继续爬取。
+
+        Returns:
+            统计信息 {'written', 'skipped', 'failed', 'resumed', 'output'}，获取列表失败时返回 None
+        """
         self.logger.info("开始爬取辟谣网站 ld.htm 页面")
         
-        # 获取列表页文章
-        articles = self.parse_list_page()
+        # 获取列表页文章；上次运行中断时列表页可能没有变化，不发条件请求，保证能从断点继续
+        checkpoint = self.checkpoint.load() if resume else None
+        articles = self.parse_list_page(conditional=checkpoint is None)
+        if articles is NOT_MODIFIED:
+            self.logger.info("列表页未变化，没有新文章")
+            self.state.save()
+            self.checkpoint.clear()
+            return {'written': 0, 'skipped': 0, 'failed': 0, 'resumed': 0, 'output': self.output_file}
         if not articles:
             self.logger.error("获取文章列表失败")
             return None
@@ -172,49 +211,67 @@ class PiyaoLdSpider:
             articles = articles[:max_articles]
             self.logger.info(f"限制爬取数量为 {max_articles} 篇")
 
-        results = []
-        for index, article in enumerate(articles, 1):
-            self.logger.info(f"正在爬取第 {index}/{len(articles)} 篇文章: {article['title']}")
-            
-            # 获取文章详情
-            detail = self.parse_detail_page(article['url'])
-            if detail:
-                # 合并列表页和详情页的信息
-                detail.update({
-                    'list_title': article['title'],
-                    'aria_title': article.get('aria_title', ''),
-                    'target': article.get('target', '')
-                })
-                results.append(detail)
+        stats = {'written': 0, 'skipped': 0, 'failed': 0, 'resumed': 0, 'output': self.output_file}
+        with JsonlWriter(self.output_file) as writer:
+            # 从断点恢复: 上次运行写入的完整记录不再爬取，截掉写了一半的行
+            done = set()
+            if checkpoint and checkpoint.get('output') == self.output_file and checkpoint['start'] <= writer.offset:
+                start = checkpoint['start']
+                done = writer.recover(start)
+                stats['resumed'] = len(done)
+                self.logger.info(f"从断点继续，上次已完成 {len(done)} 篇文章")
             else:
-                self.logger.warning(f"跳过文章: {article['title']}")
-            
-            # 添加延时，避免请求过快
-            time.sleep(2)
-
-        # 保存结果到文件
-        if results:
-            try:
-                output_file = 'piyao_ld_results.json'
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(results, f, ensure_ascii=False, indent=2)
-                self.logger.info(f"结果已保存到 {output_file}")
+                start = writer.offset
+                self.checkpoint.save(output=self.output_file, start=start)
+
+            for index, article in enumerate(articles, 1):
+                if article['url'] in done:
+                    continue
+                if self.incremental and not self.state.entry_changed(article['url'], article):
+                    self.logger.debug(f"文章未变化，跳过: {article['title']}")
+                    self.state.skip(article['url'])
+                    stats['skipped'] += 1
+                    continue
+
+                self.logger.info(f"正在爬取第 {index}/{len(articles)} 篇文章: {article['title']}")
                 
-                # 同时保存一个简化版本，只包含标题和URL
-                summary_file = 'piyao_ld_summary.json'
-                summary = [{'title': r.get('title', ''), 'url': r.get('url', '')} for r in results]
-                with open(summary_file, 'w', encoding='utf-8') as f:
-                    json.dump(summary, f, ensure_ascii=False, indent=2)
-                self.logger.info(f"摘要已保存到 {summary_file}")
+                # 获取文章详情
+                detail = self.parse_detail_page(article['url'])
+                if detail is NOT_MODIFIED:
+                    self.state.commit_entry(article['url'], article)
+                    stats['skipped'] += 1
+                elif detail:
+                    # 合并列表页和详情页的信息
+                    detail.update({
+                        'list_title': article['title'],
+                        'aria_title': article.get('aria_title', ''),
+                        'target': article.get('target', '')
+                    })
+                    writer.write(detail)
+                    self.state.commit_entry(article['url'], article)
+                    stats['written'] += 1
+                else:
+                    self.logger.warning(f"跳过文章: {article['title']}")
+                    self.state.invalidate(article['url'])
+                    stats['failed'] += 1
                 
-            except Exception as e:
-                self.logger.error(f"保存结果失败: {str(e)}")
+                # 添加延时，避免请求过快
+                if self.delay:
+                    time.sleep(self.delay)
 
-        return results
+        # 有文章失败时下次重新下载列表页，保证失败的文章会被重试；全部成功才记录列表页
+        if stats['failed']:
+            self.state.invalidate(self.list_url)
+        else:
+            self.state.commit_page(self.list_url)
+        self.state.save()
+        self.checkpoint.clear()
+        self.logger.info(f"爬取状态: {self.state.report()}")
+        self.logger.info(f"本次写入 {stats['written'] + stats['resumed']} 篇文章到 {self.output_file}")
+        return stats
 
-def run_spider(max_articles=None):
-    """运行爬虫"""
-    # 配置日志
+def setup_logging():
+    """配置日志"""
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -223,16 +280,20 @@ def run_spider(max_articles=None):
             logging.FileHandler('piyao_ld_spider.log', encoding='utf-8')
         ]
     )
+
+
+def run_spider(max_articles=None, incremental=True):
+    """运行爬虫，incremental=True 时只爬取新增或变化的文章"""
+    setup_logging()
+    spider = PiyaoLdSpider(incremental=incremental)
+    stats = spider.crawl(max_articles=max_articles)
     
-    spider = PiyaoLdSpider()
-    results = spider.crawl(max_articles=max_articles)
-    
-    if results:
-        logging.info(f"成功爬取 {len(results)} 篇文章")
-        return results
-    else:
+    if stats is None:
         logging.error("爬取失败")
         return None
+    logging.info(f"成功爬取 {stats['written'] + stats['resumed']} 篇文章，"
+                 f"跳过 {stats['skipped']} 篇，失败 {stats['failed']} 篇")
+    return stats
 
 if __name__ == "__main__":
     # 可以通过参数限制爬取数量，避免第一次测试时爬取太多
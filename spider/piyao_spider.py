@@ -7,11 +7,20 @@ import logging
 import time
 from urllib.parse import urljoin
 import re
-import json
+from spider.crawl_state import CrawlStateStore, NOT_MODIFIED
+from spider.jsonl import JsonlWriter
 
 class PiyaoSpider:
-    def __init__(self):
+    def __init__(self, state_path='crawls/state/piyao.json', incremental=True, output_file='piyao_results.jsonl'):
+        """
+        Args:
+            state_path: 爬取状态文件，保存每个URL的 ETag/Last-Modified/内容哈希
+            incremental: 只爬取新增或变化的文章；为 False 时全量重新爬取(仍会更新状态)
+            output_file: 结果文件(JSONL)，每篇文章处理完立即追加一行
+        """
+        self.output_file = output_file
         self.base_url = "https://www.piyao.org.cn"
+        self.list_url = f"{self.base_url}/bq/index.htm"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -19,29 +28,44 @@ class PiyaoSpider:
             'Connection': 'keep-alive'
         }
         self.logger = logging.getLogger(__name__)
+        self.incremental = incremental
+        self.state = CrawlStateStore(state_path)
+        # 文章之间的请求间隔(秒)
+        self.delay = 2
+        # 复用连接
+        self.session = requests.Session()
 
-    def get_page_content(self, url):
-        """获取页面内容"""
+    def get_page_content(self, url, conditional=False, defer=False):
+        """获取页面内容
+
+        conditional=True 时发送条件请求，页面和上次相比没有变化时返回 NOT_MODIFIED；
+        defer=True 时页面的 ETag/哈希等到调用 state.commit_page 后才记录
+        """
         try:
             self.logger.info(f"正在请求页面: {url}")
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()  # 检查响应状态
-            response.encoding = 'utf-8'
+            content = self.state.fetch(self.session, url, headers=self.headers,
+                                       conditional=conditional and self.incremental, defer=defer, timeout=10)
+            if content is NOT_MODIFIED:
+                self.logger.info(f"页面未变化: {url}")
+                return content
             
             # 记录响应状态
-            self.logger.info(f"页面请求成功: {url}, 状态码: {response.status_code}")
+            self.logger.info(f"页面请求成功: {url}")
             
-            return response.text
+            return content
         except requests.exceptions.RequestException as e:
             self.logger.error(f"请求失败: {url}, 错误类型: {type(e).__name__}, 错误信息: {str(e)}")
             return None
 
     def parse_list_page(self):
-        """解析列表页"""
-        url = f"{self.base_url}/bq/index.htm"
-        content = self.get_page_content(url)
-        if not content:
-            return None
+        """解析列表页，列表页未变化时返回 NOT_MODIFIED
+
+        列表页的 ETag/哈希在所有文章处理完后由 crawl 记录
+        """
+        url = self.list_url
+        content = self.get_page_content(url, conditional=True, defer=True)
+        if content is NOT_MODIFIED or not content:
+            return content or None
 
         soup = BeautifulSoup(content, 'html.parser')
         articles = []
@@ -84,14 +108,14 @@ class PiyaoSpider:
 
         return articles
 
-    def parse_detail_page(self, url):
-        """解析详情页"""
-        content = self.get_page_content(url)
-        if not content:
-            return None
+    def parse_detail_page(self, url, conditional=True):
+        """解析详情页，conditional=True 且页面未变化时返回 NOT_MODIFIED"""
+        content = self.get_page_content(url, conditional=conditional)
+        if content is NOT_MODIFIED or not content:
+            return content or None
 
         soup = BeautifulSoup(content, 'html.parser')
-        article_data = {}
+        article_data = {'url': url}
 
         try:
             # 获取标题
@@ -155,46 +179,71 @@ class PiyaoSpider:
         return article_data
 
     def crawl(self):
-        """开始爬取"""
+        """开始爬取
+
+        每篇文章处理完立即追加到 output_file，写入后才记录为已爬取；列表页等所有文章处理完才记录，
+        中途退出时已写入的文章不会丢失，未处理的文章下次运行时继续爬取。
+        """
         self.logger.info("开始爬取辟谣网站")
         
         # 获取列表页文章
         articles = self.parse_list_page()
+        if articles is NOT_MODIFIED:
+            self.logger.info("列表页未变化，没有新文章")
+            self.state.save()
+            return []
         if not articles:
             self.logger.error("获取文章列表失败")
             return None
 
         results = []
-        for index, article in enumerate(articles, 1):
-            self.logger.info(f"正在爬取第 {index}/{len(articles)} 篇文章: {article['title']}")
-            
-            # 获取文章详情
-            detail = self.parse_detail_page(article['url'])
-            if detail:
-                # 如果存在真相链接，继续爬取
-                if 'truth_link' in detail:
-                    self.logger.info(f"正在爬取真相页面: {detail['truth_link']}")
-                    truth_detail = self.parse_detail_page(detail['truth_link'])
-                    if truth_detail:
-                        detail['truth_content'] = truth_detail
-                results.append(detail)
-            
-            # 添加延时，避免请求过快
-            time.sleep(2)
+        failed = 0
+        with JsonlWriter(self.output_file) as writer:
+            for index, article in enumerate(articles, 1):
+                if self.incremental and not self.state.entry_changed(article['url'], article):
+                    self.logger.debug(f"文章未变化，跳过: {article['title']}")
+                    self.state.skip(article['url'])
+                    continue
+
+                self.logger.info(f"正在爬取第 {index}/{len(articles)} 篇文章: {article['title']}")
+                
+                # 获取文章详情
+                detail = self.parse_detail_page(article['url'])
+                if detail is NOT_MODIFIED:
+                    self.state.commit_entry(article['url'], article)
+                elif detail:
+                    # 如果存在真相链接，继续爬取(文章有变化时真相页面也要完整获取)
+                    if 'truth_link' in detail:
+                        self.logger.info(f"正在爬取真相页面: {detail['truth_link']}")
+                        truth_detail = self.parse_detail_page(detail['truth_link'], conditional=False)
+                        if truth_detail:
+                            detail['truth_content'] = truth_detail
+                    # 先写入结果文件再记录为已爬取
+                    writer.write(detail)
+                    results.append(detail)
+                    self.state.commit_entry(article['url'], article)
+                else:
+                    self.state.invalidate(article['url'])
+                    failed += 1
+                
+                # 添加延时，避免请求过快
+                if self.delay:
+                    time.sleep(self.delay)
 
-        # 保存结果到文件
+        # 有文章失败时下次重新下载列表页，保证失败的文章会被重试；全部成功才记录列表页
+        if failed:
+            self.state.invalidate(self.list_url)
+        else:
+            self.state.commit_page(self.list_url)
+        self.state.save()
+        self.logger.info(f"爬取状态: {self.state.report()}")
         if results:
-            try:
-                with open('piyao_results.json', 'w', encoding='utf-8') as f:
-                    json.dump(results, f, ensure_ascii=False, indent=2)
-                self.logger.info("结果已保存到 piyao_results.json")
-            except Exception as e:
-                self.logger.error(f"保存结果失败: {str(e)}")
+            self.logger.info(f"{len(results)} 篇文章已追加到 {self.output_file}")
 
         return results
 
-def run_spider():
-    """运行爬虫"""
+def run_spider(incremental=True):
+    """运行爬虫，incremental=True 时只爬取新增或变化的文章"""
     # 配置日志
     logging.basicConfig(
         level=logging.INFO,
@@ -205,12 +254,15 @@ def run_spider():
         ]
     )
     
-    spider = PiyaoSpider()
+    spider = PiyaoSpider(incremental=incremental)
     results = spider.crawl()
     
     if results:
         logging.info(f"成功爬取 {len(results)} 篇文章")
         return results
+    elif results is not None:
+        logging.info("没有新增或变化的文章")
+        return results
     else:
         logging.error("爬取失败")
         return None
@@ -7,63 +7,57 @@ from typing import Tuple
 import uuid
 import numpy as np
 import requests
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from webdriver_manager.chrome import ChromeDriverManager
+from contextlib import contextmanager
 from model.article import ArticleContent, Comment
 from spider.toutiao_search.toutiao_util import parse_toutiao_page_id
+from spider.toutiao_search.browser_pool import get_browser_pool
 from utils.utils import convert_text_count_to_int
 from bs4 import BeautifulSoup
 import zipfile
 import cv2
 import time
 
-def start_get_toutiao_detail_page_out(request_url):
-    toutiaoDetailPage =ToutiaoDetailPage(None)
-    toutiaoDetailPage.start_get_toutiao_detail_page(request_url,quit_driver=True)
+def start_get_toutiao_detail_page_out(request_url, source=''):
+    toutiaoDetailPage =ToutiaoDetailPage(None, source)
+    toutiaoDetailPage.start_get_toutiao_detail_page(request_url)
 
 class ToutiaoDetailPage:
-    def __init__(self,driver,source,cookies=[],data_from='web',article_content=ArticleContent(),update_fource=False) -> None:
+    def __init__(self,driver,source,cookies=[],data_from='web',article_content=ArticleContent(),update_fource=False,pool=None) -> None:
+        # 不传 driver 时，需要浏览器的方法从浏览器池借用，用完归还，不再每个详情页启动一个 Chrome
         self.driver = driver
+        self.pool = pool
         self.cache_dir = 'cache_dir/toutiao'
         self.article_content = article_content
         self.data_from = data_from
         self.source = source
         self.update_fource = update_fource
         os.makedirs(self.cache_dir , exist_ok=True)
-        try:
-            if driver is None:
-                options = Options()
-                options.add_argument('--headless')  # 无头模式
-                options.add_argument('--no-sandbox')  # 禁用沙箱
-                options.add_argument('--disable-dev-shm-usage')  # 禁用/dev/shm使用
-                options.add_argument('--disable-gpu')  # 禁用GPU加速
-                options.add_argument('--disable-infobars')  # 禁用信息栏
-                options.add_argument('--disable-notifications')  # 禁用通知
-                options.add_argument('--disable-extensions')  # 禁用扩展
-                options.add_argument('--remote-debugging-port=9222')  # 设置调试端口
-                options.add_argument('--window-size=1920,1080')  # 设置窗口大小
-                options.add_argument('--start-maximized')  # 最大化窗口
-                options.add_argument('--disable-blink-features=AutomationControlled')  # 禁用自动化控制检测
-                
-                # 使用 webdriver_manager 自动管理 ChromeDriver
-                service = Service("/usr/local/bin/chromedriver")
-                self.driver = webdriver.Chrome(
-                    service=service,
-                    options=options
-                )
-                print("创建driver成功")
-        except Exception as e:
-            print(f"创建driver失败: {e}")        
+
+    @contextmanager
+    def lease_driver(self):
+        """已有 driver 时直接使用，否则从浏览器池借一个"""
+        if self.driver is not None:
+            yield self.driver
+            return
+        if self.pool is None:
+            self.pool = get_browser_pool()
+        with self.pool.lease() as driver:
+            self.driver = driver
+            try:
+                yield driver
+            finally:
+                self.driver = None
 
     def start_get_toutiao_detail_page(self,request_url='',quit_driver=False):
-        driver = self.driver
+        with self.lease_driver() as driver:
+            return self._start_get_toutiao_detail_page(driver,request_url,quit_driver)
+
+    def _start_get_toutiao_detail_page(self,driver,request_url='',quit_driver=False):
         try:
             print("正在访问用户页面...")
             
@@ -362,10 +356,15 @@ class ToutiaoDetailPage:
         if detail_url is None or detail_url == "":
             detail_url = self.article_content.origin_url
         if self.article_content.genre == 1:
-            w_item_ori = self.get_video_detail_page(detail_url)
+            if "douyin.com" in detail_url:
+                print("douyin.com")
+                return
+            with self.lease_driver():
+                w_item_ori = self.get_video_detail_page(detail_url)
             return w_item_ori
         elif self.article_content.genre == 2:
-            w_item_ori = self.get_article_detail_page_toutiao(detail_url)
+            with self.lease_driver():
+                w_item_ori = self.get_article_detail_page_toutiao(detail_url)
             return  w_item_ori 
     def get_article_detail_page_toutiao(self,detail_url:str):
         # 等待文章详情可见（超时40秒）
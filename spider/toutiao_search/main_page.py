@@ -6,10 +6,7 @@ import random
 import re
 import numpy as np
 import requests
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
@@ -20,6 +17,8 @@ from curl2pyreqs.ulti import parseCurlString,parseCurlCommand
 from spider.toutiao_search.toutiao_util import parse_toutiao_page_id
 from utils.utils import convert_text_count_to_int,get_full_url
 from spider.toutiao_search.detail_page import ToutiaoDetailPage
+from spider.toutiao_search.browser_pool import get_browser_pool
+from contextlib import contextmanager
 
 import time
 
@@ -46,8 +45,10 @@ def start_get_toutiao_mobile_articles_out(source:str, search_type='all'):
     toutiao_crawler.start_get_toutiao_list_page(search_type)
 
 class ToutiaoMainListPage:
-    def __init__(self, driver, source:str) -> None:
+    def __init__(self, driver, source:str, pool=None) -> None:
+        # 不传 driver 时从浏览器池借用，列表页和详情页共用池里常驻的浏览器
         self.driver = driver
+        self.pool = pool if pool is not None else get_browser_pool()
        
         self.cache_dir = 'cache_dir/toutiao'
         self.cookies = []
@@ -57,58 +58,19 @@ class ToutiaoMainListPage:
         
         # 创建缓存目录
         os.makedirs(self.cache_dir, exist_ok=True)
-        
-        try:
-            if driver is None:
-                options = Options()
-                os.environ["DISPLAY"] = ":99"
-                # Linux服务器环境必需的配置
-                options.binary_location = '/usr/bin/google-chrome-stable'  # 使用实际的Chrome路径
-                
-                # 必需的基本配置
-                options.add_argument('--headless=new')  # 使用新版无头模式
-                options.add_argument('--no-sandbox')  # 在Linux服务器端必需
-                options.add_argument('--disable-dev-shm-usage')  # 解决内存不足问题
-                options.add_argument('--disable-gpu')  # Linux服务器端推荐
-                
-                # 调试端口配置
-                options.add_argument('--remote-debugging-port=9222')
-                
-                # 浏览器配置
-                options.add_argument('--window-size=1920,1080')
-                options.add_argument('--start-maximized')
-                options.add_argument('--lang=zh-CN')
-                options.add_argument('--disable-blink-features=AutomationControlled')
-                
-                # 设置用户代理
-                options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-                
-                # 页面加载策略
-                options.page_load_strategy = 'normal'
-                
-                # 创建service并启动driver
-                try:
-                    service = Service("/usr/local/bin/chromedriver", log_path='chromedriver.log')
-                    driver = webdriver.Chrome(service=service, options=options)
-                    
-                    # 设置超时时间
-                    driver.set_page_load_timeout(60)
-                    driver.set_script_timeout(60)
-                    driver.implicitly_wait(20)
-                    
-                    print("Chrome WebDriver创建成功")
-                except Exception as e:
-                    print(f"创建Chrome WebDriver失败: {e}")
-                    if driver:
-                        driver.quit()
-                    raise
-                
-                print("创建driver成功")
-        except Exception as e:
-            print(f"创建driver失败: {e}")
-            if self.driver:
-                self.driver.quit()
-            raise e
+
+    @contextmanager
+    def lease_driver(self):
+        """已有 driver 时直接使用，否则从浏览器池借一个"""
+        if self.driver is not None:
+            yield self.driver
+            return
+        with self.pool.lease() as driver:
+            self.driver = driver
+            try:
+                yield driver
+            finally:
+                self.driver = None
 
     def start_get_toutiao_list_page(self,search_type='all'):
         search_words = query_map[self.source]
@@ -121,82 +83,40 @@ class ToutiaoMainListPage:
             print(f"\n{'='*50}")
             print(f"当前搜索关键词: {searchKeyword}")
             
-            # 为每个关键词创建新的driver实例
+            # 每个关键词从浏览器池借一个浏览器，处理完归还
             try:
-                options = Options()
-                
-                # 基本设置
-       
-                options.add_argument('--allow-running-insecure-content')
-                
-                # 浏览器配置
-                options.add_argument('--window-size=1920,1080')
-                options.add_argument('--start-maximized')
-                options.add_argument('--lang=zh-CN')
-                options.add_argument('--disable-blink-features=AutomationControlled')
-                options.add_argument("--headless=new")
-              
-                options.set_capability('goog:loggingPrefs', {'performance': 'ALL'}) # 开启日志性能监听
-                options.add_argument("--auto-open-devtools-for-tabs") 
-                # 设置用户代理
-                options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-                
-                # 页面加载策略
-                options.page_load_strategy = 'normal'  # 改为normal，等待页面加载完成
-                
-                # 创建service
-                service = Service("/usr/local/bin/chromedriver")
-                driver = webdriver.Chrome(service=service, options=options)
-                
-                # 设置超时时间
-                driver.set_page_load_timeout(60)  # 增加到60秒
-                driver.set_script_timeout(60)     # 增加到60秒
-                driver.implicitly_wait(20)        # 增加到20秒
-                options.add_argument("--disable-blink-features=AutomationControlled")
-                driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-                    "source": """
-                        Object.defineProperty(navigator, 'webdriver', {
-                            get: () => undefined
-                        })
-                    """
-                })
-                # 构建搜索URL
-                if search_type == 'video':
-                    url = f"https://so.toutiao.com/search?keyword={searchKeyword}&pd=xiaoshipin&source=aladdin&dvpf=pc&aid=4916&page_num=0"
-                    print(f"视频搜索URL: {url}")
-                    self.get_toutiao_search_video(driver,url)
-                else:
-                    url = f'https://so.toutiao.com/search?dvpf=pc&source=input&keyword={searchKeyword}&pd=synthesis&filter_vendor=site&index_resource=site&filter_period=all'
-                    print(f"综合搜索URL: {url}")
-                    
-                    # 添加重试机制
-                    max_retries = 3
-                    for retry in range(max_retries):
-                        try:
-                            self.get_toutiao_search_all(driver,url)
-                            break
-                        except Exception as e:
-                            print(f"第 {retry + 1} 次尝试失败: {e}")
-                            if retry < max_retries - 1:
-                                print("等待10秒后重试...")  # 增加重试等待时间
-                                time.sleep(10)
-                                continue
-                            else:
-                                print("已达到最大重试次数，跳过当前关键词")
-                
+                with self.lease_driver() as driver:
+                    # 构建搜索URL
+                    if search_type == 'video':
+                        url = f"https://so.toutiao.com/search?keyword={searchKeyword}&pd=xiaoshipin&source=aladdin&dvpf=pc&aid=4916&page_num=0"
+                        print(f"视频搜索URL: {url}")
+                        self.get_toutiao_search_video(driver,url)
+                    else:
+                        url = f'https://so.toutiao.com/search?dvpf=pc&source=input&keyword={searchKeyword}&pd=synthesis&filter_vendor=site&index_resource=site&filter_period=all'
+                        print(f"综合搜索URL: {url}")
+                        
+                        # 添加重试机制
+                        max_retries = 3
+                        for retry in range(max_retries):
+                            try:
+                                self.get_toutiao_search_all(driver,url)
+                                break
+                            except Exception as e:
+                                print(f"第 {retry + 1} 次尝试失败: {e}")
+                                if retry < max_retries - 1:
+                                    print("等待10秒后重试...")  # 增加重试等待时间
+                                    time.sleep(10)
+                                    continue
+                                else:
+                                    print("已达到最大重试次数，跳过当前关键词")
+                print(f"关键词 {searchKeyword} 处理完成，已归还浏览器")
             except Exception as e:
                 print(f"处理关键词 {searchKeyword} 时出错: {e}")
-            finally:
-                try:
-                    if driver:
-                        driver.quit()
-                        print(f"关键词 {searchKeyword} 处理完成，已关闭浏览器")
-                except:
-                    pass
                     
             print(f"{'='*50}\n")
             # 每个关键词之间增加等待时间
             time.sleep(15)
+        print(self.pool.report())
 
     def get_toutiao_search_all(self,driver,url:str):
         print(f"正在访问搜索页面URL: {url}")
@@ -289,7 +209,8 @@ class ToutiaoMainListPage:
                             source=self.source,
                             cookies=driver.get_cookies(),
                             article_content=artcle_item,
-                            update_fource=True
+                            update_fource=True,
+                            pool=self.pool
                         )
                         detailInstance.get_detail_page_by_requests(url_result)
                         print(f"文章 {title} 处理完成")
@@ -321,10 +242,9 @@ class ToutiaoMainListPage:
         except Exception as e:
             print(f"搜索页面处理出错: {e}")
         finally:
-            print("搜索完成，关闭浏览器")
-            driver.quit()
+            print("搜索完成")
     def get_toutiao_search_video(self,driver,url:str):
-        self.driver.get(url)
+        driver.get(url)
         # 等待视频列表加载
         try:
             WebDriverWait(driver, 60).until(
@@ -359,7 +279,7 @@ class ToutiaoMainListPage:
                 print(f"视频链接: {video_link}")
                 print('-' * 40)
                 artcle_item = ArticleContent(id_str=parse_toutiao_page_id(video_link),genre=1,origin_url=video_link,image_url=cover_url, title=title)
-                detailInstance = ToutiaoDetailPage(driver=None,source=self.source,cookies=self.driver.get_cookies(),article_content=artcle_item,update_fource=True)
+                detailInstance = ToutiaoDetailPage(driver=None,source=self.source,cookies=driver.get_cookies(),article_content=artcle_item,update_fource=True,pool=self.pool)
                 # detailInstance.start_get_toutiao_detail_page()
                 detailInstance.get_detail_page_by_requests(video_link)
                 result.append(artcle_item)
@@ -390,7 +310,7 @@ class ToutiaoMainListPage:
         # },
             print(item)
             article_content = ArticleContent(id_str=docId,genre=2,author=authorId,origin_url=url,image_url=image_url, title=title,comment_count= comment_count)
-            detailInstance = ToutiaoDetailPage(driver=None,source=self.source,cookies=self.driver.get_cookies(),article_content=article_content)
+            detailInstance = ToutiaoDetailPage(driver=None,source=self.source,cookies=self.cookies,article_content=article_content,pool=self.pool)
             # detailInstance.start_get_toutiao_detail_page()
             detailInstance.get_detail_page_by_requests(url)
             return 0
@@ -401,6 +321,8 @@ class ToutiaoMainListPage:
         try:
             if page_num > 30:
                 return
+            if driver is not None:
+                self.cookies = driver.get_cookies()
         # 示例使用
             curl_string = self.curl_string
             # urllib_request = curl_to_urllib(curl_string, url_params=url_params, data_params=data_params)
@@ -422,8 +344,8 @@ class ToutiaoMainListPage:
 
             # 使用代理下载图像
     # 根据 method 执行不同的请求
-                # 创建线程池，最多使用 5 个线程
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+            # 详情页任务都要从浏览器池借浏览器，线程数超过池大小只会排队等待
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.pool.size) as executor:
                 # 提交任务
                 # futures =[] {executor.submit(self.detail_page_task, ): i for i in range(10)}  # 提交 10 个任务
                 futures =[]
@@ -9,6 +9,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from spider.piyao_ld_spider import run_spider
+from spider.jsonl import iter_jsonl
 
 def main():
     """主函数"""
@@ -16,13 +17,15 @@ def main():
     print("=" * 50)
     
     # 先爬取少量文章进行测试
-    results = run_spider(max_articles=3)
+    stats = run_spider(max_articles=3)
     
-    if results:
-        print(f"\n✅ 测试成功！共爬取 {len(results)} 篇文章")
+    if stats is not None:
+        print(f"\n✅ 测试成功！本次写入 {stats['written']} 篇文章，跳过 {stats['skipped']} 篇")
         print("\n文章摘要:")
         print("-" * 30)
-        for i, article in enumerate(results, 1):
+        # 结果文件追加写入，只显示本次写入的最后几行
+        records = list(iter_jsonl(stats['output']))[-stats['written']:] if stats['written'] else []
+        for i, article in enumerate(records, 1):
             title = article.get('title', '无标题')
             url = article.get('url', '无URL')
             content_length = len(article.get('content', ''))
@@ -36,8 +39,7 @@ def main():
     print("=" * 50)
     print("测试完成！")
     print("结果文件:")
-    print("- piyao_ld_results.json (完整数据)")
-    print("- piyao_ld_summary.json (摘要数据)")
+    print("- piyao_ld_results.jsonl (完整数据，每行一篇文章)")
     print("- piyao_ld_spider.log (日志文件)")
 
 if __name__ == "__main__":
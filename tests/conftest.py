@@ -0,0 +1,152 @@
+"""测试共用的模拟聊天供应商
+
+MockProviderHandler 模拟 OpenAI 兼容的 /chat/completions 接口和 Dify 的 /workflows/run(只支持流式)，
+行为由服务器属性配置，测试中可以随时修改:
+
+- reply: 回复内容，字符串或 callable(server, body)
+- status / error: 返回的状态码和错误信息(状态码不是 200 时返回错误)
+- delay: 开始响应前的等待时间(秒)；token_delay: 流式输出的数据块间隔
+- tokens: 流式输出的数据块，为 None 时整段回复作为一个数据块
+- models: {模型名: {属性: 值}}，按请求的模型覆盖以上属性
+
+启动: fixture server(默认配置)，或 fixture mock_provider(**属性) 启动多个。
+
+同时统计 requests(请求数)、connections(连接数)、active/peak(并发数)、
+completed(完整输出的流式请求数)，客户端提前断开时设置 cancelled。
+"""
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+DEFAULT_REPLY = '经核实，该说法不实。'
+USAGE = {'prompt_tokens': 20, 'completion_tokens': 30, 'total_tokens': 50}
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def option(self, name, body):
+        return self.server.models.get(body.get('model'), {}).get(name, getattr(self.server, name))
+
+    def send_payload(self, status, content_type, payload):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+        time.sleep(self.option('delay', body))
+        with self.server.lock:
+            self.server.active -= 1
+
+        status = self.option('status', body)
+        if status != 200:
+            error_type = 'server_error' if status >= 500 else 'invalid_request_error'
+            payload = json.dumps({'error': {'message': self.option('error', body), 'type': error_type}},
+                                 ensure_ascii=False).encode('utf-8')
+            self.send_payload(status, 'application/json', payload)
+            return
+
+        reply = self.option('reply', body)
+        if callable(reply):
+            reply = reply(self.server, body)
+        if body.get('stream') or self.path.endswith('/workflows/run'):
+            self.stream(body, self.option('tokens', body) or [reply])
+            return
+        payload = json.dumps({
+            'id': 'chatcmpl-mock', 'object': 'chat.completion', 'model': body['model'],
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply}, 'finish_reason': 'stop'}],
+            'usage': USAGE,
+        }, ensure_ascii=False).encode('utf-8')
+        self.send_payload(200, 'application/json', payload)
+
+    def stream(self, body, tokens):
+        """/chat/completions 返回 OpenAI 格式的数据块，/workflows/run 返回 Dify 的 text_chunk 事件"""
+        workflow = self.path.endswith('/workflows/run')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for token in tokens:
+                if workflow:
+                    event = {'event': 'text_chunk', 'data': {'text': token}}
+                else:
+                    event = {'id': 'chatcmpl-mock', 'object': 'chat.completion.chunk', 'model': body['model'],
+                             'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]}
+                self.write_chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n")
+                time.sleep(self.option('token_delay', body))
+            if workflow:
+                self.write_chunk('data: {"event": "workflow_finished", "data": {"status": "succeeded"}}\n\n')
+            else:
+                self.write_chunk('data: [DONE]\n\n')
+            self.write_chunk('')
+            self.server.completed += 1
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.cancelled.set()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_mock_provider(**options):
+    """启动模拟供应商，options 覆盖默认的服务器属性"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockProviderHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = server.connections = server.active = server.peak = server.completed = 0
+    server.cancelled = threading.Event()
+    server.reply = DEFAULT_REPLY
+    server.status = 200
+    server.error = 'upstream overloaded'
+    server.delay = 0
+    server.token_delay = 0
+    server.tokens = None
+    server.models = {}
+    for name, value in options.items():
+        setattr(server, name, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def mock_provider():
+    """启动模拟供应商的工厂: mock_provider(**属性)，测试结束时全部关闭"""
+    servers = []
+
+    def start(**options):
+        server = start_mock_provider(**options)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def server(mock_provider):
+    """一个默认配置的模拟供应商，测试中可以修改服务器属性"""
+    return mock_provider()
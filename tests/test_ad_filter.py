@@ -0,0 +1,78 @@
+"""广告过滤测试"""
+
+import os
+import re
+import json
+
+from app.scraper import ad_filter as ad_filter_module
+from app.scraper import settings
+from app.scraper.ad_filter import AdFilter
+
+CONFIG = settings.TRUTH_GUARDIAN_SETTINGS['AD_FILTER']
+
+TEXT = '\n'.join([
+    '网传某地自来水有毒，经核实为谣言。',
+    '限时优惠，点击购买',
+    '当地水务部门已发布检测报告。',
+    '购买链接：https://shop.example.com',
+    '联系方式：13800000000 欢迎咨询',
+    '详情见 www.example.cn 页面',
+    '请勿轻信和转发未经核实的消息。',
+])
+
+
+def legacy_filter_ads(text, ad_keywords, ad_patterns):
+    """改造前的逐段落写法，作为对照"""
+    kept = []
+    for para in re.split(r'\n+', text):
+        if any(keyword in para for keyword in ad_keywords):
+            continue
+        if any(re.search(pattern, para) for pattern in ad_patterns):
+            continue
+        kept.append(para)
+    return '\n'.join(kept)
+
+
+def test_matches_legacy_filter(monkeypatch):
+    expected = legacy_filter_ads(TEXT, CONFIG['KEYWORDS'], CONFIG['PATTERNS'])
+    assert expected.count('\n') == 2
+
+    engine = AdFilter(CONFIG['KEYWORDS'], CONFIG['PATTERNS'], config_file='')
+    assert engine.filter(TEXT) == expected
+    assert engine.filter('\n\n' + TEXT + '\n') == legacy_filter_ads('\n\n' + TEXT + '\n', CONFIG['KEYWORDS'],
+                                                                   CONFIG['PATTERNS'])
+    assert engine.is_ad('加入我们的微信群：truthguardian2024')
+
+    # 未安装 pyahocorasick 时关键词并入正则，结果相同
+    monkeypatch.setattr(ad_filter_module, 'ahocorasick', None)
+    assert AdFilter(CONFIG['KEYWORDS'], CONFIG['PATTERNS'], config_file='').filter(TEXT) == expected
+
+
+def test_pattern_across_paragraphs_checked_per_paragraph():
+    engine = AdFilter([], [r'优惠\s+活动'], config_file='')
+    assert engine.classify(['限时优惠', '活动介绍', '优惠 活动']) == [False, False, True]
+
+
+def test_anchored_pattern_matches_each_paragraph():
+    paragraphs = ['网传消息不实', '联系客服领取优惠', '本店特价仅需9.9元', '请以官方通报为准']
+    engine = AdFilter([], [r'^联系', r'\d+(\.\d+)?元$'], config_file='')
+    assert engine.classify(paragraphs) == [False, True, True, False]
+    assert engine.filter('\n'.join(paragraphs)) == legacy_filter_ads('\n'.join(paragraphs), [],
+                                                                    [r'^联系', r'\d+(\.\d+)?元$'])
+
+
+def test_hot_reload_from_config_file(tmp_path):
+    path = tmp_path / 'ad_filter.json'
+    path.write_text(json.dumps({'keywords': ['团购']}), encoding='utf-8')
+    engine = AdFilter(['广告'], [], config_file=str(path), check_interval=0)
+    assert engine.filter('正文\n团购热线\n广告位') == '正文\n广告位'
+
+    path.write_text(json.dumps({'keywords': ['广告位'], 'patterns': [r'热线\d+']}), encoding='utf-8')
+    os.utime(path, (1, 1))
+    assert engine.filter('正文\n团购热线\n广告位\n热线123') == '正文\n团购热线'
+
+    # 配置有误时保留原配置
+    path.write_text(json.dumps({'patterns': ['(']}), encoding='utf-8')
+    os.utime(path, (2, 2))
+    assert engine.reload() is False
+    assert engine.patterns == [r'热线\d+']
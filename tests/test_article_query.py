@@ -0,0 +1,77 @@
+"""辟谣文章查询层测试
+
+验证列表/详情接口的 SQL 条数不随文章数增长(无 N+1)，并且不超过声明的查询预算
+"""
+
+import pytest
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.debunk import DebunkArticle, RumorReport, ClarificationReport
+from app.services import article_query
+from app.utils.query_counter import count_queries
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def seed(article_count, reports_per_article=3):
+    authors = []
+    for i in range(5):
+        author = User(user_name=f'author{i}', password_hash='x')
+        db.session.add(author)
+        authors.append(author)
+    db.session.flush()
+
+    for i in range(article_count):
+        article = DebunkArticle(title=f'文章{i}', content='内容', author_id=authors[i % 5].id, tags='健康')
+        for j in range(reports_per_article):
+            article.rumor_reports.append(RumorReport(title=f'谣言{i}-{j}', content='谣言'))
+            article.clarification_reports.append(ClarificationReport(title=f'澄清{i}-{j}', content='澄清'))
+        db.session.add(article)
+    db.session.commit()
+
+
+def query_count(response):
+    assert response.status_code == 200, response.get_json()
+    return int(response.headers['X-Query-Count'])
+
+
+def test_list_query_count_is_constant(app, client):
+    seed(60)
+    small = query_count(client.get('/api/debunk/articles?per_page=10'))
+    large = query_count(client.get('/api/debunk/articles?per_page=50'))
+    assert small == large
+
+    filtered = client.get('/api/debunk/articles?per_page=50&tags=健康')
+    assert len(filtered.get_json()['data']['items']) == 50
+
+
+def test_detail_within_budget(app, client):
+    seed(1, reports_per_article=5)
+    response = client.get('/api/debunk/articles/1')
+    assert query_count(response) <= 3
+    data = response.get_json()
+    assert len(data['rumor_reports']) == 5
+    assert len(data['clarification_reports']) == 5
+
+
+def test_load_by_ids(app):
+    seed(1, reports_per_article=3)
+    with count_queries() as counter:
+        reports = article_query.load_by_ids(RumorReport, [3, '1', 'x', 999, 3])
+    assert [report.id for report in reports] == [3, 1]
+    assert counter['count'] == 1
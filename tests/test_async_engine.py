@@ -0,0 +1,82 @@
+import asyncio
+from urllib.parse import urlsplit
+
+from app.scraper.async_engine import AsyncSearchEngine
+from app.scraper.replay_server import ReplayServer, load_responses
+from app.scraper.spiders.xinlang_search import XinlangSearchSpider
+
+CONFIG = {
+    'CONCURRENCY': 16,
+    'PER_HOST': 3,
+    'HOST_LIMITS': {},
+    'RETRIES': 5,
+    'BACKOFF_BASE': 0.001,
+    'BACKOFF_MAX': 0.01,
+    'BATCH_SIZE': 25,
+}
+
+
+def page_body(page):
+    return {'data': {'results': [{
+        'id': f'{page}-{i}',
+        'docid': f'doc-{page}-{i}',
+        'title': f'第{page}页第{i}条',
+        'url': f'https://news.sina.com.cn/{page}/{i}.shtml',
+        'datetime': '2025-03-01 12:00:00',
+    } for i in range(10)]}}
+
+
+def make_spider(base_url):
+    spider = XinlangSearchSpider()
+    spider.search_url = base_url + urlsplit(spider.search_url).path
+    spider.api_base_url = base_url
+    return spider
+
+
+def crawl(server, keywords, max_pages, record_path=None):
+    async def main():
+        base_url = await server.start()
+        try:
+            engine = AsyncSearchEngine(make_spider(base_url), CONFIG, record_path=record_path)
+            return await engine.crawl(keywords, max_pages)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_crawl_retries_and_writes_all_pages():
+    """多个关键词 × 页码并发抓取，503 重试后全部成功，数据攒批写入入库接口"""
+    spider = XinlangSearchSpider()
+    responses = []
+    for page in range(1, 4):
+        request = spider.build_request('辟谣', page)
+        responses.append({'url': request['url'], 'params': request['params'], 'body': page_body(page)})
+    server = ReplayServer(responses, latency=0.01, error_rate=0.2, seed=1)
+
+    stats = crawl(server, ['辟谣', '谣言', '真相', '疫苗'], 5)
+
+    assert stats['pages'] == 20
+    assert stats['pages_failed'] == 0
+    assert stats['retries'] == server.stats['errors'] > 0
+    assert stats['items'] == server.stats['items'] == 200
+    assert stats['created'] == 200 and stats['failed'] == 0
+    # 同一主机的并发不超过 PER_HOST
+    assert 1 < server.stats['max_concurrent'] <= CONFIG['PER_HOST']
+
+
+def test_recorded_responses_replay_exactly(tmp_path):
+    """引擎录制的响应可以被回放服务器按请求精确回放"""
+    spider = XinlangSearchSpider()
+    responses = []
+    for page in range(1, 3):
+        request = spider.build_request('辟谣', page)
+        responses.append({'url': request['url'], 'params': request['params'], 'body': page_body(page)})
+    record_path = tmp_path / 'recorded.jsonl'
+    crawl(ReplayServer(responses), ['辟谣'], 2, record_path=str(record_path))
+
+    recorded = load_responses(record_path)
+    assert sorted(record['params']['page'] for record in recorded) == [1, 2]
+    server = ReplayServer(recorded)
+    stats = crawl(server, ['辟谣'], 2)
+    assert stats['items'] == 20 and server.stats['misses'] == 0
+    assert {record['body']['data']['results'][0]['id'] for record in recorded} == {'1-0', '2-0'}
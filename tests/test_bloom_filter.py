@@ -0,0 +1,104 @@
+"""布隆过滤器去重测试
+
+验证可扩展布隆过滤器的误判率和扩容、文件/Redis 持久化，以及去重管道跨次运行时
+只在命中时查询数据库
+"""
+
+import hashlib
+from types import SimpleNamespace
+
+import fakeredis
+from scrapy.exceptions import DropItem
+from app.scraper.bloom import ScalableBloomFilter, RedisScalableBloomFilter
+from app.scraper.pipelines.duplicate_filter import DuplicateFilterPipeline
+
+
+def fingerprint(value):
+    return hashlib.sha256(str(value).encode('utf-8')).hexdigest()
+
+
+def test_error_rate_and_growth():
+    bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01)
+    collisions = sum(bloom.add(fingerprint(i)) for i in range(5000))
+    assert collisions < 50
+    assert len(bloom.slices) == 3 and len(bloom) == 5000 - collisions
+    assert all(fingerprint(i) in bloom for i in range(5000))
+    false_positives = sum(fingerprint(f'other{i}') in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.01
+
+
+def test_file_and_redis_persistence(tmp_path):
+    path = str(tmp_path / 'test.bloom')
+    bloom = ScalableBloomFilter.load(path, initial_capacity=100)
+    for i in range(250):
+        bloom.add(fingerprint(i))
+    bloom.save(path)
+
+    loaded = ScalableBloomFilter.load(path, initial_capacity=100)
+    assert len(loaded) == 250 and loaded.memory_bytes == bloom.memory_bytes
+    assert all(fingerprint(i) in loaded for i in range(250))
+    loaded.add(fingerprint('new'))
+    loaded.save(path)
+    assert fingerprint('new') in ScalableBloomFilter.load(path, initial_capacity=100)
+
+    client = fakeredis.FakeRedis()
+    shared = RedisScalableBloomFilter(client, 'bloom', initial_capacity=100)
+    for i in range(150):
+        shared.add(fingerprint(i))
+    other = RedisScalableBloomFilter(client, 'bloom', initial_capacity=100)
+    assert len(other.slices) == 2 and len(other) == 150
+    assert fingerprint(10) in other and fingerprint('missing') not in other
+
+
+class FakeSpider:
+    name = 'test'
+
+    def __init__(self, stored):
+        self.settings = {'FLASK_APP': object()}
+        self.stored = stored
+        self.lookups = 0
+
+    def check_duplicate(self, item_type, item):
+        self.lookups += 1
+        return item['news_id'] in self.stored
+
+
+def run(pipeline, spider, items):
+    passed = []
+    pipeline.open_spider(spider)
+    for item in items:
+        try:
+            passed.append(pipeline.process_item(item, spider)['news_id'])
+        except DropItem:
+            pass
+    stats = pipeline.get_stats()
+    pipeline.close_spider(spider)
+    return passed, stats
+
+
+def test_pipeline_skips_db_lookups_across_runs(tmp_path):
+    config = {'BACKEND': 'file', 'PATH': str(tmp_path / '{spider}.bloom'), 'INITIAL_CAPACITY': 1000}
+    items = [{'news_id': f'n{i}', 'url': f'https://example.com/{i}', 'title': f'新闻{i}'} for i in range(100)]
+    stored = {'n0', 'n1'}
+
+    # 首次运行过滤器为空，逐条查询数据库
+    spider = FakeSpider(stored)
+    passed, stats = run(DuplicateFilterPipeline(config), spider, items + items[:5])
+    # 数据库中已存在的 n0、n1 重复出现时再次查询
+    assert len(passed) == 98 and spider.lookups == 102
+    assert stats['duplicates'] == 7
+    stored.update(passed)
+
+    # 再次运行: 新数据不查数据库，历史数据命中后精确检查
+    spider = FakeSpider(stored)
+    new_items = [{'news_id': f'm{i}', 'url': f'https://example.com/m{i}', 'title': f'新{i}'} for i in range(50)]
+    passed, stats = run(DuplicateFilterPipeline(config), spider, items[:20] + new_items)
+    assert len(passed) == 50 and spider.lookups == 20 + stats['false_positives']
+    assert stats['db_lookups_avoided'] == 50 - stats['false_positives']
+    assert stats['bloom_hits'] == 20 + stats['false_positives']
+    assert stats['bloom_items'] == 150 and stats['bloom_memory_bytes'] > 0
+
+    # 没有数据库时以布隆过滤器为准
+    spider = SimpleNamespace(name='test', settings={})
+    passed, _ = run(DuplicateFilterPipeline(config), spider, items[:3] + [{'news_id': 'x', 'title': '全新'}])
+    assert passed == ['x']
@@ -0,0 +1,122 @@
+"""头条爬虫浏览器池测试
+
+用替身浏览器验证复用、按页数重建、崩溃后丢弃重建以及并发借用上限
+"""
+
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException
+
+from spider.toutiao_search.browser_pool import BrowserPool
+
+
+class FakeDriver:
+    instances = []
+
+    def __init__(self):
+        self.quit_count = 0
+        self.visited = []
+        self.fail = None
+        FakeDriver.instances.append(self)
+
+    def get(self, url):
+        if self.fail:
+            raise self.fail
+        self.visited.append(url)
+
+    def get_cookies(self):
+        return [{'name': 'tt_webid', 'value': '1'}]
+
+    def quit(self):
+        self.quit_count += 1
+
+
+@pytest.fixture(autouse=True)
+def reset_instances():
+    FakeDriver.instances = []
+
+
+def test_reuse_and_recycle():
+    """浏览器在借用之间复用，加载 max_pages 个页面后重建"""
+    pool = BrowserPool(size=1, max_pages=3, driver_factory=FakeDriver)
+    for i in range(5):
+        with pool.lease() as driver:
+            driver.get(f'https://www.toutiao.com/{i}')
+            assert driver.get_cookies()[0]['name'] == 'tt_webid'
+            driver.quit()  # 旧代码里的 quit() 不会关闭池中的浏览器
+
+    first, second = FakeDriver.instances
+    assert len(first.visited) == 3 and first.quit_count == 1
+    assert len(second.visited) == 2 and second.quit_count == 0
+
+    metrics = pool.get_metrics()
+    assert metrics['startups'] == 2 and metrics['leases'] == 5
+    assert metrics['startups_avoided'] == 3 and metrics['recycled'] == 1
+    assert metrics['pages'] == 5 and metrics['page_latency']['p95'] >= 0
+    assert '节省启动 3 次' in pool.report()
+
+    pool.close()
+    assert second.quit_count == 1
+
+
+def test_crashed_driver_is_replaced():
+    """会话失效的浏览器归还时丢弃，页面超时的浏览器继续使用"""
+    pool = BrowserPool(size=1, max_pages=0, driver_factory=FakeDriver)
+    with pool.lease() as driver:
+        driver._driver.fail = TimeoutException('timeout')
+        with pytest.raises(TimeoutException):
+            driver.get('https://www.toutiao.com/slow')
+        driver._driver.fail = None
+    with pool.lease() as driver:
+        assert driver._driver is FakeDriver.instances[0]
+        driver._driver.fail = InvalidSessionIdException('session deleted')
+        try:
+            driver.get('https://www.toutiao.com/crash')
+        except InvalidSessionIdException:
+            pass
+    with pool.lease() as driver:
+        driver.get('https://www.toutiao.com/after')
+
+    assert len(FakeDriver.instances) == 2
+    assert FakeDriver.instances[0].quit_count == 1
+    assert FakeDriver.instances[1].visited == ['https://www.toutiao.com/after']
+    assert pool.get_metrics()['crashed'] == 1
+
+
+def test_lease_limit_across_threads():
+    """同时借出的浏览器不超过 size，其余线程等待归还"""
+    pool = BrowserPool(size=2, driver_factory=FakeDriver)
+    pool.start()
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def task(i):
+        with pool.lease() as driver:
+            with lock:
+                active.append(i)
+                peak.append(len(active))
+            driver.get(f'https://www.toutiao.com/{i}')
+            time.sleep(0.02)
+            with lock:
+                active.remove(i)
+
+    threads = [threading.Thread(target=task, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+    assert len(FakeDriver.instances) == 2
+    assert pool.get_metrics()['startups_avoided'] == 6
+
+    with pool.lease():
+        with pool.lease():
+            pool.lease_timeout = 0.05
+            with pytest.raises(TimeoutError):
+                with pool.lease():
+                    pass
+    pool.close()
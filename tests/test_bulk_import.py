@@ -0,0 +1,112 @@
+"""辟谣数据批量导入测试
+
+验证 (来源, 标题) 去重、分块提交、断点续导、--dry-run，以及绕过 ORM 事件写入后
+标签/全文索引/统计汇总与重建结果一致
+"""
+
+import pytest
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.debunk import DebunkArticle, DebunkContent, Tag
+from app.models.search_index import SearchPosting
+from app.services import search_service, stats_service, tag_service
+from app.services.bulk_import import BulkImporter, piyao_article_record, piyao_content_record
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(user_name='admin', password_hash='x'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class MemoryCheckpoint:
+    def __init__(self):
+        self.data = None
+
+    def load(self):
+        return self.data
+
+    def save(self, **data):
+        self.data = data
+
+    def clear(self):
+        self.data = None
+
+
+def ld_records(count, start=0):
+    return [{'title': f'谣言{i}的真相', 'content': f'经核实，第{i}条网传消息不实。', 'url': f'/{i}.htm'}
+            for i in range(start, start + count)]
+
+
+def postings():
+    return sorted((p.doc_type, p.doc_id, p.term, round(p.tf, 3)) for p in SearchPosting.query.all())
+
+
+def test_import_articles_dedup_and_derived(app):
+    db.session.add(DebunkArticle(title='谣言0的真相', content='已有', source='piyao.org.cn', author_id=1,
+                                 tags='辟谣'))
+    db.session.commit()
+
+    records = ld_records(5) + ld_records(2, start=3) + [{'title': '', 'content': 'x'}]
+    importer = BulkImporter(DebunkArticle, piyao_article_record, chunk_size=2)
+    stats = importer.run(records)
+
+    assert stats['created'] == 4 and stats['duplicates'] == 3 and stats['invalid'] == 1
+    assert stats['chunks'] == 2
+    assert DebunkArticle.query.count() == 5
+    assert '去重率 42.9%' in importer.report()
+
+    # 标签关联和全文索引与重建结果一致
+    counts = {tag.name: tag.article_count for tag in Tag.query}
+    assert counts == {'辟谣': 5, '官方': 4}
+    indexed = postings()
+    assert indexed
+    tag_service.rebuild_tags()
+    search_service.rebuild_index('debunk_article')
+    assert {tag.name: tag.article_count for tag in Tag.query} == counts
+    assert postings() == indexed
+
+
+def test_import_content_syncs_stats(app):
+    records = [{'truth_link': f'https://www.piyao.org.cn/{i}.htm',
+                'truth_content': {'title': f'标题{i}', 'content': '疫苗谣言澄清', 'source': '新华社'}}
+               for i in range(3)] + [{'title': '没有truth_content'}]
+    stats = BulkImporter(DebunkContent, piyao_content_record).run(records)
+
+    assert stats['created'] == 3 and stats['invalid'] == 1
+    row = DebunkContent.query.filter_by(title='标题1').one()
+    assert row.source == 'piyao.org.cn' and row.author_name == '新华社' and row.status == 'published'
+    assert stats_service.check_stats() == {}
+
+
+def test_dry_run_and_resume(app):
+    stats = BulkImporter(DebunkArticle, piyao_article_record, dry_run=True).run(ld_records(4) + ld_records(2))
+    assert stats['created'] == 4 and stats['duplicates'] == 2
+    assert DebunkArticle.query.count() == 0
+
+    checkpoint = MemoryCheckpoint()
+
+    def failing_records():
+        yield from ld_records(5)
+        raise RuntimeError('数据库连接断开')
+
+    with pytest.raises(RuntimeError):
+        BulkImporter(DebunkArticle, piyao_article_record, chunk_size=2, checkpoint=checkpoint) \
+            .run(failing_records(), name='ld.jsonl')
+    # 前两块已提交，第三块(第5条)未提交
+    assert DebunkArticle.query.count() == 4
+    assert checkpoint.data == {'name': 'ld.jsonl', 'position': 4}
+
+    stats = BulkImporter(DebunkArticle, piyao_article_record, chunk_size=2, checkpoint=checkpoint) \
+        .run(ld_records(6), name='ld.jsonl')
+    assert stats['resumed'] == 4 and stats['created'] == 2 and stats['duplicates'] == 0
+    assert DebunkArticle.query.count() == 6
+    assert checkpoint.data is None
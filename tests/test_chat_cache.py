@@ -0,0 +1,115 @@
+"""聊天回复缓存测试
+
+本地模拟 OpenAI 兼容接口并统计收到的请求数，验证精确/语义命中、否定提问不命中、供应商排除、流式回复写入缓存和命中统计
+"""
+
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.services.chat.factory import ChatServiceFactory
+from app.services.chat.transport import close_transports
+
+
+@pytest.fixture
+def app(server):
+    """创建测试应用实例"""
+    # 回复中带上第几次请求，用来区分缓存命中和重新调用
+    server.reply = lambda server, body: f"第{server.requests}次回答: 经核实，该说法不实。"
+    app = create_app('test')
+    app.config.update(OPENAI_API_BASE=f'http://127.0.0.1:{server.server_address[1]}/v1',
+                      OPENAI_API_KEY='sk-test', OPENAI_API_PROXY=None)
+    app.extensions['chat_cache'].token_price = {'openai': 0.02}
+    app.extensions['chat_cache'].semantic = True
+    ChatServiceFactory._instances.clear()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    ChatServiceFactory._instances.clear()
+    close_transports()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(app):
+    user = User(user_name='chat', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': 'Bearer ' + create_access_token(identity=user)}
+
+
+def ask(client, headers, question, system=None, **kwargs):
+    messages = [{'role': 'system', 'content': system}] if system else []
+    messages.append({'role': 'user', 'content': question})
+    return client.post('/api/chat/completions', headers=headers,
+                       json=dict({'provider': 'openai', 'model': 'gpt-test', 'messages': messages}, **kwargs))
+
+
+def test_exact_and_semantic_hits(client, headers, server):
+    first = ask(client, headers, '5G基站辐射致癌吗').get_json()
+    assert 'cache' not in first
+
+    exact = ask(client, headers, '  5G基站辐射致癌吗 ', user='someone').get_json()
+    assert exact['cache']['type'] == 'exact'
+    assert exact['choices'] == first['choices']
+
+    semantic = ask(client, headers, '5G基站辐射致癌吗？').get_json()
+    assert semantic['cache']['type'] == 'semantic'
+    assert semantic['choices'] == first['choices']
+    assert server.requests == 1
+
+    # 不同的问题、不同的 system 消息或参数都不能命中
+    ask(client, headers, '喝板蓝根能预防新冠吗')
+    ask(client, headers, '5G基站辐射致癌吗', system='用英文回答')
+    ask(client, headers, '5G基站辐射致癌吗', temperature=0.1)
+    assert server.requests == 4
+
+
+def test_negated_question_misses(client, headers, server):
+    pairs = [('5G基站辐射会致癌吗', '5G基站辐射不会致癌吗'),
+             ('喝酒能杀死新冠病毒吗', '喝酒不能杀死新冠病毒吗'),
+             ('疫苗导致自闭症', '疫苗不导致自闭症'),
+             ('网上说5G基站的电磁辐射会致癌，还会影响周边居民健康，这是真的吗',
+              '网上说5G基站的电磁辐射不会致癌，还会影响周边居民健康，这是真的吗')]
+    for question, negated in pairs:
+        ask(client, headers, question)
+        assert 'cache' not in ask(client, headers, negated).get_json()
+    assert server.requests == 8
+
+
+def test_opt_out(app, client, headers, server):
+    ask(client, headers, '5G基站辐射致癌吗')
+    ask(client, headers, '5G基站辐射致癌吗', cache=False)
+    assert server.requests == 2
+
+    app.extensions['chat_cache'].excluded.add('openai')
+    ask(client, headers, '5G基站辐射致癌吗')
+    assert server.requests == 3
+
+
+def test_stream_result_cached_and_stats(client, headers, server):
+    response = ask(client, headers, '5G基站辐射致癌吗', stream=True)
+    assert response.mimetype == 'text/event-stream'
+    response.get_data()
+
+    cached = ask(client, headers, '5G基站辐射致癌吗').get_json()
+    assert cached['cache']['type'] == 'exact'
+    assert cached['choices'][0]['message']['content'].startswith('第1次回答')
+    ask(client, headers, '喝板蓝根能预防新冠吗')
+    ask(client, headers, '喝板蓝根能预防新冠吗？', stream=True).get_data()
+    assert server.requests == 2
+
+    stats = client.get('/api/cache/chat/stats', headers=headers).get_json()['data']
+    openai = stats['providers']['openai']
+    assert (openai['hit_exact'], openai['hit_semantic'], openai['miss']) == (1, 1, 2)
+    assert openai['hit_ratio'] == 0.5
+    # 非流式回复带有 usage，命中时计入省下的 token 和费用
+    assert openai['saved_tokens'] == 50 and openai['saved_cost'] == 0.001
+    assert stats['total']['saved_calls'] == 2
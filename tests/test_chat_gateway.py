@@ -0,0 +1,88 @@
+"""聊天网关测试
+
+本地模拟一个较慢的 OpenAI 兼容接口并统计收到的请求数，验证相同请求合并、并发限制、队列满时返回 429 和统计接口
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.services.chat.factory import ChatServiceFactory
+from app.services.chat.gateway import ChatGateway, GatewayRejected
+from app.services.chat.transport import close_transports
+
+
+@pytest.fixture
+def app(server):
+    """创建测试应用实例(关闭回复缓存，只验证网关)"""
+    server.delay = 0.3
+    app = create_app('test')
+    app.config.update(OPENAI_API_BASE=f'http://127.0.0.1:{server.server_address[1]}/v1',
+                      OPENAI_API_KEY='sk-test', OPENAI_API_PROXY=None)
+    app.extensions.pop('chat_cache', None)
+    app.extensions['chat_gateway'] = ChatGateway(max_concurrency=2, max_queue=2, queue_timeout=5)
+    ChatServiceFactory._instances.clear()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    ChatServiceFactory._instances.clear()
+    close_transports()
+
+
+@pytest.fixture
+def headers(app):
+    user = User(user_name='chat', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': 'Bearer ' + create_access_token(identity=user)}
+
+
+def burst(app, headers, questions):
+    """并发发送一组提问，返回响应列表"""
+    def ask(question):
+        with app.test_client() as client:
+            response = client.post('/api/chat/completions', headers=headers, json={
+                'provider': 'openai', 'model': 'gpt-test',
+                'messages': [{'role': 'user', 'content': question}]})
+            return response.status_code, response.get_json(), response.headers
+
+    with ThreadPoolExecutor(len(questions)) as pool:
+        return list(pool.map(ask, questions))
+
+
+def test_identical_requests_coalesced(app, headers, server):
+    responses = burst(app, headers, ['5G基站辐射致癌吗'] * 8)
+    assert [status for status, _, _ in responses] == [200] * 8
+    assert server.requests == 1
+    assert sum(1 for _, body, _ in responses if body.get('coalesced')) == 7
+    assert len({body['choices'][0]['message']['content'] for _, body, _ in responses}) == 1
+
+
+def test_concurrency_limit_and_load_shedding(app, headers, server):
+    responses = burst(app, headers, [f'第{index}个谣言是真的吗' for index in range(6)])
+    statuses = sorted(status for status, _, _ in responses)
+    # 2 个并发 + 2 个排队，其余直接返回 429
+    assert statuses == [200, 200, 200, 200, 429, 429]
+    assert server.peak <= 2 and server.requests == 4
+    rejected = next((body, headers) for status, body, headers in responses if status == 429)
+    assert rejected[0]['error']['code'] == 'queue_full'
+    assert rejected[1]['Retry-After'] == '1'
+
+
+def test_queue_timeout_and_stats(app, headers, server):
+    gateway = app.extensions['chat_gateway']
+    gateway.queue_timeout = 0.1
+    with gateway.slot('openai'), gateway.slot('openai'):
+        with pytest.raises(GatewayRejected) as e:
+            gateway.complete('openai', None, lambda: {})
+    assert e.value.reason == 'queue_timeout'
+
+    stats = app.test_client().get('/api/chat/gateway/stats', headers=headers).get_json()['stats']
+    openai = stats['providers']['openai']
+    assert (openai['admitted'], openai['queued'], openai['timeouts']) == (2, 1, 1)
+    assert openai['active'] == 0 and stats['in_flight'] == 0
@@ -0,0 +1,173 @@
+"""聊天供应商路由测试
+
+本地启动两个 OpenAI 兼容的模拟供应商(openai、deepseek)，注入耗时和错误，
+验证按耗时选择路线、5xx 和超时切换、连续失败后暂停、对冲请求、流式切换和路由状态接口
+"""
+
+import json
+import time
+
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.services.chat.cache import init_chat_cache
+from app.services.chat.factory import ChatServiceFactory
+from app.services.chat.router import ProviderRouter
+from app.services.chat.transport import close_transports
+
+
+@pytest.fixture
+def providers(mock_provider):
+    # 回复内容为供应商名称，用来判断走了哪条路线
+    return {name: mock_provider(reply=name) for name in ('openai', 'deepseek')}
+
+
+@pytest.fixture
+def app(providers):
+    """创建测试应用实例(关闭回复缓存和网关，只验证路由)"""
+    app = create_app('test')
+    app.config.update(
+        OPENAI_API_BASE=f"http://127.0.0.1:{providers['openai'].server_address[1]}/v1",
+        OPENAI_API_KEY='sk-test', OPENAI_API_PROXY=None,
+        DEEPSEEK_API_BASE=f"http://127.0.0.1:{providers['deepseek'].server_address[1]}/v1",
+        DEEPSEEK_API_KEY='sk-test', DEEPSEEK_API_PROXY=None,
+        CHAT_HTTP_READ_TIMEOUT=0.5
+    )
+    app.extensions.pop('chat_cache', None)
+    app.extensions.pop('chat_gateway', None)
+    app.extensions['chat_router'] = ProviderRouter([('openai', 'gpt-test'), ('deepseek', 'deepseek-test')],
+                                                   min_samples=2, cooldown=60, explore=0)
+    ChatServiceFactory._instances.clear()
+    close_transports()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    ChatServiceFactory._instances.clear()
+    close_transports()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(app):
+    user = User(user_name='chat', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': 'Bearer ' + create_access_token(identity=user)}
+
+
+def ask(client, headers, **kwargs):
+    return client.post('/api/chat/completions', headers=headers, json=dict(
+        {'provider': 'auto', 'messages': [{'role': 'user', 'content': '5G基站辐射致癌吗'}]}, **kwargs))
+
+
+def test_prefers_faster_provider(client, headers, providers):
+    providers['openai'].delay = 0.1
+    for _ in range(4):
+        ask(client, headers)
+    # 两条路线都有足够样本后，都走更快的 deepseek
+    for _ in range(3):
+        body = ask(client, headers).get_json()
+        assert body['routing']['provider'] == 'deepseek'
+        assert body['choices'][0]['message']['content'] == 'deepseek'
+
+    # 指定模型时只使用该模型的路线
+    body = ask(client, headers, model='gpt-test').get_json()
+    assert body['choices'][0]['message']['content'] == 'openai'
+
+
+def test_request_without_provider_uses_default_source(app, client, headers, providers):
+    messages = [{'role': 'user', 'content': '5G基站辐射致癌吗'}]
+    body = client.post('/api/chat/completions', headers=headers,
+                       json={'model': 'gpt-test', 'messages': messages}).get_json()
+    assert body['choices'][0]['message']['content'] == 'openai'
+    assert 'routing' not in body
+
+    app.config['DEFAULT_CHAT_SOURCE'] = 'deepseek'
+    body = client.post('/api/chat/completions', headers=headers,
+                       json={'model': 'deepseek-test', 'messages': messages}).get_json()
+    assert body['choices'][0]['message']['content'] == 'deepseek'
+
+    # 默认供应商为 auto 时由路由选择，与显式传 provider=auto 相同
+    app.config['DEFAULT_CHAT_SOURCE'] = 'auto'
+    providers['openai'].status = 503
+    body = client.post('/api/chat/completions', headers=headers, json={'messages': messages}).get_json()
+    assert body['routing']['attempts'] == ['openai/gpt-test', 'deepseek/deepseek-test']
+    assert providers['deepseek'].requests == 2
+
+
+def test_failover_and_ejection(app, client, headers, providers):
+    providers['openai'].status = 503
+    for _ in range(2):
+        body = ask(client, headers).get_json()
+        assert body['routing'] == {'provider': 'deepseek', 'model': 'deepseek-test',
+                                   'attempts': ['openai/gpt-test', 'deepseek/deepseek-test']}
+    # 样本足够后错误率过高的路线排到后面，之后直接使用 deepseek
+    body = ask(client, headers).get_json()
+    assert body['routing']['attempts'] == ['deepseek/deepseek-test']
+    assert providers['openai'].requests == 2
+
+    # 指定供应商时不切换，直接返回供应商的错误；连续失败 3 次后暂停
+    assert ask(client, headers, provider='openai', model='gpt-test').status_code == 503
+    openai = next(route for route in app.extensions['chat_router'].get_stats()['routes']
+                  if route['provider'] == 'openai')
+    assert openai['consecutive_failures'] == 3 and openai['ejected_for'] > 0
+
+    # 读取超时同样切换
+    app.extensions['chat_router'].reset()
+    providers['openai'].status = 200
+    providers['openai'].delay = 1
+    body = ask(client, headers).get_json()
+    assert body['routing']['attempts'] == ['openai/gpt-test', 'deepseek/deepseek-test']
+
+
+def test_routing_not_cached(app, client, headers, providers):
+    init_chat_cache(app)
+    providers['openai'].status = 503
+    first = ask(client, headers).get_json()
+    assert first['routing']['attempts'] == ['openai/gpt-test', 'deepseek/deepseek-test']
+
+    # 缓存命中时不带上一次请求的路由和切换信息
+    cached = ask(client, headers).get_json()
+    assert cached['cache']['type'] == 'exact'
+    assert 'routing' not in cached
+    assert cached['choices'] == first['choices']
+
+
+def test_hedged_request(app, client, headers, providers):
+    router = app.extensions['chat_router']
+    router.hedge = True
+    router.hedge_delay = 0.05
+    providers['openai'].delay = 0.3
+    begin = time.monotonic()
+    body = ask(client, headers).get_json()
+    assert time.monotonic() - begin < 0.25
+    assert body['routing']['provider'] == 'deepseek'
+    assert body['routing']['attempts'] == ['openai/gpt-test', 'deepseek/deepseek-test']
+    assert providers['openai'].requests == 1 and providers['deepseek'].requests == 1
+
+
+def test_stream_failover_and_routing_state(client, headers, providers):
+    providers['openai'].status = 500
+    for _ in range(2):
+        response = ask(client, headers, stream=True)
+        assert response.mimetype == 'text/event-stream'
+        events = [line[6:] for line in response.get_data(as_text=True).splitlines() if line.startswith('data: ')]
+        assert json.loads(events[0])['choices'][0]['delta']['content'] == 'deepseek'
+
+    state = client.get('/api/chat/routing', headers=headers).get_json()['routing']
+    assert [route['provider'] for route in state['routes']] == ['deepseek', 'openai']
+    openai = state['routes'][1]
+    assert (openai['requests'], openai['failures'], openai['error_rate']) == (2, 2, 1.0)
+    assert state['routes'][0]['failovers'] == 2
+
+    assert client.delete('/api/chat/routing', headers=headers).get_json()['success']
+    state = client.get('/api/chat/routing', headers=headers).get_json()['routing']
+    assert all(route['requests'] == 0 for route in state['routes'])
@@ -0,0 +1,94 @@
+"""聊天流式输出测试
+
+本地模拟 OpenAI 兼容和 Dify 的流式接口，验证 /api/chat/completions 的 stream 模式
+按到达顺序转发 chat.completion.chunk、上游出错时返回 JSON 错误、客户端断开时取消上游请求
+"""
+
+import json
+
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.services.chat.factory import ChatServiceFactory
+from app.services.chat.transport import close_transports
+
+TOKENS = ['经核实', '，', '该消息', '不实', '。']
+
+
+@pytest.fixture
+def app(server):
+    """创建测试应用实例"""
+    server.tokens = TOKENS
+    server.token_delay = 0.01
+    server.models = {'bad-model': {'status': 404, 'error': '模型不存在'}, 'slow-model': {'tokens': TOKENS * 20}}
+    app = create_app('test')
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/v1'
+    app.config.update(OPENAI_API_BASE=base_url, OPENAI_API_KEY='sk-test', OPENAI_API_PROXY=None,
+                      DIFY_API_BASE_URL=base_url, DIFY_API_KEY='app-test')
+    ChatServiceFactory._instances.clear()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    ChatServiceFactory._instances.clear()
+    close_transports()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(app):
+    user = User(user_name='chat', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': 'Bearer ' + create_access_token(identity=user)}
+
+
+def read_events(response):
+    events = [line[len('data: '):] for line in response.get_data(as_text=True).split('\n\n') if line]
+    assert events[-1] == '[DONE]'
+    return [json.loads(event) for event in events[:-1]]
+
+
+@pytest.mark.parametrize('provider', ['openai', 'dify'])
+def test_stream_relays_chunks(client, headers, provider):
+    response = client.post('/api/chat/completions', headers=headers, json={
+        'provider': provider, 'model': 'gpt-test', 'stream': True,
+        'messages': [{'role': 'user', 'content': '这条消息是真的吗？'}]
+    })
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = read_events(response)
+    assert all(chunk['object'] == 'chat.completion.chunk' and chunk['provider'] == provider for chunk in chunks)
+    assert ''.join(chunk['choices'][0]['delta'].get('content', '') for chunk in chunks) == ''.join(TOKENS)
+
+
+def test_stream_upstream_error_returns_json(client, headers):
+    response = client.post('/api/chat/completions', headers=headers, json={
+        'provider': 'openai', 'model': 'bad-model', 'stream': True,
+        'messages': [{'role': 'user', 'content': '你好'}]
+    })
+
+    assert response.status_code == 404
+    assert response.get_json()['message'] == '模型不存在'
+
+
+def test_client_disconnect_cancels_upstream(client, headers, server):
+    response = client.post('/api/chat/completions', headers=headers, buffered=False, json={
+        'provider': 'openai', 'model': 'slow-model', 'stream': True,
+        'messages': [{'role': 'user', 'content': '你好'}]
+    })
+    first = next(iter(response.response))
+    assert first.startswith(b'data: ')
+
+    # 模拟客户端断开: WSGI 服务器关闭响应迭代器
+    response.close()
+    assert server.cancelled.wait(5)
+    assert server.completed == 0
@@ -0,0 +1,68 @@
+"""聊天供应商连接池测试
+
+用本地的 OpenAI 兼容模拟服务验证同一供应商的多次请求复用连接
+"""
+
+import pytest
+from app import create_app
+from app.services.chat.factory import ChatServiceFactory, CozeService, DeepSeekService, TongyiService
+from app.services.chat.transport import close_transports, get_transport
+
+
+@pytest.fixture
+def app(server):
+    """创建测试应用实例"""
+    server.reply = 'ok'
+    app = create_app('test')
+    app.config['OPENAI_API_BASE'] = f'http://127.0.0.1:{server.server_address[1]}/v1'
+    app.config['OPENAI_API_KEY'] = 'sk-test'
+    app.config['OPENAI_API_PROXY'] = None
+    ChatServiceFactory._instances.clear()
+    with app.app_context():
+        yield app
+    ChatServiceFactory._instances.clear()
+    close_transports()
+
+
+def test_openai_requests_reuse_connection(app, server):
+    service = ChatServiceFactory.get_service('openai')
+    for _ in range(5):
+        result = service.chat_completion([{'role': 'user', 'content': '你好'}], model='gpt-test')
+        assert result['choices'][0]['message']['content'] == 'ok'
+        assert result['provider'] == 'openai'
+
+    assert server.connections == 1
+    assert service.transport.stats['requests'] == 5
+
+
+def test_transport_shared_per_base_url(app):
+    first = get_transport('https://api.deepseek.com/v1')
+    assert get_transport('https://API.deepseek.com/beta') is first
+    assert get_transport('https://api.deepseek.com/v1', proxy='http://proxy:8080') is not first
+    assert first.connect_timeout == app.config['CHAT_HTTP_CONNECT_TIMEOUT']
+
+
+def test_idle_connections_recycled(app, server):
+    service = ChatServiceFactory.get_service('openai')
+    transport = service.transport
+    url = f"{service.api_base}/chat/completions"
+    # 另一个协程正在读取的响应
+    in_flight = transport.post(url, json={'model': 'gpt-test', 'messages': []}, stream=True)
+    old_session = transport.session
+    transport.last_used -= app.config['CHAT_HTTP_KEEPALIVE'] + 1
+    service.chat_completion([{'role': 'user', 'content': '你好'}])
+
+    assert transport.stats['recycled'] == 1
+    assert transport.session is not old_session
+    assert server.connections == 2
+    # 换池时不关闭旧连接池，进行中的响应仍能读完
+    assert in_flight.json()['choices'][0]['message']['content'] == 'ok'
+
+
+def test_all_providers_registered(app):
+    providers = ChatServiceFactory.list_providers()
+    assert providers['deepseek'] is DeepSeekService
+    assert providers['tongyi'] is TongyiService
+    # coze 使用基于配置的服务类，不需要传入 api_key
+    assert providers['coze'] is CozeService
+    assert isinstance(ChatServiceFactory.get_service('coze'), CozeService)
@@ -0,0 +1,225 @@
+"""辟谣爬虫增量爬取测试
+
+用支持 ETag 的替身站点验证: 重新运行时只请求新增或变化的文章，并统计跳过的页面；
+结果逐篇追加到 JSONL，中断后从断点继续，中断前自动保存的状态不会让未处理的文章被跳过
+"""
+
+import os
+
+import pytest
+
+from spider import piyao_ld_spider
+from spider.jsonl import iter_jsonl
+from spider.piyao_ld_spider import PiyaoLdSpider
+from spider.piyao_spider import PiyaoSpider
+
+LIST_URL = 'https://www.piyao.org.cn/ld.htm'
+BQ_LIST_URL = 'https://www.piyao.org.cn/bq/index.htm'
+
+
+class FakeResponse:
+    def __init__(self, status_code, text='', etag=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {'ETag': etag} if etag else {}
+        self.encoding = None
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSite:
+    """按正文哈希生成 ETag，请求带上相同的 If-None-Match 时返回 304"""
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []
+
+    def set_list(self, titles):
+        links = ''.join(f'<li><h2><a href="/{i}.htm">{title}</a></h2></li>' for i, title in enumerate(titles))
+        self.pages[LIST_URL] = f'<ul id="list">{links}</ul>'
+        for i, title in enumerate(titles):
+            self.pages.setdefault(f'https://www.piyao.org.cn/{i}.htm', self.detail(title, '正文'))
+
+    def set_bq_list(self, titles):
+        """辟谣标签列表页(PiyaoSpider)"""
+        links = ''.join(f'<li><a href="/bq/{i}.htm">{title}</a></li>' for i, title in enumerate(titles))
+        self.pages[BQ_LIST_URL] = f'<div class="list"><ul>{links}</ul></div>'
+        for i, title in enumerate(titles):
+            self.pages.setdefault(f'https://www.piyao.org.cn/bq/{i}.htm',
+                                  f'<h2>{title}</h2><div id="detailContent"><p>正文</p></div>')
+
+    @staticmethod
+    def detail(title, body):
+        return (f'<div class="content"><div class="con_left left"><div><div class="con_tit"><h2>{title}</h2></div>'
+                f'<div class="con_txt"><p>{body}</p></div></div></div></div>')
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(url)
+        etag = f'"{hash(self.pages[url])}"'
+        if (headers or {}).get('If-None-Match') == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.pages[url], etag)
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return FakeSite()
+
+
+def make_spider(site, **kwargs):
+    spider = PiyaoLdSpider(state_path='state.json', checkpoint_path='checkpoint.json', **kwargs)
+    spider.session = site
+    spider.delay = 0
+    return spider
+
+
+def written(stats):
+    """本次运行写入的文章"""
+    records = list(iter_jsonl(stats['output']))
+    return records[len(records) - stats['written']:]
+
+
+def test_rerun_fetches_only_new_and_changed(site):
+    site.set_list(['谣言一', '谣言二', '谣言三'])
+    first = make_spider(site).crawl()
+    assert first['written'] == 3 and len(site.requests) == 4
+
+    # 站点没有变化: 列表页返回 304，不请求任何详情页
+    site.requests = []
+    spider = make_spider(site)
+    assert spider.crawl()['written'] == 0
+    assert site.requests == [LIST_URL]
+    assert spider.state.stats['not_modified'] == 1
+
+    # 新增一篇文章、修改一篇文章的正文(列表项未变)
+    site.set_list(['谣言一', '谣言二', '谣言三', '谣言四'])
+    site.pages['https://www.piyao.org.cn/1.htm'] = site.detail('谣言二', '更新后的正文')
+    site.requests = []
+    spider = make_spider(site)
+    stats = spider.crawl()
+    assert [item['title'] for item in written(stats)] == ['谣言四']
+    assert site.requests == [LIST_URL, 'https://www.piyao.org.cn/3.htm']
+    assert spider.state.stats['skipped'] == 3 and stats['skipped'] == 3
+    assert '跳过 3 个页面' in spider.state.report()
+
+    # 结果文件追加写入，包含所有文章
+    assert len(list(iter_jsonl('piyao_ld_results.jsonl'))) == 4
+
+    # 全量爬取时重新请求所有页面，正文变化的文章也会更新
+    site.requests = []
+    stats = make_spider(site, incremental=False).crawl()
+    assert stats['written'] == 4 and len(site.requests) == 5
+    assert any(item['content'] == '更新后的正文' for item in written(stats))
+
+
+def test_failed_article_is_retried(site):
+    site.set_list(['谣言一', '谣言二'])
+    broken = site.pages.pop('https://www.piyao.org.cn/1.htm')
+    original_get = site.get
+
+    def flaky_get(url, headers=None, **kwargs):
+        if url not in site.pages:
+            raise piyao_ld_spider.requests.exceptions.ConnectionError('connection reset')
+        return original_get(url, headers, **kwargs)
+
+    site.get = flaky_get
+    assert make_spider(site).crawl()['failed'] == 1
+
+    site.pages['https://www.piyao.org.cn/1.htm'] = broken
+    site.requests = []
+    stats = make_spider(site).crawl()
+    assert [item['title'] for item in written(stats)] == ['谣言二']
+    assert site.requests == [LIST_URL, 'https://www.piyao.org.cn/1.htm']
+
+
+def test_resume_after_crash(site):
+    """中断后再次运行: 截掉写了一半的行，已写入的文章不再请求"""
+    site.set_list([f'谣言{i}' for i in range(5)])
+    spider = make_spider(site, incremental=False)
+    parse_detail_page = spider.parse_detail_page
+
+    def crash_on_fourth(url):
+        if url.endswith('/3.htm'):
+            # 模拟写到一半时进程被杀
+            with open('piyao_ld_results.jsonl', 'a', encoding='utf-8') as f:
+                f.write('{"url": "https://www.piyao.org.cn/3.htm", "ti')
+            raise KeyboardInterrupt
+        return parse_detail_page(url)
+
+    spider.parse_detail_page = crash_on_fourth
+    with pytest.raises(KeyboardInterrupt):
+        spider.crawl()
+
+    site.requests = []
+    stats = make_spider(site, incremental=False).crawl()
+    assert stats['resumed'] == 3 and stats['written'] == 2
+    assert site.requests == [LIST_URL, 'https://www.piyao.org.cn/3.htm', 'https://www.piyao.org.cn/4.htm']
+    records = list(iter_jsonl('piyao_ld_results.jsonl'))
+    assert [item['title'] for item in records] == [f'谣言{i}' for i in range(5)]
+
+
+def test_incremental_resume_after_autosave(site):
+    """增量模式下中断前自动保存了状态: 再次运行仍从断点继续，不会因为列表页未变化而直接结束"""
+    site.set_list([f'谣言{i}' for i in range(5)])
+    spider = make_spider(site)
+    parse_detail_page = spider.parse_detail_page
+
+    def crash_on_third(url):
+        if url.endswith('/2.htm'):
+            spider.state.save()
+            raise KeyboardInterrupt
+        return parse_detail_page(url)
+
+    spider.parse_detail_page = crash_on_third
+    with pytest.raises(KeyboardInterrupt):
+        spider.crawl()
+
+    site.requests = []
+    stats = make_spider(site).crawl()
+    assert stats['resumed'] == 2 and stats['written'] == 3
+    assert site.requests == [LIST_URL] + [f'https://www.piyao.org.cn/{i}.htm' for i in range(2, 5)]
+    assert [item['title'] for item in iter_jsonl('piyao_ld_results.jsonl')] == [f'谣言{i}' for i in range(5)]
+    assert not os.path.exists('checkpoint.json')
+
+    # 全部处理完后才记录列表页，再次运行列表页返回 304
+    site.requests = []
+    assert make_spider(site).crawl()['written'] == 0
+    assert site.requests == [LIST_URL]
+
+
+def test_piyao_spider_crash_keeps_written_articles(site):
+    """中断前自动保存了状态: 已处理的文章已写入结果文件，列表页没有被记录为未变化"""
+    site.set_bq_list([f'谣言{i}' for i in range(4)])
+    spider = PiyaoSpider(state_path='state.json')
+    spider.session = site
+    spider.delay = 0
+    parse_detail_page = spider.parse_detail_page
+
+    def crash_on_third(url, conditional=True):
+        if url.endswith('/bq/2.htm'):
+            # 模拟中断前刚好触发了自动保存
+            spider.state.save()
+            raise KeyboardInterrupt
+        return parse_detail_page(url, conditional)
+
+    spider.parse_detail_page = crash_on_third
+    with pytest.raises(KeyboardInterrupt):
+        spider.crawl()
+    assert [item['title'] for item in iter_jsonl('piyao_results.jsonl')] == ['谣言0', '谣言1']
+
+    site.requests = []
+    spider = PiyaoSpider(state_path='state.json')
+    spider.session = site
+    spider.delay = 0
+    assert [item['title'] for item in spider.crawl()] == ['谣言2', '谣言3']
+    assert site.requests == [BQ_LIST_URL, 'https://www.piyao.org.cn/bq/2.htm', 'https://www.piyao.org.cn/bq/3.htm']
+    assert [item['title'] for item in iter_jsonl('piyao_results.jsonl')] == [f'谣言{i}' for i in range(4)]
+
+    # 全部处理完后才记录列表页，再次运行列表页返回 304
+    site.requests = []
+    spider = PiyaoSpider(state_path='state.json')
+    spider.session = site
+    assert spider.crawl() == []
+    assert site.requests == [BQ_LIST_URL]
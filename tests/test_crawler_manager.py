@@ -0,0 +1,141 @@
+"""爬虫管理器调度测试
+
+验证优先级顺序、排队任务去重、每个爬虫的并发上限、任务状态持久化(重启后恢复)
+以及工作进程异常退出后的处理
+"""
+
+import os
+import time
+
+import pytest
+from app import create_app
+from app.extensions import db
+from app.models.crawl_task import CrawlTask
+from app.scraper.crawler import CrawlerManager
+
+
+class SleepSpider:
+    """搜索爬虫替身: 每页耗时 0.05 秒"""
+
+    def run_many(self, keywords, max_pages=5, config=None, start_page=1):
+        pages = max_pages - start_page + 1
+        time.sleep(0.05 * pages)
+        return {'items': pages * 10}
+
+
+class CrashSpider:
+    """执行时工作进程直接退出"""
+
+    def run_many(self, keywords, max_pages=5, config=None, start_page=1):
+        os._exit(3)
+
+
+SPIDERS = {'a': SleepSpider, 'b': SleepSpider, 'crash': CrashSpider}
+
+
+@pytest.fixture
+def app():
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def make_manager(app, **config):
+    options = {'WORKERS': 1, 'SPIDER_CONCURRENCY': {}, 'DEFAULT_CONCURRENCY': 1, 'MAX_PAGES': 2,
+               'POLL_INTERVAL': 0.05}
+    options.update(config)
+    return CrawlerManager(app, spiders=SPIDERS, config=options)
+
+
+def run_all(manager):
+    manager.start()
+    assert manager.wait(timeout=30)
+    metrics = manager.get_metrics()
+    manager.stop()
+    db.session.expire_all()
+    return metrics
+
+
+def test_priority_order_and_dedup(app):
+    """优先级高的先执行，重复入队只提高优先级"""
+    manager = make_manager(app)
+    low = manager.add_task('a', 0, '辟谣')
+    mid = manager.add_task('a', 5, '谣言')
+    other = manager.add_task('b', 1, '真相')
+    assert manager.add_task('a', 7, '辟谣') == low
+    assert manager.add_task('a', 0, '谣言') == mid
+    assert manager.add_task('a', 0) is None  # 搜索爬虫必须指定关键词
+    assert CrawlTask.query.count() == 3
+
+    metrics = run_all(manager)
+
+    tasks = CrawlTask.query.order_by(CrawlTask.started_at).all()
+    assert [task.id for task in tasks] == [low, mid, other]
+    assert [task.status for task in tasks] == ['success'] * 3
+    assert tasks[0].priority == 7 and tasks[0].items == 20
+    assert metrics['completed'] == 3 and metrics['queue_wait']['count'] == 3
+    assert 0 < metrics['utilization'] <= 1
+
+
+def test_spider_concurrency_limit(app):
+    """每个爬虫同时执行的任务数不超过上限，其余工作进程执行其他爬虫的任务"""
+    manager = make_manager(app, WORKERS=3, SPIDER_CONCURRENCY={'a': 1, 'b': 2})
+    for i in range(3):
+        manager.add_task('a', 9, f'a{i}')
+    for i in range(4):
+        manager.add_task('b', 0, f'b{i}')
+
+    run_all(manager)
+
+    def max_overlap(spider):
+        events = []
+        for task in CrawlTask.query.filter_by(spider=spider):
+            events += [(task.started_at, 1), (task.finished_at, -1)]
+        current = peak = 0
+        for _, delta in sorted(events, key=lambda event: (event[0], event[1])):
+            current += delta
+            peak = max(peak, current)
+        return peak
+
+    assert CrawlTask.query.filter_by(status='success').count() == 7
+    assert max_overlap('a') == 1
+    assert max_overlap('b') == 2
+
+
+def test_status_survives_restart(app):
+    """任务状态保存在数据库中，新的管理器恢复未完成的任务并继续执行"""
+    first = make_manager(app)
+    first.add_task('a', 0, '辟谣')
+    interrupted = first.add_task('b', 0, '谣言')
+    # 模拟上次运行到一半时进程退出
+    CrawlTask.query.filter_by(id=interrupted).update({'status': 'running'})
+    db.session.commit()
+
+    second = make_manager(app)
+    status = second.get_status()
+    assert status['a']['status'] == 'queued' and status['b']['status'] == 'running'
+
+    run_all(second)
+
+    status = make_manager(app).get_status()
+    assert status['a']['items_scraped'] == 20 and status['b']['items_scraped'] == 20
+    assert status['a']['status'] == 'stopped' and status['a']['last_end'] is not None
+    assert CrawlTask.query.filter_by(status='success').count() == 2
+
+
+def test_worker_crash_fails_task_and_respawns(app):
+    """工作进程异常退出时任务记为失败，重建的工作进程继续执行后续任务"""
+    manager = make_manager(app)
+    crashed = manager.add_task('crash', 5, '辟谣')
+    after = manager.add_task('a', 0, '辟谣')
+
+    metrics = run_all(manager)
+
+    assert db.session.get(CrawlTask, crashed).status == 'failed'
+    assert '异常退出' in db.session.get(CrawlTask, crashed).error
+    assert db.session.get(CrawlTask, after).status == 'success'
+    assert metrics['failed'] == 1 and metrics['completed'] == 1
+    assert manager.get_status()['crash']['error_count'] == 1
@@ -0,0 +1,93 @@
+"""数据库存储管道测试
+
+验证按条数批量写入、批内合并、已存在记录只更新出现的字段、新闻词频向量同步，
+以及爬虫关闭时写入剩余数据并记录写入统计
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from scrapy.settings import Settings
+from scrapy.statscollectors import MemoryStatsCollector
+from app import create_app
+from app.extensions import db
+from app.models.news_data import NewsData, RumorData, SocialMediaData
+from app.models.term_vector import TermVector
+from app.scraper.pipelines.db_storage import DatabaseStoragePipeline
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def spider(app):
+    return SimpleNamespace(name='test', settings={'FLASK_APP': app})
+
+
+def open_pipeline(spider, **kwargs):
+    pipeline = DatabaseStoragePipeline(
+        stats=MemoryStatsCollector(SimpleNamespace(settings=Settings({'STATS_DUMP': False}))), **kwargs)
+    pipeline.open_spider(spider)
+    return pipeline
+
+
+def news_item(index, **kwargs):
+    item = {'news_id': f'n{index}', 'title': f'新闻{index}', 'content': '网传自来水有毒，经核实为谣言',
+            'source': '新浪', 'tags': ['辟谣']}
+    item.update(kwargs)
+    return item
+
+
+def test_flush_by_batch_size_and_close_stats(app, spider):
+    pipeline = open_pipeline(spider, batch_size=3, flush_interval=0)
+    for index in range(3):
+        pipeline.process_item(news_item(index), spider)
+    assert NewsData.query.count() == 3
+    assert pipeline.buffered == 0
+
+    pipeline.process_item({'rumor_id': 'r1', 'title': '谣言', 'content': '内容'}, spider)
+    pipeline.process_item({'post_id': 'p1', 'platform': 'weibo', 'content': '帖子', 'topics': ['话题']}, spider)
+    assert RumorData.query.count() == 0
+
+    pipeline.close_spider(spider)
+    assert RumorData.query.one().spread_level == 1
+    post = SocialMediaData.query.one()
+    assert (post.content_type, json.loads(post.topics), post.processed) == ('original', ['话题'], False)
+    assert TermVector.query.filter_by(doc_type='news_data').count() == 3
+
+    stats = pipeline.stats.get_stats(spider)
+    assert stats['db_storage/flushes'] == 2
+    assert stats['db_storage/inserted'] == 5
+    assert (stats['db_storage/avg_batch_size'], stats['db_storage/max_batch_size']) == (2.5, 3)
+    assert stats['db_storage/max_flush_ms'] >= stats['db_storage/avg_flush_ms'] > 0
+
+
+def test_update_keeps_missing_fields_and_merges_batch(app, spider):
+    pipeline = open_pipeline(spider, batch_size=100, flush_interval=0)
+    pipeline.process_item(news_item(1, author='记者'), spider)
+    pipeline.flush()
+    first_crawl = NewsData.query.one().crawl_time
+
+    pipeline.process_item({'news_id': 'n1', 'content': '更新后的正文'}, spider)
+    pipeline.process_item({'news_id': 'n1', 'summary': '摘要'}, spider)
+    pipeline.process_item(news_item(2), spider)
+    # 新记录缺少必填字段时跳过，不影响同一批的其他数据
+    pipeline.process_item({'news_id': 'n3', 'content': '没有标题'}, spider)
+    assert pipeline.flush()
+
+    db.session.expire_all()
+    news = NewsData.query.filter_by(news_id='n1').one()
+    assert (news.title, news.author, news.content, news.summary) == ('新闻1', '记者', '更新后的正文', '摘要')
+    assert news.crawl_time >= first_crawl
+    assert NewsData.query.count() == 2
+    assert pipeline.get_stats()['updated'] == 1
+    assert pipeline.get_stats()['dropped'] == 1
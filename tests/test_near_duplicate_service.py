@@ -0,0 +1,134 @@
+"""近似重复检测测试
+
+验证写入时计算指纹并归入分组、删除/修改后分组收缩或解散、批量入库路径同步、
+全量重建结果与增量维护一致，以及分组列表接口
+"""
+
+import numpy as np
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.debunk import DebunkContent
+from app.models.news_data import RumorData
+from app.models.near_duplicate import NearDuplicateCluster, SimHashBand
+from app.services import near_duplicate_service
+from app.utils.simhash import SimHashIndex, hamming
+
+BASE = ("近日，网上流传一则消息称，某市自来水检测出致癌物质，已有多名市民饮用后出现不适症状并住院治疗。"
+        "记者从市卫生健康委员会了解到，该消息纯属谣言。市供水公司每天对出厂水和管网水进行多次抽样检测，"
+        "近期所有水质指标均符合国家生活饮用水卫生标准。医院方面也表示，近期并未接诊因饮用自来水导致不适的患者。"
+        "警方已对散布谣言的网民依法进行调查处理，提醒广大市民不信谣、不传谣，通过官方渠道获取权威信息。")
+REWORDED = BASE.replace('近日，', '近期，').replace('提醒广大市民', '提醒市民')
+PREFIXED = '【辟谣】' + BASE
+OTHER = ("有网友发帖称，吃香蕉可以治疗感冒，还能预防流感病毒感染，帖子被大量转发。专家表示，这种说法没有任何科学依据，"
+         "香蕉虽然富含钾元素和膳食纤维，但并不具备抗病毒作用。感冒患者应当注意休息、多喝水，症状严重时应及时就医，"
+         "不要轻信网络上流传的所谓偏方，以免延误病情。")
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def add_content(content, source='weibo', content_id=None):
+    row = DebunkContent(source=source, content_id=content_id, title=content[:100], content=content)
+    db.session.add(row)
+    db.session.commit()
+    return row
+
+
+def clusters_snapshot():
+    """{成员集合}，与分组ID无关"""
+    groups = {}
+    for model, doc_type in ((DebunkContent, 'debunk_content'), (RumorData, 'rumor_data')):
+        for row_id, cluster_id in db.session.query(model.id, model.cluster_id).filter(model.cluster_id.isnot(None)):
+            groups.setdefault(cluster_id, set()).add((doc_type, row_id))
+    sizes = {cluster.id: cluster.size for cluster in NearDuplicateCluster.query}
+    assert sizes == {cluster_id: len(members) for cluster_id, members in groups.items()}
+    return sorted(sorted(members) for members in groups.values())
+
+
+def test_cluster_on_insert_and_shrink_on_delete(app):
+    weibo = add_content(BASE, content_id='mid1')
+    other = add_content(OTHER, content_id='mid2')
+    assert weibo.simhash is not None and weibo.cluster_id is None
+
+    piyao = add_content(REWORDED, source='piyao.org.cn')
+    rumor = RumorData(rumor_id='r1', title='网传自来水致癌', content=PREFIXED)
+    db.session.add(rumor)
+    db.session.commit()
+
+    db.session.expire_all()
+    assert weibo.cluster_id == piyao.cluster_id == rumor.cluster_id is not None
+    assert other.cluster_id is None
+    assert db.session.get(NearDuplicateCluster, weibo.cluster_id).size == 3
+    assert SimHashBand.query.count() == 4 * 4
+
+    duplicates = near_duplicate_service.find_near_duplicates('debunk_content', weibo.id)
+    assert {(item['doc_type'], item['id']) for item in duplicates} == {
+        ('debunk_content', piyao.id), ('rumor_data', rumor.id)}
+    assert all(item['distance'] <= 3 for item in duplicates)
+    assert near_duplicate_service.find_similar_text(OTHER)[0]['id'] == other.id
+
+    # 修改后不再近似重复，离开分组
+    piyao.content = OTHER
+    db.session.commit()
+    db.session.expire_all()
+    assert piyao.cluster_id == other.cluster_id is not None
+    assert db.session.get(NearDuplicateCluster, weibo.cluster_id).size == 2
+
+    # 删除后分组不足两条即解散
+    cluster_id = weibo.cluster_id
+    db.session.delete(rumor)
+    db.session.commit()
+    db.session.expire_all()
+    assert weibo.cluster_id is None and db.session.get(NearDuplicateCluster, cluster_id) is None
+    assert SimHashBand.query.filter_by(doc_type='rumor_data').count() == 0
+
+
+def test_batch_ingest_and_rebuild_consistent(app):
+    add_content(BASE, content_id='mid1')
+    user = User(user_name='spider', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    headers = {'Authorization': 'Bearer ' + create_access_token(identity=user)}
+    client = app.test_client()
+    response = client.post('/api/spider/data/batch', headers=headers, json={'items': [
+        {'source': 'weibo', 'data': {'weibo_mid_id': 'mid2', 'content': PREFIXED}},
+        {'source': 'piyao', 'data': {'title': '自来水致癌系谣言', 'content': REWORDED}},
+        {'source': 'weibo', 'data': {'weibo_mid_id': 'mid3', 'content': OTHER}},
+    ]})
+    assert response.get_json()['data']['created'] == 3
+
+    incremental = clusters_snapshot()
+    assert [len(members) for members in incremental] == [3]
+    assert near_duplicate_service.rebuild() == (4, 1)
+    assert clusters_snapshot() == incremental
+
+    response = client.get('/api/analysis/near-duplicates')
+    data = response.get_json()['data']
+    assert data['total'] == 1 and data['items'][0]['size'] == 3
+    assert {member['source'] for member in data['items'][0]['members']} == {'weibo', 'piyao'}
+    content_id = data['items'][0]['members'][0]['id']
+    detail = client.get(f'/api/analysis/near-duplicates/debunk_content/{content_id}').get_json()['data']
+    assert len(detail['duplicates']) == 2 and detail['cluster_id'] == data['items'][0]['cluster_id']
+    assert client.get('/api/analysis/near-duplicates/unknown/1').status_code == 400
+
+
+def test_memory_index_matches_brute_force():
+    rng = np.random.default_rng(7)
+    hashes = rng.integers(0, 2 ** 63, size=20000, dtype=np.int64).astype(np.uint64) * np.uint64(2) + \
+        rng.integers(0, 2, size=20000, dtype=np.int64).astype(np.uint64)
+    index = SimHashIndex(range(len(hashes)), hashes)
+    for position in rng.integers(0, len(hashes), size=50):
+        value = int(hashes[position]) ^ (1 << 5) ^ (1 << 40)
+        expected = sorted((i, hamming(value, int(h))) for i, h in enumerate(hashes) if hamming(value, int(h)) <= 3)
+        assert sorted(index.query(value)) == expected
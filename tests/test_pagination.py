@@ -0,0 +1,151 @@
+"""信息流分页测试
+
+验证游标模式与页码模式结果一致(时间相同的记录按 id 区分，不重复不遗漏)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.debunk import DebunkArticle, WeiboDebunk
+from app.models.message import Message
+from app.utils.pagination import paginate_feed, encode_cursor, decode_cursor, CursorError
+from app.utils.query_counter import count_queries
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def seed_articles(count):
+    author = User(user_name='author', password_hash='x')
+    db.session.add(author)
+    db.session.flush()
+    base = datetime(2025, 5, 1)
+    for i in range(count):
+        # 每三篇共用一个创建时间，检验 id 作为第二排序键
+        db.session.add(DebunkArticle(title=f'文章{i}', content='内容', author_id=author.id,
+                                     created_at=base + timedelta(minutes=i // 3)))
+    db.session.commit()
+
+
+def walk_cursor(client, url):
+    ids, cursor = [], ''
+    while cursor is not None:
+        data = client.get(f'{url}&cursor={cursor}').get_json()['data']
+        ids.extend(item['id'] for item in data['items'])
+        cursor = data['next_cursor']
+    return ids
+
+
+def test_cursor_matches_page_mode(app, client):
+    seed_articles(25)
+    page_ids = []
+    for page in range(1, 4):
+        data = client.get(f'/api/debunk/articles?per_page=10&page={page}').get_json()['data']
+        page_ids.extend(item['id'] for item in data['items'])
+
+    cursor_ids = walk_cursor(client, '/api/debunk/articles?per_page=10')
+    assert cursor_ids == page_ids
+    assert len(set(cursor_ids)) == 25
+
+
+def test_my_articles_page_and_cursor_mode(app, client):
+    seed_articles(15)
+    other = User(user_name='other', password_hash='x')
+    db.session.add(other)
+    db.session.flush()
+    db.session.add(DebunkArticle(title='别人的文章', content='内容', author_id=other.id))
+    db.session.commit()
+    author = User.query.filter_by(user_name='author').first()
+    headers = {'Authorization': 'Bearer ' + create_access_token(identity=author)}
+
+    page_ids = []
+    for page in range(1, 3):
+        response = client.get(f'/api/debunk/user/articles?per_page=10&page={page}', headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data['total'] == 15 and data['page'] == page
+        page_ids.extend(item['id'] for item in data['items'])
+
+    ids, cursor = [], ''
+    while cursor is not None:
+        response = client.get(f'/api/debunk/user/articles?per_page=4&cursor={cursor}', headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        ids.extend(item['id'] for item in data['items'])
+        cursor = data['next_cursor']
+    assert ids == page_ids
+    assert len(set(ids)) == 15
+
+
+def test_include_total_false_skips_count(app, client):
+    seed_articles(5)
+    response = client.get('/api/debunk/articles?per_page=2&cursor=&include_total=false')
+    data = response.get_json()['data']
+    assert data['total'] is None and data['pages'] is None
+    assert data['has_more'] is True
+    assert int(response.headers['X-Query-Count']) == 1
+
+
+def test_invalid_cursor(app, client):
+    response = client.get('/api/debunk/weibo/debunks?cursor=not-a-cursor')
+    assert response.status_code == 400
+
+
+def test_weibo_feed_with_null_created_at(app, client):
+    base = datetime(2025, 5, 1)
+    for i in range(7):
+        created_at = None if i % 3 == 0 else base + timedelta(hours=i)
+        db.session.add(WeiboDebunk(content=f'微博{i}', weibo_mid_id=str(i), created_at=created_at))
+    db.session.commit()
+
+    ids, cursor = [], ''
+    while cursor is not None:
+        data = client.get(f'/api/debunk/weibo/debunks?per_page=2&cursor={cursor}').get_json()
+        ids.extend(item['id'] for item in data['items'])
+        cursor = data['next_cursor']
+    assert sorted(ids) == list(range(1, 8))
+    assert ids[-3:] == [7, 4, 1]  # 无时间的记录排在最后
+
+
+def test_message_priority_keyset(app):
+    base = datetime(2025, 5, 1)
+    for i in range(12):
+        db.session.add(Message(sender_id=1, receiver_id=2, title='t', msg_type='text', content='c',
+                               priority=None if i == 5 else i % 3, send_time=base + timedelta(minutes=i % 4)))
+    db.session.commit()
+
+    columns = [Message.priority, Message.send_time, Message.id]
+    expected = [m.id for m in paginate_feed(Message.query, columns, per_page=100).items]
+
+    ids, cursor = [], ''
+    with count_queries() as counter:
+        while cursor is not None:
+            page = paginate_feed(Message.query, columns, per_page=5, cursor=cursor, include_total=False)
+            ids.extend(m.id for m in page.items)
+            cursor = page.next_cursor
+    assert ids == expected
+    assert counter['count'] == 4  # 3 页，最后一页不足时补取一次 priority 为 NULL 的行
+
+
+def test_cursor_round_trip():
+    values = [datetime(2025, 5, 1, 12, 30, 5), 42]
+    assert decode_cursor(encode_cursor(values), [DebunkArticle.created_at, DebunkArticle.id]) == values
+    with pytest.raises(CursorError):
+        decode_cursor(encode_cursor([1]), [DebunkArticle.created_at, DebunkArticle.id])
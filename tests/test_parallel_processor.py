@@ -0,0 +1,65 @@
+"""数据处理多进程批处理模式测试"""
+
+import pytest
+from app import create_app
+from app.extensions import db
+from app.models.news_data import NewsData, SocialMediaData, DataProcessLog
+from app.models.term_vector import TermVector
+from app.services.data_processor.processor import DataProcessor, NEWS_FIELDS
+from app.services.data_processor.parallel import process_parallel
+
+KEYWORDS = ['疫苗', '谣言']
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_parallel_matches_serial_computation(app):
+    texts = [f'<p>网传第{i}批疫苗存在问题。</p>经核实，该消息为谣言，请勿转发★' for i in range(7)]
+    for i, text in enumerate(texts):
+        db.session.add(NewsData(news_id=f'n{i}', title=f'标题{i}', content=text, source='新华网'))
+    db.session.add(NewsData(news_id='done', title='已处理', content='疫苗', processed=True))
+    db.session.commit()
+
+    result = process_parallel('news', workers=2, chunk_size=3, keywords=KEYWORDS)
+    assert result['processed'] == 7
+    assert result['failed'] == 0
+    assert set(result['stages']) == {'read', 'compute', 'write'}
+    assert result['stages']['write']['rows'] == 7
+
+    expected = DataProcessor().compute_news_fields({'content': texts[0], 'keyword_match': 0.0}, keywords=KEYWORDS)
+    news = NewsData.query.filter_by(news_id='n0').one()
+    assert news.processed is True
+    assert news.processed_time is not None
+    for field in NEWS_FIELDS:
+        assert getattr(news, field) == expected[field]
+    assert news.keyword_match == 1.0
+    assert '<p>' not in news.content and '★' not in news.content
+
+    assert DataProcessLog.query.filter_by(data_type='news', status='success').count() == 7
+    # 批量更新后词频向量同步刷新
+    assert TermVector.query.filter_by(doc_type='news_data', doc_id=news.id).count() == 1
+
+    # 已处理的数据不会重复处理
+    assert process_parallel('news', workers=2, keywords=KEYWORDS)['processed'] == 0
+
+
+def test_parallel_limit_and_social_recommendation(app):
+    for i in range(5):
+        db.session.add(SocialMediaData(post_id=f'p{i}', platform='weibo', content='疫苗谣言已辟谣',
+                                       verified_type='official', shares=2000))
+    db.session.commit()
+
+    assert process_parallel('social', workers=2, chunk_size=2, limit=3, keywords=KEYWORDS)['processed'] == 3
+    assert SocialMediaData.query.filter_by(processed=False).count() == 2
+    post = SocialMediaData.query.filter_by(processed=True).first()
+    assert post.keyword_match == 1.0
+    assert post.recommendation_level == 4
@@ -0,0 +1,134 @@
+"""响应缓存测试
+
+验证查询参数规范化、写入后按标签失效、单飞计算和命中统计
+"""
+
+import time
+import threading
+
+import pytest
+from flask import jsonify
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.debunk import DebunkArticle, WeiboDebunk
+from app.utils.response_cache import get_response_cache
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def seed_articles(count):
+    author = User(user_name='author', password_hash='x')
+    db.session.add(author)
+    db.session.flush()
+    articles = [DebunkArticle(title=f'文章{i}', content='内容', author_id=author.id, status='published')
+                for i in range(count)]
+    db.session.add_all(articles)
+    db.session.commit()
+    return articles
+
+
+def test_list_cached_and_invalidated_on_write(app, client):
+    seed_articles(3)
+    first = client.get('/api/debunk/articles?per_page=10&status=published')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert first.get_json()['data']['total'] == 3
+
+    # 参数顺序、首尾空白和无关参数不影响缓存键，命中时不执行 SQL
+    again = client.get('/api/debunk/articles?status=published%20&per_page=10&_t=123')
+    assert again.headers['X-Cache'] == 'HIT'
+    assert again.headers['X-Query-Count'] == '0'
+    assert again.get_json() == first.get_json()
+
+    article = DebunkArticle.query.first()
+    article.status = 'archived'
+    db.session.commit()
+    after = client.get('/api/debunk/articles?per_page=10&status=published')
+    assert after.headers['X-Cache'] == 'MISS'
+    assert after.get_json()['data']['total'] == 2
+
+
+def test_detail_invalidated_per_row_and_by_bulk_update(app, client):
+    first, second = seed_articles(2)
+    client.get(f'/api/debunk/articles/{first.id}')
+    client.get(f'/api/debunk/articles/{second.id}')
+
+    first.title = '新标题'
+    db.session.commit()
+    assert client.get(f'/api/debunk/articles/{first.id}').get_json()['title'] == '新标题'
+    assert client.get(f'/api/debunk/articles/{second.id}').headers['X-Cache'] == 'HIT'
+
+    # 批量更新无法确定行，使所有详情失效
+    DebunkArticle.query.update({'summary': '摘要'}, synchronize_session=False)
+    db.session.commit()
+    response = client.get(f'/api/debunk/articles/{second.id}')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['summary'] == '摘要'
+
+    # 未提交的写入不会使缓存失效
+    second.title = '回滚'
+    db.session.flush()
+    db.session.rollback()
+    assert client.get(f'/api/debunk/articles/{second.id}').headers['X-Cache'] == 'HIT'
+
+
+def test_spider_stats_and_hit_ratio(app, client):
+    user = User(user_name='admin', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    headers = {'Authorization': 'Bearer ' + create_access_token(identity=user)}
+    assert client.get('/api/spider/stats', headers=headers).get_json()['data']['total']['weibo'] == 0
+    assert client.get('/api/spider/stats', headers=headers).headers['X-Cache'] == 'HIT'
+
+    db.session.add(WeiboDebunk(weibo_mid_id='w1', content='辟谣', status='pending'))
+    db.session.commit()
+    assert client.get('/api/spider/stats', headers=headers).get_json()['data']['total']['weibo'] == 1
+
+    stats = client.get('/api/cache/stats', headers=headers).get_json()['data']
+    assert stats['endpoints']['spider.get_spider_stats'] == {
+        'hit': 1, 'miss': 2, 'coalesced': 0, 'error': 0, 'hit_ratio': 0.3333
+    }
+    assert client.delete('/api/cache/stats', headers=headers).status_code == 200
+    assert client.get('/api/cache/stats', headers=headers).get_json()['data']['total']['hit'] == 0
+
+
+def test_single_flight(app):
+    cache = get_response_cache()
+    calls = []
+    outcomes = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.3)
+        return jsonify({'value': 1})
+
+    def request_once():
+        with app.test_request_context('/slow'):
+            key = cache.make_key('slow', {})
+            response = cache.serve('slow', key, ['slow'], 60, compute)
+            outcomes.append(response.headers['X-Cache'])
+
+    threads = [threading.Thread(target=request_once) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(outcomes) == ['COALESCED'] * 3 + ['MISS']
+    assert cache.get_stats()['endpoints']['slow']['hit_ratio'] == 0.75
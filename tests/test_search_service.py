@@ -0,0 +1,74 @@
+"""全文检索服务测试
+
+验证倒排索引随文章增删改同步维护，以及 BM25 排序结果
+"""
+
+import pytest
+from app import create_app
+from app.extensions import db
+from app.models.debunk import DebunkArticle
+from app.models.search_index import SearchDocument, SearchPosting
+from app.services import search_service
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def add_article(title, content, tags=None):
+    article = DebunkArticle(title=title, content=content, author_id=1, tags=tags)
+    db.session.add(article)
+    db.session.commit()
+    return article
+
+
+def search_ids(keyword):
+    query = search_service.apply_search('debunk_article', DebunkArticle.query, keyword)
+    return [article.id for article in query.all()]
+
+
+def test_tokenize_drops_punctuation():
+    tokens = search_service.tokenize('疫苗，会导致！不孕？')
+    assert '疫苗' in tokens
+    assert all(token not in ('，', '！', '？') for token in tokens)
+
+
+def test_index_maintained_on_write(app):
+    article = add_article('喝醋能软化血管', '专家表示喝醋并不能软化血管')
+    assert SearchDocument.query.filter_by(doc_type='debunk_article', doc_id=article.id).count() == 1
+    assert search_ids('软化血管') == [article.id]
+
+    article.title = '吃蒜能防新冠'
+    article.content = '大蒜无法预防新型冠状病毒感染'
+    db.session.commit()
+    assert search_ids('软化血管') == []
+    assert search_ids('大蒜') == [article.id]
+
+    db.session.delete(article)
+    db.session.commit()
+    assert SearchPosting.query.filter_by(doc_type='debunk_article', doc_id=article.id).count() == 0
+
+
+def test_ranked_by_relevance(app):
+    weak = add_article('夏季饮食提示', '多喝水，少吃生冷，偶尔提到疫苗接种')
+    strong = add_article('疫苗导致不孕是谣言', '疫苗不会导致不孕，疫苗安全性经过严格验证', tags='疫苗,健康')
+    add_article('台风预警', '今晚有大风大雨')
+
+    assert search_ids('疫苗') == [strong.id, weak.id]
+
+
+def test_rebuild_index(app):
+    article = add_article('微波炉加热致癌', '微波炉加热食物不会致癌')
+    db.session.execute(SearchPosting.__table__.delete())
+    db.session.execute(SearchDocument.__table__.delete())
+    db.session.commit()
+
+    assert search_service.rebuild_index('debunk_article') == 1
+    assert search_ids('微波炉') == [article.id]
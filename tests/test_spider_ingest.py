@@ -0,0 +1,132 @@
+"""爬虫数据批量入库测试
+
+验证批量接口的逐项结果、重复提交时的更新语义，以及统计汇总/全文索引/词频向量
+与逐条写入(重建)的结果一致
+"""
+
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.debunk import WeiboDebunk, XinlangDebunk, DebunkContent
+from app.models.search_index import SearchPosting
+from app.models.term_vector import Term, TermDocFreq
+from app.services import search_service, stats_service, term_vector_service
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(app):
+    user = User(user_name='spider', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': 'Bearer ' + create_access_token(identity=user)}
+
+
+def weibo_item(index, content, **kwargs):
+    data = {
+        'content': content,
+        'weibo_mid_id': f'mid{index}',
+        'weibo_user_name': f'用户{index}',
+        'region': '北京',
+        'attitudes_count': index,
+        'reposts_count': 1,
+        'created_at': '2025-03-01 12:00:00',
+        'search_query': '辟谣',
+        'status': 'pending',
+        'unknown_field': 'ignored',
+    }
+    data.update(kwargs)
+    return {'source': 'weibo', 'data': data}
+
+
+def xinlang_item(index, title):
+    return {'source': 'xinlang', 'data': {'news_id': f'n{index}', 'title': title, 'source_name': '新浪新闻'}}
+
+
+def derived_snapshot():
+    postings = sorted((p.doc_id, p.term, round(p.tf, 3)) for p in SearchPosting.query.all())
+    terms = dict(db.session.query(Term.id, Term.term).all())
+    doc_freq = {terms[row.term_id]: row.df for row in TermDocFreq.query.filter_by(doc_type='debunk_content')}
+    return postings, doc_freq
+
+
+def assert_derived_consistent():
+    assert stats_service.check_stats() == {}
+    incremental = derived_snapshot()
+    search_service.rebuild_index('debunk_content')
+    term_vector_service.rebuild_vectors('debunk_content')
+    assert derived_snapshot() == incremental
+
+
+def post_batch(client, headers, items):
+    response = client.post('/api/spider/data/batch', json={'items': items}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']
+
+
+def test_batch_insert_and_results(app, client, headers):
+    data = post_batch(client, headers, [
+        weibo_item(1, '网传自来水有毒，经核实为谣言'),
+        xinlang_item(1, '隔夜菜致癌的说法不实'),
+        {'source': 'piyao', 'data': {'title': '吃香蕉能治感冒？', 'content': '专家表示没有科学依据'}},
+        {'source': 'weibo', 'data': {'content': '缺少ID'}},
+        weibo_item(2, '疫苗谣言已被澄清'),
+    ])
+    assert (data['created'], data['updated'], data['failed']) == (4, 0, 1)
+    assert [result['status'] for result in data['results']] == ['created', 'created', 'created', 'error', 'created']
+    assert data['results'][3]['message'] == '缺少 weibo_mid_id'
+
+    assert WeiboDebunk.query.count() == 2 and XinlangDebunk.query.count() == 1
+    content = db.session.get(DebunkContent, data['results'][0]['id'])
+    assert content.content_id == 'mid1' and content.link == 'https://m.weibo.cn/detail/mid1'
+    assert db.session.get(DebunkContent, data['results'][2]['id']).status == 'published'
+    assert_derived_consistent()
+
+
+def test_resubmit_updates_and_keeps_review_status(app, client, headers):
+    post_batch(client, headers, [weibo_item(1, '网传自来水有毒'), weibo_item(2, '疫苗谣言'),
+                                 {'source': 'piyao', 'data': {'title': '标题', 'content': '旧正文'}}])
+    content = DebunkContent.query.filter_by(content_id='mid1').one()
+    content.status = 'verified'
+    db.session.commit()
+
+    data = post_batch(client, headers, [
+        weibo_item(1, '网传自来水有毒，经核实为谣言', attitudes_count=50),
+        weibo_item(3, '新的辟谣微博'),
+        weibo_item(3, '同一批内重复提交，以最后一次为准'),
+        {'source': 'piyao', 'data': {'title': '标题', 'content': '新正文'}},
+    ])
+    assert [result['status'] for result in data['results']] == ['updated', 'created', 'created', 'updated']
+    assert data['results'][1]['id'] == data['results'][2]['id']
+
+    db.session.expire_all()
+    content = DebunkContent.query.filter_by(content_id='mid1').one()
+    assert (content.status, content.attitudes_count) == ('verified', 50)
+    assert content.content == '网传自来水有毒，经核实为谣言'
+    assert DebunkContent.query.filter_by(content_id='mid3').one().content == '同一批内重复提交，以最后一次为准'
+    assert DebunkContent.query.filter_by(source='piyao').one().content == '新正文'
+    assert DebunkContent.query.count() == 4
+    assert_derived_consistent()
+
+
+def test_batch_validation(app, client, headers):
+    assert client.post('/api/spider/data/batch', json={'items': []}, headers=headers).status_code == 400
+    too_many = [weibo_item(i, '内容') for i in range(1001)]
+    assert client.post('/api/spider/data/batch', json={'items': too_many}, headers=headers).status_code == 400
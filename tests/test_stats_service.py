@@ -0,0 +1,132 @@
+"""内容统计汇总测试
+
+验证汇总表随内容写入/修改/删除增量更新，并与原始数据重新计算的结果一致
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from app import create_app
+from app.extensions import db
+from app.models.debunk import DebunkContent
+from app.models.content_stats import ContentDailyStat, ContentDailyRegion, ContentDailyKeyword
+from app.services import stats_service
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def add_content(index, days_ago=0, **kwargs):
+    values = dict(
+        source='weibo' if index % 2 else 'xinlang',
+        content_id=f'c{index}',
+        content=f'专家提醒：隔夜菜致癌的说法属于谣言，第{index}条辟谣信息',
+        region='北京' if index % 3 else '上海',
+        reposts_count=index,
+        comments_count=1,
+        attitudes_count=2,
+        status='pending',
+        created_at=datetime.now() - timedelta(days=days_ago),
+    )
+    values.update(kwargs)
+    content = DebunkContent(**values)
+    db.session.add(content)
+    return content
+
+
+def test_incremental_rollup_matches_recompute(app):
+    contents = [add_content(i, days_ago=i % 4) for i in range(12)]
+    db.session.commit()
+    assert stats_service.check_stats() == {}
+
+    # 修改状态、互动数和日期，删除一条，汇总表应保持一致
+    contents[0].status = 'verified'
+    contents[1].reposts_count = 100
+    contents[2].created_at = datetime.now() - timedelta(days=10)
+    contents[3].content = '新的正文内容，疫苗谣言已被澄清'
+    db.session.delete(contents[4])
+    db.session.commit()
+    assert stats_service.check_stats() == {}
+
+    today = datetime.now().date()
+    verified = ContentDailyStat.query.filter_by(day=today, status='verified').one()
+    assert verified.content_count == 1
+
+
+def test_rebuild_and_check(app):
+    for i in range(6):
+        add_content(i, days_ago=i % 2)
+    db.session.commit()
+
+    # 模拟汇总表被破坏
+    ContentDailyKeyword.query.delete()
+    ContentDailyStat.query.filter_by(source='weibo').update({'content_count': 99})
+    db.session.commit()
+    assert len(stats_service.check_stats()) == 2
+
+    assert stats_service.rebuild_stats() == 2
+    assert stats_service.check_stats() == {}
+
+
+def test_merge_same_key_from_two_connections(tmp_path):
+    """两个连接各自写入同一天/来源/状态和同一关键词时累加到同一行，不触发唯一键冲突"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    tables = [ContentDailyStat.__table__, ContentDailyRegion.__table__, ContentDailyKeyword.__table__]
+    db.metadata.create_all(engine, tables=tables)
+    today = date.today()
+
+    def make_delta():
+        delta = stats_service.StatsDelta()
+        delta.stats[(today, 'weibo', 'pending')] = [1, 3, 1, 2]
+        delta.regions[(today, '北京')] = 1
+        delta.keywords[(today, '谣言')] = 0.5
+        return delta
+
+    # 两个增量都在写入前算好，相当于两次并发写入都没有看到对方的行
+    deltas = [make_delta(), make_delta()]
+    connections = [engine.connect(), engine.connect()]
+    for connection, delta in zip(connections, deltas):
+        with connection.begin():
+            stats_service.apply_delta(connection, delta)
+        connection.close()
+
+    with engine.connect() as connection:
+        stats = connection.execute(select(ContentDailyStat.__table__)).mappings().all()
+        assert [(row['content_count'], row['reposts_sum']) for row in stats] == [(2, 6)]
+        assert connection.execute(select(ContentDailyRegion.__table__.c.content_count)).scalars().all() == [2]
+        assert connection.execute(select(ContentDailyKeyword.__table__.c.weight)).scalars().all() == [1.0]
+    engine.dispose()
+
+
+def test_visualization_endpoint(app, client):
+    for i in range(5):
+        add_content(i, days_ago=i)
+    add_content(9, days_ago=40)
+    db.session.commit()
+
+    response = client.get('/api/analysis/visualization-data')
+    assert response.status_code == 200
+    assert int(response.headers['X-Query-Count']) <= 3
+    data = response.get_json()['data']
+
+    timeline = data['sentiment_analysis']['timeline']
+    assert len(timeline['dates']) == 30
+    assert sum(timeline['neutral']) == 5
+    assert sum(data['user_behavior']['interaction_stats']['shares']) == 0 + 1 + 2 + 3 + 4
+    assert {item['name']: item['value'] for item in data['geo_distribution']['regions']} == {'北京': 3, '上海': 2}
+    words = [item['word'] for item in data['text_analysis']['keyword_cloud']]
+    assert '谣言' in words or '辟谣' in words
@@ -0,0 +1,77 @@
+"""文章标签服务测试
+
+验证标签关联表、标签计数随文章写入同步，以及多标签筛选
+"""
+
+import pytest
+from app import create_app
+from app.extensions import db
+from app.models.debunk import DebunkArticle, Tag, article_tag_association
+from app.services import tag_service
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def add_article(title, tags):
+    article = DebunkArticle(title=title, content=title, author_id=1, tags=tags)
+    db.session.add(article)
+    db.session.commit()
+    return article
+
+
+def tag_counts():
+    return {tag.name: tag.article_count for tag in tag_service.list_tags()}
+
+
+def filter_ids(names):
+    query = tag_service.filter_by_tags(DebunkArticle.query, names).order_by(DebunkArticle.id)
+    return [article.id for article in query.all()]
+
+
+def test_parse_tags():
+    assert tag_service.parse_tags(' 健康, 科技，健康,,') == ['健康', '科技']
+    assert tag_service.parse_tags(['食品', ' 食品 ', '']) == ['食品']
+
+
+def test_tags_synced_on_write(app):
+    first = add_article('文章一', '健康,科技')
+    add_article('文章二', '健康')
+    assert tag_counts() == {'健康': 2, '科技': 1}
+
+    first.tags = '科技,食品'
+    db.session.commit()
+    assert tag_counts() == {'健康': 1, '科技': 1, '食品': 1}
+
+    db.session.delete(first)
+    db.session.commit()
+    assert tag_counts() == {'健康': 1}
+    assert db.session.query(article_tag_association).count() == 1
+
+
+def test_filter_by_tags(app):
+    first = add_article('文章一', '健康,科技')
+    second = add_article('文章二', '健康')
+    add_article('文章三', '科技')
+
+    assert filter_ids(['健康']) == [first.id, second.id]
+    assert filter_ids(['健康', '科技']) == [first.id]
+    assert filter_ids(['不存在']) == []
+
+
+def test_rebuild_tags(app):
+    add_article('文章一', '健康,科技')
+    db.session.execute(article_tag_association.delete())
+    db.session.execute(Tag.__table__.update().values(article_count=0))
+    db.session.commit()
+
+    assert tag_service.rebuild_tags() == 1
+    assert tag_counts() == {'健康': 1, '科技': 1}
@@ -0,0 +1,123 @@
+"""词频向量与关键词云测试"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from app import create_app
+from app.extensions import db
+from app.models.debunk import DebunkContent
+from app.models.term_vector import Term, TermDocFreq, TermCorpus, TermVector
+from app.services import term_vector_service
+
+
+@pytest.fixture
+def app():
+    """创建测试应用实例"""
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        term_vector_service.clear_cache()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def add_content(index, text, source='weibo', days_ago=0):
+    content = DebunkContent(source=source, content_id=f'c{index}', content=text,
+                            created_at=datetime.now() - timedelta(days=days_ago))
+    db.session.add(content)
+    return content
+
+
+def doc_freq():
+    terms = dict(db.session.query(Term.id, Term.term).all())
+    return {terms[row.term_id]: row.df for row in TermDocFreq.query.filter_by(doc_type='debunk_content')}
+
+
+def test_vectors_and_doc_freq_follow_changes(app):
+    first = add_content(1, '疫苗 疫苗 谣言')
+    second = add_content(2, '疫苗 澄清')
+    db.session.commit()
+
+    vector = TermVector.query.filter_by(doc_type='debunk_content', doc_id=first.id).one()
+    assert vector.length == 3
+    assert sorted(np.frombuffer(vector.term_counts, dtype='<i4').tolist()) == [1, 2]
+    assert doc_freq() == {'疫苗': 2, '谣言': 1, '澄清': 1}
+
+    second.content = '谣言 澄清'
+    db.session.commit()
+    assert doc_freq() == {'疫苗': 1, '谣言': 2, '澄清': 1}
+
+    db.session.delete(first)
+    db.session.commit()
+    assert doc_freq() == {'谣言': 1, '澄清': 1}
+    assert db.session.get(TermCorpus, 'debunk_content').doc_count == 1
+
+    # 重建结果与增量维护一致
+    assert term_vector_service.rebuild_vectors('debunk_content') == 1
+    assert doc_freq() == {'谣言': 1, '澄清': 1}
+
+
+def test_concurrent_writers_share_terms_and_counts(app):
+    """另一个写入方已写入同一新词和计数时，合并为累加而不是唯一键冲突"""
+    connection = db.session.connection()
+    mapping = term_vector_service._ensure_terms(connection, ['疫苗', 'Vaccine'])
+    # 另一个写入方写入的词项
+    connection.execute(Term.__table__.insert().values(term='谣言'))
+    term_vector_service._merge_doc_freq(connection, 'debunk_content', {mapping['疫苗']: 1})
+    term_vector_service._merge_corpus_count(connection, 'debunk_content', 1)
+
+    again = term_vector_service._ensure_terms(connection, ['疫苗', '谣言', 'Vaccine'])
+    assert again['疫苗'] == mapping['疫苗'] and again['Vaccine'] == mapping['Vaccine']
+    assert Term.query.count() == 3
+    term_vector_service._merge_doc_freq(connection, 'debunk_content', {mapping['疫苗']: 1})
+    term_vector_service._merge_corpus_count(connection, 'debunk_content', 1)
+    assert doc_freq() == {'疫苗': 2}
+    assert db.session.get(TermCorpus, 'debunk_content').doc_count == 2
+
+    # 不区分大小写/重音的排序规则下查出的等价写法也能对应上
+    assert term_vector_service._collation_key('VACCINÉ ') == term_vector_service._collation_key('vaccine')
+
+
+def test_equivalent_spellings_merge_into_one_term(app):
+    """同一文档中排序规则下等价的两种写法合并为一个词项，文档频率只加 1"""
+    connection = db.session.connection()
+    connection.execute(Term.__table__.insert().values(term='vaccine'))
+    counts = {1: (Counter({'vaccine': 2, 'vacciné': 1}), 'weibo', datetime.now())}
+    term_vector_service.write_documents(connection, 'debunk_content', counts)
+
+    vector = TermVector.query.filter_by(doc_type='debunk_content', doc_id=1).one()
+    assert len(np.frombuffer(vector.term_ids, dtype='<i4')) == 1
+    assert np.frombuffer(vector.term_counts, dtype='<i4').tolist() == [3]
+    assert vector.length == 3
+    assert doc_freq() == {'vaccine': 1}
+
+
+def test_keyword_cloud_window_and_source(app, client):
+    for i in range(6):
+        add_content(i, '食盐 抢购 谣言 食盐', source='weibo', days_ago=i)
+    add_content(10, '地震 预测 谣言', source='xinlang', days_ago=1)
+    add_content(11, '地震 预测 谣言', source='xinlang', days_ago=40)
+    db.session.commit()
+
+    keywords, doc_count = term_vector_service.keyword_cloud(sources=['xinlang'])
+    assert doc_count == 2
+    assert {item['word'] for item in keywords} >= {'地震', '预测'}
+
+    start = datetime.now() - timedelta(days=2, hours=12)
+    keywords, doc_count = term_vector_service.keyword_cloud(start=start)
+    assert doc_count == 4
+    assert keywords[0]['word'] == '食盐'
+
+    response = client.get('/api/analysis/keyword-cloud?source=xinlang&top_n=5')
+    data = response.get_json()['data']
+    assert data['doc_count'] == 1
+    assert response.status_code == 200
+    assert client.get('/api/analysis/keyword-cloud?doc_type=unknown').status_code == 400
@@ -0,0 +1,65 @@
+"""文本规范化测试"""
+
+import io
+import random
+
+import pytest
+from app.utils.text_normalize import TextNormalizer, normalize_text
+
+from scripts.benchmark_text_normalize import LEGACY, build_corpus, run_benchmarks
+
+SAMPLES = [
+    '',
+    '  纯文本，没有标签  ',
+    '<p>网传<b>某地</b>自来水有毒</p>\n\n<p>经核实为谣言★</p>',
+    '转发 &lt;b&gt;加粗&lt;/b&gt; &amp; <a href="https://m.weibo.cn/p/1">#辟谣#</a>\n\n\n下一段',
+    '<script>var a = "<p>不显示</p>";</script><style>p{}</style><!-- 注释 -->正文 https://www.piyao.org.cn/a.html 结束',
+    'a < b 并且 c > d，<>空标签',
+    '第一行\r\n  第二行\t\t第三行　全角空格',
+]
+
+
+@pytest.mark.parametrize('profile', sorted(LEGACY))
+def test_matches_legacy_implementations(profile):
+    normalizer = TextNormalizer(profile)
+    for text in SAMPLES + build_corpus(7)[:5]:
+        assert normalizer.normalize(text) == LEGACY[profile](text)
+
+
+@pytest.mark.parametrize('profile', sorted(LEGACY))
+def test_stream_matches_whole_document(profile):
+    document = '\n'.join(SAMPLES + build_corpus(11)) * 3
+    normalizer = TextNormalizer(profile)
+    expected = normalizer.normalize(document)
+    for chunk_size in (7, 64, 1000):
+        assert ''.join(normalizer.normalize_stream(document, chunk_size=chunk_size)) == expected
+    assert ''.join(normalizer.normalize_stream(io.StringIO(document), chunk_size=500)) == expected
+
+    rng = random.Random(3)
+    pieces = []
+    position = 0
+    while position < len(document):
+        size = rng.randint(1, 300)
+        pieces.append(document[position:position + size])
+        position += size
+    assert ''.join(normalizer.normalize_stream(pieces, chunk_size=200)) == expected
+
+
+def test_batch_and_cache():
+    normalizer = TextNormalizer('clean', cache_size=2)
+    texts = ['<p>甲</p>', None, '<p>乙</p>', '<p>甲</p>']
+    assert normalizer.normalize_batch(texts) == ['甲', '', '乙', '甲']
+    assert normalizer.cache_info()['misses'] == 2
+
+    normalizer.normalize('<p>甲</p>')
+    assert normalizer.cache_info()['hits'] == 1
+    normalizer.normalize('<p>丙</p>')
+    assert normalizer.cache_info()['size'] == 2
+    assert normalize_text('<i>丁</i>') == '丁'
+    with pytest.raises(ValueError):
+        TextNormalizer('unknown')
+
+
+def test_benchmark_suite_outputs_match():
+    # 基准中的每个场景都会先校验新旧写法输出一致
+    assert len(run_benchmarks(repeat=1)) == 7